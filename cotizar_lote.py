@@ -0,0 +1,96 @@
+"""
+cotizar_lote.py - Creación masiva de cotizaciones desde la línea de comandos
+
+Crea cotizaciones sin abrir la interfaz gráfica a partir de un archivo CSV
+o JSON, con las mismas reglas de precio de la ventana de nueva cotización.
+
+Uso:
+    python cotizar_lote.py cotizaciones.csv
+    python cotizar_lote.py cotizaciones.json --omitir-errores
+    python cotizar_lote.py cotizaciones.csv --simular
+"""
+
+import argparse
+import sys
+import os
+
+# Asegurar que los imports funcionen correctamente
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.database import DatabaseManager
+from utils.importador_cotizaciones import ImportadorCotizaciones, ErrorCotizacion
+
+
+def main():
+    """Función principal del importador por línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="Crea cotizaciones en lote desde un archivo CSV o JSON"
+    )
+    parser.add_argument('archivo', help="Archivo .csv, .json, .jsonl o .ndjson")
+    parser.add_argument('--db', default='models/airsolutions.db',
+                        help="Ruta de la base de datos (por defecto: models/airsolutions.db)")
+    parser.add_argument('--lote', type=int, default=500,
+                        help="Cotizaciones por cada inserción de líneas (por defecto: 500)")
+    parser.add_argument('--omitir-errores', action='store_true',
+                        help="Saltar cotizaciones inválidas en vez de cancelar todo")
+    parser.add_argument('--simular', action='store_true',
+                        help="Calcular y validar sin guardar nada")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.archivo):
+        print(f"[ERROR] No se encuentra el archivo: {args.archivo}")
+        return 1
+
+    if not os.path.exists(args.db):
+        print(f"[ERROR] Base de datos no encontrada: {args.db}")
+        return 1
+
+    print("="*60)
+    print("AIRSOLUTIONS - CREACIÓN MASIVA DE COTIZACIONES")
+    print("="*60)
+
+    db = DatabaseManager(args.db)
+    if not db.conectar():
+        return 1
+
+    try:
+        db.migrar_esquema()
+        importador = ImportadorCotizaciones(db, tamano_lote=args.lote)
+
+        def progreso(cotizaciones, lineas):
+            print(f"  ... {cotizaciones} cotizaciones, {lineas} líneas")
+
+        estadisticas = importador.importar(
+            args.archivo,
+            omitir_errores=args.omitir_errores,
+            simular=args.simular,
+            progreso=progreso
+        )
+
+    except (ErrorCotizacion, ValueError) as e:
+        print(f"\n[ERROR] Importación cancelada, no se guardó nada: {e}")
+        return 1
+
+    finally:
+        db.desconectar()
+
+    for error in estadisticas['errores']:
+        print(f"  [OMITIDA] {error}")
+
+    print()
+    print("="*60)
+    print("SIMULACIÓN COMPLETADA (no se guardó nada)" if args.simular else "IMPORTACIÓN COMPLETADA")
+    print("="*60)
+    print(f"Cotizaciones: {estadisticas['cotizaciones']}")
+    print(f"Líneas:       {estadisticas['lineas']}")
+    print(f"Omitidas:     {len(estadisticas['errores'])}")
+    print(f"Monto total:  ${estadisticas['total']:,.2f}")
+    print(f"Tiempo:       {estadisticas['segundos']:.2f} s")
+    print(f"Velocidad:    {estadisticas['por_segundo']:,.0f} cotizaciones/s "
+          f"({estadisticas['lineas_por_segundo']:,.0f} líneas/s)")
+    print("="*60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+enviar_campana.py - Envío masivo de cotizaciones por email
+
+Envía a cada cliente su cotización en PDF (por ejemplo, las ofertas de
+mantenimiento anual) en paralelo, con un límite de mensajes por minuto, y
+registra el resultado de cada destinatario.
+
+Uso:
+    python enviar_campana.py COT-MT-25-03-00012 COT-MT-25-03-00013
+    python enviar_campana.py --tipo-servicio Mantenimiento --estado pendiente
+    python enviar_campana.py --desde 2025-03-01 --sesiones 4 --por-minuto 60
+    python enviar_campana.py --estado pendiente --simular
+"""
+
+import argparse
+import sys
+import os
+
+# Asegurar que los imports funcionen correctamente
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.database import DatabaseManager
+from utils.campana_email import CampanaEmail, SESIONES, POR_MINUTO
+
+
+def seleccionar_cotizaciones(db, estado=None, tipo_servicio=None, desde=None, hasta=None):
+    """Números de cotización que cumplen los filtros"""
+    condiciones = []
+    parametros = []
+
+    if estado:
+        condiciones.append("estado = ?")
+        parametros.append(estado)
+    if tipo_servicio:
+        condiciones.append("tipo_servicio = ?")
+        parametros.append(tipo_servicio)
+    if desde:
+        condiciones.append("fecha_emision >= ?")
+        parametros.append(desde)
+    if hasta:
+        condiciones.append("fecha_emision <= ?")
+        parametros.append(hasta)
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    db.cursor.execute(
+        f"SELECT numero_cotizacion FROM cotizaciones {where} ORDER BY id_cotizacion",
+        parametros
+    )
+    return [fila[0] for fila in db.cursor.fetchall()]
+
+
+def main():
+    """Función principal del envío masivo por línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="Envía varias cotizaciones por email en paralelo"
+    )
+    parser.add_argument('numeros', nargs='*', help="Números de cotización")
+    parser.add_argument('--estado', help="Todas las cotizaciones con este estado")
+    parser.add_argument('--tipo-servicio', help="Todas las cotizaciones de este tipo de servicio")
+    parser.add_argument('--desde', help="Fecha de emisión mínima (YYYY-MM-DD)")
+    parser.add_argument('--hasta', help="Fecha de emisión máxima (YYYY-MM-DD)")
+    parser.add_argument('--nombre', help="Nombre de la campaña")
+    parser.add_argument('--mensaje', default="", help="Mensaje personalizado para todos")
+    parser.add_argument('--sesiones', type=int, default=SESIONES,
+                        help=f"Sesiones SMTP simultáneas (por defecto: {SESIONES})")
+    parser.add_argument('--por-minuto', type=int, default=POR_MINUTO,
+                        help=f"Máximo de mensajes por minuto, 0 sin límite (por defecto: {POR_MINUTO})")
+    parser.add_argument('--reducir-pdf', action='store_true', default=None,
+                        help="Reducir los PDFs con muchas imágenes antes de adjuntarlos (requiere pypdf)")
+    parser.add_argument('--sin-cache', action='store_true',
+                        help="Dibujar todos los PDFs aunque estén en caché")
+    parser.add_argument('--simular', action='store_true',
+                        help="Mostrar los destinatarios sin enviar nada")
+    parser.add_argument('--db', default='models/airsolutions.db',
+                        help="Ruta de la base de datos (por defecto: models/airsolutions.db)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"[ERROR] Base de datos no encontrada: {args.db}")
+        return 1
+
+    print("="*60)
+    print("AIRSOLUTIONS - CAMPAÑA DE COTIZACIONES POR EMAIL")
+    print("="*60)
+
+    db = DatabaseManager(args.db)
+    if not db.conectar():
+        return 1
+
+    try:
+        db.migrar_esquema()
+
+        numeros = list(args.numeros)
+        if args.estado or args.tipo_servicio or args.desde or args.hasta:
+            numeros += seleccionar_cotizaciones(
+                db, args.estado, args.tipo_servicio, args.desde, args.hasta
+            )
+        if not numeros:
+            print("[ERROR] Indique números de cotización o filtros")
+            return 1
+
+        campana = CampanaEmail(
+            db, sesiones=args.sesiones, por_minuto=args.por_minuto,
+            usar_cache=not args.sin_cache, reducir_pdf=args.reducir_pdf
+        )
+
+        if args.simular:
+            envios = campana.preparar(numeros, args.mensaje)
+            for envio in envios:
+                destino = envio['email_destino'] or "(sin email)"
+                print(f"  {envio['numero_cotizacion']:<22} {envio['nombre_cliente'][:30]:<30} {destino}")
+            print(f"\n{len(envios)} cotizaciones, "
+                  f"{sum(1 for e in envios if e['email_destino'])} con email. No se envió nada.")
+            return 0
+
+        def progreso(hechos, total, resultado):
+            detalle = f" - {resultado['error']}" if resultado['error'] else ""
+            print(f"  [{hechos}/{total}] {resultado['numero_cotizacion']} → "
+                  f"{resultado['email_destino'] or '-'}: {resultado['estado']}{detalle}")
+
+        try:
+            estadisticas = campana.ejecutar(
+                numeros, nombre=args.nombre, mensaje_personalizado=args.mensaje,
+                progreso=progreso
+            )
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            return 1
+
+    finally:
+        db.desconectar()
+
+    for numero in estadisticas['no_encontradas']:
+        print(f"  [NO ENCONTRADA] {numero}")
+
+    en_bandeja = sum(1 for r in estadisticas['resultados'] if r['estado'] == 'en_bandeja')
+
+    print()
+    print("="*60)
+    print("CAMPAÑA COMPLETADA")
+    print("="*60)
+    print(f"Campaña:     {estadisticas['nombre']} (#{estadisticas['id_campana']})")
+    print(f"Enviados:    {estadisticas['enviados']} de {estadisticas['total']}")
+    print(f"Fallidos:    {estadisticas['fallidos']} ({en_bandeja} pasan a la bandeja de salida)")
+    print(f"Sin email:   {estadisticas['sin_email']}")
+    print(f"Sin PDF:     {estadisticas['sin_pdf']}")
+    print(f"Sesiones:    {estadisticas['sesiones']} ({estadisticas['conexiones']} conexiones)")
+    print(f"Enviado:     {estadisticas['bytes_enviados'] / 1024 / 1024:.2f} MB "
+          f"(codificación de adjuntos: {estadisticas['segundos_codificacion']:.2f} s)")
+    print(f"Tiempo:      {estadisticas['segundos']:.2f} s")
+    print(f"Velocidad:   {estadisticas['por_minuto_real']:.0f} mensajes/min "
+          f"(límite {estadisticas['por_minuto'] or 'ninguno'})")
+    print("="*60)
+    return 0 if not estadisticas['fallidos'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+exportar_analitica.py - Instantáneas de la base para análisis
+
+Exporta las tablas de cotizaciones y proyectos a archivos comprimidos por
+columnas (Parquet si pyarrow está instalado, si no .npz o CSV.gz) sin
+bloquear la base mientras la aplicación está abierta.
+
+Uso:
+    python exportar_analitica.py                   # instantánea completa
+    python exportar_analitica.py --incremental     # solo lo que cambió
+    python exportar_analitica.py --formato csv.gz --salida /datos/analitica
+
+En un notebook:
+    from utils.analitica import reconstruir_tabla
+    items = reconstruir_tabla('analitica', 'proyecto_items')
+"""
+
+import argparse
+import sys
+import os
+
+# Asegurar que los imports funcionen correctamente
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.database import DatabaseManager
+from utils.analitica import ExportadorAnalitico, FORMATOS, TAMANO_BLOQUE
+
+
+def main():
+    """Función principal de la exportación analítica"""
+    parser = argparse.ArgumentParser(
+        description="Exporta instantáneas de las tablas de hechos para análisis"
+    )
+    parser.add_argument('--incremental', action='store_true',
+                        help="Solo las filas modificadas o eliminadas desde la última instantánea")
+    parser.add_argument('--formato', choices=FORMATOS, default=None,
+                        help="Formato de salida (por defecto: parquet, o npz sin pyarrow)")
+    parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE,
+                        help=f"Filas por bloque (por defecto: {TAMANO_BLOQUE})")
+    parser.add_argument('--db', default='models/airsolutions.db',
+                        help="Ruta de la base de datos (por defecto: models/airsolutions.db)")
+    parser.add_argument('--salida', default=None,
+                        help="Carpeta de instantáneas (por defecto: analitica/)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"[ERROR] Base de datos no encontrada: {args.db}")
+        return 1
+
+    print("="*60)
+    print("AIRSOLUTIONS - EXPORTACIÓN ANALÍTICA")
+    print("="*60)
+
+    # Los triggers de fecha_modificacion llegan con la migración 8
+    db = DatabaseManager(args.db)
+    if not db.conectar():
+        return 1
+    try:
+        if not db.migrar_esquema():
+            return 1
+    finally:
+        db.desconectar()
+
+    try:
+        exportador = ExportadorAnalitico(
+            args.db, carpeta=args.salida, formato=args.formato, tamano_bloque=args.bloque
+        )
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+    def progreso(tabla, filas):
+        print(f"  ... {tabla}: {filas:,} filas")
+
+    estadisticas = exportador.exportar(incremental=args.incremental, progreso=progreso)
+
+    print()
+    print("="*60)
+    print(f"INSTANTÁNEA {estadisticas['tipo'].upper()} COMPLETADA")
+    print("="*60)
+    print(f"Carpeta:   {estadisticas['carpeta']}")
+    print(f"Formato:   {estadisticas['formato']}")
+    if estadisticas['tipo'] == 'incremental':
+        print(f"Desde:     {estadisticas['desde'] or '(sin cambios sellados)'}")
+    for tabla, filas in estadisticas['tablas'].items():
+        print(f"  {tabla:<18} {filas:>10,} filas")
+    print(f"Tamaño:    {estadisticas['bytes'] / 1024:,.0f} KB")
+    print(f"Tiempo:    {estadisticas['segundos']:.2f} s "
+          f"(copia consistente {estadisticas['segundos_copia']:.2f} s)")
+    print(f"Velocidad: {estadisticas['filas_por_segundo']:,.0f} filas/s")
+    print("="*60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+exportar_excel.py - Exportación de proyectos a Excel por línea de comandos
+
+Exporta uno o varios proyectos al mismo formato editable que el menú
+"Exportar a Excel", sin abrir la interfaz gráfica. Varios proyectos se
+escriben en paralelo, un archivo por proyecto o un solo libro con una
+hoja por proyecto.
+
+Uso:
+    python exportar_excel.py PROY-2025-001
+    python exportar_excel.py PROY-2025-001 --salida exports/
+    python exportar_excel.py PROY-2025-001 --benchmark
+    python exportar_excel.py --estado en_curso --procesos 4
+    python exportar_excel.py --todos --un-libro
+"""
+
+import argparse
+import sys
+import os
+
+# Asegurar que los imports funcionen correctamente
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.database import DatabaseManager
+from utils.excel_manager import ExcelManager, benchmark_exportacion
+from utils.excel_lote import ExportadorExcelLote
+
+
+def buscar_proyecto(db, numero_proyecto):
+    """ID y cantidad de items de un proyecto, o None si no existe"""
+    db.cursor.execute('''
+        SELECT p.id_proyecto, COUNT(i.id_item)
+        FROM proyectos p
+        LEFT JOIN proyecto_niveles n ON n.id_proyecto = p.id_proyecto
+        LEFT JOIN proyecto_items i ON i.id_nivel = n.id_nivel
+        WHERE p.numero_proyecto = ?
+        GROUP BY p.id_proyecto
+    ''', (numero_proyecto,))
+    return db.cursor.fetchone()
+
+
+def seleccionar_proyectos(db, numeros=(), estado=None, todos=False):
+    """IDs de los proyectos indicados por número, por estado o todos"""
+    ids = []
+    for numero in numeros:
+        db.cursor.execute("SELECT id_proyecto FROM proyectos WHERE numero_proyecto = ?", (numero,))
+        fila = db.cursor.fetchone()
+        if fila:
+            ids.append(fila[0])
+        else:
+            print(f"  [NO ENCONTRADO] {numero}")
+
+    if estado or todos:
+        where = "WHERE estado = ?" if estado else ""
+        db.cursor.execute(
+            f"SELECT id_proyecto FROM proyectos {where} ORDER BY numero_proyecto",
+            (estado,) if estado else ()
+        )
+        ids += [fila[0] for fila in db.cursor.fetchall()]
+
+    return ids
+
+
+def main():
+    """Función principal de la exportación por línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="Exporta uno o varios proyectos a Excel"
+    )
+    parser.add_argument('proyectos', nargs='*', help="Números de proyecto")
+    parser.add_argument('--estado', help="Todos los proyectos con este estado (p. ej. en_curso)")
+    parser.add_argument('--todos', action='store_true', help="Todos los proyectos")
+    parser.add_argument('--un-libro', action='store_true',
+                        help="Varios proyectos en un solo libro, una hoja por proyecto")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="Procesos trabajadores (por defecto: uno por núcleo)")
+    parser.add_argument('--db', default='models/airsolutions.db',
+                        help="Ruta de la base de datos (por defecto: models/airsolutions.db)")
+    parser.add_argument('--salida', default=None,
+                        help="Carpeta de salida (por defecto: exports/)")
+    parser.add_argument('--en-memoria', action='store_true',
+                        help="Usar la exportación en memoria anterior")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="Comparar la exportación por streaming contra la exportación en memoria")
+    parser.add_argument('--sin-memoria', action='store_true',
+                        help="En el benchmark, no medir el pico de memoria (más rápido)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"[ERROR] Base de datos no encontrada: {args.db}")
+        return 1
+
+    print("="*60)
+    print("AIRSOLUTIONS - EXPORTACIÓN DE PROYECTOS A EXCEL")
+    print("="*60)
+
+    db = DatabaseManager(args.db)
+    if not db.conectar():
+        return 1
+
+    try:
+        db.migrar_esquema()
+
+        if len(args.proyectos) > 1 or args.estado or args.todos:
+            return exportar_varios(db, args)
+
+        if not args.proyectos:
+            print("[ERROR] Indique un número de proyecto, --estado o --todos")
+            return 1
+
+        encontrado = buscar_proyecto(db, args.proyectos[0])
+        if not encontrado:
+            print(f"[ERROR] Proyecto no encontrado: {args.proyectos[0]}")
+            return 1
+        id_proyecto, items = encontrado
+
+        if args.benchmark:
+            resultado = benchmark_exportacion(
+                db, id_proyecto, args.salida, medir_memoria=not args.sin_memoria
+            )
+            print(f"\nItems: {items}")
+            for nombre, datos in resultado.items():
+                pico = f"{datos['pico_mb']:.1f} MB" if datos['pico_mb'] is not None else "-"
+                print(f"  {nombre:<11} {datos['segundos']:8.2f} s   pico {pico:>10}   "
+                      f"{datos['bytes'] / 1024:,.0f} KB")
+            aceleracion = resultado['en_memoria']['segundos'] / resultado['streaming']['segundos']
+            print(f"Aceleración: {aceleracion:.2f}x")
+            return 0
+
+        ruta = ExcelManager(db).exportar_proyecto(
+            id_proyecto, args.salida, streaming=not args.en_memoria
+        )
+
+    finally:
+        db.desconectar()
+
+    print(f"\n[OK] {items} items exportados a:\n  {ruta}")
+    return 0
+
+
+def exportar_varios(db, args):
+    """Exporta varios proyectos en paralelo e imprime el resumen"""
+    ids = seleccionar_proyectos(db, args.proyectos, args.estado, args.todos)
+    if not ids:
+        print("[ERROR] No hay proyectos para exportar")
+        return 1
+
+    def progreso(hechos, total, ruta, segundos):
+        print(f"  [{hechos}/{total}] {os.path.basename(ruta)} ({segundos:.2f} s)")
+
+    estadisticas = ExportadorExcelLote(
+        db, procesos=args.procesos, carpeta=args.salida
+    ).exportar(ids, un_libro=args.un_libro, progreso=progreso)
+
+    for ruta in estadisticas['errores']:
+        print(f"  [ERROR] {ruta}")
+
+    print()
+    print("="*60)
+    print("EXPORTACIÓN COMPLETADA")
+    print("="*60)
+    print(f"Proyectos:   {estadisticas['proyectos']} ({estadisticas['items']:,} items)")
+    print(f"Archivos:    {estadisticas['archivos']}")
+    print(f"Procesos:    {estadisticas['procesos']}")
+    print(f"Carga datos: {estadisticas['segundos_carga']:.2f} s")
+    print(f"Tiempo:      {estadisticas['segundos']:.2f} s")
+    print(f"Velocidad:   {estadisticas['archivos_por_segundo']:.1f} archivos/s")
+    print("="*60)
+    return 0 if not estadisticas['errores'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
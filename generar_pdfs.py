@@ -0,0 +1,152 @@
+"""
+generar_pdfs.py - Generación masiva de PDFs de cotizaciones
+
+Genera las ofertas en PDF de muchas cotizaciones a la vez usando todos
+los núcleos del equipo, sin abrir la interfaz gráfica.
+
+Uso:
+    python generar_pdfs.py COT-MT-25-03-00012 COT-MT-25-03-00013
+    python generar_pdfs.py --estado pendiente
+    python generar_pdfs.py --desde 2025-03-01 --hasta 2025-03-31 --procesos 4
+    python generar_pdfs.py --estado pendiente --benchmark
+    python generar_pdfs.py --estado pendiente --benchmark-recursos
+"""
+
+import argparse
+import sys
+import os
+
+# Asegurar que los imports funcionen correctamente
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.database import DatabaseManager
+from utils.pdf_lote import GeneradorPDFLote, benchmark, benchmark_recursos
+
+
+def seleccionar_cotizaciones(db, estado=None, desde=None, hasta=None):
+    """Números de cotización que cumplen los filtros"""
+    condiciones = []
+    parametros = []
+
+    if estado:
+        condiciones.append("estado = ?")
+        parametros.append(estado)
+    if desde:
+        condiciones.append("fecha_emision >= ?")
+        parametros.append(desde)
+    if hasta:
+        condiciones.append("fecha_emision <= ?")
+        parametros.append(hasta)
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    db.cursor.execute(
+        f"SELECT numero_cotizacion FROM cotizaciones {where} ORDER BY id_cotizacion",
+        parametros
+    )
+    return [fila[0] for fila in db.cursor.fetchall()]
+
+
+def imprimir_resumen(titulo, estadisticas):
+    """Imprime las estadísticas de una corrida"""
+    print(f"{titulo}")
+    print(f"  Documentos:  {estadisticas['generados']} de {estadisticas['documentos']}")
+    print(f"  En caché:    {estadisticas['en_cache']}")
+    print(f"  Procesos:    {estadisticas['procesos']}")
+    print(f"  Carga datos: {estadisticas['segundos_carga']:.2f} s")
+    print(f"  Tiempo:      {estadisticas['segundos']:.2f} s")
+    print(f"  Promedio:    {estadisticas['promedio'] * 1000:.0f} ms por documento")
+    print(f"  Velocidad:   {estadisticas['por_segundo']:.1f} documentos/s")
+
+
+def main():
+    """Función principal del generador por línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="Genera los PDFs de varias cotizaciones en paralelo"
+    )
+    parser.add_argument('numeros', nargs='*', help="Números de cotización")
+    parser.add_argument('--estado', help="Todas las cotizaciones con este estado")
+    parser.add_argument('--desde', help="Fecha de emisión mínima (YYYY-MM-DD)")
+    parser.add_argument('--hasta', help="Fecha de emisión máxima (YYYY-MM-DD)")
+    parser.add_argument('--db', default='models/airsolutions.db',
+                        help="Ruta de la base de datos (por defecto: models/airsolutions.db)")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="Procesos trabajadores (por defecto: uno por núcleo)")
+    parser.add_argument('--salida', default=None,
+                        help="Carpeta de salida (por defecto: cotizaciones/)")
+    parser.add_argument('--sin-cache', action='store_true',
+                        help="Dibujar todos los PDFs aunque estén en caché")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="Comparar generación secuencial contra paralela "
+                             "(en una carpeta temporal, salvo que se indique --salida)")
+    parser.add_argument('--benchmark-recursos', action='store_true',
+                        help="Comparar tiempo por documento con y sin recursos compartidos")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"[ERROR] Base de datos no encontrada: {args.db}")
+        return 1
+
+    print("="*60)
+    print("AIRSOLUTIONS - GENERACIÓN MASIVA DE PDFs")
+    print("="*60)
+
+    db = DatabaseManager(args.db)
+    if not db.conectar():
+        return 1
+
+    try:
+        db.migrar_esquema()
+
+        numeros = list(args.numeros)
+        if args.estado or args.desde or args.hasta or not numeros:
+            numeros += seleccionar_cotizaciones(db, args.estado, args.desde, args.hasta)
+
+        if not numeros:
+            print("[ERROR] No hay cotizaciones para generar")
+            return 1
+
+        opciones = {'procesos': args.procesos}
+        if args.salida:
+            opciones['pdf_dir'] = args.salida
+
+        if args.benchmark_recursos:
+            resultado = benchmark_recursos(db, numeros)
+            print()
+            print(f"Documentos: {resultado['documentos']}")
+            print(f"  Antes:    {resultado['antes_ms']:.1f} ms por documento")
+            print(f"  Después:  {resultado['despues_ms']:.1f} ms por documento")
+            print(f"Aceleración: {resultado['aceleracion']:.2f}x")
+            return 0
+
+        if args.benchmark:
+            resultado = benchmark(db, numeros, **opciones)
+            print()
+            imprimir_resumen("SECUENCIAL", resultado['secuencial'])
+            imprimir_resumen("PARALELO", resultado['paralelo'])
+            print(f"Aceleración: {resultado['aceleracion']:.1f}x")
+            return 0
+
+        def progreso(hechos, total, numero, segundos):
+            print(f"  [{hechos}/{total}] {numero} ({segundos * 1000:.0f} ms)")
+
+        estadisticas = GeneradorPDFLote(
+            db, usar_cache=not args.sin_cache, **opciones
+        ).generar(numeros, progreso=progreso)
+
+    finally:
+        db.desconectar()
+
+    for numero in estadisticas['no_encontradas']:
+        print(f"  [NO ENCONTRADA] {numero}")
+    for numero in estadisticas['errores']:
+        print(f"  [ERROR] {numero}")
+
+    print()
+    print("="*60)
+    imprimir_resumen("GENERACIÓN COMPLETADA", estadisticas)
+    print("="*60)
+    return 0 if not estadisticas['errores'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
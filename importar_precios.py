@@ -0,0 +1,135 @@
+"""
+importar_precios.py - Importación de listas de precios por línea de comandos
+
+Carga la lista de precios de un proveedor (CSV o Excel) en el catálogo de
+equipos, materiales o componentes HVAC, actualizando los productos que ya
+existen por su código. Reemplaza al antiguo models/importar_excel.py.
+
+Uso:
+    python importar_precios.py lista.csv --destino materiales
+    python importar_precios.py lista.xlsx --config proveedor.json
+    python importar_precios.py lista.xlsx --destino catalogo --hoja "Lista 2025" \\
+        --columna codigo=SKU --columna costo_equipo_base="Precio USD" --simular
+"""
+
+import argparse
+import sys
+import os
+
+# Asegurar que los imports funcionen correctamente
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.database import DatabaseManager
+from utils.importador_precios import ImportadorPrecios, ErrorImportacion, DESTINOS
+
+
+def leer_columnas(pares):
+    """Convierte ['campo=Encabezado', ...] en un diccionario"""
+    columnas = {}
+    for par in pares or ():
+        campo, separador, encabezado = par.partition('=')
+        if not separador:
+            raise ErrorImportacion(f"Columna inválida (use campo=Encabezado): {par}")
+        columnas[campo.strip()] = encabezado.strip()
+    return columnas
+
+
+def main():
+    """Función principal del importador por línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="Importa una lista de precios de proveedor a un catálogo"
+    )
+    parser.add_argument('archivo', help="Archivo .csv, .xlsx o .xlsm")
+    parser.add_argument('--destino', choices=sorted(DESTINOS),
+                        help="Catálogo de destino (o 'destino' en --config)")
+    parser.add_argument('--config', help="Configuración JSON con el mapeo de columnas")
+    parser.add_argument('--columna', action='append', metavar='CAMPO=ENCABEZADO',
+                        help="Asigna una columna del archivo a un campo (se puede repetir)")
+    parser.add_argument('--hoja', help="Hoja del Excel (por defecto, la activa)")
+    parser.add_argument('--fila-encabezado', type=int, default=None,
+                        help="Fila con los encabezados (por defecto: 1)")
+    parser.add_argument('--bloque', type=int, default=5000,
+                        help="Filas por bloque (por defecto: 5000)")
+    parser.add_argument('--sin-pandas', action='store_true',
+                        help="Limpiar los datos sin pandas aunque esté instalado")
+    parser.add_argument('--db', default='models/airsolutions.db',
+                        help="Ruta de la base de datos (por defecto: models/airsolutions.db)")
+    parser.add_argument('--simular', action='store_true',
+                        help="Leer y validar sin guardar nada")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.archivo):
+        print(f"[ERROR] No se encuentra el archivo: {args.archivo}")
+        return 1
+
+    if not os.path.exists(args.db):
+        print(f"[ERROR] Base de datos no encontrada: {args.db}")
+        return 1
+
+    if not args.destino and not args.config:
+        print("[ERROR] Indique --destino o --config")
+        return 1
+
+    print("="*60)
+    print("AIRSOLUTIONS - IMPORTACIÓN DE LISTAS DE PRECIOS")
+    print("="*60)
+
+    db = DatabaseManager(args.db)
+    if not db.conectar():
+        return 1
+
+    try:
+        db.migrar_esquema()
+
+        opciones = {
+            'columnas': leer_columnas(args.columna),
+            'hoja': args.hoja,
+            'fila_encabezado': args.fila_encabezado,
+            'tamano_bloque': args.bloque,
+            'usar_pandas': not args.sin_pandas,
+        }
+        if args.config:
+            # Las --columna se suman al mapeo del archivo y se validan con él
+            importador = ImportadorPrecios.desde_configuracion(
+                db, args.config, destino=args.destino, **opciones
+            )
+        else:
+            opciones['fila_encabezado'] = args.fila_encabezado or 1
+            importador = ImportadorPrecios(db, args.destino, **opciones)
+
+        def progreso(estadisticas):
+            print(f"  ... {estadisticas['filas']:,} filas "
+                  f"({estadisticas['insertados']:,} nuevas, "
+                  f"{estadisticas['actualizados']:,} actualizadas)")
+
+        estadisticas = importador.importar(args.archivo, simular=args.simular, progreso=progreso)
+
+    except ErrorImportacion as e:
+        print(f"\n[ERROR] Importación cancelada, no se guardó nada: {e}")
+        return 1
+
+    finally:
+        db.desconectar()
+
+    print()
+    print("="*60)
+    print("SIMULACIÓN COMPLETADA (no se guardó nada)" if args.simular else "IMPORTACIÓN COMPLETADA")
+    print("="*60)
+    print(f"Destino:      {DESTINOS[estadisticas['destino']]['tabla']}")
+    print(f"Columnas:     {', '.join(importador.campos)}")
+    print(f"Filas:        {estadisticas['filas']:,} en {estadisticas['bloques']} bloques")
+    print(f"Nuevos:       {estadisticas['insertados']:,}")
+    print(f"Actualizados: {estadisticas['actualizados']:,}")
+    print(f"Descartados:  {estadisticas['rechazados']:,} sin código o nombre, "
+          f"{estadisticas['duplicados']:,} códigos repetidos")
+    print(f"Tiempo:       {estadisticas['segundos']:.2f} s "
+          f"(lectura {estadisticas['segundos_lectura']:.2f}, "
+          f"limpieza {estadisticas['segundos_limpieza']:.2f} [{estadisticas['motor']}], "
+          f"escritura {estadisticas['segundos_escritura']:.2f})")
+    print(f"Velocidad:    {estadisticas['filas_por_segundo']:,.0f} filas/s")
+    print("="*60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
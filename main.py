@@ -32,8 +32,9 @@ def main():
         inicializar_base_datos()
     else:
         print("[OK] Base de datos encontrada")
-        # Conectar para verificar que funcione
+        # Conectar para verificar que funcione y aplicar migraciones pendientes
         if db.conectar():
+            db.migrar_esquema()
             db.desconectar()
 
     print()
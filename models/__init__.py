@@ -2,7 +2,10 @@
 Modelos - Capa de Datos (Database)
 
 Esta carpeta contiene todo lo relacionado con la base de datos:
-- database.py: Conexión y operaciones de base de datos
-- importar_excel.py: Importador de datos desde Excel
+- database.py: Conexión, esquema y migraciones de base de datos
+- cotizaciones.py: Líneas de detalle de las cotizaciones
+- registros.py: Filas con nombre (proyecciones de cotizaciones y clientes)
+- secuencias.py: Numeración de cotizaciones y proyectos
+- tipo_cambio.py: Historial del tipo de cambio y conversión a colones
 - airsolutions.db: Base de datos SQLite
 """
@@ -0,0 +1,198 @@
+"""
+cotizaciones.py - Cálculo y detalle de las cotizaciones
+
+Todas las líneas de una cotización (equipos, ductos, difusores, rejillas,
+tuberías, mano de obra, materiales y gastos) se guardan en la tabla
+cotizacion_lineas. Este módulo contiene las reglas de precio (factor de
+venta, INS/CCSS e IVA), convierte los items de la interfaz en filas de esa
+tabla y las vuelve a agrupar por categoría al cargarlas.
+"""
+
+from models.database import FECHA_MODIFICACION_SQL
+
+# Orden en que se muestran las categorías
+CATEGORIAS = (
+    'equipo', 'ducto', 'difusor', 'rejilla',
+    'tuberia', 'mano_obra', 'material', 'gasto'
+)
+
+# INS y CCSS sobre el subtotal cuando se incluyen en la cotización
+PORCENTAJE_INS_CCSS = 0.35
+
+# Columnas del encabezado que se copian al clonar una cotización o plantilla
+COLUMNAS_ENCABEZADO_COPIABLES = (
+    'tipo_servicio', 'visitas_anuales', 'factor_venta', 'iva', 'tipo_cambio',
+    'subtotal', 'total_materiales', 'total_mano_obra', 'total_gastos',
+    'total_ductos', 'total_difusores', 'total_rejillas', 'total_tuberias',
+    'ins_ccss', 'total_iva', 'total', 'iva_porcentaje', 'mostrar_colones', 'notas'
+)
+
+# Columnas de una línea (sin la cotización a la que pertenece)
+COLUMNAS_LINEA = (
+    'categoria', 'id_referencia', 'descripcion', 'cantidad',
+    'medida', 'precio_unitario', 'subtotal', 'orden'
+)
+
+
+def precio_equipo(horas_por_equipo, cantidad, costo_hora, factor_venta):
+    """
+    Calcula el precio de mantenimiento de un equipo
+
+    Args:
+        horas_por_equipo: Horas de mantenimiento de una unidad
+        cantidad: Cantidad de equipos
+        costo_hora: Costo por hora de técnico
+        factor_venta: Factor de venta sobre costos
+
+    Returns:
+        tuple: (horas_totales, subtotal)
+    """
+    horas_total = horas_por_equipo * cantidad
+    return horas_total, horas_total * costo_hora * factor_venta
+
+
+def calcular_totales(equipos=(), ductos=(), difusores=(), rejillas=(),
+                     tuberias=(), mano_obra=(), materiales=(), gastos=(),
+                     iva_porcentaje=13.0, incluir_ins_ccss=False):
+    """
+    Calcula los totales de una cotización
+
+    Recibe las mismas listas de diccionarios que arma NuevaCotizacionWindow.
+
+    Returns:
+        dict: Totales por categoría, subtotal, INS/CCSS, IVA y total
+    """
+    totales = {
+        'total_equipos': sum(e['subtotal'] for e in equipos),
+        'total_ductos': sum(d['subtotal'] for d in ductos),
+        'total_difusores': sum(d['subtotal'] for d in difusores),
+        'total_rejillas': sum(r['subtotal'] for r in rejillas),
+        'total_tuberias': sum(t['subtotal'] for t in tuberias),
+        'total_mano_obra': sum(m['subtotal'] for m in mano_obra),
+        'total_materiales': sum(m['subtotal'] for m in materiales),
+        'total_gastos': sum(g['monto'] for g in gastos),
+    }
+
+    # Subtotal sin impuestos
+    subtotal = sum(totales.values())
+
+    # INS y CCSS (opcional)
+    total_ins_ccss = subtotal * PORCENTAJE_INS_CCSS if incluir_ins_ccss else 0
+
+    # IVA configurable
+    base_iva = subtotal + total_ins_ccss
+    total_iva = base_iva * (iva_porcentaje / 100)
+
+    totales.update({
+        'subtotal': subtotal,
+        'ins_ccss': total_ins_ccss,
+        'total_iva': total_iva,
+        'total': base_iva + total_iva
+    })
+    return totales
+
+
+def construir_lineas(equipos=(), ductos=(), difusores=(), rejillas=(),
+                     tuberias=(), mano_obra=(), materiales=(), gastos=()):
+    """
+    Convierte los items agregados en la interfaz en líneas de cotización
+
+    Recibe las mismas listas de diccionarios que arma NuevaCotizacionWindow.
+
+    Returns:
+        list: Tuplas (categoria, id_referencia, descripcion, cantidad,
+              medida, precio_unitario, subtotal, orden)
+    """
+    lineas = []
+
+    for orden, e in enumerate(equipos):
+        precio = e['subtotal'] / e['cantidad'] if e['cantidad'] else 0
+        lineas.append(('equipo', e['id'], e['nombre'], e['cantidad'],
+                       e['horas'], precio, e['subtotal'], orden))
+
+    for orden, d in enumerate(ductos):
+        lineas.append(('ducto', None, d['tipo'], d['largo_suministro'],
+                       d['largo_retorno'], d['precio_metro'], d['subtotal'], orden))
+
+    for orden, d in enumerate(difusores):
+        lineas.append(('difusor', None, d['tipo'], d['cantidad'],
+                       None, d['precio_unit'], d['subtotal'], orden))
+
+    for orden, r in enumerate(rejillas):
+        lineas.append(('rejilla', None, r['tipo'], r['cantidad'],
+                       None, r['precio_unit'], r['subtotal'], orden))
+
+    for orden, t in enumerate(tuberias):
+        lineas.append(('tuberia', None, t['tipo'], t['largo'],
+                       None, t['precio_metro'], t['subtotal'], orden))
+
+    for orden, m in enumerate(mano_obra):
+        lineas.append(('mano_obra', None, m['descripcion'], m['cantidad'],
+                       None, m['precio_unit'], m['subtotal'], orden))
+
+    for orden, m in enumerate(materiales):
+        lineas.append(('material', m['id'], m['nombre'], m['cantidad'],
+                       None, m['precio_unit'], m['subtotal'], orden))
+
+    for orden, g in enumerate(gastos):
+        lineas.append(('gasto', None, g['concepto'], 1,
+                       None, g['monto'], g['monto'], orden))
+
+    return lineas
+
+
+def guardar_lineas(cursor, id_cotizacion, lineas):
+    """
+    Inserta todas las líneas de una cotización con un solo executemany
+
+    No hace commit: se ejecuta dentro de la transacción de quien guarda
+    la cotización.
+
+    Args:
+        cursor: Cursor de sqlite3
+        id_cotizacion: ID de la cotización
+        lineas: Tuplas generadas por construir_lineas()
+    """
+    cursor.executemany(f'''
+        INSERT INTO cotizacion_lineas (
+            id_cotizacion, categoria, id_referencia, descripcion,
+            cantidad, medida, precio_unitario, subtotal, orden, fecha_modificacion
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, {FECHA_MODIFICACION_SQL})
+    ''', [(id_cotizacion,) + tuple(linea) for linea in lineas])
+
+
+def cargar_lineas(cursor, id_cotizacion):
+    """
+    Carga el detalle completo de una cotización en una sola consulta
+
+    Las filas se devuelven agrupadas por categoría con la misma forma que
+    tenían las consultas antiguas de cada tabla.
+
+    Args:
+        cursor: Cursor de sqlite3
+        id_cotizacion: ID de la cotización
+
+    Returns:
+        dict: {categoria: [tuplas]} con todas las categorías presentes
+    """
+    cursor.execute('''
+        SELECT categoria, nombre, cantidad, medida, precio_unitario, subtotal
+        FROM vista_lineas_cotizacion
+        WHERE id_cotizacion = ?
+        ORDER BY categoria, orden, id_linea
+    ''', (id_cotizacion,))
+
+    detalle = {categoria: [] for categoria in CATEGORIAS}
+
+    for categoria, nombre, cantidad, medida, precio, subtotal in cursor.fetchall():
+        if categoria == 'equipo':
+            fila = (nombre, cantidad, medida, subtotal)
+        elif categoria == 'ducto':
+            fila = (nombre, cantidad, medida, precio, subtotal)
+        elif categoria == 'gasto':
+            fila = (nombre, subtotal)
+        else:
+            fila = (nombre, cantidad, precio, subtotal)
+        detalle[categoria].append(fila)
+
+    return detalle
@@ -14,6 +14,11 @@ import bcrypt
 import os
 from datetime import datetime
 
+# Valor de fecha_modificacion (UTC, con milisegundos). Los triggers lo usan
+# para los INSERT/UPDATE que no lo indican; las cargas masivas lo escriben
+# en la misma sentencia para no pagar un UPDATE extra por fila.
+FECHA_MODIFICACION_SQL = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
 class DatabaseManager:
     """Clase que maneja todas las operaciones de la base de datos"""
 
@@ -343,9 +348,641 @@ class DatabaseManager:
         if self.conectar():
             if self.crear_tablas():
                 self.insertar_datos_iniciales()
+                self.migrar_esquema()
                 return True
         return False
 
+    # --- MIGRACIONES DE ESQUEMA ---
+
+    def migrar_esquema(self):
+        """
+        Aplica las migraciones pendientes de la base de datos
+
+        La versión del esquema se guarda en PRAGMA user_version, así que
+        cada migración se ejecuta una sola vez por archivo .db.
+
+        Returns:
+            bool: True si el esquema quedó actualizado
+        """
+        migraciones = [
+            self._migracion_columnas_cotizaciones,
+            self._migracion_lineas_cotizacion,
+            self._migracion_plantillas_cotizacion,
+            self._migracion_secuencias,
+            self._migracion_tipos_cambio,
+            self._migracion_indice_items_proyecto,
+            self._migracion_codigos_catalogos,
+            self._migracion_seguimiento_cambios,
+            self._migracion_bandeja_salida,
+            self._migracion_campanas_email,
+            self._migracion_plantillas_email,
+            self._migracion_config_adjuntos,
+            self._migracion_historial_envios,
+            self._migracion_insercion_con_fecha,
+        ]
+
+        try:
+            self.cursor.execute("PRAGMA user_version")
+            version_actual = self.cursor.fetchone()[0]
+
+            for version, migracion in enumerate(migraciones, start=1):
+                if version <= version_actual:
+                    continue
+
+                migracion()
+                self.cursor.execute(f"PRAGMA user_version = {version}")
+                self.conn.commit()
+                print(f"[OK] Migración {version} aplicada: {migracion.__name__}")
+
+            return True
+
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"[ERROR] Error al migrar esquema: {e}")
+            return False
+
+    def _existe_tabla(self, tabla):
+        """Indica si una tabla existe en la base de datos"""
+        self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (tabla,)
+        )
+        return self.cursor.fetchone() is not None
+
+    def _agregar_columna(self, tabla, columna, definicion):
+        """Agrega una columna a la tabla si todavía no existe"""
+        self.cursor.execute(f"PRAGMA table_info({tabla})")
+        columnas = {fila[1] for fila in self.cursor.fetchall()}
+        if columna not in columnas:
+            self.cursor.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}")
+
+    def _migracion_columnas_cotizaciones(self):
+        """Columnas de cotizaciones que usa la ventana de nueva cotización"""
+        self._agregar_columna('cotizaciones', 'id_proyecto', 'INTEGER REFERENCES proyectos(id_proyecto)')
+        self._agregar_columna('cotizaciones', 'total_ductos', 'REAL DEFAULT 0')
+        self._agregar_columna('cotizaciones', 'total_difusores', 'REAL DEFAULT 0')
+        self._agregar_columna('cotizaciones', 'total_rejillas', 'REAL DEFAULT 0')
+        self._agregar_columna('cotizaciones', 'total_tuberias', 'REAL DEFAULT 0')
+        self._agregar_columna('cotizaciones', 'ins_ccss', 'REAL DEFAULT 0')
+        self._agregar_columna('cotizaciones', 'iva_porcentaje', 'REAL DEFAULT 13')
+        self._agregar_columna('cotizaciones', 'mostrar_colones', 'INTEGER DEFAULT 0')
+
+    def _migracion_lineas_cotizacion(self):
+        """
+        Unifica el detalle de las cotizaciones en la tabla cotizacion_lineas
+
+        Antes cada categoría (equipos, ductos, difusores, rejillas, tuberías,
+        mano de obra, materiales y gastos) tenía su propia tabla. Ahora todas
+        las líneas viven en una sola tabla indexada por cotización, y la vista
+        vista_lineas_cotizacion resuelve los nombres del catálogo.
+
+        Las tablas antiguas no se eliminan; sus datos se copian una sola vez.
+        """
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS cotizacion_lineas (
+                id_linea INTEGER PRIMARY KEY AUTOINCREMENT,
+                id_cotizacion INTEGER NOT NULL,
+                categoria TEXT NOT NULL CHECK (categoria IN (
+                    'equipo', 'ducto', 'difusor', 'rejilla',
+                    'tuberia', 'mano_obra', 'material', 'gasto'
+                )),
+                id_referencia INTEGER,
+                descripcion TEXT,
+                cantidad REAL NOT NULL DEFAULT 1,
+                medida REAL,
+                precio_unitario REAL NOT NULL DEFAULT 0,
+                subtotal REAL NOT NULL DEFAULT 0,
+                orden INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY (id_cotizacion) REFERENCES cotizaciones(id_cotizacion) ON DELETE CASCADE
+            )
+        ''')
+
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_cotizacion_lineas_cotizacion
+            ON cotizacion_lineas (id_cotizacion, categoria, orden)
+        ''')
+
+        # Vista de compatibilidad: devuelve el nombre igual que las consultas antiguas
+        self.cursor.execute('''
+            CREATE VIEW IF NOT EXISTS vista_lineas_cotizacion AS
+            SELECT
+                l.id_linea, l.id_cotizacion, l.categoria, l.id_referencia,
+                CASE l.categoria
+                    WHEN 'equipo' THEN COALESCE(pe.tipo_equipo, l.descripcion)
+                    WHEN 'material' THEN COALESCE(mr.nombre_material, l.descripcion)
+                    ELSE l.descripcion
+                END AS nombre,
+                l.cantidad, l.medida, l.precio_unitario, l.subtotal, l.orden
+            FROM cotizacion_lineas l
+            LEFT JOIN productos_equipos pe
+                ON l.categoria = 'equipo' AND pe.id_equipo = l.id_referencia
+            LEFT JOIN materiales_repuestos mr
+                ON l.categoria = 'material' AND mr.id_material = l.id_referencia
+        ''')
+
+        # Copiar el detalle de las tablas antiguas (solo las que existan)
+        legado = [
+            ('detalle_cotizacion', 'equipo',
+             'id_equipo, NULL, cantidad, horas_por_equipo, precio_unitario, subtotal, id_detalle'),
+            ('cotizacion_ductos', 'ducto',
+             'NULL, tipo_ducto, largo_suministro, largo_retorno, precio_unitario, subtotal, rowid'),
+            ('cotizacion_difusores', 'difusor',
+             'NULL, tipo_difusor, cantidad, NULL, precio_unitario, subtotal, rowid'),
+            ('cotizacion_rejillas', 'rejilla',
+             'NULL, tipo_rejilla, cantidad, NULL, precio_unitario, subtotal, rowid'),
+            ('cotizacion_tuberias', 'tuberia',
+             'NULL, tipo_tuberia, largo, NULL, precio_unitario, subtotal, rowid'),
+            ('cotizacion_mano_obra', 'mano_obra',
+             'NULL, descripcion, cantidad, NULL, precio_unitario, subtotal, rowid'),
+            ('cotizacion_materiales', 'material',
+             'id_material, NULL, cantidad, NULL, precio_unitario, subtotal, id'),
+            ('gastos_adicionales', 'gasto',
+             'NULL, concepto, 1, NULL, monto, monto, id_gasto'),
+        ]
+
+        for tabla, categoria, columnas in legado:
+            if not self._existe_tabla(tabla):
+                continue
+
+            self.cursor.execute(f'''
+                INSERT INTO cotizacion_lineas (
+                    id_cotizacion, categoria, id_referencia, descripcion,
+                    cantidad, medida, precio_unitario, subtotal, orden
+                )
+                SELECT id_cotizacion, '{categoria}', {columnas}
+                FROM {tabla}
+            ''')
+
+    def _migracion_plantillas_cotizacion(self):
+        """Plantillas de cotización reutilizables (encabezado + líneas)"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS plantillas_cotizacion (
+                id_plantilla INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre TEXT UNIQUE NOT NULL,
+                tipo_servicio TEXT,
+                visitas_anuales INTEGER DEFAULT 1,
+                factor_venta REAL DEFAULT 1.5,
+                iva REAL DEFAULT 0.13,
+                tipo_cambio REAL DEFAULT 515,
+                subtotal REAL DEFAULT 0,
+                total_materiales REAL DEFAULT 0,
+                total_mano_obra REAL DEFAULT 0,
+                total_gastos REAL DEFAULT 0,
+                total_ductos REAL DEFAULT 0,
+                total_difusores REAL DEFAULT 0,
+                total_rejillas REAL DEFAULT 0,
+                total_tuberias REAL DEFAULT 0,
+                ins_ccss REAL DEFAULT 0,
+                total_iva REAL DEFAULT 0,
+                total REAL DEFAULT 0,
+                iva_porcentaje REAL DEFAULT 13,
+                mostrar_colones INTEGER DEFAULT 0,
+                notas TEXT,
+                fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS plantilla_lineas (
+                id_linea INTEGER PRIMARY KEY AUTOINCREMENT,
+                id_plantilla INTEGER NOT NULL,
+                categoria TEXT NOT NULL,
+                id_referencia INTEGER,
+                descripcion TEXT,
+                cantidad REAL NOT NULL DEFAULT 1,
+                medida REAL,
+                precio_unitario REAL NOT NULL DEFAULT 0,
+                subtotal REAL NOT NULL DEFAULT 0,
+                orden INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY (id_plantilla) REFERENCES plantillas_cotizacion(id_plantilla) ON DELETE CASCADE
+            )
+        ''')
+
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_plantilla_lineas_plantilla
+            ON plantilla_lineas (id_plantilla, categoria, orden)
+        ''')
+
+    def _migracion_secuencias(self):
+        """Tabla de secuencias para numerar cotizaciones y proyectos"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS secuencias (
+                secuencia TEXT NOT NULL,
+                periodo TEXT NOT NULL,
+                ultimo INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (secuencia, periodo)
+            ) WITHOUT ROWID
+        ''')
+
+        # Continuar la numeración de proyectos existente (PROY-2025-001)
+        self.cursor.execute('''
+            INSERT OR REPLACE INTO secuencias (secuencia, periodo, ultimo)
+            SELECT 'proyecto', substr(numero_proyecto, 6, 4),
+                   MAX(CAST(substr(numero_proyecto, 11) AS INTEGER))
+            FROM proyectos
+            WHERE numero_proyecto GLOB 'PROY-[0-9][0-9][0-9][0-9]-[0-9]*'
+            GROUP BY substr(numero_proyecto, 6, 4)
+        ''')
+
+        # Cotizaciones que ya usen el formato consecutivo (COT-MT-25-01-00001)
+        self.cursor.execute('''
+            INSERT OR REPLACE INTO secuencias (secuencia, periodo, ultimo)
+            SELECT 'cotizacion', '20' || substr(numero_cotizacion, 8, 2),
+                   MAX(CAST(substr(numero_cotizacion, 14) AS INTEGER))
+            FROM cotizaciones
+            WHERE numero_cotizacion GLOB
+                  'COT-MT-[0-9][0-9]-[0-9][0-9]-[0-9][0-9][0-9][0-9][0-9]'
+            GROUP BY substr(numero_cotizacion, 8, 2)
+        ''')
+
+    def _migracion_tipos_cambio(self):
+        """Historial de tipos de cambio por fecha"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tipos_cambio (
+                fecha DATE PRIMARY KEY,
+                valor REAL NOT NULL,
+                fecha_registro DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # Reconstruir el historial con el valor que usó la última cotización de cada día
+        self.cursor.execute('''
+            INSERT OR IGNORE INTO tipos_cambio (fecha, valor)
+            SELECT substr(fecha_emision, 1, 10), tipo_cambio
+            FROM cotizaciones
+            WHERE id_cotizacion IN (
+                SELECT MAX(id_cotizacion)
+                FROM cotizaciones
+                WHERE tipo_cambio > 0 AND fecha_emision IS NOT NULL
+                GROUP BY substr(fecha_emision, 1, 10)
+            )
+        ''')
+
+        # El valor configurado actualmente rige desde hoy
+        self.cursor.execute('''
+            INSERT OR REPLACE INTO tipos_cambio (fecha, valor)
+            SELECT date('now', 'localtime'), CAST(valor AS REAL)
+            FROM configuracion
+            WHERE clave = 'tipo_cambio' AND CAST(valor AS REAL) > 0
+        ''')
+
+    def _migracion_indice_items_proyecto(self):
+        """Índice para recorrer los items de un nivel en orden"""
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_proyecto_items_nivel
+            ON proyecto_items (id_nivel, orden, especificacion)
+        ''')
+
+    def _migracion_codigos_catalogos(self):
+        """Código de proveedor en equipos e índices para actualizar por código"""
+        self._agregar_columna('productos_equipos', 'codigo', 'TEXT')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_productos_equipos_codigo
+            ON productos_equipos (codigo)
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_materiales_codigo
+            ON materiales_repuestos (codigo_producto)
+        ''')
+
+    def _migracion_seguimiento_cambios(self):
+        """
+        Fecha de modificación y registro de eliminaciones en las tablas de hechos
+
+        Los triggers sellan fecha_modificacion (UTC, con milisegundos) en cada
+        INSERT o UPDATE y anotan las filas borradas en filas_eliminadas, para
+        que la exportación analítica incremental solo lea lo que cambió. Las
+        filas existentes quedan con fecha NULL: entran en la próxima
+        exportación completa.
+        """
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS filas_eliminadas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tabla TEXT NOT NULL,
+                id_fila INTEGER NOT NULL,
+                fecha TEXT NOT NULL
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_filas_eliminadas_fecha
+            ON filas_eliminadas (fecha)
+        ''')
+
+        ahora = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+        for tabla in ('clientes', 'cotizaciones', 'cotizacion_lineas',
+                      'proyectos', 'proyecto_niveles', 'proyecto_items'):
+            self._agregar_columna(tabla, 'fecha_modificacion', 'TEXT')
+            self.cursor.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_{tabla}_modificacion
+                ON {tabla} (fecha_modificacion)
+            ''')
+            self.cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{tabla}_insertada
+                AFTER INSERT ON {tabla}
+                BEGIN
+                    UPDATE {tabla} SET fecha_modificacion = {ahora}
+                    WHERE rowid = NEW.rowid;
+                END
+            ''')
+            # El WHEN evita que el UPDATE del propio trigger lo vuelva a disparar
+            self.cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{tabla}_modificada
+                AFTER UPDATE ON {tabla}
+                WHEN NEW.fecha_modificacion IS OLD.fecha_modificacion
+                BEGIN
+                    UPDATE {tabla} SET fecha_modificacion = {ahora}
+                    WHERE rowid = NEW.rowid;
+                END
+            ''')
+            self.cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{tabla}_eliminada
+                AFTER DELETE ON {tabla}
+                BEGIN
+                    INSERT INTO filas_eliminadas (tabla, id_fila, fecha)
+                    VALUES ('{tabla}', OLD.rowid, {ahora});
+                END
+            ''')
+
+    def _migracion_bandeja_salida(self):
+        """
+        Bandeja de salida de emails e historial de intentos de entrega
+
+        Los emails se encolan en bandeja_salida y un hilo repartidor los
+        envía (utils/bandeja_salida.py); cada intento, exitoso o no, queda en
+        bandeja_intentos.
+        """
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS bandeja_salida (
+                id_mensaje INTEGER PRIMARY KEY AUTOINCREMENT,
+                numero_cotizacion TEXT,
+                email_destino TEXT NOT NULL,
+                nombre_cliente TEXT,
+                pdf_path TEXT NOT NULL,
+                mensaje_personalizado TEXT,
+                estado TEXT NOT NULL DEFAULT 'pendiente' CHECK (estado IN (
+                    'pendiente', 'enviando', 'enviado', 'fallido', 'cancelado'
+                )),
+                intentos INTEGER NOT NULL DEFAULT 0,
+                max_intentos INTEGER NOT NULL DEFAULT 6,
+                proximo_intento TEXT NOT NULL,
+                ultimo_error TEXT,
+                fecha_creacion TEXT NOT NULL,
+                fecha_envio TEXT
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_bandeja_salida_pendientes
+            ON bandeja_salida (estado, proximo_intento)
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS bandeja_intentos (
+                id_intento INTEGER PRIMARY KEY AUTOINCREMENT,
+                id_mensaje INTEGER NOT NULL,
+                fecha TEXT NOT NULL,
+                exito INTEGER NOT NULL,
+                error TEXT,
+                segundos REAL,
+                FOREIGN KEY (id_mensaje) REFERENCES bandeja_salida(id_mensaje) ON DELETE CASCADE
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_bandeja_intentos_mensaje
+            ON bandeja_intentos (id_mensaje)
+        ''')
+
+    def _migracion_campanas_email(self):
+        """Campañas de envío masivo de cotizaciones y el resultado por destinatario"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS campanas_email (
+                id_campana INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre TEXT NOT NULL,
+                fecha_inicio TEXT NOT NULL,
+                fecha_fin TEXT,
+                total INTEGER DEFAULT 0,
+                enviados INTEGER DEFAULT 0,
+                fallidos INTEGER DEFAULT 0,
+                sesiones INTEGER,
+                por_minuto INTEGER,
+                segundos REAL
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS campana_envios (
+                id_envio INTEGER PRIMARY KEY AUTOINCREMENT,
+                id_campana INTEGER NOT NULL,
+                numero_cotizacion TEXT NOT NULL,
+                email_destino TEXT,
+                estado TEXT NOT NULL CHECK (estado IN (
+                    'enviado', 'fallido', 'sin_email', 'sin_pdf', 'en_bandeja'
+                )),
+                error TEXT,
+                fecha TEXT,
+                segundos REAL,
+                FOREIGN KEY (id_campana) REFERENCES campanas_email(id_campana) ON DELETE CASCADE
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_campana_envios_campana
+            ON campana_envios (id_campana, estado)
+        ''')
+
+    def _migracion_plantillas_email(self):
+        """Plantillas editables para el asunto y el cuerpo de los emails"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS plantillas_email (
+                id_plantilla INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre TEXT UNIQUE NOT NULL,
+                asunto TEXT NOT NULL,
+                cuerpo TEXT NOT NULL,
+                activa INTEGER DEFAULT 0,
+                version INTEGER DEFAULT 1,
+                fecha_modificacion TEXT
+            )
+        ''')
+        # A lo sumo una plantilla activa
+        self.cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_plantillas_email_activa
+            ON plantillas_email (activa) WHERE activa = 1
+        ''')
+
+    def _migracion_config_adjuntos(self):
+        """Opción para reducir los PDFs adjuntos a los emails"""
+        self.cursor.execute('''
+            INSERT OR IGNORE INTO configuracion (clave, valor, descripcion)
+            VALUES ('email_reducir_pdf', '0', 'Reducir PDFs con imágenes antes de enviarlos por email')
+        ''')
+
+    def _migracion_historial_envios(self):
+        """
+        Historial de emails indexado y resúmenes por cotización y por cliente
+
+        envios_email se creaba al registrar el primer envío y no tenía
+        índices. Los resúmenes (cantidad de envíos, primero y último) se
+        mantienen con triggers, así que consultarlos es una búsqueda por
+        clave primaria aunque el historial tenga cientos de miles de filas.
+        """
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS envios_email (
+                id_envio INTEGER PRIMARY KEY AUTOINCREMENT,
+                numero_cotizacion TEXT,
+                email_destino TEXT,
+                fecha_envio TEXT,
+                estado TEXT DEFAULT 'Enviado'
+            )
+        ''')
+        self._agregar_columna('envios_email', 'id_cliente', 'INTEGER')
+        self.cursor.execute('''
+            UPDATE envios_email
+            SET id_cliente = (
+                SELECT c.id_cliente FROM cotizaciones c
+                WHERE c.numero_cotizacion = envios_email.numero_cotizacion
+            )
+            WHERE id_cliente IS NULL
+        ''')
+
+        # Orden del historial y búsquedas por cotización y por cliente;
+        # id_envio desempata envíos del mismo segundo
+        for nombre, columnas in (
+            ('fecha', 'fecha_envio, id_envio'),
+            ('cotizacion', 'numero_cotizacion, fecha_envio, id_envio'),
+            ('cliente', 'id_cliente, fecha_envio, id_envio'),
+        ):
+            self.cursor.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_envios_email_{nombre}
+                ON envios_email ({columnas})
+            ''')
+
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS resumen_envios_cotizacion (
+                numero_cotizacion TEXT PRIMARY KEY,
+                envios INTEGER NOT NULL DEFAULT 0,
+                primer_envio TEXT,
+                ultimo_envio TEXT,
+                ultimo_destino TEXT
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS resumen_envios_cliente (
+                id_cliente INTEGER PRIMARY KEY,
+                envios INTEGER NOT NULL DEFAULT 0,
+                primer_envio TEXT,
+                ultimo_envio TEXT,
+                ultima_cotizacion TEXT
+            )
+        ''')
+
+        # Cada envío nuevo suma al resumen de su cotización y de su cliente
+        # (en el SET, las columnas sin excluded. son los valores anteriores)
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_envios_email_cotizacion
+            AFTER INSERT ON envios_email
+            WHEN NEW.numero_cotizacion IS NOT NULL
+            BEGIN
+                INSERT INTO resumen_envios_cotizacion
+                    (numero_cotizacion, envios, primer_envio, ultimo_envio, ultimo_destino)
+                VALUES (NEW.numero_cotizacion, 1, NEW.fecha_envio, NEW.fecha_envio, NEW.email_destino)
+                ON CONFLICT (numero_cotizacion) DO UPDATE SET
+                    envios = envios + 1,
+                    primer_envio = MIN(primer_envio, excluded.primer_envio),
+                    ultimo_destino = CASE WHEN excluded.ultimo_envio >= ultimo_envio
+                                          THEN excluded.ultimo_destino ELSE ultimo_destino END,
+                    ultimo_envio = MAX(ultimo_envio, excluded.ultimo_envio);
+            END
+        ''')
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_envios_email_cliente
+            AFTER INSERT ON envios_email
+            WHEN NEW.id_cliente IS NOT NULL
+            BEGIN
+                INSERT INTO resumen_envios_cliente
+                    (id_cliente, envios, primer_envio, ultimo_envio, ultima_cotizacion)
+                VALUES (NEW.id_cliente, 1, NEW.fecha_envio, NEW.fecha_envio, NEW.numero_cotizacion)
+                ON CONFLICT (id_cliente) DO UPDATE SET
+                    envios = envios + 1,
+                    primer_envio = MIN(primer_envio, excluded.primer_envio),
+                    ultima_cotizacion = CASE WHEN excluded.ultimo_envio >= ultimo_envio
+                                             THEN excluded.ultima_cotizacion ELSE ultima_cotizacion END,
+                    ultimo_envio = MAX(ultimo_envio, excluded.ultimo_envio);
+            END
+        ''')
+
+        # Al borrar un envío se recalculan los resúmenes afectados (solo
+        # recorre los envíos de esa cotización y de ese cliente)
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_envios_email_eliminado
+            AFTER DELETE ON envios_email
+            BEGIN
+                DELETE FROM resumen_envios_cotizacion
+                WHERE numero_cotizacion = OLD.numero_cotizacion;
+                INSERT INTO resumen_envios_cotizacion
+                    (numero_cotizacion, envios, primer_envio, ultimo_envio, ultimo_destino)
+                SELECT numero_cotizacion, COUNT(*), MIN(fecha_envio), MAX(fecha_envio),
+                       (SELECT email_destino FROM envios_email
+                        WHERE numero_cotizacion = OLD.numero_cotizacion
+                        ORDER BY fecha_envio DESC, id_envio DESC LIMIT 1)
+                FROM envios_email
+                WHERE numero_cotizacion = OLD.numero_cotizacion
+                GROUP BY numero_cotizacion;
+
+                DELETE FROM resumen_envios_cliente WHERE id_cliente = OLD.id_cliente;
+                INSERT INTO resumen_envios_cliente
+                    (id_cliente, envios, primer_envio, ultimo_envio, ultima_cotizacion)
+                SELECT id_cliente, COUNT(*), MIN(fecha_envio), MAX(fecha_envio),
+                       (SELECT numero_cotizacion FROM envios_email
+                        WHERE id_cliente = OLD.id_cliente
+                        ORDER BY fecha_envio DESC, id_envio DESC LIMIT 1)
+                FROM envios_email
+                WHERE id_cliente = OLD.id_cliente
+                GROUP BY id_cliente;
+            END
+        ''')
+
+        # Resúmenes de los envíos ya registrados
+        self.cursor.execute('''
+            INSERT OR REPLACE INTO resumen_envios_cotizacion
+                (numero_cotizacion, envios, primer_envio, ultimo_envio, ultimo_destino)
+            SELECT e.numero_cotizacion, COUNT(*), MIN(e.fecha_envio), MAX(e.fecha_envio),
+                   (SELECT u.email_destino FROM envios_email u
+                    WHERE u.numero_cotizacion = e.numero_cotizacion
+                    ORDER BY u.fecha_envio DESC, u.id_envio DESC LIMIT 1)
+            FROM envios_email e
+            WHERE e.numero_cotizacion IS NOT NULL
+            GROUP BY e.numero_cotizacion
+        ''')
+        self.cursor.execute('''
+            INSERT OR REPLACE INTO resumen_envios_cliente
+                (id_cliente, envios, primer_envio, ultimo_envio, ultima_cotizacion)
+            SELECT e.id_cliente, COUNT(*), MIN(e.fecha_envio), MAX(e.fecha_envio),
+                   (SELECT u.numero_cotizacion FROM envios_email u
+                    WHERE u.id_cliente = e.id_cliente
+                    ORDER BY u.fecha_envio DESC, u.id_envio DESC LIMIT 1)
+            FROM envios_email e
+            WHERE e.id_cliente IS NOT NULL
+            GROUP BY e.id_cliente
+        ''')
+
+    def _migracion_insercion_con_fecha(self):
+        """
+        Triggers de inserción que respetan la fecha_modificacion recibida
+
+        Los triggers trg_*_insertada de la migración 8 hacían un UPDATE por
+        cada fila insertada. Ahora solo sellan la fecha si el INSERT no la
+        escribió, así las cargas masivas que usan FECHA_MODIFICACION_SQL
+        cambian cada fila una sola vez.
+        """
+        for tabla in ('clientes', 'cotizaciones', 'cotizacion_lineas',
+                      'proyectos', 'proyecto_niveles', 'proyecto_items'):
+            self.cursor.execute(f"DROP TRIGGER IF EXISTS trg_{tabla}_insertada")
+            self.cursor.execute(f'''
+                CREATE TRIGGER trg_{tabla}_insertada
+                AFTER INSERT ON {tabla}
+                WHEN NEW.fecha_modificacion IS NULL
+                BEGIN
+                    UPDATE {tabla} SET fecha_modificacion = {FECHA_MODIFICACION_SQL}
+                    WHERE rowid = NEW.rowid;
+                END
+            ''')
+
     # --- MÉTODOS DE CONSULTA Y MANIPULACIÓN ---
 
     def verificar_login(self, usuario, password):
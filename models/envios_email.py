@@ -0,0 +1,126 @@
+"""
+envios_email.py - Historial de emails enviados
+
+El historial crece con cada envío (y con las campañas, de a decenas), así
+que nada aquí recorre la tabla entera:
+- Las páginas se piden por clave (fecha_envio, id_envio) en lugar de
+  OFFSET: cada página cuesta lo mismo sin importar cuántas haya antes
+- "Enviada N veces, la última el X" sale de resumen_envios_cotizacion y
+  resumen_envios_cliente, que los triggers de la migración mantienen al
+  día; consultarlos es una búsqueda por clave primaria
+
+    filas, siguiente = historial_envios(db, limite=50)
+    filas, siguiente = historial_envios(db, limite=50, antes_de=siguiente)
+"""
+
+from datetime import datetime
+
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+
+# Envíos por página por defecto
+TAMANO_PAGINA = 50
+
+
+def registrar_envios(db, envios, fecha=None, confirmar=True):
+    """
+    Registra emails enviados en una sola transacción
+
+    Args:
+        db: Instancia conectada de DatabaseManager
+        envios: Lista de tuplas (email_destino, numero_cotizacion)
+        fecha: Fecha del envío (por defecto, ahora)
+        confirmar: Hacer commit; con False queda en la transacción del llamador
+
+    Returns:
+        int: Envíos registrados
+    """
+    fecha = fecha or datetime.now().strftime(FORMATO_FECHA)
+    db.cursor.executemany('''
+        INSERT INTO envios_email (numero_cotizacion, email_destino, fecha_envio, id_cliente)
+        VALUES (?, ?, ?, (SELECT id_cliente FROM cotizaciones WHERE numero_cotizacion = ?))
+    ''', [(numero, email, fecha, numero) for email, numero in envios])
+    if confirmar:
+        db.conn.commit()
+    return len(envios)
+
+
+def historial_envios(db, limite=TAMANO_PAGINA, antes_de=None, numero_cotizacion=None,
+                     id_cliente=None):
+    """
+    Una página del historial, del envío más reciente al más antiguo
+
+    Args:
+        db: Instancia conectada de DatabaseManager
+        limite: Envíos por página
+        antes_de: Clave devuelta por la página anterior (None: primera página)
+        numero_cotizacion: Solo los envíos de esta cotización
+        id_cliente: Solo los envíos de este cliente
+
+    Returns:
+        tuple: (filas, siguiente); cada fila es (numero_cotizacion,
+               email_destino, fecha_envio, estado, id_envio) y siguiente es
+               la clave de la próxima página o None si no hay más
+    """
+    condiciones = []
+    parametros = []
+
+    if numero_cotizacion is not None:
+        condiciones.append("numero_cotizacion = ?")
+        parametros.append(numero_cotizacion)
+    if id_cliente is not None:
+        condiciones.append("id_cliente = ?")
+        parametros.append(id_cliente)
+    if antes_de is not None:
+        condiciones.append("(fecha_envio, id_envio) < (?, ?)")
+        parametros.extend(antes_de)
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+    # Se pide una fila de más para saber si hay otra página
+    filas = db.conn.execute(f'''
+        SELECT numero_cotizacion, email_destino, fecha_envio, estado, id_envio
+        FROM envios_email
+        {where}
+        ORDER BY fecha_envio DESC, id_envio DESC
+        LIMIT ?
+    ''', parametros + [limite + 1]).fetchall()
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = (filas[-1][2], filas[-1][4])
+    return filas, siguiente
+
+
+def resumen_cotizacion(db, numero_cotizacion):
+    """
+    Envíos de una cotización
+
+    Returns:
+        dict: envios, primer_envio, ultimo_envio y ultimo_destino (envios = 0
+              y fechas None si nunca se envió)
+    """
+    fila = db.conn.execute('''
+        SELECT envios, primer_envio, ultimo_envio, ultimo_destino
+        FROM resumen_envios_cotizacion
+        WHERE numero_cotizacion = ?
+    ''', (numero_cotizacion,)).fetchone() or (0, None, None, None)
+
+    return dict(zip(('envios', 'primer_envio', 'ultimo_envio', 'ultimo_destino'), fila))
+
+
+def resumen_cliente(db, id_cliente):
+    """
+    Envíos a un cliente (todas sus cotizaciones)
+
+    Returns:
+        dict: envios, primer_envio, ultimo_envio y ultima_cotizacion
+    """
+    fila = db.conn.execute('''
+        SELECT envios, primer_envio, ultimo_envio, ultima_cotizacion
+        FROM resumen_envios_cliente
+        WHERE id_cliente = ?
+    ''', (id_cliente,)).fetchone() or (0, None, None, None)
+
+    return dict(zip(('envios', 'primer_envio', 'ultimo_envio', 'ultima_cotizacion'), fila))
+
@@ -0,0 +1,141 @@
+"""
+registros.py - Filas con nombre para cotizaciones y clientes
+
+Las pantallas y el PDF leían `SELECT c.*` y tomaban los valores por
+posición (cotizacion[26], cotizacion[27], ...). Las columnas agregadas por
+migraciones quedan al final de la tabla, así que esas posiciones cambian
+según la base de datos y los datos salían corridos sin ningún error.
+
+Cada clase de este módulo declara exactamente las columnas que necesita
+(su proyección) y las expone como atributos:
+
+    cursor = CotizacionPDF.consultar(db, "c.numero_cotizacion = ?", (numero,))
+    cotizacion = cursor.fetchone()
+    cotizacion.cliente, cotizacion.total
+
+Los registros usan __slots__ y se crean directamente desde el cursor
+(row_factory), sin tupla de c.* ni diccionario por fila.
+"""
+
+
+class Registro:
+    """Base de las filas con nombre"""
+
+    __slots__ = ()
+
+    # Expresión SQL de cada atributo, en el mismo orden que __slots__
+    COLUMNAS = ()
+
+    # Tablas de la consulta (FROM ...)
+    DESDE = ''
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if len(cls.COLUMNAS) != len(cls.__slots__):
+            raise TypeError(f"{cls.__name__}: COLUMNAS y __slots__ no coinciden")
+        cls.PROYECCION = ', '.join(
+            f"{expresion} AS {campo}"
+            for campo, expresion in zip(cls.__slots__, cls.COLUMNAS)
+        )
+
+    def __init__(self, *valores):
+        for campo, valor in zip(self.__slots__, valores):
+            setattr(self, campo, valor)
+
+    @classmethod
+    def desde_fila(cls, cursor, fila):
+        """row_factory de sqlite3: crea el registro directamente desde la fila"""
+        return cls(*fila)
+
+    @classmethod
+    def consultar(cls, db, condicion='1', parametros=(), orden=None):
+        """
+        Ejecuta SELECT <proyección> FROM <tablas> WHERE condicion
+
+        Usa un cursor propio para no alterar db.cursor.
+
+        Args:
+            db: Instancia conectada de DatabaseManager
+            condicion: Expresión WHERE con marcadores ?
+            parametros: Valores de los marcadores
+            orden: Expresión ORDER BY opcional
+
+        Returns:
+            sqlite3.Cursor: Cursor que entrega instancias de la clase
+        """
+        cursor = db.conn.cursor()
+        cursor.row_factory = cls.desde_fila
+        sql = f"SELECT {cls.PROYECCION} FROM {cls.DESDE} WHERE {condicion}"
+        if orden:
+            sql += f" ORDER BY {orden}"
+        cursor.execute(sql, parametros)
+        return cursor
+
+    def como_dict(self):
+        """Valores del registro como diccionario"""
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+    def __eq__(self, otro):
+        if type(otro) is not type(self):
+            return NotImplemented
+        return all(getattr(self, c) == getattr(otro, c) for c in self.__slots__)
+
+    # Los atributos se pueden modificar: un hash por valor cambiaría con
+    # ellos, así que los registros no se usan como claves de dict o set
+    __hash__ = None
+
+    def __repr__(self):
+        valores = ', '.join(f"{c}={getattr(self, c)!r}" for c in self.__slots__)
+        return f"{type(self).__name__}({valores})"
+
+
+_COTIZACION_CON_CLIENTE = "cotizaciones c LEFT JOIN clientes cl ON cl.id_cliente = c.id_cliente"
+
+
+class CotizacionPDF(Registro):
+    """Datos de una cotización que imprime el PDF"""
+
+    __slots__ = (
+        'id_cotizacion', 'numero_cotizacion', 'fecha_emision', 'tipo_servicio',
+        'visitas_anuales', 'subtotal', 'ins_ccss', 'total_iva', 'total',
+        'iva_porcentaje', 'mostrar_colones',
+        'cliente', 'contacto', 'direccion_cliente'
+    )
+    COLUMNAS = (
+        'c.id_cotizacion', 'c.numero_cotizacion', 'c.fecha_emision', 'c.tipo_servicio',
+        'c.visitas_anuales', 'c.subtotal', 'c.ins_ccss', 'c.total_iva', 'c.total',
+        'c.iva_porcentaje', 'c.mostrar_colones',
+        'cl.nombre_empresa', 'cl.contacto_nombre', 'cl.direccion'
+    )
+    DESDE = _COTIZACION_CON_CLIENTE
+
+
+class CotizacionResumen(Registro):
+    """Encabezado de una cotización para la ventana de detalle"""
+
+    __slots__ = (
+        'id_cotizacion', 'numero_cotizacion', 'id_cliente', 'fecha_emision',
+        'tipo_servicio', 'visitas_anuales', 'factor_venta', 'subtotal',
+        'ins_ccss', 'total_iva', 'total', 'iva_porcentaje', 'estado',
+        'cliente', 'contacto'
+    )
+    COLUMNAS = (
+        'c.id_cotizacion', 'c.numero_cotizacion', 'c.id_cliente', 'c.fecha_emision',
+        'c.tipo_servicio', 'c.visitas_anuales', 'c.factor_venta', 'c.subtotal',
+        'c.ins_ccss', 'c.total_iva', 'c.total', 'c.iva_porcentaje', 'c.estado',
+        'cl.nombre_empresa', 'cl.contacto_nombre'
+    )
+    DESDE = _COTIZACION_CON_CLIENTE
+
+
+class ClienteContacto(Registro):
+    """Datos de contacto de un cliente (envío de emails)"""
+
+    __slots__ = ('id_cliente', 'nombre_empresa', 'contacto_nombre', 'email', 'telefono')
+    COLUMNAS = ('id_cliente', 'nombre_empresa', 'contacto_nombre', 'email', 'telefono')
+    DESDE = 'clientes'
+
+    @classmethod
+    def obtener(cls, db, id_cliente):
+        """Contacto de un cliente o None si no existe"""
+        return cls.consultar(db, "id_cliente = ?", (id_cliente,)).fetchone()
@@ -0,0 +1,149 @@
+"""
+secuencias.py - Numeración de cotizaciones y proyectos
+
+Los números se toman de la tabla secuencias, que guarda el último valor
+entregado por secuencia y periodo (año). Reservar un número es un UPDATE
+dentro de la misma transacción que inserta el registro: SQLite toma el
+bloqueo de escritura en ese UPDATE, así que dos ventanas que guardan a la
+vez nunca reciben el mismo número, y si la transacción se cancela el
+contador vuelve atrás junto con todo lo demás.
+
+Para creaciones masivas se reserva un bloque completo con un solo UPDATE
+en lugar de un número por registro; los números del bloque que no se usan
+se devuelven en la misma transacción.
+
+Ninguna función hace commit.
+"""
+
+from datetime import datetime
+
+# Nombres de las secuencias
+SECUENCIA_COTIZACION = 'cotizacion'
+SECUENCIA_PROYECTO = 'proyecto'
+
+
+def reservar_bloque(cursor, secuencia, periodo, cantidad=1):
+    """
+    Reserva un bloque de números consecutivos de una secuencia
+
+    Args:
+        cursor: Cursor de sqlite3 (dentro de la transacción de quien guarda)
+        secuencia: Nombre de la secuencia
+        periodo: Periodo de la numeración (por ejemplo, el año)
+        cantidad: Cantidad de números a reservar
+
+    Returns:
+        range: Números reservados
+    """
+    if cantidad < 1:
+        return range(0)
+
+    cursor.execute('''
+        INSERT OR IGNORE INTO secuencias (secuencia, periodo, ultimo)
+        VALUES (?, ?, 0)
+    ''', (secuencia, periodo))
+    cursor.execute('''
+        UPDATE secuencias SET ultimo = ultimo + ?
+        WHERE secuencia = ? AND periodo = ?
+    ''', (cantidad, secuencia, periodo))
+    cursor.execute('''
+        SELECT ultimo FROM secuencias
+        WHERE secuencia = ? AND periodo = ?
+    ''', (secuencia, periodo))
+
+    ultimo = cursor.fetchone()[0]
+    return range(ultimo - cantidad + 1, ultimo + 1)
+
+
+def devolver_bloque(cursor, secuencia, periodo, cantidad):
+    """
+    Devuelve los últimos números reservados que no se usaron
+
+    Solo es correcto dentro de la misma transacción que los reservó: desde
+    el UPDATE de reservar_bloque nadie más pudo tomar números.
+
+    Args:
+        cursor: Cursor de sqlite3 (la transacción que reservó el bloque)
+        secuencia: Nombre de la secuencia
+        periodo: Periodo de la numeración
+        cantidad: Cantidad de números sin usar al final del bloque
+    """
+    if cantidad < 1:
+        return
+
+    cursor.execute('''
+        UPDATE secuencias SET ultimo = ultimo - ?
+        WHERE secuencia = ? AND periodo = ?
+    ''', (cantidad, secuencia, periodo))
+
+
+def consultar_siguiente(cursor, secuencia, periodo):
+    """
+    Devuelve el próximo número de una secuencia sin reservarlo
+
+    Solo sirve para mostrarlo en pantalla: el número definitivo se
+    reserva al guardar.
+    """
+    cursor.execute('''
+        SELECT ultimo FROM secuencias
+        WHERE secuencia = ? AND periodo = ?
+    ''', (secuencia, periodo))
+    fila = cursor.fetchone()
+    return (fila[0] if fila else 0) + 1
+
+
+# --- COTIZACIONES ---
+
+def formato_numero_cotizacion(numero, fecha):
+    """Formato COT-MT-yy-mm-00001 (consecutivo anual)"""
+    return f"COT-MT-{fecha.strftime('%y-%m')}-{numero:05d}"
+
+
+def reservar_numeros_cotizacion(cursor, cantidad=1, fecha=None):
+    """
+    Reserva números de cotización
+
+    Args:
+        cursor: Cursor de sqlite3
+        cantidad: Cantidad de números
+        fecha: Fecha de creación (por defecto, ahora)
+
+    Returns:
+        list: Números de cotización formateados
+    """
+    fecha = fecha or datetime.now()
+    bloque = reservar_bloque(cursor, SECUENCIA_COTIZACION, fecha.strftime('%Y'), cantidad)
+    return [formato_numero_cotizacion(n, fecha) for n in bloque]
+
+
+def devolver_numeros_cotizacion(cursor, cantidad, fecha=None):
+    """Devuelve los números de cotización sin usar del último bloque reservado"""
+    fecha = fecha or datetime.now()
+    devolver_bloque(cursor, SECUENCIA_COTIZACION, fecha.strftime('%Y'), cantidad)
+
+
+def siguiente_numero_cotizacion(cursor, fecha=None):
+    """Reserva y devuelve un número de cotización"""
+    return reservar_numeros_cotizacion(cursor, 1, fecha)[0]
+
+
+# --- PROYECTOS ---
+
+def formato_numero_proyecto(numero, año):
+    """Formato PROY-2025-001"""
+    return f"PROY-{año}-{numero:03d}"
+
+
+def siguiente_numero_proyecto(cursor, fecha=None):
+    """Reserva y devuelve un número de proyecto"""
+    año = (fecha or datetime.now()).year
+    numero = reservar_bloque(cursor, SECUENCIA_PROYECTO, str(año))[0]
+    return formato_numero_proyecto(numero, año)
+
+
+def consultar_numero_proyecto(cursor, fecha=None):
+    """Número de proyecto que se asignará al próximo guardado"""
+    año = (fecha or datetime.now()).year
+    return formato_numero_proyecto(
+        consultar_siguiente(cursor, SECUENCIA_PROYECTO, str(año)), año
+    )
@@ -0,0 +1,130 @@
+"""
+tipo_cambio.py - Historial del tipo de cambio (₡/$)
+
+Cada cambio del tipo de cambio en Configuración queda registrado con su
+fecha en la tabla tipos_cambio. Para convertir montos históricos se busca
+el tipo de cambio vigente a la fecha de la cotización ("as-of").
+
+El historial completo se carga una sola vez en memoria (dos listas
+ordenadas por fecha) y cada búsqueda es un bisect, así que los reportes
+convierten miles de cotizaciones sin una consulta por fila. El caché se
+actualiza al registrar un tipo de cambio nuevo desde la aplicación.
+"""
+
+from bisect import bisect_right, insort
+from datetime import date, datetime
+
+# Valor usado cuando no hay historial ni configuración
+TIPO_CAMBIO_DEFECTO = 515.0
+
+# Historiales cargados, por ruta de base de datos
+_historiales = {}
+
+
+def _fecha_iso(fecha):
+    """Normaliza una fecha (date, datetime o texto) a 'YYYY-MM-DD'"""
+    if fecha is None:
+        return date.today().isoformat()
+    if isinstance(fecha, (date, datetime)):
+        return fecha.strftime('%Y-%m-%d')
+    return str(fecha)[:10]
+
+
+class HistorialTipoCambio:
+    """Historial de tipos de cambio con búsqueda por fecha en memoria"""
+
+    def __init__(self, filas, defecto=TIPO_CAMBIO_DEFECTO):
+        """
+        Args:
+            filas: Tuplas (fecha 'YYYY-MM-DD', valor) ordenadas por fecha
+            defecto: Valor si no hay ningún registro
+        """
+        self.fechas = [fecha for fecha, _ in filas]
+        self.valores = [valor for _, valor in filas]
+        self.defecto = defecto
+
+    def valor_en(self, fecha=None):
+        """
+        Tipo de cambio vigente en una fecha
+
+        Es el último registrado en o antes de la fecha; para fechas
+        anteriores al primer registro se usa el primero.
+        """
+        if not self.fechas:
+            return self.defecto
+
+        i = bisect_right(self.fechas, _fecha_iso(fecha))
+        return self.valores[i - 1] if i else self.valores[0]
+
+    def convertir(self, monto, fecha=None):
+        """Convierte un monto en dólares a colones al tipo de cambio de la fecha"""
+        return (monto or 0) * self.valor_en(fecha)
+
+    def agregar(self, fecha, valor):
+        """Agrega o reemplaza el valor de una fecha en el historial en memoria"""
+        fecha = _fecha_iso(fecha)
+        i = bisect_right(self.fechas, fecha)
+        if i and self.fechas[i - 1] == fecha:
+            self.valores[i - 1] = valor
+            return
+
+        insort(self.fechas, fecha)
+        self.valores.insert(i, valor)
+
+
+def obtener_historial(db):
+    """
+    Devuelve el historial de tipos de cambio de la base de datos
+
+    La primera llamada lo carga con una sola consulta; las siguientes
+    usan el caché.
+
+    Args:
+        db: Instancia conectada de DatabaseManager
+    """
+    historial = _historiales.get(db.db_path)
+    if historial is None:
+        db.cursor.execute("SELECT fecha, valor FROM tipos_cambio ORDER BY fecha")
+        filas = db.cursor.fetchall()
+        defecto = float(db.obtener_configuracion('tipo_cambio') or TIPO_CAMBIO_DEFECTO)
+        historial = HistorialTipoCambio(filas, defecto)
+        _historiales[db.db_path] = historial
+    return historial
+
+
+def registrar_tipo_cambio(db, valor, fecha=None):
+    """
+    Registra el tipo de cambio vigente desde una fecha (por defecto, hoy)
+
+    Hace commit y actualiza el caché en memoria.
+
+    Returns:
+        tuple: (éxito, mensaje)
+    """
+    try:
+        valor = float(valor)
+    except (TypeError, ValueError):
+        return False, "El tipo de cambio debe ser un número"
+
+    if valor <= 0:
+        return False, "El tipo de cambio debe ser mayor que cero"
+
+    fecha = _fecha_iso(fecha)
+    db.cursor.execute('''
+        INSERT OR REPLACE INTO tipos_cambio (fecha, valor) VALUES (?, ?)
+    ''', (fecha, valor))
+    db.conn.commit()
+
+    historial = _historiales.get(db.db_path)
+    if historial is not None:
+        historial.agregar(fecha, valor)
+
+    return True, f"Tipo de cambio ₡{valor:,.2f} registrado desde {fecha}"
+
+
+def invalidar_cache(db=None):
+    """Descarta el historial en memoria (de una base de datos o de todas)"""
+    if db is None:
+        _historiales.clear()
+    else:
+        _historiales.pop(db.db_path, None)
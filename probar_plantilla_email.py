@@ -0,0 +1,108 @@
+"""
+probar_plantilla_email.py - Vista previa y medición de las plantillas de email
+
+Muestra el asunto y guarda el cuerpo HTML que recibiría el cliente de una
+cotización con la plantilla activa, o mide cuántos cuerpos por segundo se
+renderizan con la plantilla compilada frente a compilarla en cada email.
+
+Uso:
+    python probar_plantilla_email.py COT-MT-25-03-00012
+    python probar_plantilla_email.py COT-MT-25-03-00012 --mensaje "Hola {{contacto}}"
+    python probar_plantilla_email.py --benchmark 5000
+"""
+
+import argparse
+import sys
+import os
+
+# Asegurar que los imports funcionen correctamente
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.database import DatabaseManager
+from utils.email_manager import EmailManager
+from utils.plantillas_email import (
+    obtener_plantilla, datos_cotizacion, valores_email, medir_renderizado,
+    ASUNTO_PREDETERMINADO, CUERPO_PREDETERMINADO
+)
+
+MENSAJE_CAMPANA = "Estimado/a {{contacto}}:\nLe recordamos que su contrato de {{tipo_servicio}} vence pronto."
+
+
+def main():
+    """Función principal de la prueba de plantillas"""
+    parser = argparse.ArgumentParser(
+        description="Vista previa y medición de la plantilla de email activa"
+    )
+    parser.add_argument('numero', nargs='?', help="Número de cotización para la vista previa")
+    parser.add_argument('--mensaje', default="", help="Mensaje personalizado")
+    parser.add_argument('--salida', default='vista_previa_email.html',
+                        help="Archivo HTML de la vista previa (por defecto: vista_previa_email.html)")
+    parser.add_argument('--benchmark', type=int, metavar='N',
+                        help="Renderizar N emails con cada método y comparar")
+    parser.add_argument('--db', default='models/airsolutions.db',
+                        help="Ruta de la base de datos (por defecto: models/airsolutions.db)")
+    args = parser.parse_args()
+
+    if not args.numero and not args.benchmark:
+        parser.error("Indique un número de cotización o --benchmark")
+
+    if not os.path.exists(args.db):
+        print(f"[ERROR] Base de datos no encontrada: {args.db}")
+        return 1
+
+    print("="*60)
+    print("AIRSOLUTIONS - PLANTILLAS DE EMAIL")
+    print("="*60)
+
+    db = DatabaseManager(args.db)
+    if not db.conectar():
+        return 1
+
+    try:
+        db.migrar_esquema()
+        email = EmailManager(db)
+        plantilla = obtener_plantilla(db)
+        print(f"Plantilla activa: {plantilla.nombre}")
+
+        if args.numero:
+            datos = datos_cotizacion(db, args.numero)
+            if not datos:
+                print(f"[ERROR] Cotización no encontrada: {args.numero}")
+                return 1
+
+            asunto, cuerpo = email.generar_email(
+                datos['cliente'], args.numero, args.mensaje, datos
+            )
+            with open(args.salida, 'w', encoding='utf-8') as archivo:
+                archivo.write(cuerpo)
+            print(f"Asunto: {asunto}")
+            print(f"Cuerpo: {args.salida} ({len(cuerpo):,} caracteres)")
+
+        if args.benchmark:
+            db.cursor.execute("SELECT numero_cotizacion FROM cotizaciones LIMIT 500")
+            valores = []
+            for (numero,) in db.cursor.fetchall():
+                datos = datos_cotizacion(db, numero)
+                valores.append(valores_email(email.config['email_nombre'], datos['cliente'], numero, datos))
+            if not valores:
+                valores = [valores_email(email.config['email_nombre'], 'Cliente', 'COT-PRUEBA', None)]
+
+            texto = db.conn.execute(
+                "SELECT asunto, cuerpo FROM plantillas_email WHERE activa = 1"
+            ).fetchone() or (ASUNTO_PREDETERMINADO, CUERPO_PREDETERMINADO)
+
+            resultados = medir_renderizado(texto, valores, args.benchmark, MENSAJE_CAMPANA)
+            print()
+            print(f"{args.benchmark} cuerpos, {len(valores)} cotizaciones distintas:")
+            for metodo, medida in resultados.items():
+                print(f"  {metodo:<12} {medida['segundos']:8.3f} s  "
+                      f"{medida['por_segundo']:10,.0f} emails/s")
+    finally:
+        db.desconectar()
+
+    print("="*60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
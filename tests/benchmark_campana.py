@@ -0,0 +1,110 @@
+"""
+benchmark_campana.py - Medición del envío masivo contra el servidor SMTP local
+
+Crea una base temporal con clientes y cotizaciones de prueba, levanta
+smtp_local.ServidorSMTPLocal con la latencia indicada y envía la misma
+campaña con distintas cantidades de sesiones, sin límite por minuto, para
+comparar mensajes por minuto y conexiones abiertas. Los PDFs quedan en la
+carpeta cotizaciones/ de la aplicación, como en un envío real.
+
+Uso:
+    python tests/benchmark_campana.py
+    python tests/benchmark_campana.py --clientes 100 --retardo 0.15 --sesiones 1 3 6
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import DatabaseManager
+from utils.campana_email import CampanaEmail
+from utils.email_manager import cerrar_pools
+from utils.encryption import encriptar_password
+from tests.smtp_local import ServidorSMTPLocal, clave_temporal
+
+
+def crear_base(ruta, clientes, puerto):
+    """Base nueva con un cliente y una cotización por destinatario"""
+    db = DatabaseManager(ruta)
+    db.conectar()
+    db.crear_tablas()
+    db.insertar_datos_iniciales()
+    db.migrar_esquema()
+
+    cursor = db.cursor
+    for clave, valor in (
+        ('smtp_server', '127.0.0.1'), ('smtp_port', str(puerto)),
+        ('email_remitente', 'ventas@airsolutions.test'), ('email_password', encriptar_password('clave')),
+    ):
+        cursor.execute("INSERT OR REPLACE INTO configuracion (clave, valor) VALUES (?, ?)", (clave, valor))
+
+    numeros = []
+    for n in range(1, clientes + 1):
+        cursor.execute(
+            "INSERT INTO clientes (nombre_empresa, email) VALUES (?, ?)",
+            (f'Cliente {n}', f'cliente{n}@ejemplo.test')
+        )
+        numero = f'COT-MT-25-01-{n:05d}'
+        cursor.execute('''
+            INSERT INTO cotizaciones (numero_cotizacion, id_cliente, fecha_emision,
+                                      tipo_servicio, subtotal, total_iva, total)
+            VALUES (?, ?, '2025-01-15', 'Mantenimiento', 400, 52, 452)
+        ''', (numero, cursor.lastrowid))
+        id_cotizacion = cursor.lastrowid
+        cursor.executemany('''
+            INSERT INTO cotizacion_lineas (id_cotizacion, categoria, descripcion, cantidad,
+                                           precio_unitario, subtotal, orden)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (id_cotizacion, 'equipo', 'Mantenimiento preventivo split 12000 BTU', 4, 60, 240, 0),
+            (id_cotizacion, 'material', 'Limpiador de serpentines', 2, 30, 60, 1),
+            (id_cotizacion, 'gasto', 'Viáticos', 1, 100, 100, 2),
+        ])
+        numeros.append(numero)
+    db.conn.commit()
+    return db, numeros
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el envío masivo contra un SMTP local")
+    parser.add_argument('--clientes', type=int, default=60, help="Destinatarios (por defecto: 60)")
+    parser.add_argument('--retardo', type=float, default=0.15,
+                        help="Segundos que tarda el servidor en aceptar cada mensaje (por defecto: 0.15)")
+    parser.add_argument('--sesiones', type=int, nargs='+', default=[1, 3, 6],
+                        help="Cantidades de sesiones a comparar (por defecto: 1 3 6)")
+    args = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp(prefix='benchmark_campana_')
+    servidor = ServidorSMTPLocal(retardo=args.retardo).iniciar()
+    db = None
+    try:
+        with clave_temporal(carpeta):
+            db, numeros = crear_base(os.path.join(carpeta, 'airsolutions.db'), args.clientes, servidor.puerto)
+
+            # Primera pasada para dejar los PDFs en caché y medir solo el envío
+            CampanaEmail(db, sesiones=max(args.sesiones), por_minuto=0).ejecutar(numeros, nombre='Preparación')
+            cerrar_pools()
+
+            print(f"{args.clientes} mensajes, {args.retardo:.2f} s de latencia por mensaje\n")
+            print(f"{'Sesiones':>8}  {'Enviados':>8}  {'Segundos':>8}  {'Msg/min':>8}  {'Conexiones':>10}")
+            for sesiones in args.sesiones:
+                estadisticas = CampanaEmail(db, sesiones=sesiones, por_minuto=0).ejecutar(
+                    numeros, nombre=f'{sesiones} sesiones'
+                )
+                cerrar_pools()
+                print(f"{sesiones:>8}  {estadisticas['enviados']:>8}  {estadisticas['segundos']:>8.2f}  "
+                      f"{estadisticas['por_minuto_real']:>8.0f}  {estadisticas['conexiones']:>10}")
+    finally:
+        if db:
+            db.desconectar()
+        servidor.detener()
+        shutil.rmtree(carpeta, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,223 @@
+"""
+smtp_local.py - Servidor SMTP local para pruebas y mediciones
+
+Reemplaza al servidor de correo real en las pruebas de la bandeja de salida
+y en las mediciones de campañas: acepta STARTTLS (con el certificado
+autofirmado smtp_local.pem), AUTH PLAIN/LOGIN, NOOP y RSET, y guarda los
+mensajes en memoria. Permite simular latencia, destinatarios inexistentes
+(550) y errores temporales (451).
+
+Uso desde una prueba:
+    servidor = ServidorSMTPLocal(retardo=0.15)
+    servidor.iniciar()
+    ... configurar smtp_server='127.0.0.1', smtp_port=servidor.puerto y la
+        contraseña con encriptar_password() dentro de clave_temporal() ...
+    servidor.detener()
+
+Uso desde la línea de comandos (para probar la aplicación a mano):
+    python tests/smtp_local.py --puerto 2525 --retardo 0.15
+"""
+
+import argparse
+import os
+import socket
+import socketserver
+import ssl
+import threading
+import time
+
+CERTIFICADO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'smtp_local.pem')
+
+
+class _Sesion(socketserver.StreamRequestHandler):
+    """Una conexión SMTP"""
+
+    def handle(self):
+        servidor = self.server.smtp
+        servidor._conectado(self.request)
+        self._socket = self.request
+        self._archivo = self._socket.makefile('rb')
+        self._responder('220 smtp-local ESMTP')
+
+        remitente = None
+        destinatarios = []
+        while True:
+            try:
+                linea = self._archivo.readline()
+            except (OSError, ValueError):
+                return
+            if not linea:
+                return
+
+            comando = linea.decode('utf-8', errors='replace').strip()
+            verbo = comando.upper()
+
+            if verbo.startswith(('EHLO', 'HELO')):
+                self._socket.sendall(
+                    b'250-smtp-local\r\n250-STARTTLS\r\n250-AUTH PLAIN LOGIN\r\n'
+                    b'250-8BITMIME\r\n250 SIZE 104857600\r\n'
+                )
+            elif verbo == 'STARTTLS':
+                self._responder('220 Listo para TLS')
+                self._socket = servidor.contexto.wrap_socket(self._socket, server_side=True)
+                self._archivo = self._socket.makefile('rb')
+                servidor._conectado(self._socket)
+            elif verbo.startswith('AUTH'):
+                if verbo == 'AUTH LOGIN':
+                    self._responder('334 VXNlcm5hbWU6')
+                    self._archivo.readline()
+                    self._responder('334 UGFzc3dvcmQ6')
+                    self._archivo.readline()
+                servidor._contar('logins')
+                self._responder('235 Autenticado')
+            elif verbo == 'NOOP':
+                self._responder('250 OK')
+            elif verbo == 'RSET':
+                remitente, destinatarios = None, []
+                self._responder('250 OK')
+            elif verbo.startswith('MAIL FROM'):
+                remitente, destinatarios = comando[10:].strip('<> '), []
+                self._responder('250 OK')
+            elif verbo.startswith('RCPT TO'):
+                destino = comando[8:].strip('<> ')
+                if destino in servidor.rechazar:
+                    self._responder('550 Buzón inexistente')
+                else:
+                    destinatarios.append(destino)
+                    self._responder('250 OK')
+            elif verbo == 'DATA':
+                self._recibir(servidor, remitente, destinatarios)
+            elif verbo == 'QUIT':
+                self._responder('221 Adiós')
+                return
+            else:
+                self._responder('502 Comando no implementado')
+
+    def _responder(self, texto):
+        self._socket.sendall(f'{texto}\r\n'.encode('utf-8'))
+
+    def _recibir(self, servidor, remitente, destinatarios):
+        self._responder('354 Termine con <CRLF>.<CRLF>')
+        lineas = []
+        while True:
+            linea = self._archivo.readline()
+            if not linea or linea in (b'.\r\n', b'.\n'):
+                break
+            # Quitar el punto duplicado al inicio de línea (RFC 5321 4.5.2)
+            lineas.append(linea[1:] if linea.startswith(b'..') else linea)
+        mensaje = b''.join(lineas)
+
+        if servidor.retardo:
+            time.sleep(servidor.retardo)
+
+        with servidor._lock:
+            servidor.bytes_recibidos += len(mensaje)
+            if servidor.fallar > 0:
+                servidor.fallar -= 1
+                temporal = True
+            else:
+                temporal = False
+                servidor.mensajes.append((remitente, list(destinatarios), mensaje))
+
+        self._responder('451 Intente más tarde' if temporal else '250 Aceptado')
+
+
+class _ServidorTCP(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ServidorSMTPLocal:
+    """Servidor SMTP en 127.0.0.1 que guarda los mensajes en memoria"""
+
+    def __init__(self, puerto=0, retardo=0.0):
+        """
+        Args:
+            puerto: Puerto a escuchar (0: uno libre)
+            retardo: Segundos que tarda en aceptar cada mensaje
+        """
+        self.retardo = retardo
+        self.rechazar = set()
+        self.fallar = 0
+        self.mensajes = []
+        self.conexiones = 0
+        self.logins = 0
+        self.bytes_recibidos = 0
+
+        self.contexto = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        self.contexto.load_cert_chain(CERTIFICADO)
+
+        self._lock = threading.Lock()
+        self._sockets = []
+        self._tcp = _ServidorTCP(('127.0.0.1', puerto), _Sesion)
+        self._tcp.smtp = self
+        self.puerto = self._tcp.server_address[1]
+
+    def iniciar(self):
+        """Atiende conexiones en un hilo aparte"""
+        threading.Thread(target=self._tcp.serve_forever, name='SMTPLocal', daemon=True).start()
+        return self
+
+    def detener(self):
+        """Deja de aceptar conexiones y corta las abiertas"""
+        self._tcp.shutdown()
+        self._tcp.server_close()
+        with self._lock:
+            for abierto in self._sockets:
+                try:
+                    abierto.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                abierto.close()
+            self._sockets = []
+
+    def destinatarios(self):
+        """Lista de destinatarios de todos los mensajes aceptados"""
+        with self._lock:
+            return [d for _, destinos, _ in self.mensajes for d in destinos]
+
+    def _conectado(self, sock):
+        with self._lock:
+            if not isinstance(sock, ssl.SSLSocket):
+                self.conexiones += 1
+            self._sockets.append(sock)
+
+    def _contar(self, atributo):
+        with self._lock:
+            setattr(self, atributo, getattr(self, atributo) + 1)
+
+
+def clave_temporal(carpeta):
+    """
+    Contexto que encripta con una clave guardada en carpeta
+
+    Así encriptar_password() no crea config/.encryption_key en el
+    repositorio al configurar la contraseña SMTP de una prueba.
+    """
+    from unittest import mock
+    from utils.encryption import EncryptionManager
+
+    gestor = EncryptionManager(os.path.join(carpeta, '.encryption_key'))
+    return mock.patch('utils.encryption._encryption_manager', gestor)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor SMTP local para pruebas")
+    parser.add_argument('--puerto', type=int, default=2525, help="Puerto (por defecto: 2525)")
+    parser.add_argument('--retardo', type=float, default=0.0,
+                        help="Segundos por mensaje aceptado (simula la latencia del proveedor)")
+    args = parser.parse_args()
+
+    servidor = ServidorSMTPLocal(args.puerto, args.retardo).iniciar()
+    print(f"Servidor SMTP local en 127.0.0.1:{servidor.puerto} (Ctrl+C para salir)")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"  {len(servidor.mensajes)} mensajes, {servidor.conexiones} conexiones")
+    except KeyboardInterrupt:
+        servidor.detener()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
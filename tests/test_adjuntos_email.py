@@ -0,0 +1,75 @@
+"""
+test_adjuntos_email.py - Formato del email con el PDF codificado por bloques
+
+Ejecutar con:
+    python -m unittest discover tests
+"""
+
+import email
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from email import policy
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.adjuntos_email import MensajeCotizacion
+
+
+class TestMensajeCotizacion(unittest.TestCase):
+    """El mensaje armado por partes es un MIME válido con el PDF intacto"""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp(prefix='test_adjuntos_')
+        self.pdf_path = os.path.join(self.carpeta, 'COT-MT-25-01-00001.pdf')
+        # Tamaño que no es múltiplo del bloque ni de 57, con bytes de todo tipo
+        self.contenido = b'%PDF-1.4\n' + bytes(range(256)) * 900 + b'\n.\r\n%%EOF'
+        with open(self.pdf_path, 'wb') as archivo:
+            archivo.write(self.contenido)
+
+        self.mensaje = MensajeCotizacion(
+            'ventas@airsolutions.test', 'cliente@ejemplo.test', 'Cotización COT-MT-25-01-00001',
+            "<p>Adjuntamos la cotizacion.</p>\n.linea con punto\n<p>Saludos</p>",
+            self.pdf_path
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+    def _datos(self, tamano_bloque):
+        return b''.join(self.mensaje.fragmentos(tamano_bloque))
+
+    def test_lineas_smtp(self):
+        datos = self._datos(57 * 10)
+
+        lineas = datos.split(b'\r\n')
+        self.assertNotIn(b'\n', b''.join(lineas))
+        self.assertNotIn(b'\r', b''.join(lineas))
+        self.assertTrue(all(len(linea) <= 998 for linea in lineas))
+        # Un punto al inicio de línea se duplica para que no termine el DATA
+        self.assertIn(b'\r\n..linea con punto\r\n', datos)
+
+    def test_adjunto_intacto_con_cualquier_bloque(self):
+        for tamano_bloque in (57, 57 * 10, 57 * 1024):
+            with self.subTest(tamano_bloque=tamano_bloque):
+                datos = self._datos(tamano_bloque).replace(b'\r\n..', b'\r\n.')
+                msg = email.message_from_bytes(datos, policy=policy.default)
+
+                self.assertEqual(msg['Subject'], 'Cotización COT-MT-25-01-00001')
+                html, adjunto = list(msg.iter_parts())
+                self.assertIn('.linea con punto', html.get_content())
+                self.assertEqual(adjunto.get_filename(), 'COT-MT-25-01-00001.pdf')
+                self.assertEqual(adjunto.get_content(), self.contenido)
+
+                estadisticas = self.mensaje.estadisticas
+                self.assertEqual(estadisticas['bytes_pdf'], len(self.contenido))
+                self.assertEqual(estadisticas['bytes_enviados'], len(self._datos(tamano_bloque)))
+
+    def test_tamano_estimado(self):
+        self.assertAlmostEqual(self.mensaje.tamano(), len(self._datos(57 * 1024)), delta=80)
+
+
+if __name__ == '__main__':
+    unittest.main()
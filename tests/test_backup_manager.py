@@ -0,0 +1,126 @@
+"""
+test_backup_manager.py - Respaldos en línea mientras otra conexión escribe
+
+Ejecutar con:
+    python -m unittest discover tests
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.backup_manager import BackupManager
+
+# Tiempo máximo para un respaldo antes de darlo por colgado (s)
+LIMITE_RESPALDO = 60
+
+
+class TestRespaldoEnLinea(unittest.TestCase):
+    """La copia termina y es consistente aunque la base se escriba sin parar"""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp(prefix='test_respaldos_')
+        self.db_path = os.path.join(self.carpeta, 'airsolutions.db')
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE clientes (id_cliente INTEGER PRIMARY KEY, notas TEXT)")
+        conn.execute("CREATE TABLE contador (n INTEGER)")
+        conn.execute("INSERT INTO contador VALUES (0)")
+        # Unas 5000 páginas: varios pasos de copia
+        conn.executemany(
+            "INSERT INTO clientes (notas) VALUES (?)",
+            (('x' * 3500,) for _ in range(5000))
+        )
+        conn.commit()
+        conn.close()
+
+        self.gestor = BackupManager(self.db_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+    def _con_escritor(self, funcion, pausa=0):
+        """Ejecuta funcion() mientras otro hilo confirma un UPDATE tras otro"""
+        detener = threading.Event()
+        escrituras = []
+
+        def escribir():
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            while not detener.is_set():
+                conn.execute("UPDATE contador SET n = n + 1")
+                conn.commit()
+                escrituras.append(1)
+                if pausa:
+                    time.sleep(pausa)
+            conn.close()
+
+        escritor = threading.Thread(target=escribir, daemon=True)
+        escritor.start()
+
+        resultado = {}
+
+        def ejecutar():
+            try:
+                resultado['valor'] = funcion()
+            except Exception as e:
+                resultado['error'] = e
+
+        hilo = threading.Thread(target=ejecutar, daemon=True)
+        hilo.start()
+        hilo.join(LIMITE_RESPALDO)
+        detener.set()
+        escritor.join(10)
+
+        self.assertFalse(hilo.is_alive(), "El respaldo no terminó con escrituras continuas")
+        self.assertNotIn('error', resultado)
+        self.assertTrue(escrituras, "El escritor no llegó a escribir")
+        return resultado['valor']
+
+    def test_copia_termina_con_escrituras_continuas(self):
+        destino = os.path.join(self.carpeta, 'copia.db')
+        avance = []
+
+        paginas = self._con_escritor(lambda: self.gestor._copiar_en_linea(
+            destino, progreso=lambda hechos, total, etapa: avance.append((hechos, total))
+        ))
+
+        self.assertGreater(paginas, 1024)
+        self.assertEqual(avance[-1][0], avance[-1][1])
+
+        conn = sqlite3.connect(destino)
+        try:
+            self.assertEqual(conn.execute("PRAGMA integrity_check").fetchone()[0], 'ok')
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM clientes").fetchone()[0], 5000)
+        finally:
+            conn.close()
+
+    def test_respaldos_con_escrituras_frecuentes(self):
+        # Un escritor más realista: una transacción cada 20 ms
+        exito, ruta = self._con_escritor(lambda: self.gestor.crear_backup("prueba"), pausa=0.02)
+        self.assertTrue(exito, ruta)
+        self.assertTrue(os.path.exists(ruta))
+
+        exito, ruta = self._con_escritor(
+            lambda: self.gestor.crear_backup_incremental("prueba"), pausa=0.02
+        )
+        self.assertTrue(exito, ruta)
+
+        restaurada = os.path.join(self.carpeta, 'restaurada.db')
+        self.gestor._reconstruir(ruta, restaurada)
+        conn = sqlite3.connect(restaurada)
+        try:
+            self.assertEqual(conn.execute("PRAGMA integrity_check").fetchone()[0], 'ok')
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM clientes").fetchone()[0], 5000)
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
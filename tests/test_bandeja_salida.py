@@ -0,0 +1,133 @@
+"""
+test_bandeja_salida.py - Entrega de la bandeja de salida con varios repartidores
+
+Ejecutar con:
+    python -m unittest discover tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import DatabaseManager
+from utils.bandeja_salida import BandejaSalida, RepartidorCorreo, FORMATO_FECHA
+from utils.email_manager import cerrar_pools
+from utils.encryption import encriptar_password
+from tests.smtp_local import ServidorSMTPLocal, clave_temporal
+
+
+class TestBandejaSalida(unittest.TestCase):
+    """Cada email se envía una sola vez aunque haya dos aplicaciones abiertas"""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp(prefix='test_bandeja_')
+        self.servidor = ServidorSMTPLocal(retardo=0.02).iniciar()
+        clave = clave_temporal(self.carpeta)
+        clave.start()
+        self.addCleanup(clave.stop)
+
+        self.db = DatabaseManager(os.path.join(self.carpeta, 'airsolutions.db'))
+        self.db.conectar()
+        self.db.crear_tablas()
+        self.db.insertar_datos_iniciales()
+        self.db.migrar_esquema()
+        for clave, valor in (
+            ('smtp_server', '127.0.0.1'), ('smtp_port', str(self.servidor.puerto)),
+            ('email_remitente', 'ventas@airsolutions.test'), ('email_password', encriptar_password('clave')),
+        ):
+            self.db.cursor.execute(
+                "INSERT OR REPLACE INTO configuracion (clave, valor) VALUES (?, ?)", (clave, valor)
+            )
+        self.db.conn.commit()
+
+        self.pdf = os.path.join(self.carpeta, 'cotizacion.pdf')
+        with open(self.pdf, 'wb') as archivo:
+            archivo.write(b'%PDF-1.4\n% prueba\n')
+
+        self.bandeja = BandejaSalida(self.db)
+        self.repartidores = []
+
+    def tearDown(self):
+        for repartidor in self.repartidores:
+            repartidor.detener()
+        cerrar_pools()
+        self.db.desconectar()
+        self.servidor.detener()
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+    def _repartidor(self):
+        repartidor = RepartidorCorreo(self.db.db_path, intervalo=1, tamano_tanda=10)
+        self.repartidores.append(repartidor)
+        return repartidor
+
+    def _esperar_vacia(self, limite=60):
+        fin = time.monotonic() + limite
+        while time.monotonic() < fin:
+            resumen = self.bandeja.resumen()
+            if not resumen['pendiente'] and not resumen['enviando']:
+                return resumen
+            time.sleep(0.1)
+        self.fail(f"La bandeja no se vació: {self.bandeja.resumen()}")
+
+    def test_entrega_los_pendientes(self):
+        destinos = [f'cliente{n}@ejemplo.test' for n in range(10)]
+        for n, destino in enumerate(destinos):
+            self.bandeja.encolar(destino, f'Cliente {n}', f'COT-{n}', self.pdf)
+
+        self._repartidor().iniciar()
+
+        resumen = self._esperar_vacia()
+        self.assertEqual(resumen['enviado'], len(destinos))
+        self.assertEqual(sorted(self.servidor.destinatarios()), sorted(destinos))
+
+    def test_dos_repartidores_no_duplican_envios(self):
+        destinos = [f'cliente{n}@ejemplo.test' for n in range(40)]
+        for n, destino in enumerate(destinos):
+            self.bandeja.encolar(destino, f'Cliente {n}', f'COT-{n}', self.pdf)
+
+        # Dos aplicaciones abiertas sobre la misma base
+        for repartidor in (self._repartidor(), self._repartidor()):
+            repartidor.iniciar()
+
+        resumen = self._esperar_vacia()
+        self.assertEqual(resumen['enviado'], len(destinos))
+        self.assertEqual(sorted(self.servidor.destinatarios()), sorted(destinos))
+
+    def test_solo_se_recuperan_envios_vencidos(self):
+        vencido = self.bandeja.encolar('vencido@ejemplo.test', 'A', 'COT-A', self.pdf)
+        vigente = self.bandeja.encolar('vigente@ejemplo.test', 'B', 'COT-B', self.pdf)
+        for id_mensaje, plazo in ((vencido, -60), (vigente, 600)):
+            self.db.cursor.execute('''
+                UPDATE bandeja_salida SET estado = 'enviando', proximo_intento = ?
+                WHERE id_mensaje = ?
+            ''', ((datetime.now() + timedelta(seconds=plazo)).strftime(FORMATO_FECHA), id_mensaje))
+        self.db.conn.commit()
+
+        self.assertEqual(RepartidorCorreo.recuperar_interrumpidos(self.db), 1)
+        estados = dict(
+            (fila[0], fila[3]) for fila in self.bandeja.listar()
+        )
+        self.assertEqual(estados[vencido], 'pendiente')
+        self.assertEqual(estados[vigente], 'enviando')
+
+    def test_error_temporal_se_reintenta(self):
+        self.servidor.fallar = 1
+        id_mensaje = self.bandeja.encolar('cliente@ejemplo.test', 'Cliente', 'COT-1', self.pdf)
+
+        repartidor = self._repartidor()
+        repartidor.espera_base = 0.5
+        repartidor.iniciar()
+
+        resumen = self._esperar_vacia()
+        self.assertEqual(resumen['enviado'], 1)
+        self.assertEqual([exito for _, exito, _, _ in self.bandeja.intentos(id_mensaje)], [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+test_importacion_excel.py - Vista previa de la importación de proyectos desde Excel
+
+Ejecutar con:
+    python -m unittest discover tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from openpyxl import load_workbook
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import DatabaseManager
+from utils.excel_manager import ExcelManager
+
+
+class TestImportacionExcel(unittest.TestCase):
+    """Solo se escriben las diferencias y un Excel sin cambios no toca la base"""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp(prefix='test_excel_')
+        self.db = DatabaseManager(os.path.join(self.carpeta, 'airsolutions.db'))
+        self.db.conectar()
+        self.db.crear_tablas()
+        self.db.migrar_esquema()
+
+        cursor = self.db.cursor
+        cursor.execute("INSERT INTO clientes (nombre_empresa) VALUES ('Cliente')")
+        cursor.execute('''
+            INSERT INTO proyectos (numero_proyecto, nombre_proyecto, id_cliente)
+            VALUES ('PROY-25-0001', 'Edificio', ?)
+        ''', (cursor.lastrowid,))
+        self.id_proyecto = cursor.lastrowid
+        cursor.execute('''
+            INSERT INTO proyecto_niveles (id_proyecto, codigo_nivel, nombre_nivel, orden)
+            VALUES (?, 'N1', 'Primer piso', 1)
+        ''', (self.id_proyecto,))
+        id_nivel = cursor.lastrowid
+        cursor.executemany('''
+            INSERT INTO proyecto_items (id_nivel, especificacion, descripcion, cantidad,
+                                        unidad, costo_equipo, costo_materiales,
+                                        costo_mano_obra, total_item, orden)
+            VALUES (?, ?, ?, ?, 'unidad', ?, 10, 5, ?, ?)
+        ''', [(id_nivel, f'EQ-{n}', f'Equipo {n}', n, 100 * n, (100 * n + 15) * n, n)
+              for n in range(1, 4)])
+        self.db.conn.commit()
+
+        self.gestor = ExcelManager(self.db)
+        self.ruta = self.gestor.exportar_proyecto(self.id_proyecto, carpeta=self.carpeta)
+
+    def tearDown(self):
+        self.db.desconectar()
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+    def _editar_cantidad(self, especificacion, cantidad):
+        wb = load_workbook(self.ruta)
+        for fila in wb.active.iter_rows():
+            if fila[1].value == especificacion:
+                fila[3].value = cantidad
+        wb.save(self.ruta)
+
+    def test_reimportar_sin_cambios_no_escribe(self):
+        exito, cambios = self.gestor.previsualizar_importacion(self.id_proyecto, self.ruta)
+        self.assertTrue(exito, cambios)
+        self.assertEqual((cambios.agregados, cambios.actualizados, cambios.faltantes), ([], [], []))
+        self.assertEqual(cambios.sin_cambios, 3)
+
+        antes = self.db.conn.total_changes
+        exito, _ = self.gestor.aplicar_cambios(cambios)
+        self.assertTrue(exito)
+        self.assertEqual(self.db.conn.total_changes, antes)
+
+    def test_diferencias_por_campo(self):
+        self._editar_cantidad('EQ-2', 5)
+
+        exito, cambios = self.gestor.previsualizar_importacion(self.id_proyecto, self.ruta)
+        self.assertTrue(exito, cambios)
+        self.assertEqual(cambios.sin_cambios, 2)
+        self.assertEqual(len(cambios.actualizados), 1)
+        _, codigo_nivel, especificacion, _, diferencias = cambios.actualizados[0]
+        self.assertEqual((codigo_nivel, especificacion), ('N1', 'EQ-2'))
+        self.assertEqual(diferencias, {'cantidad': (2, 5)})
+
+        exito, mensaje = self.gestor.aplicar_cambios(cambios)
+        self.assertTrue(exito, mensaje)
+        self.db.cursor.execute('''
+            SELECT cantidad, total_item FROM proyecto_items WHERE especificacion = 'EQ-2'
+        ''')
+        self.assertEqual(self.db.cursor.fetchone(), (5, 215 * 5))
+        self.db.cursor.execute(
+            "SELECT total_proyecto FROM proyectos WHERE id_proyecto = ?", (self.id_proyecto,)
+        )
+        self.assertEqual(self.db.cursor.fetchone()[0], 115 + 215 * 5 + 315 * 3)
+
+        # Aplicado el cambio, el mismo archivo ya no tiene diferencias
+        exito, cambios = self.gestor.previsualizar_importacion(self.id_proyecto, self.ruta)
+        self.assertFalse(cambios.hay_cambios())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+test_lineas_cotizacion.py - Migración del detalle antiguo a cotizacion_lineas
+
+Ejecutar con:
+    python -m unittest discover tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import DatabaseManager
+from models.cotizaciones import cargar_lineas
+
+
+class TestMigracionLineas(unittest.TestCase):
+    """Las líneas de las tablas antiguas se copian una sola vez y se leen igual"""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp(prefix='test_lineas_')
+        self.db = DatabaseManager(os.path.join(self.carpeta, 'airsolutions.db'))
+        self.db.conectar()
+        self.db.crear_tablas()
+
+        cursor = self.db.cursor
+        cursor.execute("INSERT INTO clientes (nombre_empresa) VALUES ('Cliente')")
+        id_cliente = cursor.lastrowid
+        cursor.execute('''
+            INSERT INTO productos_equipos (tipo_equipo, categoria) VALUES ('Split 12000 BTU', 'Split')
+        ''')
+        id_equipo = cursor.lastrowid
+        cursor.execute("INSERT INTO materiales_repuestos (nombre_material) VALUES ('Gas R410A')")
+        id_material = cursor.lastrowid
+        cursor.execute('''
+            INSERT INTO cotizaciones (numero_cotizacion, id_cliente, fecha_emision)
+            VALUES ('COT-MT-25-01-00001', ?, '2025-01-15')
+        ''', (id_cliente,))
+        self.id_cotizacion = cursor.lastrowid
+
+        # Detalle con el esquema anterior: una tabla por categoría
+        cursor.execute('''
+            INSERT INTO detalle_cotizacion (id_cotizacion, id_equipo, cantidad,
+                                            horas_por_equipo, precio_unitario, subtotal)
+            VALUES (?, ?, 2, 1.5, 60, 120)
+        ''', (self.id_cotizacion, id_equipo))
+        cursor.executemany('''
+            INSERT INTO cotizacion_materiales (id_cotizacion, id_material, cantidad,
+                                               precio_unitario, subtotal)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(self.id_cotizacion, id_material, 1, 25, 25),
+              (self.id_cotizacion, id_material, 3, 25, 75)])
+        cursor.execute('''
+            INSERT INTO gastos_adicionales (id_cotizacion, concepto, monto)
+            VALUES (?, 'Viáticos', 40)
+        ''', (self.id_cotizacion,))
+        cursor.execute('''
+            CREATE TABLE cotizacion_ductos (
+                id_cotizacion INTEGER, tipo_ducto TEXT, largo_suministro REAL,
+                largo_retorno REAL, precio_unitario REAL, subtotal REAL
+            )
+        ''')
+        cursor.execute('''
+            INSERT INTO cotizacion_ductos VALUES (?, 'Ducto flexible 8"', 10, 6, 5, 80)
+        ''', (self.id_cotizacion,))
+        self.db.conn.commit()
+
+    def tearDown(self):
+        self.db.desconectar()
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+    def test_copia_el_detalle_antiguo(self):
+        self.assertTrue(self.db.migrar_esquema())
+
+        detalle = cargar_lineas(self.db.cursor, self.id_cotizacion)
+        self.assertEqual(detalle['equipo'], [('Split 12000 BTU', 2, 1.5, 120)])
+        self.assertEqual(detalle['ducto'], [('Ducto flexible 8"', 10, 6, 5, 80)])
+        self.assertEqual(detalle['material'], [('Gas R410A', 1, 25, 25), ('Gas R410A', 3, 25, 75)])
+        self.assertEqual(detalle['gasto'], [('Viáticos', 40)])
+        self.assertEqual(detalle['difusor'], [])
+
+    def test_la_copia_no_se_repite(self):
+        self.assertTrue(self.db.migrar_esquema())
+        self.assertTrue(self.db.migrar_esquema())
+
+        self.db.cursor.execute(
+            "SELECT COUNT(*) FROM cotizacion_lineas WHERE id_cotizacion = ?", (self.id_cotizacion,)
+        )
+        self.assertEqual(self.db.cursor.fetchone()[0], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
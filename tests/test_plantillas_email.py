@@ -0,0 +1,50 @@
+"""
+test_plantillas_email.py - Escapado de los campos en las plantillas de email
+
+Ejecutar con:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.plantillas_email import PlantillaEmail, VALORES_EJEMPLO
+
+
+class TestPlantillaEmail(unittest.TestCase):
+    """Los valores se escapan en el cuerpo HTML y no en el asunto"""
+
+    def setUp(self):
+        self.plantilla = PlantillaEmail(
+            "Cotización {{numero_cotizacion}} para {{cliente}}",
+            "<p>Estimado {{ cliente }}:</p>{{mensaje}}<p>{{total}}</p>",
+        )
+        self.valores = dict(VALORES_EJEMPLO, cliente='Frío & Calor <S.A.>', total='$1,130.00')
+
+    def test_valores_escapados_en_el_cuerpo(self):
+        asunto, cuerpo = self.plantilla.renderizar(self.valores)
+
+        self.assertEqual(asunto, f"Cotización {VALORES_EJEMPLO['numero_cotizacion']} para Frío & Calor <S.A.>")
+        self.assertEqual(cuerpo, "<p>Estimado Frío &amp; Calor &lt;S.A.&gt;:</p><p>$1,130.00</p>")
+
+    def test_mensaje_personalizado_escapado(self):
+        _, cuerpo = self.plantilla.renderizar(
+            self.valores, "Hola {{cliente}},\n<b>oferta</b> {{desconocido}}"
+        )
+
+        self.assertIn(
+            "<div class='mensaje-personalizado'>Hola Frío &amp; Calor &lt;S.A.&gt;,<br>"
+            "&lt;b&gt;oferta&lt;/b&gt; {{desconocido}}</div>",
+            cuerpo
+        )
+
+    def test_campo_desconocido_en_la_plantilla(self):
+        with self.assertRaises(ValueError):
+            PlantillaEmail("Cotización {{numero}}", "<p>{{cliente}}</p>")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+test_respaldos_incrementales.py - Bloques compartidos entre respaldos incrementales
+
+Ejecutar con:
+    python -m unittest discover tests
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.backup_manager import BackupManager
+
+
+class TestRespaldosIncrementales(unittest.TestCase):
+    """Un respaldo incremental solo guarda los bloques que cambiaron"""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp(prefix='test_incrementales_')
+        self.db_path = os.path.join(self.carpeta, 'airsolutions.db')
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE clientes (id_cliente INTEGER PRIMARY KEY, notas TEXT)")
+        # Unos 2 MB, con contenido distinto en cada página
+        conn.executemany(
+            "INSERT INTO clientes (notas) VALUES (?)",
+            ((f'{n:06d}' * 500,) for n in range(600))
+        )
+        conn.commit()
+        conn.close()
+
+        self.gestor = BackupManager(self.db_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+    def _respaldo(self):
+        exito, ruta = self.gestor.crear_backup_incremental(pausa=0)
+        self.assertTrue(exito, ruta)
+        # El nombre lleva la hora con segundos
+        time.sleep(1.05)
+        return ruta, self.gestor._leer_manifiesto(ruta)
+
+    def _notas(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute("SELECT notas FROM clientes ORDER BY id_cliente").fetchall()
+        finally:
+            conn.close()
+
+    def _bloques_en_disco(self):
+        return sum(len(archivos) for _, _, archivos in os.walk(self.gestor.bloques_dir))
+
+    def test_solo_se_guardan_los_bloques_nuevos(self):
+        primero, manifiesto_1 = self._respaldo()
+        self.assertGreater(len(manifiesto_1['bloques']), 10)
+        self.assertEqual(manifiesto_1['bloques_nuevos'], len(set(manifiesto_1['bloques'])))
+
+        # Sin cambios no se agrega ningún bloque
+        _, manifiesto_2 = self._respaldo()
+        self.assertEqual(manifiesto_2['bloques'], manifiesto_1['bloques'])
+        self.assertEqual(manifiesto_2['bloques_nuevos'], 0)
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("UPDATE clientes SET notas = 'modificado' WHERE id_cliente = 300")
+        conn.commit()
+        conn.close()
+        esperado = self._notas()
+
+        tercero, manifiesto_3 = self._respaldo()
+        self.assertEqual(len(manifiesto_3['bloques']), len(manifiesto_1['bloques']))
+        self.assertLessEqual(manifiesto_3['bloques_nuevos'], 2)
+        self.assertEqual(self._bloques_en_disco(),
+                         len(set(manifiesto_1['bloques']) | set(manifiesto_3['bloques'])))
+
+        # Al borrar el primero se conservan los bloques que todavía se usan
+        exito, mensaje = self.gestor.eliminar_backup(primero)
+        self.assertTrue(exito, mensaje)
+        self.assertEqual(self._bloques_en_disco(),
+                         len(set(manifiesto_2['bloques']) | set(manifiesto_3['bloques'])))
+
+        exito, mensaje = self.gestor.restaurar_backup(tercero)
+        self.assertTrue(exito, mensaje)
+        self.assertEqual(self._notas(), esperado)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,302 @@
+"""
+adjuntos_email.py - Emails con PDF adjunto enviados por partes
+
+Armar el email con MIMEBase y msg.as_string() deja en memoria el PDF, su
+copia en base64 y el mensaje completo: con los PDFs de proyectos con planos
+son tres copias de varios MB por envío. Aquí:
+- Solo el encabezado y el cuerpo HTML (pocos KB) se arman en memoria
+- El PDF se lee y se codifica en base64 por bloques, que se escriben
+  directamente en el socket SMTP durante el comando DATA
+- Opcionalmente se reduce el PDF antes de adjuntarlo (imágenes a JPEG de
+  menor resolución y contenido comprimido) con pypdf, si está instalado
+
+Cada mensaje informa los bytes enviados y el tiempo de lectura y
+codificación del adjunto.
+"""
+
+import base64
+import os
+import re
+import smtplib
+import time
+import uuid
+from io import BytesIO
+from email.generator import BytesGenerator
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+try:
+    from pypdf import PdfWriter
+except ImportError:
+    PdfWriter = None
+
+# Bytes del PDF leídos por vez; múltiplo de 57 para que cada bloque sean
+# líneas base64 completas de 76 caracteres
+BLOQUE_LECTURA = 57 * 1024
+
+# Reducción de PDFs: PDFs más chicos que esto se adjuntan tal cual
+TAMANO_MINIMO_REDUCCION = 512 * 1024
+CALIDAD_JPEG = 70
+MAX_LADO_IMAGEN = 1600
+
+CRLF = b'\r\n'
+_FIN_DE_LINEA = re.compile(rb'\r\n|\n|\r(?!\n)')
+_PUNTO_INICIAL = re.compile(rb'^\.', re.MULTILINE)
+
+
+class DesconexionEnDatos(smtplib.SMTPServerDisconnected):
+    """
+    El servidor cerró la sesión después de empezar DATA
+
+    El mensaje pudo haber llegado, así que no se reintenta en otra sesión.
+    """
+
+
+def reduccion_disponible():
+    """True si está instalado pypdf para reducir los PDFs"""
+    return PdfWriter is not None
+
+
+def _a_smtp(datos):
+    """Fines de línea CRLF y puntos duplicados al inicio de línea (RFC 5321 4.5.2)"""
+    return _PUNTO_INICIAL.sub(b'..', _FIN_DE_LINEA.sub(CRLF, datos))
+
+
+class MensajeCotizacion:
+    """
+    Email con cuerpo HTML y un PDF adjunto, que se envía por partes
+
+    El adjunto se lee del disco cada vez que se recorre fragmentos(), así
+    que el mismo mensaje se puede reintentar.
+    """
+
+    def __init__(self, remitente, destino, asunto, cuerpo_html, pdf_path, nombre_adjunto=None):
+        """
+        Arma el encabezado y el cuerpo del mensaje
+
+        Args:
+            remitente: Valor del encabezado From
+            destino: Valor del encabezado To
+            asunto: Asunto
+            cuerpo_html: Cuerpo HTML
+            pdf_path: Ruta del PDF a adjuntar
+            nombre_adjunto: Nombre del archivo en el email (por defecto, el del PDF)
+        """
+        self.pdf_path = pdf_path
+        self.nombre_adjunto = nombre_adjunto or os.path.basename(pdf_path)
+        self.estadisticas = {'bytes_pdf': 0, 'bytes_enviados': 0, 'segundos_codificacion': 0.0}
+
+        # El adjunto lleva una marca en lugar del contenido; el mensaje se
+        # serializa una vez y se parte en lo que va antes y después de la marca
+        marca = f"ADJUNTO-{uuid.uuid4().hex}"
+        msg = MIMEMultipart()
+        msg['From'] = remitente
+        msg['To'] = destino
+        msg['Subject'] = asunto
+        msg.attach(MIMEText(cuerpo_html, 'html'))
+
+        parte = MIMEBase('application', 'pdf')
+        parte.set_payload(marca)
+        parte['Content-Transfer-Encoding'] = 'base64'
+        parte.add_header('Content-Disposition', 'attachment', filename=self.nombre_adjunto)
+        msg.attach(parte)
+
+        buffer = BytesIO()
+        BytesGenerator(buffer, mangle_from_=False).flatten(msg)
+        antes, despues = buffer.getvalue().split(marca.encode('ascii'))
+        self._antes = _a_smtp(antes)
+        self._despues = _a_smtp(despues)
+
+    def tamano(self):
+        """Tamaño aproximado del mensaje en bytes, sin leer el PDF"""
+        bytes_pdf = os.path.getsize(self.pdf_path)
+        lineas = -(-bytes_pdf // 57)
+        return len(self._antes) + lineas * 78 + len(self._despues)
+
+    def fragmentos(self, tamano_bloque=BLOQUE_LECTURA):
+        """
+        Genera el mensaje en formato SMTP (listo para DATA) por bloques
+
+        Actualiza self.estadisticas a medida que avanza.
+        """
+        estadisticas = {'bytes_pdf': 0, 'bytes_enviados': 0, 'segundos_codificacion': 0.0}
+        self.estadisticas = estadisticas
+
+        estadisticas['bytes_enviados'] += len(self._antes)
+        yield self._antes
+
+        with open(self.pdf_path, 'rb') as archivo:
+            primero = True
+            while True:
+                inicio = time.perf_counter()
+                bloque = archivo.read(tamano_bloque)
+                if not bloque:
+                    break
+                codificado = base64.encodebytes(bloque).rstrip(b'\n').replace(b'\n', CRLF)
+                if not primero:
+                    codificado = CRLF + codificado
+                primero = False
+                estadisticas['segundos_codificacion'] += time.perf_counter() - inicio
+                estadisticas['bytes_pdf'] += len(bloque)
+                estadisticas['bytes_enviados'] += len(codificado)
+                yield codificado
+
+        estadisticas['bytes_enviados'] += len(self._despues)
+        yield self._despues
+
+    def como_bytes(self):
+        """Mensaje completo en memoria (para pruebas o para guardarlo)"""
+        return b''.join(self.fragmentos())
+
+
+def enviar_por_partes(sesion, remitente, destinatarios, mensaje):
+    """
+    Envía un MensajeCotizacion escribiendo el adjunto en el socket por bloques
+
+    Sigue los pasos de smtplib.SMTP.sendmail (MAIL, RCPT, DATA) pero sin
+    tener el mensaje entero en memoria.
+
+    Args:
+        sesion: smtplib.SMTP autenticada
+        remitente: Dirección del remitente
+        destinatarios: Dirección o lista de direcciones
+        mensaje: MensajeCotizacion
+
+    Returns:
+        dict: Destinatarios rechazados (como smtplib.SMTP.sendmail)
+
+    Raises:
+        DesconexionEnDatos: Si la sesión se cortó después de enviar DATA
+    """
+    rechazados = iniciar_envio(sesion, remitente, destinatarios)
+
+    try:
+        codigo, respuesta = sesion.docmd('data')
+        if codigo != 354:
+            raise smtplib.SMTPDataError(codigo, respuesta)
+
+        for fragmento in mensaje.fragmentos():
+            sesion.send(fragmento)
+        sesion.send(b'.' + CRLF)
+
+        codigo, respuesta = sesion.getreply()
+    except smtplib.SMTPServerDisconnected as e:
+        raise DesconexionEnDatos(f"Se perdió la conexión durante DATA: {e}") from e
+    if codigo != 250:
+        raise smtplib.SMTPDataError(codigo, respuesta)
+    return rechazados
+
+
+def iniciar_envio(sesion, remitente, destinatarios):
+    """
+    Comandos MAIL y RCPT de un envío, hasta antes de DATA
+
+    Returns:
+        dict: Destinatarios rechazados (como smtplib.SMTP.sendmail)
+    """
+    if isinstance(destinatarios, str):
+        destinatarios = [destinatarios]
+
+    sesion.ehlo_or_helo_if_needed()
+    codigo, respuesta = sesion.mail(remitente)
+    if codigo != 250:
+        if codigo == 421:
+            sesion.close()
+        raise smtplib.SMTPSenderRefused(codigo, respuesta, remitente)
+
+    rechazados = {}
+    for destinatario in destinatarios:
+        codigo, respuesta = sesion.rcpt(destinatario)
+        if codigo not in (250, 251):
+            rechazados[destinatario] = (codigo, respuesta)
+        if codigo == 421:
+            sesion.close()
+            raise smtplib.SMTPRecipientsRefused(rechazados)
+    if len(rechazados) == len(destinatarios):
+        raise smtplib.SMTPRecipientsRefused(rechazados)
+    return rechazados
+
+
+def ruta_pdf_reducido(pdf_path):
+    """Ruta de la versión reducida de un PDF (junto al original)"""
+    base, _ = os.path.splitext(pdf_path)
+    return f"{base}.reducido.pdf"
+
+
+def reducir_pdf(pdf_path, calidad=CALIDAD_JPEG, max_lado=MAX_LADO_IMAGEN,
+                tamano_minimo=TAMANO_MINIMO_REDUCCION):
+    """
+    Achica un PDF con muchas imágenes para adjuntarlo
+
+    Las imágenes RGB o en escala de grises se reescalan a max_lado píxeles
+    como máximo y se guardan como JPEG; el contenido de las páginas se
+    comprime. La versión reducida queda junto al original y se reutiliza
+    mientras el original no cambie. Si no se gana espacio, si pypdf no está
+    instalado o si algo falla, se usa el original.
+
+    Args:
+        pdf_path: Ruta del PDF
+        calidad: Calidad JPEG (1-95)
+        max_lado: Lado mayor máximo de las imágenes en píxeles
+        tamano_minimo: PDFs más chicos se adjuntan tal cual
+
+    Returns:
+        tuple: (ruta a adjuntar, estadísticas con bytes_original, bytes_final,
+                imagenes, segundos y reducido)
+    """
+    inicio = time.perf_counter()
+    bytes_original = os.path.getsize(pdf_path)
+    estadisticas = {
+        'bytes_original': bytes_original,
+        'bytes_final': bytes_original,
+        'imagenes': 0,
+        'segundos': 0.0,
+        'reducido': False,
+    }
+
+    if PdfWriter is None or bytes_original < tamano_minimo:
+        return pdf_path, estadisticas
+
+    destino = ruta_pdf_reducido(pdf_path)
+    if os.path.exists(destino) and os.path.getmtime(destino) >= os.path.getmtime(pdf_path):
+        estadisticas['bytes_final'] = os.path.getsize(destino)
+        estadisticas['reducido'] = True
+        return destino, estadisticas
+
+    temporal = f"{destino}.tmp"
+    try:
+        writer = PdfWriter(clone_from=pdf_path)
+        for pagina in writer.pages:
+            for imagen in pagina.images:
+                foto = imagen.image
+                # Las imágenes con transparencia o CMYK se dejan como están
+                if foto.mode not in ('RGB', 'L'):
+                    continue
+                if max(foto.size) > max_lado:
+                    foto.thumbnail((max_lado, max_lado))
+                imagen.replace(foto, quality=calidad)
+                estadisticas['imagenes'] += 1
+            pagina.compress_content_streams()
+
+        with open(temporal, 'wb') as archivo:
+            writer.write(archivo)
+
+        bytes_final = os.path.getsize(temporal)
+        if bytes_final >= bytes_original:
+            os.remove(temporal)
+            return pdf_path, estadisticas
+
+        os.replace(temporal, destino)
+        estadisticas['bytes_final'] = bytes_final
+        estadisticas['reducido'] = True
+        return destino, estadisticas
+
+    except Exception as e:
+        print(f"Error reduciendo PDF {pdf_path}: {e}")
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        return pdf_path, estadisticas
+
+    finally:
+        estadisticas['segundos'] = time.perf_counter() - inicio
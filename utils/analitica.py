@@ -0,0 +1,452 @@
+"""
+analitica.py - Exportación de instantáneas para análisis
+
+Gerencia analiza años de cotizaciones y proyectos en notebooks. Consultar
+airsolutions.db mientras la aplicación está abierta la bloquea, así que
+aquí se exportan instantáneas de las tablas de hechos a archivos
+comprimidos por columnas:
+- Copia la base con la API de respaldo de SQLite (un solo paso, bloqueo de
+  lectura breve) y lee la copia: todas las tablas salen del mismo instante
+  sin retener la base en uso
+- Lee por bloques de filas (fetchmany) y escribe cada bloque en cuanto
+  llega; la memoria no depende del tamaño de la tabla
+- Formato Parquet si pyarrow está instalado; si no, .npz de numpy (un
+  archivo por bloque) o CSV comprimido con gzip
+- Exportación incremental: solo las filas con fecha_modificacion desde la
+  última instantánea, más las filas eliminadas (migración 8)
+
+Cada instantánea es una carpeta con un archivo por tabla y un
+manifiesto.json; estado.json recuerda hasta dónde llegó la última.
+cargar_tabla() y reconstruir_tabla() leen las instantáneas desde pandas.
+"""
+
+import csv
+import gzip
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+CARPETA_ANALITICA = 'analitica'
+
+# Tablas exportadas (las de hechos y los clientes para poder cruzarlas)
+TABLAS = (
+    'clientes', 'cotizaciones', 'cotizacion_lineas',
+    'proyectos', 'proyecto_niveles', 'proyecto_items',
+)
+
+FORMATOS = ('parquet', 'npz', 'csv.gz')
+
+# Filas por bloque de lectura y escritura
+TAMANO_BLOQUE = 50000
+
+
+def formato_disponible():
+    """El formato más compacto que se puede escribir con lo instalado"""
+    if pa is not None:
+        return 'parquet'
+    if np is not None:
+        return 'npz'
+    return 'csv.gz'
+
+
+def _tipo_columna(tipo_declarado, obligatoria):
+    """Tipo de salida según la afinidad de SQLite: entero, real o texto"""
+    tipo = (tipo_declarado or '').upper()
+    if 'INT' in tipo:
+        # numpy no tiene enteros con NULL: los opcionales van como real
+        return 'entero' if obligatoria else 'real'
+    if any(t in tipo for t in ('REAL', 'FLOA', 'DOUB', 'NUMERIC', 'DECIMAL')):
+        return 'real'
+    return 'texto'
+
+
+def _a_numero(valor):
+    """Valor numérico o None (SQLite admite texto en columnas REAL)"""
+    if valor is None or isinstance(valor, (int, float)):
+        return valor
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+class _EscritorParquet:
+    """Un archivo .parquet por tabla, un row group por bloque"""
+
+    TIPOS = {'entero': 'int64', 'real': 'float64', 'texto': 'string'}
+
+    def __init__(self, carpeta, tabla, columnas, tipos):
+        self.ruta = os.path.join(carpeta, f"{tabla}.parquet")
+        self.columnas = columnas
+        self.tipos = tipos
+        self.esquema = pa.schema([
+            (columna, getattr(pa, self.TIPOS[tipo])())
+            for columna, tipo in zip(columnas, tipos)
+        ])
+        self.escritor = pq.ParquetWriter(self.ruta, self.esquema, compression='zstd')
+
+    def escribir(self, valores_columnas):
+        arreglos = []
+        for valores, tipo, campo in zip(valores_columnas, self.tipos, self.esquema):
+            try:
+                arreglos.append(pa.array(valores, type=campo.type))
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                if tipo == 'texto':
+                    valores = [None if v is None else str(v) for v in valores]
+                else:
+                    valores = [_a_numero(v) for v in valores]
+                arreglos.append(pa.array(valores, type=campo.type))
+        self.escritor.write_table(pa.Table.from_arrays(arreglos, schema=self.esquema))
+
+    def cerrar(self):
+        self.escritor.close()
+        return [self.ruta]
+
+
+class _EscritorNpz:
+    """Una carpeta por tabla con un .npz comprimido por bloque"""
+
+    def __init__(self, carpeta, tabla, columnas, tipos):
+        self.carpeta = os.path.join(carpeta, tabla)
+        os.makedirs(self.carpeta, exist_ok=True)
+        self.columnas = columnas
+        self.tipos = tipos
+        self.rutas = []
+
+    def escribir(self, valores_columnas):
+        arreglos = {}
+        for columna, valores, tipo in zip(self.columnas, valores_columnas, self.tipos):
+            if tipo == 'texto':
+                arreglos[columna] = np.array(['' if v is None else str(v) for v in valores], dtype=str)
+                continue
+            dtype = np.int64 if tipo == 'entero' else np.float64
+            try:
+                arreglos[columna] = np.array(valores, dtype=dtype)
+            except (TypeError, ValueError):
+                valores = [_a_numero(v) for v in valores]
+                if tipo == 'entero':
+                    valores = [0 if v is None else int(v) for v in valores]
+                arreglos[columna] = np.array(valores, dtype=dtype)
+
+        ruta = os.path.join(self.carpeta, f"parte_{len(self.rutas):05d}.npz")
+        np.savez_compressed(ruta, **arreglos)
+        self.rutas.append(ruta)
+
+    def cerrar(self):
+        return self.rutas
+
+
+class _EscritorCsv:
+    """Un archivo .csv.gz por tabla"""
+
+    def __init__(self, carpeta, tabla, columnas, tipos):
+        self.ruta = os.path.join(carpeta, f"{tabla}.csv.gz")
+        self.archivo = gzip.open(self.ruta, 'wt', encoding='utf-8', newline='')
+        self.csv = csv.writer(self.archivo)
+        self.csv.writerow(columnas)
+
+    def escribir(self, valores_columnas):
+        self.csv.writerows(zip(*valores_columnas))
+
+    def cerrar(self):
+        self.archivo.close()
+        return [self.ruta]
+
+
+ESCRITORES = {
+    'parquet': _EscritorParquet,
+    'npz': _EscritorNpz,
+    'csv.gz': _EscritorCsv,
+}
+
+
+class ExportadorAnalitico:
+    """Exporta instantáneas completas o incrementales de las tablas de hechos"""
+
+    def __init__(self, db_path, carpeta=None, formato=None, tamano_bloque=TAMANO_BLOQUE):
+        """
+        Inicializa el exportador
+
+        Args:
+            db_path: Ruta de la base de datos (ya migrada a la versión 8)
+            carpeta: Carpeta de instantáneas (por defecto, analitica/)
+            formato: 'parquet', 'npz' o 'csv.gz' (por defecto, el más
+                     compacto disponible)
+            tamano_bloque: Filas por bloque de lectura y escritura
+        """
+        formato = formato or formato_disponible()
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato desconocido: {formato}")
+        if formato == 'parquet' and pa is None:
+            raise ValueError("El formato parquet requiere pyarrow")
+        if formato == 'npz' and np is None:
+            raise ValueError("El formato npz requiere numpy")
+
+        self.db_path = db_path
+        self.carpeta = carpeta or CARPETA_ANALITICA
+        self.formato = formato
+        self.tamano_bloque = tamano_bloque
+        self.ruta_estado = os.path.join(self.carpeta, 'estado.json')
+
+    def leer_estado(self):
+        """Estado de la última instantánea ({'hasta', 'instantanea'}) o None"""
+        if not os.path.exists(self.ruta_estado):
+            return None
+        with open(self.ruta_estado, encoding='utf-8') as f:
+            return json.load(f)
+
+    def exportar(self, incremental=False, progreso=None):
+        """
+        Exporta una instantánea
+
+        Args:
+            incremental: Solo las filas modificadas o eliminadas desde la
+                         última instantánea (si no hay ninguna, es completa)
+            progreso: Función opcional progreso(tabla, filas_acumuladas)
+
+        Returns:
+            dict: Estadísticas (tipo, formato, carpeta, desde, hasta, tablas,
+                  filas, eliminadas, bytes, segundos_copia, segundos,
+                  filas_por_segundo)
+        """
+        inicio = time.perf_counter()
+        estado = self.leer_estado()
+        tipo = 'incremental' if incremental and estado else 'completa'
+        desde = estado['hasta'] if tipo == 'incremental' else None
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        carpeta = os.path.join(self.carpeta, f"{timestamp}_{tipo}")
+        n = 2
+        while os.path.exists(carpeta):
+            carpeta = os.path.join(self.carpeta, f"{timestamp}_{tipo}_{n}")
+            n += 1
+        os.makedirs(carpeta)
+
+        copia = self._copiar_base()
+        segundos_copia = time.perf_counter() - inicio
+
+        try:
+            conn = sqlite3.connect(copia)
+            try:
+                hasta = self._ultima_modificacion(conn) or desde
+                tablas = {}
+                for tabla in TABLAS:
+                    tablas[tabla] = self._exportar_tabla(
+                        conn, carpeta, tabla, tipo == 'incremental', desde, progreso
+                    )
+                if tipo == 'incremental':
+                    tablas['filas_eliminadas'] = self._exportar_tabla(
+                        conn, carpeta, 'filas_eliminadas', True, desde, progreso,
+                        columna_fecha='fecha'
+                    )
+            finally:
+                conn.close()
+        finally:
+            os.remove(copia)
+
+        manifiesto = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'tipo': tipo,
+            'formato': self.formato,
+            'base_datos': os.path.abspath(self.db_path),
+            'anterior': estado['instantanea'] if tipo == 'incremental' else None,
+            'desde': desde,
+            'hasta': hasta,
+            'tablas': tablas,
+        }
+        with open(os.path.join(carpeta, 'manifiesto.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+
+        # El estado se actualiza al final: si algo falla, la próxima
+        # incremental vuelve a partir de la instantánea anterior
+        with open(self.ruta_estado, 'w', encoding='utf-8') as f:
+            json.dump({'hasta': hasta, 'instantanea': os.path.basename(carpeta)}, f, indent=2)
+
+        segundos = time.perf_counter() - inicio
+        filas = sum(t['filas'] for nombre, t in tablas.items() if nombre != 'filas_eliminadas')
+        return {
+            'tipo': tipo,
+            'formato': self.formato,
+            'carpeta': carpeta,
+            'desde': desde,
+            'hasta': hasta,
+            'tablas': {nombre: t['filas'] for nombre, t in tablas.items()},
+            'filas': filas,
+            'eliminadas': tablas.get('filas_eliminadas', {}).get('filas', 0),
+            'bytes': sum(t['bytes'] for t in tablas.values()),
+            'segundos_copia': segundos_copia,
+            'segundos': segundos,
+            'filas_por_segundo': filas / segundos if segundos else 0,
+        }
+
+    def _copiar_base(self):
+        """
+        Copia la base a un archivo temporal con la API de respaldo de SQLite
+
+        La copia se hace en un solo paso, así que es consistente y el
+        bloqueo de lectura sobre la base en uso dura solo lo que tarda en
+        copiar las páginas; la exportación lee después la copia.
+        """
+        descriptor, copia = tempfile.mkstemp(suffix='.db', prefix='analitica_')
+        os.close(descriptor)
+
+        origen = sqlite3.connect(f"file:{os.path.abspath(self.db_path)}?mode=ro", uri=True)
+        destino = sqlite3.connect(copia)
+        try:
+            origen.backup(destino)
+        except sqlite3.Error:
+            destino.close()
+            os.remove(copia)
+            raise
+        finally:
+            origen.close()
+        destino.close()
+        return copia
+
+    @staticmethod
+    def _ultima_modificacion(conn):
+        """
+        Sello más reciente de la copia; es el 'desde' de la próxima incremental
+
+        La próxima incremental usa >=: las filas con el mismo sello se
+        exportan otra vez, nunca se pierden (reconstruir_tabla se queda con
+        la última versión de cada fila).
+        """
+        consultas = [f"SELECT MAX(fecha_modificacion) FROM {tabla}" for tabla in TABLAS]
+        consultas.append("SELECT MAX(fecha) FROM filas_eliminadas")
+        sellos = [conn.execute(consulta).fetchone()[0] for consulta in consultas]
+        sellos = [sello for sello in sellos if sello]
+        return max(sellos) if sellos else None
+
+    def _exportar_tabla(self, conn, carpeta, tabla, incremental, desde, progreso,
+                        columna_fecha='fecha_modificacion'):
+        """Exporta una tabla por bloques y devuelve su entrada del manifiesto"""
+        info = conn.execute(f"PRAGMA table_info({tabla})").fetchall()
+        columnas = [fila[1] for fila in info]
+        tipos = [_tipo_columna(fila[2], fila[3] or fila[5]) for fila in info]
+        clave = next((fila[1] for fila in info if fila[5]), None)
+
+        if not incremental:
+            cursor = conn.execute(f"SELECT * FROM {tabla} ORDER BY rowid")
+        elif desde is None:
+            # Sin sellos en la instantánea anterior: todo lo sellado es nuevo
+            cursor = conn.execute(
+                f"SELECT * FROM {tabla} WHERE {columna_fecha} IS NOT NULL ORDER BY rowid"
+            )
+        else:
+            cursor = conn.execute(
+                f"SELECT * FROM {tabla} WHERE {columna_fecha} >= ? ORDER BY rowid", (desde,)
+            )
+
+        escritor = ESCRITORES[self.formato](carpeta, tabla, columnas, tipos)
+        filas = 0
+        try:
+            while True:
+                bloque = cursor.fetchmany(self.tamano_bloque)
+                if not bloque:
+                    break
+                escritor.escribir(list(zip(*bloque)))
+                filas += len(bloque)
+                if progreso:
+                    progreso(tabla, filas)
+        finally:
+            rutas = escritor.cerrar()
+
+        return {
+            'filas': filas,
+            'clave': clave,
+            'columnas': dict(zip(columnas, tipos)),
+            'archivos': [os.path.relpath(ruta, carpeta) for ruta in rutas],
+            'bytes': sum(os.path.getsize(ruta) for ruta in rutas),
+        }
+
+
+def cargar_tabla(carpeta_instantanea, tabla):
+    """
+    Lee una tabla de una instantánea como DataFrame de pandas
+
+    Args:
+        carpeta_instantanea: Carpeta de la instantánea (con manifiesto.json)
+        tabla: Nombre de la tabla
+    """
+    import pandas as pd
+
+    with open(os.path.join(carpeta_instantanea, 'manifiesto.json'), encoding='utf-8') as f:
+        manifiesto = json.load(f)
+    entrada = manifiesto['tablas'][tabla]
+    rutas = [os.path.join(carpeta_instantanea, ruta) for ruta in entrada['archivos']]
+    columnas = list(entrada['columnas'])
+
+    if manifiesto['formato'] == 'parquet':
+        return pd.read_parquet(rutas[0])
+    if manifiesto['formato'] == 'npz':
+        partes = []
+        for ruta in rutas:
+            with np.load(ruta) as datos:
+                partes.append(pd.DataFrame({columna: datos[columna] for columna in columnas}))
+        if not partes:
+            return pd.DataFrame(columns=columnas)
+        return pd.concat(partes, ignore_index=True)
+    return pd.read_csv(rutas[0])
+
+
+def reconstruir_tabla(carpeta, tabla):
+    """
+    Estado de una tabla según la última instantánea completa y las
+    incrementales posteriores
+
+    Aplica en orden las filas modificadas (se queda con la última versión
+    de cada clave) y quita las eliminadas.
+
+    Args:
+        carpeta: Carpeta de instantáneas (la de ExportadorAnalitico)
+        tabla: Nombre de la tabla
+    """
+    import pandas as pd
+
+    cadena = []
+    for nombre in sorted(os.listdir(carpeta)):
+        ruta = os.path.join(carpeta, nombre)
+        if not os.path.exists(os.path.join(ruta, 'manifiesto.json')):
+            continue
+        with open(os.path.join(ruta, 'manifiesto.json'), encoding='utf-8') as f:
+            tipo = json.load(f)['tipo']
+        if tipo == 'completa':
+            cadena = [ruta]
+        elif cadena:
+            cadena.append(ruta)
+
+    if not cadena:
+        raise FileNotFoundError(f"No hay instantáneas completas en {carpeta}")
+
+    with open(os.path.join(cadena[0], 'manifiesto.json'), encoding='utf-8') as f:
+        clave = json.load(f)['tablas'][tabla]['clave']
+
+    resultado = cargar_tabla(cadena[0], tabla)
+    for ruta in cadena[1:]:
+        cambios = cargar_tabla(ruta, tabla)
+        eliminadas = cargar_tabla(ruta, 'filas_eliminadas')
+        eliminadas = eliminadas.loc[eliminadas['tabla'] == tabla, 'id_fila']
+
+        resultado = pd.concat([resultado, cambios], ignore_index=True)
+        resultado = resultado.drop_duplicates(subset=clave, keep='last')
+        # Una fila borrada y vuelta a insertar con el mismo id aparece en cambios
+        eliminadas = eliminadas[~eliminadas.isin(cambios[clave])]
+        resultado = resultado[~resultado[clave].isin(eliminadas)]
+
+    return resultado.sort_values(clave).reset_index(drop=True)
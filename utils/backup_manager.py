@@ -6,14 +6,56 @@ Permite:
 - Comprimir respaldos en ZIP
 - Restaurar desde respaldo
 - Listar y eliminar respaldos antiguos
+- Respaldos incrementales: solo se guarda lo que cambió desde el anterior
+
+Los respaldos se toman con la API de backup de SQLite mientras la
+aplicación sigue usando la base de datos: se copian unas cientos de
+páginas por paso con una pausa entre pasos, así que las escrituras no
+quedan bloqueadas, y si la base cambia durante la copia SQLite la
+reinicia, de modo que el respaldo siempre es una foto consistente.
+Copiar el archivo con shutil podía capturarlo a mitad de una transacción.
+
+Respaldos incrementales: la copia se parte en bloques alineados a las
+páginas de SQLite y cada bloque se guarda comprimido en backups/bloques/
+con su hash SHA-256 como nombre. Un bloque que ya está guardado (porque no
+cambió desde otro respaldo) no se vuelve a guardar, así que cada respaldo
+es un manifiesto JSON con la lista de bloques más los bloques nuevos.
+Restaurar vuelve a armar el archivo con los bloques del manifiesto.
 """
 
+import hashlib
+import json
 import os
 import shutil
+import threading
+import time
 import zipfile
+import zlib
 from datetime import datetime
 import sqlite3
 
+from utils.tareas import TareaCancelada
+
+# Páginas copiadas por paso (4 MB con páginas de 4 KB) y pausa entre pasos
+PAGINAS_POR_PASO = 1024
+PAUSA_ENTRE_PASOS = 0.005
+
+# Veces que se deja reiniciar la copia por escrituras de otras conexiones
+MAX_REINICIOS = 3
+
+# Bytes por escritura al comprimir el respaldo
+BLOQUE_COMPRESION = 1024 * 1024
+
+# Respaldos incrementales: bytes por bloque (múltiplo de cualquier tamaño de
+# página de SQLite) y nivel de compresión de cada bloque
+TAMANO_BLOQUE = 64 * 1024
+NIVEL_COMPRESION = 6
+VERSION_MANIFIESTO = 1
+
+
+class _CopiaReiniciada(Exception):
+    """La copia se reinició demasiadas veces por escrituras concurrentes"""
+
 
 class BackupManager:
     """Gestor de respaldos de la base de datos"""
@@ -35,20 +77,35 @@ class BackupManager:
         else:
             self.backup_dir = backup_dir
 
+        # Almacén de bloques de los respaldos incrementales
+        self.bloques_dir = os.path.join(self.backup_dir, 'bloques')
+
         # Crear directorio de backups si no existe
         if not os.path.exists(self.backup_dir):
             os.makedirs(self.backup_dir)
 
-    def crear_backup(self, descripcion=""):
+        # Mientras se guarda un respaldo incremental no se borran bloques
+        self._guardando = threading.Lock()
+
+    def crear_backup(self, descripcion="", progreso=None, paginas_por_paso=PAGINAS_POR_PASO,
+                     pausa=PAUSA_ENTRE_PASOS):
         """
         Crea un respaldo de la base de datos
 
+        Se puede llamar desde un hilo en segundo plano: usa su propia conexión.
+
         Args:
             descripcion: Descripción opcional del respaldo
+            progreso: Función opcional progreso(hechos, total, etapa), con
+                      etapa 'copia' (páginas) o 'compresion' (bytes)
+            paginas_por_paso: Páginas copiadas en cada paso
+            pausa: Segundos de espera entre pasos para no frenar las escrituras
 
         Returns:
             tuple: (éxito, ruta_backup o mensaje_error)
         """
+        backup_path = None
+        zip_path = None
         try:
             # Verificar que la base de datos existe
             if not os.path.exists(self.db_path):
@@ -60,20 +117,23 @@ class BackupManager:
             backup_path = os.path.join(self.backup_dir, backup_name)
 
             # Copiar base de datos
-            shutil.copy2(self.db_path, backup_path)
+            inicio = time.perf_counter()
+            paginas = self._copiar_en_linea(backup_path, progreso, paginas_por_paso, pausa)
+            segundos_copia = time.perf_counter() - inicio
 
             # Comprimir en ZIP
             zip_name = f"airsolutions_backup_{timestamp}.zip"
             zip_path = os.path.join(self.backup_dir, zip_name)
 
             with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                zipf.write(backup_path, backup_name)
+                self._comprimir(zipf, backup_path, backup_name, progreso)
 
                 # Agregar archivo de metadata
                 metadata = f"""Respaldo de AirSolutions
 Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 Descripción: {descripcion if descripcion else 'Respaldo manual'}
 Archivo DB: {backup_name}
+Páginas: {paginas} (copiadas en {segundos_copia:.1f} s)
 """
                 zipf.writestr('INFO.txt', metadata)
 
@@ -82,29 +142,336 @@ Archivo DB: {backup_name}
 
             return True, zip_path
 
+        except TareaCancelada:
+            self._descartar(backup_path, zip_path)
+            raise
+
         except Exception as e:
+            self._descartar(backup_path, zip_path)
             return False, f"Error al crear respaldo: {str(e)}"
 
+    def _descartar(self, *rutas):
+        """Elimina los archivos de un respaldo que no se terminó"""
+        for ruta in rutas:
+            if ruta and os.path.exists(ruta):
+                os.remove(ruta)
+
+    def _copiar_en_linea(self, destino, progreso=None, paginas_por_paso=PAGINAS_POR_PASO,
+                         pausa=PAUSA_ENTRE_PASOS):
+        """
+        Copia la base de datos a destino con la API de backup de SQLite
+
+        Entre pasos la base queda libre para las demás conexiones; si alguna
+        escribe, SQLite vuelve a empezar la copia en el paso siguiente. Si
+        la copia deja de avanzar más de MAX_REINICIOS veces (alguien escribe
+        sin parar), se termina en un solo paso: las escrituras esperan lo
+        que dure la copia, pero el respaldo termina.
+
+        Returns:
+            int: Páginas copiadas
+        """
+        reinicios = 0
+        copiadas = None
+
+        def paso(estado, restantes, total):
+            nonlocal reinicios, copiadas
+            hechas = total - restantes
+            # Tras un reinicio el paso vuelve a copiar las mismas primeras
+            # páginas: el avance queda igual o retrocede
+            if copiadas is not None and restantes and hechas <= copiadas:
+                reinicios += 1
+                if reinicios > MAX_REINICIOS:
+                    raise _CopiaReiniciada()
+            copiadas = hechas
+            if progreso:
+                progreso(hechas, total, 'copia')
+            if restantes and pausa:
+                time.sleep(pausa)
+
+        def paso_unico(estado, restantes, total):
+            if progreso:
+                progreso(total - restantes, total, 'copia')
+
+        origen = sqlite3.connect(self.db_path, timeout=30)
+        copia = sqlite3.connect(destino)
+        try:
+            # sleep es la espera de SQLite cuando otra conexión tiene la base
+            # bloqueada; la pausa entre pasos normales la hace paso()
+            try:
+                origen.backup(copia, pages=paginas_por_paso, progress=paso, sleep=max(pausa, 0.05))
+            except _CopiaReiniciada:
+                origen.backup(copia, pages=-1, progress=paso_unico, sleep=max(pausa, 0.05))
+            return copia.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            copia.close()
+            origen.close()
+
+    def _comprimir(self, zipf, ruta, nombre, progreso=None):
+        """Agrega un archivo al ZIP por bloques, informando el avance"""
+        total = os.path.getsize(ruta)
+        hechos = 0
+        with open(ruta, 'rb') as origen, zipf.open(nombre, 'w', force_zip64=True) as destino:
+            while True:
+                bloque = origen.read(BLOQUE_COMPRESION)
+                if not bloque:
+                    break
+                destino.write(bloque)
+                hechos += len(bloque)
+                if progreso:
+                    progreso(hechos, total, 'compresion')
+
+    def crear_backup_incremental(self, descripcion="", progreso=None,
+                                 paginas_por_paso=PAGINAS_POR_PASO, pausa=PAUSA_ENTRE_PASOS):
+        """
+        Crea un respaldo incremental de la base de datos
+
+        Se toma la misma copia en línea que en crear_backup y solo se guardan
+        los bloques que no estén ya en el almacén.
+
+        Args:
+            descripcion: Descripción opcional del respaldo
+            progreso: Función opcional progreso(hechos, total, etapa), con
+                      etapa 'copia' (páginas) o 'bloques' (bytes)
+            paginas_por_paso: Páginas copiadas en cada paso
+            pausa: Segundos de espera entre pasos para no frenar las escrituras
+
+        Returns:
+            tuple: (éxito, ruta_manifiesto o mensaje_error)
+        """
+        copia_path = None
+        manifiesto_path = None
+        try:
+            if not os.path.exists(self.db_path):
+                return False, "La base de datos no existe"
+
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            nombre = f"airsolutions_backup_{timestamp}"
+            copia_path = os.path.join(self.backup_dir, f"{nombre}.db")
+            manifiesto_path = os.path.join(self.backup_dir, f"{nombre}.json")
+
+            inicio = time.perf_counter()
+            self._copiar_en_linea(copia_path, progreso, paginas_por_paso, pausa)
+
+            with self._guardando:
+                manifiesto = self._guardar_bloques(copia_path, progreso)
+                manifiesto['fecha'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                manifiesto['descripcion'] = descripcion if descripcion else 'Respaldo manual'
+                manifiesto['segundos'] = round(time.perf_counter() - inicio, 2)
+
+                # El manifiesto se escribe al final: si falta, el respaldo no existe
+                temporal = f"{manifiesto_path}.tmp"
+                with open(temporal, 'w', encoding='utf-8') as archivo:
+                    json.dump(manifiesto, archivo)
+                os.replace(temporal, manifiesto_path)
+
+            os.remove(copia_path)
+            return True, manifiesto_path
+
+        except TareaCancelada:
+            self._descartar(copia_path, f"{manifiesto_path}.tmp" if manifiesto_path else None)
+            raise
+
+        except Exception as e:
+            self._descartar(copia_path, f"{manifiesto_path}.tmp" if manifiesto_path else None)
+            return False, f"Error al crear respaldo: {str(e)}"
+
+    def _ruta_bloque(self, hash_bloque):
+        """Ruta de un bloque en el almacén (subcarpeta por los dos primeros caracteres)"""
+        return os.path.join(self.bloques_dir, hash_bloque[:2], hash_bloque)
+
+    def _guardar_bloques(self, ruta, progreso=None):
+        """
+        Parte una copia de la base de datos en bloques y guarda los nuevos
+
+        Returns:
+            dict: Manifiesto (sin fecha ni descripción)
+        """
+        # Tamaño de página del encabezado de SQLite (bytes 16-17; 1 = 65536)
+        with open(ruta, 'rb') as archivo:
+            encabezado = archivo.read(100)
+        tamano_pagina = int.from_bytes(encabezado[16:18], 'big')
+        if tamano_pagina == 1:
+            tamano_pagina = 65536
+        if not encabezado.startswith(b'SQLite format 3\x00') or not tamano_pagina:
+            raise ValueError("La copia no es una base de datos SQLite")
+        tamano_bloque = max(TAMANO_BLOQUE, tamano_pagina)
+
+        total = os.path.getsize(ruta)
+        hash_total = hashlib.sha256()
+        bloques = []
+        bloques_nuevos = 0
+        bytes_nuevos = 0
+        hechos = 0
+
+        with open(ruta, 'rb') as archivo:
+            while True:
+                bloque = archivo.read(tamano_bloque)
+                if not bloque:
+                    break
+                hash_total.update(bloque)
+                hash_bloque = hashlib.sha256(bloque).hexdigest()
+                bloques.append(hash_bloque)
+
+                destino = self._ruta_bloque(hash_bloque)
+                if not os.path.exists(destino):
+                    datos = zlib.compress(bloque, NIVEL_COMPRESION)
+                    os.makedirs(os.path.dirname(destino), exist_ok=True)
+                    temporal = f"{destino}.tmp"
+                    with open(temporal, 'wb') as salida:
+                        salida.write(datos)
+                    os.replace(temporal, destino)
+                    bloques_nuevos += 1
+                    bytes_nuevos += len(datos)
+
+                hechos += len(bloque)
+                if progreso:
+                    progreso(hechos, total, 'bloques')
+
+        return {
+            'version': VERSION_MANIFIESTO,
+            'tamano': total,
+            'tamano_pagina': tamano_pagina,
+            'tamano_bloque': tamano_bloque,
+            'sha256': hash_total.hexdigest(),
+            'bloques': bloques,
+            'bloques_nuevos': bloques_nuevos,
+            'bytes_nuevos': bytes_nuevos,
+        }
+
+    def _leer_manifiesto(self, ruta):
+        with open(ruta, 'r', encoding='utf-8') as archivo:
+            manifiesto = json.load(archivo)
+        if manifiesto.get('version') != VERSION_MANIFIESTO:
+            raise ValueError(f"Versión de manifiesto no soportada: {manifiesto.get('version')}")
+        return manifiesto
+
+    def _reconstruir(self, manifiesto_path, destino):
+        """
+        Arma el archivo de la base de datos a partir de un manifiesto
+
+        Cada bloque se verifica con su hash y el archivo completo con el
+        hash del manifiesto.
+        """
+        manifiesto = self._leer_manifiesto(manifiesto_path)
+        hash_total = hashlib.sha256()
+
+        with open(destino, 'wb') as salida:
+            for hash_bloque in manifiesto['bloques']:
+                ruta = self._ruta_bloque(hash_bloque)
+                if not os.path.exists(ruta):
+                    raise ValueError(f"Falta el bloque {hash_bloque[:12]}")
+                with open(ruta, 'rb') as archivo:
+                    bloque = zlib.decompress(archivo.read())
+                if hashlib.sha256(bloque).hexdigest() != hash_bloque:
+                    raise ValueError(f"El bloque {hash_bloque[:12]} está dañado")
+                hash_total.update(bloque)
+                salida.write(bloque)
+
+        if hash_total.hexdigest() != manifiesto['sha256']:
+            raise ValueError("El archivo reconstruido no coincide con el respaldo")
+
+    def limpiar_bloques(self):
+        """
+        Elimina del almacén los bloques que ya no usa ningún respaldo
+
+        Returns:
+            tuple: (bloques eliminados, bytes liberados)
+        """
+        # Si se está guardando un respaldo, sus bloques todavía no están en
+        # ningún manifiesto: se limpian la próxima vez
+        if not self._guardando.acquire(blocking=False):
+            return 0, 0
+
+        try:
+            if not os.path.exists(self.bloques_dir):
+                return 0, 0
+
+            usados = set()
+            for archivo in os.listdir(self.backup_dir):
+                if archivo.endswith('.json') and archivo.startswith('airsolutions_backup_'):
+                    try:
+                        manifiesto = self._leer_manifiesto(os.path.join(self.backup_dir, archivo))
+                    except Exception as e:
+                        # Sin saber qué bloques usa, no se borra nada
+                        print(f"Error leyendo manifiesto {archivo}: {e}")
+                        return 0, 0
+                    usados.update(manifiesto['bloques'])
+
+            eliminados = 0
+            liberados = 0
+            for carpeta in os.listdir(self.bloques_dir):
+                ruta_carpeta = os.path.join(self.bloques_dir, carpeta)
+                for archivo in os.listdir(ruta_carpeta):
+                    if archivo not in usados:
+                        ruta = os.path.join(ruta_carpeta, archivo)
+                        liberados += os.path.getsize(ruta)
+                        os.remove(ruta)
+                        eliminados += 1
+
+            return eliminados, liberados
+        finally:
+            self._guardando.release()
+
+    def _tamanos(self, ruta):
+        """(bytes lógicos, bytes físicos) de un respaldo"""
+        if ruta.endswith('.json'):
+            manifiesto = self._leer_manifiesto(ruta)
+            return manifiesto['tamano'], manifiesto['bytes_nuevos'] + os.path.getsize(ruta)
+
+        with zipfile.ZipFile(ruta, 'r') as zipf:
+            logico = sum(info.file_size for info in zipf.infolist() if info.filename.endswith('.db'))
+        return logico, os.path.getsize(ruta)
+
+    def resumen_espacio(self):
+        """
+        Espacio de todos los respaldos
+
+        Returns:
+            dict: bytes_logicos (lo que ocuparían las bases restauradas) y
+                  bytes_fisicos (lo que ocupan en disco, incluido el almacén)
+        """
+        bytes_logicos = 0
+        bytes_fisicos = 0
+        for _, _, logico_mb, _, ruta in self.listar_backups():
+            bytes_logicos += logico_mb * 1024 * 1024
+            bytes_fisicos += os.path.getsize(ruta)
+
+        if os.path.exists(self.bloques_dir):
+            for carpeta, _, archivos in os.walk(self.bloques_dir):
+                bytes_fisicos += sum(os.path.getsize(os.path.join(carpeta, a)) for a in archivos)
+
+        return {'bytes_logicos': int(bytes_logicos), 'bytes_fisicos': bytes_fisicos}
+
     def listar_backups(self):
         """
         Lista todos los respaldos disponibles
 
+        El tamaño lógico es el de la base de datos respaldada; el físico, lo
+        que ocupa el respaldo en disco (en los incrementales, el manifiesto y
+        los bloques que agregó al almacén).
+
         Returns:
-            list: Lista de tuplas (nombre_archivo, fecha_creacion, tamaño_mb)
+            list: Lista de tuplas (nombre_archivo, fecha_creacion,
+                  tamaño_logico_mb, tamaño_fisico_mb, ruta)
         """
         try:
             backups = []
 
             for archivo in os.listdir(self.backup_dir):
-                if archivo.endswith('.zip') and archivo.startswith('airsolutions_backup_'):
+                if archivo.endswith(('.zip', '.json')) and archivo.startswith('airsolutions_backup_'):
                     ruta = os.path.join(self.backup_dir, archivo)
 
                     # Obtener información del archivo
-                    stats = os.stat(ruta)
-                    tamaño_mb = stats.st_size / (1024 * 1024)  # Convertir a MB
-                    fecha = datetime.fromtimestamp(stats.st_mtime)
+                    try:
+                        logico, fisico = self._tamanos(ruta)
+                    except Exception as e:
+                        print(f"Error leyendo respaldo {archivo}: {e}")
+                        continue
+                    fecha = datetime.fromtimestamp(os.path.getmtime(ruta))
 
-                    backups.append((archivo, fecha, tamaño_mb, ruta))
+                    backups.append((
+                        archivo, fecha, logico / (1024 * 1024), fisico / (1024 * 1024), ruta
+                    ))
 
             # Ordenar por fecha (más reciente primero)
             backups.sort(key=lambda x: x[1], reverse=True)
@@ -120,7 +487,7 @@ Archivo DB: {backup_name}
         Restaura la base de datos desde un respaldo
 
         Args:
-            backup_path: Ruta al archivo ZIP de respaldo
+            backup_path: Ruta al archivo ZIP o al manifiesto del respaldo
 
         Returns:
             tuple: (éxito, mensaje)
@@ -136,22 +503,34 @@ Archivo DB: {backup_name}
                 self.backup_dir,
                 f"pre_restore_backup_{timestamp}.db"
             )
-            shutil.copy2(self.db_path, backup_actual)
-
-            # Extraer el archivo de la base de datos del ZIP
-            with zipfile.ZipFile(backup_path, 'r') as zipf:
-                # Buscar el archivo .db dentro del ZIP
-                db_files = [f for f in zipf.namelist() if f.endswith('.db')]
+            # Con la API de backup: una copia del archivo con otra conexión
+            # escribiendo (el repartidor de correo) puede quedar inconsistente
+            self._copiar_en_linea(backup_actual, pausa=0)
+
+            temp_db = os.path.join(self.backup_dir, 'temp_restore.db')
+
+            if backup_path.endswith('.json'):
+                # Armar el archivo con los bloques del manifiesto
+                try:
+                    self._reconstruir(backup_path, temp_db)
+                except Exception as e:
+                    if os.path.exists(temp_db):
+                        os.remove(temp_db)
+                    return False, f"El respaldo está incompleto o dañado: {str(e)}"
+            else:
+                # Extraer el archivo de la base de datos del ZIP
+                with zipfile.ZipFile(backup_path, 'r') as zipf:
+                    # Buscar el archivo .db dentro del ZIP
+                    db_files = [f for f in zipf.namelist() if f.endswith('.db')]
 
-                if not db_files:
-                    return False, "No se encontró archivo de base de datos en el respaldo"
+                    if not db_files:
+                        return False, "No se encontró archivo de base de datos en el respaldo"
 
-                # Extraer a ubicación temporal
-                temp_db = os.path.join(self.backup_dir, 'temp_restore.db')
-                zipf.extract(db_files[0], self.backup_dir)
+                    # Extraer a ubicación temporal
+                    zipf.extract(db_files[0], self.backup_dir)
 
-                extracted_path = os.path.join(self.backup_dir, db_files[0])
-                shutil.move(extracted_path, temp_db)
+                    extracted_path = os.path.join(self.backup_dir, db_files[0])
+                    shutil.move(extracted_path, temp_db)
 
             # Verificar integridad del archivo extraído
             try:
@@ -178,6 +557,9 @@ Archivo DB: {backup_name}
         """
         Elimina un archivo de respaldo
 
+        Los bloques de un respaldo incremental que no usa ningún otro
+        respaldo se eliminan también.
+
         Args:
             backup_path: Ruta al archivo de respaldo
 
@@ -187,6 +569,8 @@ Archivo DB: {backup_name}
         try:
             if os.path.exists(backup_path):
                 os.remove(backup_path)
+                if backup_path.endswith('.json'):
+                    self.limpiar_bloques()
                 return True, "Respaldo eliminado correctamente"
             else:
                 return False, "El archivo no existe"
@@ -209,13 +593,16 @@ Archivo DB: {backup_name}
             eliminados = 0
 
             for archivo in os.listdir(self.backup_dir):
-                if archivo.endswith('.zip') and archivo.startswith('airsolutions_backup_'):
+                if archivo.endswith(('.zip', '.json')) and archivo.startswith('airsolutions_backup_'):
                     ruta = os.path.join(self.backup_dir, archivo)
 
                     if os.path.getmtime(ruta) < fecha_limite:
                         os.remove(ruta)
                         eliminados += 1
 
+            if eliminados:
+                self.limpiar_bloques()
+
             return eliminados, f"Se eliminaron {eliminados} respaldos antiguos"
 
         except Exception as e:
@@ -239,6 +626,18 @@ Archivo DB: {backup_name}
             info['tamaño_mb'] = stats.st_size / (1024 * 1024)
             info['fecha_creacion'] = datetime.fromtimestamp(stats.st_mtime)
 
+            if backup_path.endswith('.json'):
+                manifiesto = self._leer_manifiesto(backup_path)
+                info['metadata'] = (
+                    f"Respaldo incremental de AirSolutions\n"
+                    f"Fecha: {manifiesto['fecha']}\n"
+                    f"Descripción: {manifiesto['descripcion']}\n"
+                    f"Tamaño: {manifiesto['tamano']:,} bytes en {len(manifiesto['bloques'])} bloques "
+                    f"({manifiesto['bloques_nuevos']} nuevos, {manifiesto['bytes_nuevos']:,} bytes)\n"
+                )
+                info['archivos'] = [os.path.basename(backup_path)]
+                return info
+
             # Leer metadata del ZIP
             with zipfile.ZipFile(backup_path, 'r') as zipf:
                 if 'INFO.txt' in zipf.namelist():
@@ -0,0 +1,383 @@
+"""
+bandeja_salida.py - Bandeja de salida de emails con reintentos
+
+En lugar de enviar desde la ventana y mostrar un error si la red falla, los
+emails se encolan en la tabla bandeja_salida y un hilo repartidor los envía:
+- Encolar es un INSERT: la ventana no espera al servidor SMTP
+- Los errores temporales (red caída, 4xx del servidor) se reintentan con
+  espera exponencial; los permanentes (5xx, PDF inexistente) o agotar los
+  intentos dejan el email como 'fallido', y se puede reintentar a mano
+- Cada intento queda en bandeja_intentos con su error y duración
+- Un repartidor toma cada email con un UPDATE condicionado a que siga
+  'pendiente': si hay dos aplicaciones abiertas sobre la misma base, solo
+  una lo envía. Mientras está 'enviando', proximo_intento guarda hasta
+  cuándo le pertenece; si la aplicación se cerró a mitad de envío, pasado
+  ese plazo cualquier repartidor lo devuelve a 'pendiente'
+
+El repartidor abre su propia conexión a la base (las conexiones SQLite son
+del hilo que las crea) y envía con el pool SMTP compartido (email_manager).
+"""
+
+import os
+import random
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+
+from models.database import DatabaseManager
+from utils.email_manager import EmailManager
+
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+
+MAX_INTENTOS = 6
+
+# Espera antes del reintento n: ESPERA_BASE * 2^(n-1), hasta ESPERA_MAXIMA
+ESPERA_BASE = 30
+ESPERA_MAXIMA = 3600
+
+# Segundos entre revisiones de la bandeja cuando no hay nada que enviar
+INTERVALO_REVISION = 60
+
+# Emails que el repartidor toma por vuelta
+TAMANO_TANDA = 50
+
+# Segundos que un email 'enviando' pertenece al repartidor que lo tomó;
+# pasado ese plazo se da por interrumpido
+PLAZO_ENVIO = 600
+
+ESTADOS = ('pendiente', 'enviando', 'enviado', 'fallido', 'cancelado')
+
+# Despierta al repartidor cuando se encola un email
+_hay_trabajo = threading.Event()
+
+
+def espera_reintento(intentos, base=ESPERA_BASE, maxima=ESPERA_MAXIMA):
+    """Segundos hasta el próximo intento tras `intentos` fallidos (±10% al azar)"""
+    espera = min(base * 2 ** (intentos - 1), maxima)
+    return espera * random.uniform(0.9, 1.1)
+
+
+def es_error_permanente(error):
+    """True si reintentar no cambiaría el resultado"""
+    if isinstance(error, (FileNotFoundError, smtplib.SMTPNotSupportedError)):
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(codigo >= 500 for codigo, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        # Se reintenta: puede corregirse la configuración mientras tanto
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+def _ahora():
+    return datetime.now().strftime(FORMATO_FECHA)
+
+
+class BandejaSalida:
+    """Encola emails y consulta su estado (desde el hilo dueño de la conexión)"""
+
+    def __init__(self, db):
+        """
+        Args:
+            db: Instancia conectada de DatabaseManager
+        """
+        self.db = db
+
+    def encolar(self, email_destino, nombre_cliente, numero_cotizacion, pdf_path,
+                mensaje_personalizado="", max_intentos=MAX_INTENTOS, confirmar=True):
+        """
+        Agrega un email de cotización a la bandeja de salida
+
+        Args:
+            confirmar: Hacer commit y despertar al repartidor. Con False el
+                       INSERT queda en la transacción del llamador, que
+                       después debe confirmarla y llamar a avisar()
+
+        Returns:
+            int: ID del mensaje encolado
+        """
+        ahora = _ahora()
+        self.db.cursor.execute('''
+            INSERT INTO bandeja_salida (
+                numero_cotizacion, email_destino, nombre_cliente, pdf_path,
+                mensaje_personalizado, max_intentos, proximo_intento, fecha_creacion
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (numero_cotizacion, email_destino, nombre_cliente, pdf_path,
+              mensaje_personalizado, max_intentos, ahora, ahora))
+        id_mensaje = self.db.cursor.lastrowid
+        if confirmar:
+            self.db.conn.commit()
+            self.avisar()
+        return id_mensaje
+
+    @staticmethod
+    def avisar():
+        """Despierta al repartidor para que revise la bandeja"""
+        _hay_trabajo.set()
+
+    def listar(self, estado=None, limite=100):
+        """
+        Emails de la bandeja, los más recientes primero
+
+        Returns:
+            list: Tuplas (id_mensaje, numero_cotizacion, email_destino, estado,
+                  intentos, proximo_intento, ultimo_error, fecha_creacion, fecha_envio)
+        """
+        where = "WHERE estado = ?" if estado else ""
+        self.db.cursor.execute(f'''
+            SELECT id_mensaje, numero_cotizacion, email_destino, estado, intentos,
+                   proximo_intento, ultimo_error, fecha_creacion, fecha_envio
+            FROM bandeja_salida
+            {where}
+            ORDER BY id_mensaje DESC
+            LIMIT ?
+        ''', (estado, limite) if estado else (limite,))
+        return self.db.cursor.fetchall()
+
+    def intentos(self, id_mensaje):
+        """
+        Historial de intentos de un email
+
+        Returns:
+            list: Tuplas (fecha, exito, error, segundos)
+        """
+        self.db.cursor.execute('''
+            SELECT fecha, exito, error, segundos
+            FROM bandeja_intentos
+            WHERE id_mensaje = ?
+            ORDER BY id_intento
+        ''', (id_mensaje,))
+        return self.db.cursor.fetchall()
+
+    def resumen(self):
+        """Cantidad de emails por estado"""
+        self.db.cursor.execute("SELECT estado, COUNT(*) FROM bandeja_salida GROUP BY estado")
+        conteo = dict.fromkeys(ESTADOS, 0)
+        conteo.update(self.db.cursor.fetchall())
+        return conteo
+
+    def reintentar(self, id_mensaje):
+        """
+        Vuelve a poner en cola un email fallido o cancelado, con los intentos a cero
+
+        Returns:
+            tuple: (éxito, mensaje)
+        """
+        self.db.cursor.execute('''
+            UPDATE bandeja_salida
+            SET estado = 'pendiente', intentos = 0, proximo_intento = ?
+            WHERE id_mensaje = ? AND estado IN ('fallido', 'cancelado')
+        ''', (_ahora(), id_mensaje))
+        self.db.conn.commit()
+        if not self.db.cursor.rowcount:
+            return False, "Solo se pueden reintentar emails fallidos o cancelados"
+        _hay_trabajo.set()
+        return True, "Email puesto en cola nuevamente"
+
+    def cancelar(self, id_mensaje):
+        """
+        Cancela un email pendiente
+
+        Returns:
+            tuple: (éxito, mensaje)
+        """
+        self.db.cursor.execute('''
+            UPDATE bandeja_salida SET estado = 'cancelado'
+            WHERE id_mensaje = ? AND estado = 'pendiente'
+        ''', (id_mensaje,))
+        self.db.conn.commit()
+        if not self.db.cursor.rowcount:
+            return False, "Solo se pueden cancelar emails pendientes"
+        return True, "Email cancelado"
+
+
+class RepartidorCorreo:
+    """Hilo que envía los emails pendientes de la bandeja de salida"""
+
+    def __init__(self, db_path, intervalo=INTERVALO_REVISION, tamano_tanda=TAMANO_TANDA,
+                 espera_base=ESPERA_BASE, espera_maxima=ESPERA_MAXIMA, plazo_envio=PLAZO_ENVIO):
+        """
+        Args:
+            db_path: Ruta de la base de datos
+            intervalo: Segundos máximos entre revisiones de la bandeja
+            tamano_tanda: Emails por vuelta
+            espera_base: Espera antes del primer reintento
+            espera_maxima: Espera máxima entre reintentos
+            plazo_envio: Segundos tras los que un email 'enviando' se da por
+                         interrumpido
+        """
+        self.db_path = db_path
+        self.intervalo = intervalo
+        self.tamano_tanda = tamano_tanda
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.plazo_envio = plazo_envio
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def iniciar(self):
+        """Arranca el hilo repartidor (no hace nada si ya está corriendo)"""
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name="RepartidorCorreo", daemon=True)
+        self._hilo.start()
+
+    def detener(self, espera=5):
+        """Detiene el hilo; el email en curso termina de enviarse"""
+        self._detener.set()
+        _hay_trabajo.set()
+        if self._hilo:
+            self._hilo.join(espera)
+
+    def _ciclo(self):
+        db = DatabaseManager(self.db_path)
+        if not db.conectar():
+            return
+        try:
+            while not self._detener.is_set():
+                # Se limpia antes de revisar la bandeja: un email encolado
+                # mientras se procesa la tanda vuelve a marcarlo y no se pierde
+                _hay_trabajo.clear()
+                try:
+                    self.recuperar_interrumpidos(db)
+                    if self.procesar_pendientes(db):
+                        continue
+                    espera = self._segundos_hasta_proximo(db)
+                except Exception as e:
+                    print(f"Error en el repartidor de correo: {e}")
+                    espera = self.intervalo
+                _hay_trabajo.wait(espera)
+        finally:
+            db.desconectar()
+
+    @staticmethod
+    def recuperar_interrumpidos(db):
+        """
+        Devuelve a la cola los emails que quedaron a mitad de envío
+
+        Solo los que vencieron su plazo: los que está enviando otro
+        repartidor (otra aplicación abierta) no se tocan.
+        """
+        ahora = _ahora()
+        db.cursor.execute('''
+            UPDATE bandeja_salida SET estado = 'pendiente', proximo_intento = ?
+            WHERE estado = 'enviando' AND proximo_intento <= ?
+        ''', (ahora, ahora))
+        db.conn.commit()
+        return db.cursor.rowcount
+
+    def _segundos_hasta_proximo(self, db):
+        # Incluye el vencimiento de los 'enviando' para recuperarlos a tiempo
+        db.cursor.execute('''
+            SELECT MIN(proximo_intento) FROM bandeja_salida
+            WHERE estado IN ('pendiente', 'enviando')
+        ''')
+        proximo = db.cursor.fetchone()[0]
+        if not proximo:
+            return self.intervalo
+        segundos = (datetime.strptime(proximo, FORMATO_FECHA) - datetime.now()).total_seconds()
+        return min(max(segundos, 0.5), self.intervalo)
+
+    def procesar_pendientes(self, db, limite=None):
+        """
+        Envía una tanda de emails cuya hora de envío ya llegó
+
+        Se puede llamar directamente (sin hilo) con una conexión propia.
+
+        Returns:
+            int: Emails procesados (enviados o no)
+        """
+        db.cursor.execute('''
+            SELECT id_mensaje, numero_cotizacion, email_destino, nombre_cliente,
+                   pdf_path, mensaje_personalizado, intentos, max_intentos
+            FROM bandeja_salida
+            WHERE estado = 'pendiente' AND proximo_intento <= ?
+            ORDER BY proximo_intento, id_mensaje
+            LIMIT ?
+        ''', (_ahora(), limite or self.tamano_tanda))
+        mensajes = db.cursor.fetchall()
+        if not mensajes:
+            return 0
+
+        # Configuración leída en cada tanda: los cambios se aplican sin reiniciar
+        email = EmailManager(db)
+
+        for mensaje in mensajes:
+            if self._detener.is_set():
+                break
+            if not self._tomar(db, mensaje[0]):
+                continue  # Lo tomó otro repartidor o se canceló
+            self._entregar(db, email, *mensaje)
+
+        return len(mensajes)
+
+    def _tomar(self, db, id_mensaje):
+        """
+        Marca un email como 'enviando' si sigue pendiente
+
+        Returns:
+            bool: True si este repartidor lo tomó
+        """
+        plazo = datetime.now() + timedelta(seconds=self.plazo_envio)
+        db.cursor.execute('''
+            UPDATE bandeja_salida SET estado = 'enviando', proximo_intento = ?
+            WHERE id_mensaje = ? AND estado = 'pendiente'
+        ''', (plazo.strftime(FORMATO_FECHA), id_mensaje))
+        db.conn.commit()
+        return db.cursor.rowcount == 1
+
+    def _entregar(self, db, email, id_mensaje, numero_cotizacion, email_destino,
+                  nombre_cliente, pdf_path, mensaje_personalizado, intentos, max_intentos):
+        """Un intento de envío de un email ya tomado con _tomar, con su registro"""
+        inicio = time.perf_counter()
+        error = None
+        try:
+            if not email.config['email_remitente'] or not email.config['email_password']:
+                raise ValueError("Configuración de email incompleta")
+            if not os.path.exists(pdf_path):
+                raise FileNotFoundError(f"El archivo PDF no existe: {pdf_path}")
+            correo = email.construir_mensaje(
+                email_destino, nombre_cliente, numero_cotizacion, pdf_path,
+                mensaje_personalizado or ""
+            )
+            email.pool.enviar(email.config['email_remitente'], email_destino, correo)
+        except Exception as e:
+            error = e
+        segundos = time.perf_counter() - inicio
+
+        intentos += 1
+        ahora = _ahora()
+        if error is None:
+            db.cursor.execute('''
+                UPDATE bandeja_salida
+                SET estado = 'enviado', intentos = ?, ultimo_error = NULL, fecha_envio = ?
+                WHERE id_mensaje = ?
+            ''', (intentos, ahora, id_mensaje))
+        elif es_error_permanente(error) or intentos >= max_intentos:
+            db.cursor.execute('''
+                UPDATE bandeja_salida
+                SET estado = 'fallido', intentos = ?, ultimo_error = ?
+                WHERE id_mensaje = ?
+            ''', (intentos, str(error), id_mensaje))
+        else:
+            proximo = datetime.now() + timedelta(
+                seconds=espera_reintento(intentos, self.espera_base, self.espera_maxima)
+            )
+            db.cursor.execute('''
+                UPDATE bandeja_salida
+                SET estado = 'pendiente', intentos = ?, ultimo_error = ?, proximo_intento = ?
+                WHERE id_mensaje = ?
+            ''', (intentos, str(error), proximo.strftime(FORMATO_FECHA), id_mensaje))
+
+        db.cursor.execute('''
+            INSERT INTO bandeja_intentos (id_mensaje, fecha, exito, error, segundos)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (id_mensaje, ahora, int(error is None), None if error is None else str(error), segundos))
+        db.conn.commit()
+
+        if error is None:
+            email.registrar_envio(email_destino, numero_cotizacion)
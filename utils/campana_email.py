@@ -0,0 +1,384 @@
+"""
+campana_email.py - Envío masivo de cotizaciones por email
+
+Para mandar a decenas de clientes su oferta de mantenimiento anual de una
+vez, en lugar de un diálogo por cotización:
+- Carga los datos y el email de cada cliente con pocas consultas (preparar,
+  en el hilo dueño de la conexión)
+- Dibuja el PDF de cada cotización o lo toma del caché, y lo entrega a un
+  grupo de hilos que envían en paralelo por un pool acotado de sesiones
+  SMTP: mientras se dibuja un PDF ya se están enviando los anteriores
+- Respeta un máximo de mensajes por minuto (los proveedores de correo
+  bloquean los envíos en ráfaga)
+- Guarda el resultado de cada destinatario en campana_envios; los que
+  fallaron por un error temporal pasan a la bandeja de salida para
+  reintentarse solos
+- Al cancelarla, los envíos que todavía no salieron se descartan (quedan
+  como 'cancelado' y no se registran) y lo ya enviado se guarda igual
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from models.envios_email import registrar_envios
+from utils.bandeja_salida import BandejaSalida, es_error_permanente
+from utils.email_manager import EmailManager, PoolSMTP
+from utils.plantillas_email import obtener_plantilla
+from utils.pdf_generator import obtener_datos_cotizaciones, renderizar_pdf_cotizacion
+
+# Sesiones SMTP (e hilos de envío) simultáneas por defecto
+SESIONES = 3
+
+# Mensajes por minuto por defecto
+POR_MINUTO = 30
+
+# Cada cuánto revisa LimiteEnvios si se canceló mientras espera (s)
+INTERVALO_CANCELACION = 0.2
+
+# Cotizaciones por consulta (límite de parámetros de SQLite)
+BLOQUE_CONSULTA = 500
+
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+
+
+class LimiteEnvios:
+    """Reparte los envíos para no pasar de `por_minuto` mensajes por minuto"""
+
+    def __init__(self, por_minuto):
+        self.intervalo = 60.0 / por_minuto if por_minuto else 0.0
+        self._proximo = 0.0
+        self._lock = threading.Lock()
+
+    def esperar(self, cancelado=None):
+        """
+        Bloquea hasta el turno del próximo mensaje
+
+        Args:
+            cancelado: Función opcional sin argumentos; si devuelve True se
+                       deja de esperar
+
+        Returns:
+            bool: False si se canceló durante la espera
+        """
+        if not self.intervalo:
+            return True
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._proximo)
+            self._proximo = turno + self.intervalo
+        while True:
+            if cancelado and cancelado():
+                return False
+            restante = turno - time.monotonic()
+            if restante <= 0:
+                return True
+            time.sleep(min(restante, INTERVALO_CANCELACION))
+
+
+class CampanaEmail:
+    """Envía muchas cotizaciones en paralelo con límite de velocidad"""
+
+    def __init__(self, db, sesiones=SESIONES, por_minuto=POR_MINUTO, usar_cache=True,
+                 reducir_pdf=None):
+        """
+        Inicializa la campaña
+
+        Args:
+            db: Instancia conectada de DatabaseManager
+            sesiones: Sesiones SMTP e hilos de envío simultáneos
+            por_minuto: Máximo de mensajes por minuto (0 o None: sin límite)
+            usar_cache: Reutilizar los PDFs de cotizaciones sin cambios
+            reducir_pdf: Reducir los PDFs antes de adjuntarlos (por defecto,
+                         según la configuración de email)
+        """
+        self.db = db
+        self.sesiones = max(1, sesiones)
+        self.por_minuto = por_minuto
+        self.usar_cache = usar_cache
+        self.reducir_pdf = reducir_pdf
+        # Los completa preparar(): enviar() no lee la base de datos
+        self.config = None
+        self.plantilla = None
+
+    def preparar(self, numeros_cotizacion, mensaje_personalizado=""):
+        """
+        Carga los datos de las cotizaciones y el email de cada cliente
+
+        Debe llamarse en el hilo dueño de la conexión; el resultado se puede
+        pasar a enviar() desde otro hilo.
+
+        Returns:
+            list: Un diccionario por cotización con numero_cotizacion,
+                  email_destino, nombre_cliente, mensaje_personalizado y data
+        """
+        numeros = list(dict.fromkeys(numeros_cotizacion))
+        datos = obtener_datos_cotizaciones(self.db, numeros)
+
+        clientes = {}
+        for i in range(0, len(numeros), BLOQUE_CONSULTA):
+            bloque = numeros[i:i + BLOQUE_CONSULTA]
+            marcas = ', '.join('?' for _ in bloque)
+            self.db.cursor.execute(f'''
+                SELECT c.numero_cotizacion, cl.email, cl.nombre_empresa
+                FROM cotizaciones c
+                LEFT JOIN clientes cl ON c.id_cliente = cl.id_cliente
+                WHERE c.numero_cotizacion IN ({marcas})
+            ''', bloque)
+            for numero, email, nombre in self.db.cursor.fetchall():
+                clientes[numero] = ((email or '').strip(), nombre or 'Cliente')
+
+        # La configuración y la plantilla se leen aquí: los hilos de envío no usan la base
+        self.config = dict(EmailManager(self.db).config)
+        self.plantilla = obtener_plantilla(self.db)
+
+        return [
+            {
+                'numero_cotizacion': numero,
+                'email_destino': clientes[numero][0],
+                'nombre_cliente': clientes[numero][1],
+                'mensaje_personalizado': mensaje_personalizado,
+                'data': datos[numero],
+            }
+            for numero in numeros if numero in datos and numero in clientes
+        ]
+
+    def enviar(self, envios, progreso=None, cancelado=None):
+        """
+        Dibuja (o reutiliza) los PDFs y envía los emails
+
+        Args:
+            envios: Resultado de preparar()
+            progreso: Función opcional progreso(hechos, total, resultado); se
+                      llama desde los hilos de envío
+            cancelado: Función opcional sin argumentos; si devuelve True no
+                       se dibujan más PDFs y los envíos que no salieron
+                       terminan como 'cancelado'
+
+        Returns:
+            dict: Estadísticas (total, enviados, fallidos, sin_email, sin_pdf,
+                  cancelados, resultados, sesiones, conexiones, bytes_enviados,
+                  segundos_codificacion, por_minuto, por_minuto_real,
+                  fecha_inicio, fecha_fin, segundos)
+
+        Raises:
+            RuntimeError: Si no se llamó antes a preparar()
+            ValueError: Si falta el remitente o la contraseña de email
+        """
+        if self.config is None:
+            raise RuntimeError("Llame a preparar() antes de enviar()")
+        if not self.config['email_remitente'] or not self.config['email_password']:
+            raise ValueError("Configuración de email incompleta")
+
+        inicio = time.perf_counter()
+        fecha_inicio = datetime.now().strftime(FORMATO_FECHA)
+
+        email = EmailManager()
+        email.config = dict(self.config)
+        email.plantilla = self.plantilla
+        if self.reducir_pdf is not None:
+            email.config['email_reducir_pdf'] = '1' if self.reducir_pdf else '0'
+        pool = PoolSMTP(
+            self.config['smtp_server'], self.config['smtp_port'],
+            self.config['email_remitente'], self.config['email_password'],
+            max_sesiones=self.sesiones
+        )
+        limite = LimiteEnvios(self.por_minuto)
+
+        resultados = []
+        lock = threading.Lock()
+        total = len(envios)
+
+        def terminar(resultado):
+            with lock:
+                resultados.append(resultado)
+                hechos = len(resultados)
+            if progreso:
+                progreso(hechos, total, resultado)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.sesiones) as ejecutor:
+                for posicion, envio in enumerate(envios):
+                    if cancelado and cancelado():
+                        for pendiente in envios[posicion:]:
+                            terminar(self._resultado(pendiente, 'cancelado', "Campaña cancelada"))
+                        break
+
+                    if not envio['email_destino']:
+                        terminar(self._resultado(envio, 'sin_email', "El cliente no tiene email"))
+                        continue
+
+                    try:
+                        pdf_path = renderizar_pdf_cotizacion(envio['data'], usar_cache=self.usar_cache)
+                    except Exception as e:
+                        print(f"Error generando PDF de {envio['numero_cotizacion']}: {e}")
+                        pdf_path = None
+                    if not pdf_path:
+                        terminar(self._resultado(envio, 'sin_pdf', "No se pudo generar el PDF"))
+                        continue
+
+                    futuro = ejecutor.submit(
+                        self._enviar_uno, pool, limite, email, envio, pdf_path, cancelado
+                    )
+                    futuro.add_done_callback(lambda f: terminar(f.result()))
+        finally:
+            conexiones = pool.estadisticas['conexiones']
+            pool.cerrar()
+
+        segundos = time.perf_counter() - inicio
+        conteo = {'enviado': 0, 'fallido': 0, 'sin_email': 0, 'sin_pdf': 0, 'cancelado': 0}
+        for resultado in resultados:
+            conteo[resultado['estado']] += 1
+
+        return {
+            'total': total,
+            'enviados': conteo['enviado'],
+            'fallidos': conteo['fallido'],
+            'sin_email': conteo['sin_email'],
+            'sin_pdf': conteo['sin_pdf'],
+            'cancelados': conteo['cancelado'],
+            'resultados': resultados,
+            'sesiones': self.sesiones,
+            'conexiones': conexiones,
+            'bytes_enviados': sum(r['bytes'] for r in resultados),
+            'segundos_codificacion': sum(r['segundos_codificacion'] for r in resultados),
+            'por_minuto': self.por_minuto,
+            'por_minuto_real': conteo['enviado'] * 60 / segundos if segundos else 0,
+            'fecha_inicio': fecha_inicio,
+            'fecha_fin': datetime.now().strftime(FORMATO_FECHA),
+            'segundos': segundos,
+        }
+
+    @staticmethod
+    def _resultado(envio, estado, error=None, pdf_path=None, segundos=0.0, permanente=True,
+                   correo=None):
+        return {
+            'numero_cotizacion': envio['numero_cotizacion'],
+            'email_destino': envio['email_destino'],
+            'nombre_cliente': envio['nombre_cliente'],
+            'mensaje_personalizado': envio['mensaje_personalizado'],
+            'pdf_path': pdf_path,
+            'estado': estado,
+            'error': error,
+            'permanente': permanente,
+            'fecha': datetime.now().strftime(FORMATO_FECHA),
+            'segundos': segundos,
+            'bytes': correo.estadisticas['bytes_enviados'] if correo else 0,
+            'segundos_codificacion': correo.estadisticas['segundos_codificacion'] if correo else 0.0,
+        }
+
+    @classmethod
+    def _enviar_uno(cls, pool, limite, email, envio, pdf_path, cancelado=None):
+        """Arma y envía un email (se ejecuta en un hilo de envío)"""
+        inicio = time.perf_counter()
+        if cancelado and cancelado():
+            return cls._resultado(envio, 'cancelado', "Campaña cancelada", pdf_path)
+        try:
+            correo = email.construir_mensaje(
+                envio['email_destino'], envio['nombre_cliente'], envio['numero_cotizacion'],
+                pdf_path, envio['mensaje_personalizado'], datos=envio['data']
+            )
+            if not limite.esperar(cancelado) or (cancelado and cancelado()):
+                return cls._resultado(envio, 'cancelado', "Campaña cancelada", pdf_path)
+            pool.enviar(email.config['email_remitente'], envio['email_destino'], correo)
+        except Exception as e:
+            return cls._resultado(
+                envio, 'fallido', str(e), pdf_path, time.perf_counter() - inicio,
+                permanente=es_error_permanente(e)
+            )
+        return cls._resultado(
+            envio, 'enviado', None, pdf_path, time.perf_counter() - inicio, correo=correo
+        )
+
+    def guardar(self, estadisticas, nombre, reintentar_en_bandeja=True):
+        """
+        Registra la campaña y el resultado de cada destinatario
+
+        Debe llamarse en el hilo dueño de la conexión. Los envíos cancelados
+        no se registran: nunca salieron.
+
+        Args:
+            estadisticas: Resultado de enviar()
+            nombre: Nombre de la campaña
+            reintentar_en_bandeja: Pasar a la bandeja de salida los envíos
+                                   que fallaron por un error temporal
+
+        Returns:
+            int: ID de la campaña
+        """
+        bandeja = BandejaSalida(self.db) if reintentar_en_bandeja else None
+        resultados = [r for r in estadisticas['resultados'] if r['estado'] != 'cancelado']
+        a_bandeja = [
+            r for r in resultados
+            if bandeja and r['estado'] == 'fallido' and not r['permanente']
+        ]
+        en_bandeja = {id(r) for r in a_bandeja}
+
+        # Bandeja, campaña e historial en una sola transacción: si algo falla
+        # no quedan emails encolados de una campaña que no se registró
+        try:
+            for resultado in a_bandeja:
+                bandeja.encolar(
+                    resultado['email_destino'], resultado['nombre_cliente'],
+                    resultado['numero_cotizacion'], resultado['pdf_path'],
+                    resultado['mensaje_personalizado'], confirmar=False
+                )
+
+            self.db.cursor.execute('''
+                INSERT INTO campanas_email (
+                    nombre, fecha_inicio, fecha_fin, total, enviados, fallidos,
+                    sesiones, por_minuto, segundos
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (nombre, estadisticas['fecha_inicio'], estadisticas['fecha_fin'],
+                  estadisticas['total'], estadisticas['enviados'],
+                  len(resultados) - estadisticas['enviados'],
+                  estadisticas['sesiones'], estadisticas['por_minuto'], estadisticas['segundos']))
+            id_campana = self.db.cursor.lastrowid
+
+            self.db.cursor.executemany('''
+                INSERT INTO campana_envios (
+                    id_campana, numero_cotizacion, email_destino, estado, error, fecha, segundos
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (id_campana, r['numero_cotizacion'], r['email_destino'],
+                 'en_bandeja' if id(r) in en_bandeja else r['estado'], r['error'], r['fecha'],
+                 r['segundos'])
+                for r in resultados
+            ])
+
+            registrar_envios(self.db, [
+                (r['email_destino'], r['numero_cotizacion'])
+                for r in resultados if r['estado'] == 'enviado'
+            ], confirmar=False)
+            self.db.conn.commit()
+        except Exception:
+            self.db.conn.rollback()
+            raise
+
+        for resultado in a_bandeja:
+            resultado['estado'] = 'en_bandeja'
+        if a_bandeja:
+            bandeja.avisar()
+
+        return id_campana
+
+    def ejecutar(self, numeros_cotizacion, nombre=None, mensaje_personalizado="",
+                 progreso=None, reintentar_en_bandeja=True):
+        """
+        Prepara, envía y registra una campaña en el hilo actual
+
+        Returns:
+            dict: Estadísticas de enviar() más id_campana, nombre y no_encontradas
+        """
+        envios = self.preparar(numeros_cotizacion, mensaje_personalizado)
+        estadisticas = self.enviar(envios, progreso=progreso)
+
+        nombre = nombre or f"Campaña {estadisticas['fecha_inicio']}"
+        estadisticas['id_campana'] = self.guardar(estadisticas, nombre, reintentar_en_bandeja)
+        estadisticas['nombre'] = nombre
+        encontradas = {envio['numero_cotizacion'] for envio in envios}
+        estadisticas['no_encontradas'] = [
+            n for n in dict.fromkeys(numeros_cotizacion) if n not in encontradas
+        ]
+        return estadisticas
@@ -4,18 +4,251 @@ email_manager.py - Sistema de Envío de Emails
 Permite:
 - Configurar servidor SMTP
 - Enviar cotizaciones por email con PDF adjunto
-- Plantillas de email personalizables
+- Plantillas de email editables y precompiladas (utils/plantillas_email.py)
 - Registro de emails enviados
+- Envío en lote reutilizando sesiones SMTP autenticadas (PoolSMTP)
+- Adjuntos codificados por partes directo al socket y PDFs reducidos
+  opcionalmente (utils/adjuntos_email.py)
 """
 
 import smtplib
 import os
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
+from models.envios_email import registrar_envios, historial_envios
+from utils.adjuntos_email import (
+    MensajeCotizacion, DesconexionEnDatos, enviar_por_partes, iniciar_envio, reducir_pdf
+)
+from utils.plantillas_email import obtener_plantilla, datos_cotizacion, valores_email
+
+# Segundos de espera máximos por operación con el servidor SMTP
+SMTP_TIMEOUT = 30
+
+# Una sesión libre por más de estos segundos se verifica con NOOP antes de usarla
+INTERVALO_NOOP = 15
+
+# Una sesión libre por más de estos segundos se cierra (los servidores suelen
+# cortar las conexiones inactivas a los pocos minutos)
+INACTIVIDAD_MAXIMA = 240
+
+# Errores de protocolo tras los cuales la sesión sigue siendo utilizable
+ERRORES_RECUPERABLES = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
+
+
+class PoolSMTP:
+    """
+    Sesiones SMTP autenticadas y reutilizables
+
+    Cada sesión hace el handshake TLS y el login una sola vez y vuelve al
+    pool después de cada envío. Al tomar una sesión que estuvo libre más de
+    INTERVALO_NOOP segundos se verifica con NOOP; si el servidor la cerró,
+    se abre otra. Como mucho max_sesiones se usan a la vez; los demás hilos
+    esperan a que se libere una.
+    """
+
+    def __init__(self, servidor, puerto, usuario, password, max_sesiones=2,
+                 intervalo_noop=INTERVALO_NOOP, inactividad_maxima=INACTIVIDAD_MAXIMA,
+                 timeout=SMTP_TIMEOUT):
+        """
+        Inicializa el pool (no abre conexiones hasta el primer envío)
+
+        Args:
+            servidor: Servidor SMTP
+            puerto: Puerto SMTP (STARTTLS)
+            usuario: Usuario de login (email del remitente)
+            password: Contraseña o app password
+            max_sesiones: Sesiones abiertas a la vez como máximo
+            intervalo_noop: Segundos libres tras los que se verifica la sesión
+            inactividad_maxima: Segundos libres tras los que se descarta la sesión
+            timeout: Segundos de espera por operación
+        """
+        self.servidor = servidor
+        self.puerto = int(puerto)
+        self.usuario = usuario
+        self.password = password
+        self.max_sesiones = max_sesiones
+        self.intervalo_noop = intervalo_noop
+        self.inactividad_maxima = inactividad_maxima
+        self.timeout = timeout
+
+        self._libres = []  # (sesion, ultimo_uso)
+        self._lock = threading.Lock()
+        self._cupos = threading.BoundedSemaphore(max_sesiones)
+        self._cerrado = False
+
+        self.estadisticas = {'conexiones': 0, 'reutilizadas': 0, 'noop': 0, 'reconexiones': 0}
+
+    def _contar(self, clave):
+        with self._lock:
+            self.estadisticas[clave] += 1
+
+    def _conectar(self):
+        """Abre una sesión nueva: conexión, STARTTLS y login"""
+        sesion = smtplib.SMTP(self.servidor, self.puerto, timeout=self.timeout)
+        try:
+            sesion.starttls()
+            sesion.login(self.usuario, self.password)
+        except BaseException:
+            self._cerrar_sesion(sesion)
+            raise
+        self._contar('conexiones')
+        return sesion
+
+    @staticmethod
+    def _cerrar_sesion(sesion):
+        try:
+            sesion.quit()
+        except (smtplib.SMTPException, OSError):
+            sesion.close()
+
+    def _esta_viva(self, sesion):
+        """Verifica la sesión con NOOP"""
+        self._contar('noop')
+        try:
+            return sesion.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _tomar(self):
+        """Sesión libre utilizable (la usada más recientemente) o una nueva"""
+        while True:
+            with self._lock:
+                if not self._libres:
+                    break
+                sesion, ultimo_uso = self._libres.pop()
+
+            libre = time.monotonic() - ultimo_uso
+            if libre <= self.inactividad_maxima and (
+                libre < self.intervalo_noop or self._esta_viva(sesion)
+            ):
+                self._contar('reutilizadas')
+                return sesion
+            self._cerrar_sesion(sesion)
+
+        return self._conectar()
+
+    def _devolver(self, sesion):
+        with self._lock:
+            if not self._cerrado:
+                self._libres.append((sesion, time.monotonic()))
+                return
+        self._cerrar_sesion(sesion)
+
+    @contextmanager
+    def sesion(self):
+        """
+        Presta una sesión autenticada durante el bloque with
+
+        Si el bloque termina con un error de conexión, la sesión se descarta;
+        con un error de protocolo (destinatario rechazado, etc.) se reinicia
+        con RSET y vuelve al pool.
+        """
+        self._cupos.acquire()
+        try:
+            sesion = self._tomar()
+            try:
+                yield sesion
+            except ERRORES_RECUPERABLES:
+                try:
+                    sesion.rset()
+                    self._devolver(sesion)
+                except (smtplib.SMTPException, OSError):
+                    self._cerrar_sesion(sesion)
+                raise
+            except BaseException:
+                self._cerrar_sesion(sesion)
+                raise
+            else:
+                self._devolver(sesion)
+        finally:
+            self._cupos.release()
+
+    def enviar(self, remitente, destinatarios, mensaje):
+        """
+        Envía un mensaje con una sesión del pool
+
+        Si el servidor cerró la sesión antes de DATA, reconecta y reintenta
+        una vez. Si la cerró después, el mensaje pudo haber llegado y se
+        lanza DesconexionEnDatos sin reintentar.
+
+        Args:
+            remitente: Dirección del remitente
+            destinatarios: Dirección o lista de direcciones
+            mensaje: Texto del mensaje o MensajeCotizacion (se envía por partes)
+
+        Returns:
+            dict: Destinatarios rechazados (como smtplib.SMTP.sendmail)
+        """
+        try:
+            with self.sesion() as sesion:
+                return self._enviar_con(sesion, remitente, destinatarios, mensaje)
+        except DesconexionEnDatos:
+            raise
+        except smtplib.SMTPServerDisconnected:
+            self._contar('reconexiones')
+            with self.sesion() as sesion:
+                return self._enviar_con(sesion, remitente, destinatarios, mensaje)
+
+    @staticmethod
+    def _enviar_con(sesion, remitente, destinatarios, mensaje):
+        if isinstance(mensaje, MensajeCotizacion):
+            return enviar_por_partes(sesion, remitente, destinatarios, mensaje)
+
+        # Como sendmail, pero sabiendo si el corte fue antes o después de DATA
+        rechazados = iniciar_envio(sesion, remitente, destinatarios)
+        try:
+            codigo, respuesta = sesion.data(mensaje)
+        except smtplib.SMTPServerDisconnected as e:
+            raise DesconexionEnDatos(f"Se perdió la conexión durante DATA: {e}") from e
+        if codigo != 250:
+            raise smtplib.SMTPDataError(codigo, respuesta)
+        return rechazados
+
+    def cerrar(self):
+        """Cierra las sesiones libres; las prestadas se cierran al devolverse"""
+        with self._lock:
+            self._cerrado = True
+            libres, self._libres = self._libres, []
+        for sesion, _ in libres:
+            self._cerrar_sesion(sesion)
+
+
+# Pools compartidos por configuración: las ventanas crean un EmailManager por
+# envío, pero las sesiones sobreviven entre envíos
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _clave_pool(config):
+    return (config['smtp_server'], str(config['smtp_port']),
+            config['email_remitente'], config['email_password'])
+
+
+def obtener_pool(config):
+    """Pool SMTP compartido para una configuración de email"""
+    clave = _clave_pool(config)
+    with _pools_lock:
+        pool = _pools.get(clave)
+        if pool is None:
+            pool = _pools[clave] = PoolSMTP(*clave)
+        return pool
+
+
+def cerrar_pools():
+    """Cierra todas las sesiones SMTP abiertas (al salir de la aplicación)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.cerrar()
+
 
 class EmailManager:
     """Gestor de envío de emails"""
@@ -29,6 +262,7 @@ class EmailManager:
         """
         self.db = db_manager
         self.config = self._cargar_configuracion()
+        self.plantilla = obtener_plantilla(db_manager)
 
     def _cargar_configuracion(self):
         """Carga la configuración de email desde la base de datos"""
@@ -37,18 +271,26 @@ class EmailManager:
             'smtp_port': 587,
             'email_remitente': '',
             'email_password': '',
-            'email_nombre': 'AirSolutions'
+            'email_nombre': 'AirSolutions',
+            'email_reducir_pdf': '0'
         }
 
         if self.db:
             try:
-                # Intentar cargar desde configuración
+                # Intentar cargar desde configuración (el repartidor de la
+                # bandeja de salida no tiene otra fuente que la base)
                 result = self.db.ejecutar_query(
-                    "SELECT clave, valor FROM configuracion WHERE clave LIKE 'email_%'"
+                    "SELECT clave, valor FROM configuracion "
+                    "WHERE clave LIKE 'email_%' OR clave LIKE 'smtp_%'"
                 )
                 for clave, valor in result.fetchall():
-                    if clave in config:
+                    if clave in config and valor:
                         config[clave] = valor
+
+                # La pestaña de configuración guarda la contraseña encriptada
+                if config['email_password']:
+                    from utils.encryption import desencriptar_password
+                    config['email_password'] = desencriptar_password(config['email_password'])
             except Exception as e:
                 print(f"Error cargando configuración de email: {e}")
 
@@ -68,6 +310,11 @@ class EmailManager:
         Returns:
             tuple: (éxito, mensaje)
         """
+        with _pools_lock:
+            pool_anterior = _pools.pop(_clave_pool(self.config), None)
+        if pool_anterior:
+            pool_anterior.cerrar()
+
         self.config['smtp_server'] = smtp_server
         self.config['smtp_port'] = smtp_port
         self.config['email_remitente'] = email_remitente
@@ -102,6 +349,11 @@ class EmailManager:
 
         return True, "Configuración actualizada (no guardada en BD)"
 
+    @property
+    def pool(self):
+        """Pool SMTP compartido de la configuración actual"""
+        return obtener_pool(self.config)
+
     def probar_conexion(self):
         """
         Prueba la conexión SMTP
@@ -110,10 +362,9 @@ class EmailManager:
             tuple: (éxito, mensaje)
         """
         try:
-            server = smtplib.SMTP(self.config['smtp_server'], self.config['smtp_port'])
-            server.starttls()
-            server.login(self.config['email_remitente'], self.config['email_password'])
-            server.quit()
+            # La sesión verificada queda en el pool para el próximo envío
+            with self.pool.sesion() as sesion:
+                sesion.noop()
             return True, "Conexión exitosa con el servidor SMTP"
         except smtplib.SMTPAuthenticationError:
             return False, "Error de autenticación. Verifica tu email y contraseña."
@@ -121,7 +372,7 @@ class EmailManager:
             return False, f"Error de conexión: {str(e)}"
 
     def enviar_cotizacion(self, email_destino, nombre_cliente, numero_cotizacion,
-                          pdf_path, mensaje_personalizado=""):
+                          pdf_path, mensaje_personalizado="", progreso=None, registrar=True):
         """
         Envía una cotización por email
 
@@ -131,6 +382,9 @@ class EmailManager:
             numero_cotizacion: Número de cotización
             pdf_path: Ruta al archivo PDF
             mensaje_personalizado: Mensaje adicional (opcional)
+            progreso: Función opcional progreso(porcentaje, mensaje) por cada paso
+            registrar: Registrar el envío en la base de datos; pasar False al
+                       enviar desde otro hilo y llamar registrar_envio() después
 
         Returns:
             tuple: (éxito, mensaje)
@@ -145,40 +399,21 @@ class EmailManager:
                 return False, "Configuración de email incompleta"
 
             # Crear mensaje
-            msg = MIMEMultipart()
-            msg['From'] = f"{self.config['email_nombre']} <{self.config['email_remitente']}>"
-            msg['To'] = email_destino
-            msg['Subject'] = f"Cotización {numero_cotizacion} - {self.config['email_nombre']}"
-
-            # Cuerpo del email
-            cuerpo = self._generar_cuerpo_email(
-                nombre_cliente,
-                numero_cotizacion,
-                mensaje_personalizado
+            if progreso:
+                progreso(10, "Preparando mensaje")
+            correo = self.construir_mensaje(
+                email_destino, nombre_cliente, numero_cotizacion, pdf_path, mensaje_personalizado
             )
 
-            msg.attach(MIMEText(cuerpo, 'html'))
-
-            # Adjuntar PDF
-            with open(pdf_path, 'rb') as archivo:
-                parte = MIMEBase('application', 'octet-stream')
-                parte.set_payload(archivo.read())
-
-            encoders.encode_base64(parte)
-            nombre_archivo = os.path.basename(pdf_path)
-            parte.add_header('Content-Disposition', f'attachment; filename= {nombre_archivo}')
-            msg.attach(parte)
-
-            # Enviar email
-            server = smtplib.SMTP(self.config['smtp_server'], self.config['smtp_port'])
-            server.starttls()
-            server.login(self.config['email_remitente'], self.config['email_password'])
-            texto = msg.as_string()
-            server.sendmail(self.config['email_remitente'], email_destino, texto)
-            server.quit()
+            # Enviar email (reutiliza una sesión del pool si hay una abierta;
+            # el PDF se codifica por partes directo al socket)
+            if progreso:
+                progreso(30, "Enviando mensaje")
+            self.pool.enviar(self.config['email_remitente'], email_destino, correo)
 
             # Registrar envío
-            self._registrar_envio(email_destino, numero_cotizacion)
+            if registrar:
+                self.registrar_envio(email_destino, numero_cotizacion)
 
             return True, f"Email enviado correctamente a {email_destino}"
 
@@ -187,114 +422,132 @@ class EmailManager:
         except Exception as e:
             return False, f"Error enviando email: {str(e)}"
 
-    def _generar_cuerpo_email(self, nombre_cliente, numero_cotizacion, mensaje_personalizado):
+    def enviar_lote(self, envios, progreso=None, registrar=True):
+        """
+        Envía muchas cotizaciones reutilizando una sesión SMTP autenticada
+
+        Args:
+            envios: Lista de diccionarios con email_destino, nombre_cliente,
+                    numero_cotizacion, pdf_path y opcionalmente mensaje_personalizado
+            progreso: Función opcional progreso(hechos, total, resultado)
+            registrar: Registrar cada envío exitoso en la base de datos (solo
+                       desde el hilo dueño de la conexión)
+
+        Returns:
+            dict: Estadísticas (enviados, fallidos, resultados, conexiones,
+                  bytes_enviados, segundos_codificacion, segundos, por_segundo);
+                  cada resultado es un diccionario con numero_cotizacion,
+                  email_destino, exito, mensaje, segundos y, si se envió,
+                  bytes y segundos_codificacion
+        """
+        inicio = time.perf_counter()
+        conexiones_inicio = self.pool.estadisticas['conexiones']
+        resultados = []
+
+        if not self.config['email_remitente'] or not self.config['email_password']:
+            raise ValueError("Configuración de email incompleta")
+
+        for hechos, envio in enumerate(envios, 1):
+            inicio_envio = time.perf_counter()
+            resultado = {
+                'numero_cotizacion': envio['numero_cotizacion'],
+                'email_destino': envio['email_destino'],
+            }
+            try:
+                if not os.path.exists(envio['pdf_path']):
+                    raise FileNotFoundError("El archivo PDF no existe")
+                correo = self.construir_mensaje(
+                    envio['email_destino'], envio['nombre_cliente'], envio['numero_cotizacion'],
+                    envio['pdf_path'], envio.get('mensaje_personalizado', '')
+                )
+                self.pool.enviar(self.config['email_remitente'], envio['email_destino'], correo)
+                resultado['bytes'] = correo.estadisticas['bytes_enviados']
+                resultado['segundos_codificacion'] = correo.estadisticas['segundos_codificacion']
+                resultado['exito'] = True
+                resultado['mensaje'] = f"Email enviado correctamente a {envio['email_destino']}"
+            except smtplib.SMTPAuthenticationError:
+                resultado['exito'] = False
+                resultado['mensaje'] = "Error de autenticación. Verifica tu email y contraseña."
+            except Exception as e:
+                resultado['exito'] = False
+                resultado['mensaje'] = f"Error enviando email: {str(e)}"
+
+            resultado['segundos'] = time.perf_counter() - inicio_envio
+            resultados.append(resultado)
+
+            if resultado['exito'] and registrar:
+                self.registrar_envio(envio['email_destino'], envio['numero_cotizacion'])
+            if progreso:
+                progreso(hechos, len(envios), resultado)
+
+        segundos = time.perf_counter() - inicio
+        enviados = sum(1 for r in resultados if r['exito'])
+        return {
+            'enviados': enviados,
+            'fallidos': len(resultados) - enviados,
+            'resultados': resultados,
+            'conexiones': self.pool.estadisticas['conexiones'] - conexiones_inicio,
+            'bytes_enviados': sum(r.get('bytes', 0) for r in resultados),
+            'segundos_codificacion': sum(r.get('segundos_codificacion', 0.0) for r in resultados),
+            'segundos': segundos,
+            'por_segundo': len(resultados) / segundos if segundos else 0,
+        }
+
+    def construir_mensaje(self, email_destino, nombre_cliente, numero_cotizacion,
+                           pdf_path, mensaje_personalizado="", datos=None, reducir=None):
+        """
+        Arma el email de una cotización con el PDF adjunto
+
+        El PDF no se lee aquí: se codifica por partes al enviarlo.
+
+        Args:
+            datos: Datos de la cotización para los campos de la plantilla; si
+                   no se pasan y hay base de datos, se consultan
+            reducir: Reducir el PDF antes de adjuntarlo (por defecto, según
+                     la configuración email_reducir_pdf)
+
+        Returns:
+            MensajeCotizacion: Mensaje para PoolSMTP.enviar(); después del
+                envío, su atributo estadisticas tiene los bytes enviados y
+                el tiempo de codificación
+        """
+        asunto, cuerpo = self.generar_email(
+            nombre_cliente, numero_cotizacion, mensaje_personalizado, datos
+        )
+
+        if reducir is None:
+            reducir = self.config['email_reducir_pdf'] == '1'
+        adjunto = reducir_pdf(pdf_path)[0] if reducir else pdf_path
+
+        return MensajeCotizacion(
+            f"{self.config['email_nombre']} <{self.config['email_remitente']}>",
+            email_destino, asunto, cuerpo, adjunto,
+            nombre_adjunto=os.path.basename(pdf_path)
+        )
+
+    def generar_email(self, nombre_cliente, numero_cotizacion, mensaje_personalizado="", datos=None):
         """
-        Genera el cuerpo HTML del email
+        Genera el asunto y el cuerpo HTML con la plantilla activa
 
         Args:
             nombre_cliente: Nombre del cliente
             numero_cotizacion: Número de cotización
-            mensaje_personalizado: Mensaje personalizado
+            mensaje_personalizado: Mensaje personalizado (admite los campos de la plantilla)
+            datos: Datos de la cotización (opcional)
 
         Returns:
-            str: HTML del cuerpo del email
-        """
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                }}
-                .container {{
-                    max-width: 600px;
-                    margin: 0 auto;
-                    padding: 20px;
-                }}
-                .header {{
-                    background-color: #2563eb;
-                    color: white;
-                    padding: 20px;
-                    text-align: center;
-                    border-radius: 5px 5px 0 0;
-                }}
-                .content {{
-                    background-color: #f9fafb;
-                    padding: 30px;
-                    border: 1px solid #e5e7eb;
-                }}
-                .footer {{
-                    background-color: #f3f4f6;
-                    padding: 15px;
-                    text-align: center;
-                    font-size: 12px;
-                    color: #6b7280;
-                    border-radius: 0 0 5px 5px;
-                }}
-                .button {{
-                    display: inline-block;
-                    padding: 12px 24px;
-                    background-color: #10b981;
-                    color: white;
-                    text-decoration: none;
-                    border-radius: 5px;
-                    margin: 20px 0;
-                }}
-                .mensaje-personalizado {{
-                    background-color: #fef3c7;
-                    border-left: 4px solid #f59e0b;
-                    padding: 15px;
-                    margin: 20px 0;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>{self.config['email_nombre']}</h1>
-                    <p>Soluciones en Aires Acondicionados</p>
-                </div>
-
-                <div class="content">
-                    <h2>Estimado/a {nombre_cliente},</h2>
-
-                    <p>Es un placer saludarle y hacerle llegar la cotización <strong>{numero_cotizacion}</strong>
-                    que hemos preparado especialmente para usted.</p>
-
-                    {"<div class='mensaje-personalizado'>" + mensaje_personalizado + "</div>" if mensaje_personalizado else ""}
-
-                    <p>Adjunto a este correo encontrará el documento PDF con todos los detalles de la cotización,
-                    incluyendo:</p>
-
-                    <ul>
-                        <li>Equipos y materiales cotizados</li>
-                        <li>Precios detallados</li>
-                        <li>Condiciones comerciales</li>
-                        <li>Información de contacto</li>
-                    </ul>
-
-                    <p>Quedamos atentos a cualquier consulta o aclaración que pueda tener.
-                    Estamos comprometidos en brindarle el mejor servicio.</p>
-
-                    <p>Saludos cordiales,<br>
-                    <strong>{self.config['email_nombre']}</strong></p>
-                </div>
-
-                <div class="footer">
-                    <p>Este es un correo automático, por favor no responder a esta dirección.</p>
-                    <p>Para consultas, contáctenos directamente.</p>
-                    <p>&copy; {datetime.now().year} {self.config['email_nombre']}. Todos los derechos reservados.</p>
-                </div>
-            </div>
-        </body>
-        </html>
+            tuple: (asunto, cuerpo_html)
         """
-        return html
+        if datos is None and self.db:
+            try:
+                datos = datos_cotizacion(self.db, numero_cotizacion)
+            except Exception as e:
+                print(f"Error cargando datos de la cotización {numero_cotizacion}: {e}")
+
+        valores = valores_email(self.config['email_nombre'], nombre_cliente, numero_cotizacion, datos)
+        return self.plantilla.renderizar(valores, mensaje_personalizado)
 
-    def _registrar_envio(self, email_destino, numero_cotizacion):
+    def registrar_envio(self, email_destino, numero_cotizacion):
         """
         Registra el envío de email en la base de datos
 
@@ -304,50 +557,31 @@ class EmailManager:
         """
         if self.db:
             try:
-                # Crear tabla de registro si no existe
-                self.db.cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS envios_email (
-                        id_envio INTEGER PRIMARY KEY AUTOINCREMENT,
-                        numero_cotizacion TEXT,
-                        email_destino TEXT,
-                        fecha_envio TEXT,
-                        estado TEXT DEFAULT 'Enviado'
-                    )
-                ''')
-
-                # Insertar registro
-                self.db.cursor.execute('''
-                    INSERT INTO envios_email (numero_cotizacion, email_destino, fecha_envio)
-                    VALUES (?, ?, ?)
-                ''', (numero_cotizacion, email_destino, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
-
-                self.db.conn.commit()
-
+                registrar_envios(self.db, [(email_destino, numero_cotizacion)])
             except Exception as e:
                 print(f"Error registrando envío: {e}")
 
-    def obtener_historial_envios(self, limite=50):
+    def obtener_historial_envios(self, limite=50, antes_de=None, numero_cotizacion=None):
         """
-        Obtiene el historial de emails enviados
+        Obtiene el historial de emails enviados, del más reciente al más antiguo
 
         Args:
             limite: Número máximo de registros a retornar
+            antes_de: (fecha_envio, id_envio) de la última fila de la página
+                      anterior, para pedir la siguiente
+            numero_cotizacion: Solo los envíos de esta cotización
 
         Returns:
-            list: Lista de envíos
+            list: Tuplas (numero_cotizacion, email_destino, fecha_envio, estado, id_envio)
         """
         if not self.db:
             return []
 
         try:
-            result = self.db.ejecutar_query('''
-                SELECT numero_cotizacion, email_destino, fecha_envio, estado
-                FROM envios_email
-                ORDER BY fecha_envio DESC
-                LIMIT ?
-            ''', (limite,))
-
-            return result.fetchall()
+            filas, _ = historial_envios(
+                self.db, limite, antes_de=antes_de, numero_cotizacion=numero_cotizacion
+            )
+            return filas
 
         except Exception as e:
             print(f"Error obteniendo historial: {e}")
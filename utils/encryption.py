@@ -12,9 +12,14 @@ from cryptography.fernet import Fernet
 class EncryptionManager:
     """Gestor de encriptación para datos sensibles"""
 
-    def __init__(self):
-        """Inicializa el gestor con la clave de encriptación"""
-        self.key_file = os.path.join(
+    def __init__(self, key_file=None):
+        """
+        Inicializa el gestor con la clave de encriptación
+
+        Args:
+            key_file: Ruta del archivo de la clave (por defecto, config/.encryption_key)
+        """
+        self.key_file = key_file or os.path.join(
             os.path.dirname(os.path.dirname(__file__)),
             'config',
             '.encryption_key'
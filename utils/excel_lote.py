@@ -0,0 +1,226 @@
+"""
+excel_lote.py - Exportación de muchos proyectos a Excel
+
+Para las revisiones trimestrales se exportan todos los proyectos activos
+de una vez, con el mismo formato que la exportación de un proyecto:
+- Carga los encabezados, niveles e items de todos los proyectos con dos
+  consultas por bloque de proyectos (cargar), antes de empezar a escribir
+- Escribe un libro por proyecto en un pool de procesos, porque openpyxl
+  es puro Python y no aprovecha hilos; o un solo libro con una hoja por
+  proyecto (un libro no se puede repartir entre procesos)
+- Informa el avance y el tiempo de cada archivo
+
+Los procesos trabajadores no abren la base de datos: reciben las filas ya
+cargadas y solo escriben el archivo.
+"""
+
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+
+from utils.excel_manager import (
+    CARPETA_EXPORTS, SQL_ITEMS_PROYECTOS,
+    escribir_hoja_proyecto, nuevo_libro_streaming, ruta_exportacion
+)
+
+# Proyectos por consulta (límite de parámetros de SQLite)
+BLOQUE_CONSULTA = 500
+
+_CARACTERES_HOJA = re.compile(r'[\[\]:*?/\\]')
+
+
+def _escribir_libro(ruta, proyectos):
+    """
+    Escribe un libro con una hoja por proyecto (se ejecuta en un proceso trabajador)
+
+    Args:
+        ruta: Archivo de salida
+        proyectos: Lista de (encabezado, filas)
+
+    Returns:
+        tuple: (ruta, items, segundos)
+    """
+    inicio = time.perf_counter()
+    wb = nuevo_libro_streaming()
+
+    items = 0
+    usados = set()
+    for proyecto, filas in proyectos:
+        titulo = _titulo_hoja(proyecto[0], usados) if len(proyectos) > 1 else "Proyecto"
+        items += escribir_hoja_proyecto(wb, proyecto, filas, titulo)
+
+    wb.save(ruta)
+    return ruta, items, time.perf_counter() - inicio
+
+
+def _titulo_hoja(numero_proyecto, usados):
+    """Nombre de hoja válido para Excel (31 caracteres, sin []:*?/\\) y único"""
+    base = _CARACTERES_HOJA.sub('-', str(numero_proyecto))[:31] or "Proyecto"
+    titulo = base
+    n = 2
+    while titulo.lower() in usados:
+        sufijo = f" ({n})"
+        titulo = base[:31 - len(sufijo)] + sufijo
+        n += 1
+    usados.add(titulo.lower())
+    return titulo
+
+
+class ExportadorExcelLote:
+    """Exporta muchos proyectos a Excel en paralelo"""
+
+    def __init__(self, db, procesos=None, carpeta=None):
+        """
+        Inicializa el exportador
+
+        Args:
+            db: Instancia conectada de DatabaseManager
+            procesos: Procesos trabajadores (por defecto, uno por núcleo;
+                      1 escribe en el proceso actual sin pool)
+            carpeta: Carpeta de salida (por defecto, exports/)
+        """
+        self.db = db
+        self.procesos = procesos or os.cpu_count() or 1
+        self.carpeta = carpeta or CARPETA_EXPORTS
+
+    def cargar(self, ids_proyecto):
+        """
+        Carga encabezados, niveles e items de varios proyectos
+
+        Debe llamarse en el hilo dueño de la conexión; el resultado se
+        puede pasar a escribir() desde otro hilo.
+
+        Returns:
+            dict: {id_proyecto: (encabezado, filas)} en el orden pedido
+        """
+        ids = list(dict.fromkeys(ids_proyecto))
+        encabezados = {}
+        filas = {}
+        cursor = self.db.conn.cursor()
+
+        for i in range(0, len(ids), BLOQUE_CONSULTA):
+            bloque = ids[i:i + BLOQUE_CONSULTA]
+            marcas = ', '.join('?' for _ in bloque)
+
+            cursor.execute(f'''
+                SELECT
+                    p.id_proyecto,
+                    p.numero_proyecto, p.nombre_proyecto,
+                    c.nombre_empresa, p.ubicacion, p.responsable,
+                    p.fecha_inicio, p.descripcion
+                FROM proyectos p
+                LEFT JOIN clientes c ON p.id_cliente = c.id_cliente
+                WHERE p.id_proyecto IN ({marcas})
+            ''', bloque)
+            for fila in cursor:
+                encabezados[fila[0]] = fila[1:]
+
+            cursor.execute(f'''
+                {SQL_ITEMS_PROYECTOS}
+                WHERE n.id_proyecto IN ({marcas})
+                ORDER BY n.id_proyecto, n.orden, n.codigo_nivel, n.id_nivel,
+                         i.orden, i.especificacion
+            ''', bloque)
+            for id_proyecto, filas_proyecto in groupby(cursor, key=itemgetter(12)):
+                filas[id_proyecto] = list(filas_proyecto)
+
+        return {
+            id_proyecto: (encabezados[id_proyecto], filas.get(id_proyecto, []))
+            for id_proyecto in ids if id_proyecto in encabezados
+        }
+
+    def escribir(self, datos, un_libro=False, progreso=None):
+        """
+        Escribe los archivos de proyectos ya cargados
+
+        Args:
+            datos: Resultado de cargar()
+            un_libro: Un solo libro con una hoja por proyecto en lugar de
+                      un archivo por proyecto
+            progreso: Función opcional progreso(hechos, total, ruta, segundos)
+
+        Returns:
+            dict: Estadísticas (proyectos, archivos, items, rutas, tiempos,
+                  errores, procesos, segundos, archivos_por_segundo)
+        """
+        inicio = time.perf_counter()
+        os.makedirs(self.carpeta, exist_ok=True)
+
+        if un_libro:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            ruta = os.path.join(self.carpeta, f"proyectos__{timestamp}.xlsx")
+            trabajos = [(ruta, list(datos.values()))] if datos else []
+        else:
+            trabajos = [
+                (ruta_exportacion(encabezado[0], self.carpeta), [(encabezado, filas)])
+                for encabezado, filas in datos.values()
+            ]
+
+        estadisticas = {
+            'proyectos': len(datos),
+            'archivos': 0,
+            'items': 0,
+            'rutas': [],
+            'tiempos': {},
+            'errores': [],
+            'procesos': min(self.procesos, len(trabajos)) or 1,
+        }
+
+        total = len(trabajos)
+        for hechos, (ruta, items, segundos) in enumerate(self._ejecutar(trabajos), 1):
+            if items is None:
+                estadisticas['errores'].append(ruta)
+            else:
+                estadisticas['archivos'] += 1
+                estadisticas['items'] += items
+                estadisticas['rutas'].append(ruta)
+                estadisticas['tiempos'][ruta] = segundos
+
+            if progreso:
+                progreso(hechos, total, ruta, segundos)
+
+        segundos = time.perf_counter() - inicio
+        estadisticas['segundos'] = segundos
+        estadisticas['archivos_por_segundo'] = estadisticas['archivos'] / segundos if segundos else 0
+        return estadisticas
+
+    def exportar(self, ids_proyecto, un_libro=False, progreso=None):
+        """
+        Carga y escribe varios proyectos
+
+        Returns:
+            dict: Estadísticas de escribir() más segundos_carga y no_encontrados
+        """
+        inicio = time.perf_counter()
+        datos = self.cargar(ids_proyecto)
+        segundos_carga = time.perf_counter() - inicio
+
+        estadisticas = self.escribir(datos, un_libro=un_libro, progreso=progreso)
+        estadisticas['segundos_carga'] = segundos_carga
+        estadisticas['segundos'] += segundos_carga
+        estadisticas['no_encontrados'] = [i for i in dict.fromkeys(ids_proyecto) if i not in datos]
+        return estadisticas
+
+    def _ejecutar(self, trabajos):
+        """Escribe los libros y entrega los resultados a medida que terminan"""
+        if self.procesos == 1 or len(trabajos) <= 1:
+            for ruta, proyectos in trabajos:
+                try:
+                    yield _escribir_libro(ruta, proyectos)
+                except Exception as e:
+                    print(f"Error exportando {ruta}: {e}")
+                    yield ruta, None, 0.0
+            return
+
+        with ProcessPoolExecutor(max_workers=min(self.procesos, len(trabajos))) as pool:
+            futuros = {pool.submit(_escribir_libro, *trabajo): trabajo[0] for trabajo in trabajos}
+            for futuro in as_completed(futuros):
+                try:
+                    yield futuro.result()
+                except Exception as e:
+                    print(f"Error exportando {futuros[futuro]}: {e}")
+                    yield futuros[futuro], None, 0.0
@@ -2,13 +2,323 @@
 excel_manager.py - Gestor de Exportación/Importación de Excel
 
 Permite exportar proyectos a Excel en formato editable e importar cambios
+
+La exportación usa por defecto una hoja de solo escritura (write_only) de
+openpyxl: las filas se escriben al archivo a medida que salen del cursor,
+con estilos con nombre compartidos por todas las celdas, así que proyectos
+de decenas de miles de items no se arman completos en memoria. El
+resultado tiene el mismo formato que la exportación en memoria anterior
+(exportar_proyecto_en_memoria), que se conserva para comparar.
+
+La importación se hace en dos pasos: previsualizar_importacion lee el
+archivo en modo de solo lectura y calcula en memoria los items nuevos,
+modificados (campo por campo), faltantes y sin cambios; aplicar_cambios
+guarda solo esas diferencias en una sola transacción. Importar de nuevo
+un archivo sin cambios no modifica nada.
 """
 
 import os
+import time
+import tracemalloc
 from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
 from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, Fill, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Fill, PatternFill, Alignment, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
+
+from models.database import FECHA_MODIFICACION_SQL
+
+# Carpeta por defecto de las exportaciones
+CARPETA_EXPORTS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'exports'
+)
+
+ENCABEZADOS_PROYECTO = [
+    'Nivel', 'Especificación', 'Descripción', 'Cantidad', 'Unidad',
+    'Costo Equipo', 'Costo Materiales', 'Costo Mano Obra', 'Total'
+]
+
+ANCHOS_COLUMNAS_PROYECTO = {
+    'A': 12, 'B': 20, 'C': 35, 'D': 10, 'E': 10,
+    'F': 15, 'G': 15, 'H': 18, 'I': 15
+}
+
+FORMATO_MONEDA = '"$"#,##0.00'
+
+
+def _estilos_proyecto():
+    """
+    Estilos con nombre de la exportación de proyectos
+
+    Cada celda guarda solo el nombre del estilo, en lugar de sus propios
+    objetos Font/Fill/Border/Alignment.
+    """
+    borde = Side(style='thin')
+    border = Border(left=borde, right=borde, top=borde, bottom=borde)
+    relleno = lambda color: PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+    nivel = dict(fill=relleno("e5e7eb"), font=Font(bold=True, size=11), border=border)
+    total = dict(fill=relleno("10b981"), font=Font(bold=True, color="FFFFFF", size=11), border=border)
+    total_general = dict(fill=relleno("059669"), font=Font(bold=True, color="FFFFFF", size=12),
+                         border=border)
+    derecha = Alignment(horizontal='right', vertical='center')
+
+    return [
+        NamedStyle('proy_titulo', font=Font(bold=True, size=16, color="1e293b"),
+                   alignment=Alignment(horizontal='center', vertical='center')),
+        NamedStyle('proy_info', font=Font(size=10, italic=True),
+                   alignment=Alignment(horizontal='center')),
+        NamedStyle('proy_descripcion', font=Font(size=9, italic=True)),
+        NamedStyle('proy_encabezado', fill=relleno("3b82f6"),
+                   font=Font(bold=True, color="FFFFFF", size=11), border=border,
+                   alignment=Alignment(horizontal='center', vertical='center')),
+        NamedStyle('proy_nivel', alignment=Alignment(horizontal='left', vertical='center'), **nivel),
+        NamedStyle('proy_nivel_total', alignment=derecha, number_format=FORMATO_MONEDA, **nivel),
+        NamedStyle('proy_celda', border=border),
+        NamedStyle('proy_cantidad', border=border, number_format='0.00',
+                   alignment=Alignment(horizontal='right')),
+        NamedStyle('proy_unidad', border=border, alignment=Alignment(horizontal='center')),
+        NamedStyle('proy_moneda', border=border, number_format=FORMATO_MONEDA,
+                   alignment=Alignment(horizontal='right')),
+        NamedStyle('proy_total', alignment=derecha, **total),
+        NamedStyle('proy_total_monto', alignment=derecha, number_format=FORMATO_MONEDA, **total),
+        NamedStyle('proy_total_general', alignment=derecha, **total_general),
+        NamedStyle('proy_total_general_monto', alignment=derecha, number_format=FORMATO_MONEDA,
+                   **total_general),
+    ]
+
+
+# Campos de un item que se comparan y se importan, en el orden de la hoja
+CAMPOS_ITEM = (
+    'descripcion', 'cantidad', 'unidad',
+    'costo_equipo', 'costo_materiales', 'costo_mano_obra'
+)
+
+
+def _total_item(valores):
+    """Total de un item a partir de sus valores (en el orden de CAMPOS_ITEM)"""
+    _, cantidad, _, costo_equipo, costo_materiales, costo_mano_obra = valores
+    return (costo_equipo + costo_materiales + costo_mano_obra) * cantidad
+
+
+def _mismo_valor(antes, despues):
+    """Compara un valor de la base de datos con el de la hoja"""
+    if antes in (None, '') and despues in (None, ''):
+        return True
+    if isinstance(antes, (int, float)) and isinstance(despues, (int, float)):
+        return abs(antes - despues) < 1e-9
+    return antes == despues
+
+
+class CambiosImportacion:
+    """
+    Diferencias entre un Excel y los items actuales de un proyecto
+
+    agregados:   (id_nivel, codigo_nivel, especificacion, valores, orden)
+    actualizados: (id_item, codigo_nivel, especificacion, valores,
+                   {campo: (antes, despues)})
+    faltantes:   (id_item, codigo_nivel, especificacion) de los items que
+                 están en el proyecto pero no en el archivo
+    sin_cambios: Cantidad de items idénticos
+
+    Los valores siguen el orden de CAMPOS_ITEM.
+    """
+
+    def __init__(self, id_proyecto):
+        self.id_proyecto = id_proyecto
+        self.agregados = []
+        self.actualizados = []
+        self.faltantes = []
+        self.sin_cambios = 0
+        self.niveles_ignorados = []
+        self.segundos = 0
+
+    def hay_cambios(self, eliminar_faltantes=False):
+        """True si aplicar los cambios modificaría el proyecto"""
+        return bool(self.agregados or self.actualizados
+                    or (eliminar_faltantes and self.faltantes))
+
+    def resumen(self):
+        """Texto corto con la cantidad de cambios"""
+        texto = (f"{len(self.agregados)} nuevos, {len(self.actualizados)} modificados, "
+                 f"{len(self.faltantes)} no están en el archivo, "
+                 f"{self.sin_cambios} sin cambios")
+        if self.niveles_ignorados:
+            texto += f"\nNiveles no encontrados (se ignoran): {', '.join(self.niveles_ignorados)}"
+        return texto
+
+
+# Niveles e items de proyectos en el orden de la hoja (LEFT JOIN: los
+# niveles sin items también salen); la última columna agrupa por proyecto
+SQL_ITEMS_PROYECTOS = '''
+    SELECT
+        n.id_nivel, n.codigo_nivel, n.nombre_nivel, n.total_nivel,
+        i.especificacion, i.descripcion, i.cantidad, i.unidad,
+        i.costo_equipo, i.costo_materiales, i.costo_mano_obra, i.total_item,
+        n.id_proyecto
+    FROM proyecto_niveles n
+    LEFT JOIN proyecto_items i ON i.id_nivel = n.id_nivel
+'''
+
+
+def ruta_exportacion(numero_proyecto, carpeta=None):
+    """Ruta del archivo de exportación de un proyecto"""
+    carpeta = carpeta or CARPETA_EXPORTS
+    os.makedirs(carpeta, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    nombre_archivo = f"{numero_proyecto}__{timestamp}.xlsx"
+    return os.path.join(carpeta, nombre_archivo)
+
+
+def _info_proyecto(proyecto):
+    """Texto de la fila de información del proyecto"""
+    info_text = f"Cliente: {proyecto[2] or 'N/A'}"
+    if proyecto[3]:
+        info_text += f"  |  Ubicación: {proyecto[3]}"
+    if proyecto[4]:
+        info_text += f"  |  Responsable: {proyecto[4]}"
+    return info_text
+
+
+def nuevo_libro_streaming():
+    """Libro de solo escritura con los estilos de la exportación de proyectos"""
+    wb = Workbook(write_only=True)
+    for estilo in _estilos_proyecto():
+        wb.add_named_style(estilo)
+    return wb
+
+
+def escribir_hoja_proyecto(wb, proyecto, filas, titulo="Proyecto"):
+    """
+    Escribe un proyecto en una hoja nueva de un libro de solo escritura
+
+    Args:
+        wb: Libro creado con nuevo_libro_streaming()
+        proyecto: (numero, nombre, cliente, ubicacion, responsable,
+                  fecha_inicio, descripcion)
+        filas: Filas de SQL_ITEMS_PROYECTOS (un cursor o una lista), en
+               orden de nivel y de item
+        titulo: Nombre de la hoja
+
+    Returns:
+        int: Cantidad de items escritos
+    """
+    ws = wb.create_sheet(titulo)
+
+    # Los anchos de columna deben definirse antes de escribir filas
+    for columna, ancho in ANCHOS_COLUMNAS_PROYECTO.items():
+        ws.column_dimensions[columna].width = ancho
+
+    def celda(valor=None, estilo='proy_celda'):
+        c = WriteOnlyCell(ws, value=valor)
+        c.style = estilo
+        return c
+
+    def combinar(rango):
+        ws.merged_cells.add(CellRange(rango))
+
+    # === ENCABEZADO DEL PROYECTO ===
+    row = 1
+    combinar(f'A{row}:I{row}')
+    ws.append([celda(f"{proyecto[0]} - {proyecto[1]}", 'proy_titulo')])
+    row += 1
+
+    combinar(f'A{row}:I{row}')
+    ws.append([celda(_info_proyecto(proyecto), 'proy_info')])
+    row += 1
+
+    if proyecto[6]:
+        combinar(f'A{row}:I{row}')
+        ws.append([celda(f"Descripción: {proyecto[6]}", 'proy_descripcion')])
+        row += 1
+
+    ws.append([])  # Espacio
+    row += 1
+
+    # === ENCABEZADOS DE COLUMNAS ===
+    ws.append([celda(h, 'proy_encabezado') for h in ENCABEZADOS_PROYECTO])
+    row += 1
+
+    # Celdas con estilo que se reutilizan en cada fila: ws.append escribe
+    # la fila al archivo de inmediato, así que basta con cambiar el valor
+    fila_nivel = [celda(None, 'proy_nivel')] + [celda() for _ in range(7)] \
+        + [celda(None, 'proy_nivel_total')]
+    fila_item = [
+        celda(), celda(), celda(),
+        celda(None, 'proy_cantidad'), celda(None, 'proy_unidad'),
+        celda(None, 'proy_moneda'), celda(None, 'proy_moneda'),
+        celda(None, 'proy_moneda'), celda(None, 'proy_moneda')
+    ]
+    valores_item = fila_item[1:]
+
+    total_equipos_proyecto = 0
+    total_materiales_proyecto = 0
+    total_mano_obra_proyecto = 0
+    total_proyecto = 0
+    items = 0
+
+    for (_, codigo_nivel, nombre_nivel, total_nivel), filas_nivel in groupby(
+        filas, key=itemgetter(0, 1, 2, 3)
+    ):
+        # Fila del nivel
+        combinar(f'A{row}:C{row}')
+        combinar(f'D{row}:H{row}')
+        fila_nivel[0].value = f"{codigo_nivel} - {nombre_nivel}"
+        fila_nivel[8].value = total_nivel or 0
+        ws.append(fila_nivel)
+        row += 1
+
+        # Items del nivel
+        for fila in filas_nivel:
+            (espec, desc, cant, unidad, c_equipo, c_materiales,
+             c_mano_obra, total_item) = fila[4:12]
+            if espec is None:
+                continue  # nivel sin items
+
+            for c, valor in zip(valores_item, (
+                espec, desc or '', cant, unidad,
+                c_equipo, c_materiales, c_mano_obra, total_item
+            )):
+                c.value = valor
+            ws.append(fila_item)
+
+            # Acumular totales
+            total_equipos_proyecto += c_equipo * cant
+            total_materiales_proyecto += c_materiales * cant
+            total_mano_obra_proyecto += c_mano_obra * cant
+            items += 1
+
+            row += 1
+
+        total_proyecto += total_nivel or 0
+        ws.append([])  # Espacio entre niveles
+        row += 1
+
+    # === TOTALES GENERALES ===
+    ws.append([])
+    row += 1
+
+    totales = [
+        ("TOTAL EQUIPOS", total_equipos_proyecto, 'proy_total'),
+        ("TOTAL MATERIALES", total_materiales_proyecto, 'proy_total'),
+        ("TOTAL MANO DE OBRA", total_mano_obra_proyecto, 'proy_total'),
+        ("TOTAL GENERAL DEL PROYECTO", total_proyecto, 'proy_total_general'),
+    ]
+    for etiqueta, monto, estilo in totales:
+        combinar(f'A{row}:E{row}')
+        combinar(f'F{row}:I{row}')
+        ws.append(
+            [celda(etiqueta, estilo)] + [celda(None, estilo) for _ in range(4)]
+            + [celda(monto, f'{estilo}_monto')] + [celda(None, estilo) for _ in range(3)]
+        )
+        row += 1
+
+    return items
 
 
 class ExcelManager:
@@ -23,18 +333,10 @@ class ExcelManager:
         """
         self.db = db
 
-    def exportar_proyecto(self, id_proyecto):
-        """
-        Exporta un proyecto a Excel
-
-        Args:
-            id_proyecto: ID del proyecto a exportar
-
-        Returns:
-            str: Ruta del archivo creado
-        """
-        # Obtener datos del proyecto
-        cursor = self.db.ejecutar_query('''
+    def _datos_proyecto(self, id_proyecto):
+        """Encabezado del proyecto (lanza Exception si no existe)"""
+        cursor = self.db.conn.cursor()
+        cursor.execute('''
             SELECT
                 p.numero_proyecto, p.nombre_proyecto,
                 c.nombre_empresa, p.ubicacion, p.responsable,
@@ -48,6 +350,59 @@ class ExcelManager:
 
         if not proyecto:
             raise Exception("Proyecto no encontrado")
+        return proyecto
+
+    def exportar_proyecto(self, id_proyecto, carpeta=None, streaming=True):
+        """
+        Exporta un proyecto a Excel
+
+        Args:
+            id_proyecto: ID del proyecto a exportar
+            carpeta: Carpeta de salida (por defecto, exports/)
+            streaming: Escribir fila por fila con una hoja de solo escritura;
+                       False usa la exportación en memoria anterior
+
+        Returns:
+            str: Ruta del archivo creado
+        """
+        if not streaming:
+            return self.exportar_proyecto_en_memoria(id_proyecto, carpeta)
+
+        proyecto = self._datos_proyecto(id_proyecto)
+
+        # === DATOS POR NIVEL (un solo cursor, en orden) ===
+        cursor = self.db.conn.cursor()
+        cursor.execute(f'''
+            {SQL_ITEMS_PROYECTOS}
+            WHERE n.id_proyecto = ?
+            ORDER BY n.orden, n.codigo_nivel, n.id_nivel, i.orden, i.especificacion
+        ''', (id_proyecto,))
+
+        wb = nuevo_libro_streaming()
+        escribir_hoja_proyecto(wb, proyecto, cursor)
+
+        # Guardar archivo
+        ruta_archivo = ruta_exportacion(proyecto[0], carpeta)
+        wb.save(ruta_archivo)
+
+        return ruta_archivo
+
+    def exportar_proyecto_en_memoria(self, id_proyecto, carpeta=None):
+        """
+        Exporta un proyecto a Excel armando todo el libro en memoria
+
+        Es la exportación original, con estilos por celda; se conserva para
+        comparar contra la exportación por streaming (benchmark_exportacion).
+
+        Args:
+            id_proyecto: ID del proyecto a exportar
+            carpeta: Carpeta de salida (por defecto, exports/)
+
+        Returns:
+            str: Ruta del archivo creado
+        """
+        # Obtener datos del proyecto
+        proyecto = self._datos_proyecto(id_proyecto)
 
         # Crear workbook
         wb = Workbook()
@@ -84,12 +439,7 @@ class ExcelManager:
 
         # Información del proyecto
         ws.merge_cells(f'A{row}:I{row}')
-        info_text = f"Cliente: {proyecto[2] or 'N/A'}"
-        if proyecto[3]:
-            info_text += f"  |  Ubicación: {proyecto[3]}"
-        if proyecto[4]:
-            info_text += f"  |  Responsable: {proyecto[4]}"
-        ws[f'A{row}'].value = info_text
+        ws[f'A{row}'].value = _info_proyecto(proyecto)
         ws[f'A{row}'].font = Font(size=10, italic=True)
         ws[f'A{row}'].alignment = Alignment(horizontal='center')
         row += 1
@@ -333,23 +683,16 @@ class ExcelManager:
         ws.column_dimensions['I'].width = 15
 
         # Guardar archivo
-        carpeta_exports = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-            'exports'
-        )
-        os.makedirs(carpeta_exports, exist_ok=True)
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        nombre_archivo = f"{proyecto[0]}__{timestamp}.xlsx"
-        ruta_archivo = os.path.join(carpeta_exports, nombre_archivo)
-
+        ruta_archivo = ruta_exportacion(proyecto[0], carpeta)
         wb.save(ruta_archivo)
 
         return ruta_archivo
 
     def importar_proyecto(self, id_proyecto, ruta_excel):
         """
-        Importa cambios desde Excel
+        Importa cambios desde Excel sin vista previa
+
+        Equivale a previsualizar_importacion seguido de aplicar_cambios.
 
         Args:
             id_proyecto: ID del proyecto
@@ -358,104 +701,299 @@ class ExcelManager:
         Returns:
             tuple: (exito, mensaje)
         """
-        try:
-            wb = load_workbook(ruta_excel)
-            ws = wb.active
+        exito, cambios = self.previsualizar_importacion(id_proyecto, ruta_excel)
+        if not exito:
+            return (False, cambios)
+        return self.aplicar_cambios(cambios)
+
+    def previsualizar_importacion(self, id_proyecto, ruta_excel):
+        """
+        Calcula los cambios que haría importar un Excel, sin guardar nada
+
+        El archivo se lee en modo de solo lectura y se compara en memoria
+        contra los items actuales del proyecto (una sola consulta, cruzada
+        por nivel y especificación).
+
+        Args:
+            id_proyecto: ID del proyecto
+            ruta_excel: Ruta del archivo Excel
 
-            # Verificar formato
-            if ws['B5'].value != 'Especificación':
+        Returns:
+            tuple: (exito, CambiosImportacion o mensaje de error)
+        """
+        try:
+            inicio = time.perf_counter()
+            hoja = self._leer_hoja_proyecto(ruta_excel)
+            if hoja is None:
                 return (False, "El archivo no tiene el formato esperado")
+            cambios = self._calcular_cambios(id_proyecto, hoja)
+            cambios.segundos = time.perf_counter() - inicio
+            return (True, cambios)
 
-            # Obtener niveles del proyecto
-            cursor = self.db.ejecutar_query('''
-                SELECT id_nivel, codigo_nivel
-                FROM proyecto_niveles
-                WHERE id_proyecto = ?
-                ORDER BY orden, codigo_nivel
-            ''', (id_proyecto,))
+        except Exception as e:
+            return (False, f"Error al leer Excel:\n{str(e)}")
+
+    def aplicar_cambios(self, cambios, eliminar_faltantes=False):
+        """
+        Guarda los cambios calculados por previsualizar_importacion
+
+        Solo se escriben los items agregados y los que tienen diferencias,
+        con executemany en una única transacción, y los totales de niveles
+        y proyecto se recalculan una vez al final. Si no hay cambios no se
+        toca la base de datos. Si algo falla no se guarda nada.
+
+        Args:
+            cambios: CambiosImportacion
+            eliminar_faltantes: Borrar también los items que no están en el archivo
+
+        Returns:
+            tuple: (exito, mensaje)
+        """
+        if not cambios.hay_cambios(eliminar_faltantes):
+            return (True, "El archivo no tiene cambios respecto al proyecto")
+
+        cursor = self.db.conn.cursor()
+        try:
+            inicio = time.perf_counter()
+
+            # fecha_modificacion se escribe aquí para que los triggers de
+            # seguimiento no hagan un UPDATE extra por fila
+            cursor.executemany(f'''
+                UPDATE proyecto_items
+                SET descripcion = ?, cantidad = ?, unidad = ?,
+                    costo_equipo = ?, costo_materiales = ?, costo_mano_obra = ?,
+                    total_item = ?, fecha_modificacion = {FECHA_MODIFICACION_SQL}
+                WHERE id_item = ?
+            ''', (
+                valores + (_total_item(valores), id_item)
+                for id_item, _, _, valores, _ in cambios.actualizados
+            ))
+
+            cursor.executemany(f'''
+                INSERT INTO proyecto_items (
+                    id_nivel, especificacion, descripcion,
+                    cantidad, unidad,
+                    costo_equipo, costo_materiales, costo_mano_obra,
+                    total_item, orden, fecha_modificacion
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {FECHA_MODIFICACION_SQL})
+            ''', (
+                (id_nivel, especificacion) + valores + (_total_item(valores), orden)
+                for id_nivel, _, especificacion, valores, orden in cambios.agregados
+            ))
+
+            if eliminar_faltantes:
+                cursor.executemany(
+                    "DELETE FROM proyecto_items WHERE id_item = ?",
+                    ((id_item,) for id_item, _, _ in cambios.faltantes)
+                )
+
+            self._actualizar_totales_proyecto(cursor, cambios.id_proyecto)
+            self.db.conn.commit()
+
+        except Exception as e:
+            self.db.conn.rollback()
+            return (False, f"Error al importar Excel:\n{str(e)}")
+
+        segundos = cambios.segundos + time.perf_counter() - inicio
+
+        mensaje = f"Importación exitosa:\n"
+        mensaje += f"- {len(cambios.actualizados)} items actualizados\n"
+        mensaje += f"- {len(cambios.agregados)} items nuevos agregados"
+        if eliminar_faltantes:
+            mensaje += f"\n- {len(cambios.faltantes)} items eliminados"
+        if cambios.niveles_ignorados:
+            mensaje += (f"\n- Niveles no encontrados en el proyecto (ignorados): "
+                        f"{', '.join(cambios.niveles_ignorados)}")
+        mensaje += f"\n({segundos:.2f} s)"
+
+        return (True, mensaje)
+
+    @staticmethod
+    def _leer_hoja_proyecto(ruta_excel):
+        """
+        Lee los items de un Excel exportado, agrupados por código de nivel
+
+        Returns:
+            dict: {codigo_nivel: {especificacion: (descripcion, cantidad,
+                  unidad, costo_equipo, costo_materiales, costo_mano_obra)}}
+                  en el orden del archivo, o None si el archivo no tiene el
+                  formato esperado. Si una especificación se repite dentro
+                  del nivel, queda la última fila.
+        """
+        wb = load_workbook(ruta_excel, read_only=True, data_only=True)
+        try:
+            filas = wb.active.iter_rows(values_only=True)
 
-            niveles_dict = {codigo: id_nivel for id_nivel, codigo in cursor.fetchall()}
+            # El encabezado de columnas está en la fila 4 o 5 (según haya descripción)
+            for numero_fila, fila in enumerate(filas, start=1):
+                if len(fila) > 1 and fila[1] == 'Especificación':
+                    break
+                if numero_fila >= 10:
+                    return None
+            else:
+                return None
 
-            # Leer datos del Excel
-            row = 6  # Comienza después del header
-            nivel_actual = None
-            items_actualizados = 0
-            items_nuevos = 0
+            niveles = {}
+            items_nivel = None
 
-            while row <= ws.max_row:
-                # Verificar si es una fila de nivel
-                nivel_codigo = ws[f'A{row}'].value
+            for fila in filas:
+                fila = tuple(fila[:9]) + (None,) * (9 - len(fila))
+                nivel_codigo, especificacion = fila[0], fila[1]
 
                 if nivel_codigo and '-' in str(nivel_codigo):
-                    # Es un nivel
-                    codigo_nivel = str(nivel_codigo).split('-')[0].strip()
-                    if codigo_nivel in niveles_dict:
-                        nivel_actual = niveles_dict[codigo_nivel]
-                    row += 1
+                    # Fila de nivel: "CODIGO - Nombre"
+                    texto = str(nivel_codigo)
+                    separador = ' - ' if ' - ' in texto else '-'
+                    codigo_nivel = texto.split(separador)[0].strip()
+                    items_nivel = niveles.setdefault(codigo_nivel, {})
                     continue
 
-                # Es un item
-                if nivel_actual and ws[f'B{row}'].value:
-                    especificacion = ws[f'B{row}'].value
-                    descripcion = ws[f'C{row}'].value
-                    cantidad = ws[f'D{row}'].value or 1
-                    unidad = ws[f'E{row}'].value or 'unidad'
-                    costo_equipo = ws[f'F{row}'].value or 0
-                    costo_materiales = ws[f'G{row}'].value or 0
-                    costo_mano_obra = ws[f'H{row}'].value or 0
-
-                    # Verificar si el item existe
-                    cursor_check = self.db.ejecutar_query('''
-                        SELECT id_item
-                        FROM proyecto_items
-                        WHERE id_nivel = ? AND especificacion = ?
-                    ''', (nivel_actual, especificacion))
-
-                    item_existe = cursor_check.fetchone()
-
-                    if item_existe:
-                        # Actualizar item existente
-                        total_item = (costo_equipo + costo_materiales + costo_mano_obra) * cantidad
-
-                        self.db.ejecutar_query('''
-                            UPDATE proyecto_items
-                            SET descripcion = ?, cantidad = ?, unidad = ?,
-                                costo_equipo = ?, costo_materiales = ?, costo_mano_obra = ?,
-                                total_item = ?
-                            WHERE id_item = ?
-                        ''', (
-                            descripcion, cantidad, unidad,
-                            costo_equipo, costo_materiales, costo_mano_obra,
-                            total_item, item_existe[0]
-                        ))
-                        items_actualizados += 1
-                    else:
-                        # Crear nuevo item
-                        total_item = (costo_equipo + costo_materiales + costo_mano_obra) * cantidad
-
-                        self.db.ejecutar_query('''
-                            INSERT INTO proyecto_items (
-                                id_nivel, especificacion, descripcion,
-                                cantidad, unidad,
-                                costo_equipo, costo_materiales, costo_mano_obra,
-                                total_item, orden
-                            )
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 999)
-                        ''', (
-                            nivel_actual, especificacion, descripcion,
-                            cantidad, unidad,
-                            costo_equipo, costo_materiales, costo_mano_obra,
-                            total_item
-                        ))
-                        items_nuevos += 1
+                if items_nivel is not None and especificacion:
+                    cantidad = fila[3] or 1
+                    # str(): la columna especificacion es TEXT en la base de datos
+                    items_nivel[str(especificacion)] = (
+                        fila[2], cantidad, fila[4] or 'unidad',
+                        fila[5] or 0, fila[6] or 0, fila[7] or 0
+                    )
+
+            return niveles
+        finally:
+            wb.close()
+
+    def _calcular_cambios(self, id_proyecto, hoja):
+        """Compara la hoja leída contra los items actuales del proyecto"""
+        cambios = CambiosImportacion(id_proyecto)
+
+        cursor = self.db.conn.cursor()
+        cursor.execute('''
+            SELECT codigo_nivel, id_nivel
+            FROM proyecto_niveles
+            WHERE id_proyecto = ?
+        ''', (id_proyecto,))
+        niveles_dict = dict(cursor.fetchall())
+        codigos_nivel = {id_nivel: codigo for codigo, id_nivel in niveles_dict.items()}
 
-                row += 1
+        # Items actuales por (nivel, especificación); si se repite, cuenta el primero
+        cursor.execute('''
+            SELECT
+                i.id_nivel, i.especificacion, i.id_item, i.orden,
+                i.descripcion, i.cantidad, i.unidad,
+                i.costo_equipo, i.costo_materiales, i.costo_mano_obra
+            FROM proyecto_items i
+            JOIN proyecto_niveles n ON n.id_nivel = i.id_nivel
+            WHERE n.id_proyecto = ?
+            ORDER BY i.id_item
+        ''', (id_proyecto,))
+        existentes = {}
+        ultimo_orden = {}
+        for fila in cursor:
+            existentes.setdefault((fila[0], fila[1]), fila[2:])
+            ultimo_orden[fila[0]] = max(ultimo_orden.get(fila[0], 0), fila[3] or 0)
+
+        for codigo_nivel, items in hoja.items():
+            id_nivel = niveles_dict.get(codigo_nivel)
+            if id_nivel is None:
+                if items:
+                    cambios.niveles_ignorados.append(codigo_nivel)
+                continue
+
+            for especificacion, valores in items.items():
+                actual = existentes.pop((id_nivel, especificacion), None)
+
+                if actual is None:
+                    # Los items nuevos quedan al final del nivel, en el orden del archivo
+                    ultimo_orden[id_nivel] = ultimo_orden.get(id_nivel, 0) + 1
+                    cambios.agregados.append(
+                        (id_nivel, codigo_nivel, especificacion, valores, ultimo_orden[id_nivel])
+                    )
+                    continue
+
+                id_item, valores_actuales = actual[0], actual[2:]
+                diferencias = {
+                    campo: (antes, despues)
+                    for campo, antes, despues in zip(CAMPOS_ITEM, valores_actuales, valores)
+                    if not _mismo_valor(antes, despues)
+                }
+                if diferencias:
+                    cambios.actualizados.append(
+                        (id_item, codigo_nivel, especificacion, valores, diferencias)
+                    )
+                else:
+                    cambios.sin_cambios += 1
+
+        # Lo que quedó sin cruzar existe en el proyecto pero no en el archivo
+        for (id_nivel, especificacion), actual in existentes.items():
+            cambios.faltantes.append((actual[0], codigos_nivel[id_nivel], especificacion))
+
+        return cambios
+
+    @staticmethod
+    def _actualizar_totales_proyecto(cursor, id_proyecto):
+        """Recalcula los subtotales de los niveles y del proyecto (sin commit)"""
+        cursor.execute(f'''
+            UPDATE proyecto_niveles
+            SET (subtotal_equipos, subtotal_materiales, subtotal_mano_obra, total_nivel) = (
+                SELECT
+                    COALESCE(SUM(costo_equipo * cantidad), 0),
+                    COALESCE(SUM(costo_materiales * cantidad), 0),
+                    COALESCE(SUM(costo_mano_obra * cantidad), 0),
+                    COALESCE(SUM(total_item), 0)
+                FROM proyecto_items
+                WHERE id_nivel = proyecto_niveles.id_nivel
+            ), fecha_modificacion = {FECHA_MODIFICACION_SQL}
+            WHERE id_proyecto = ?
+        ''', (id_proyecto,))
 
-            mensaje = f"Importación exitosa:\n"
-            mensaje += f"- {items_actualizados} items actualizados\n"
-            mensaje += f"- {items_nuevos} items nuevos agregados"
+        cursor.execute(f'''
+            UPDATE proyectos
+            SET (subtotal_equipos, subtotal_materiales, subtotal_mano_obra, total_proyecto) = (
+                SELECT
+                    COALESCE(SUM(subtotal_equipos), 0),
+                    COALESCE(SUM(subtotal_materiales), 0),
+                    COALESCE(SUM(subtotal_mano_obra), 0),
+                    COALESCE(SUM(total_nivel), 0)
+                FROM proyecto_niveles
+                WHERE id_proyecto = proyectos.id_proyecto
+            ), fecha_modificacion = {FECHA_MODIFICACION_SQL}
+            WHERE id_proyecto = ?
+        ''', (id_proyecto,))
 
-            return (True, mensaje)
 
-        except Exception as e:
-            return (False, f"Error al importar Excel:\n{str(e)}")
+def benchmark_exportacion(db, id_proyecto, carpeta=None, medir_memoria=True):
+    """
+    Compara la exportación por streaming contra la exportación en memoria
+
+    Args:
+        db: Instancia conectada de DatabaseManager
+        id_proyecto: Proyecto a exportar
+        carpeta: Carpeta de salida (por defecto, exports/)
+        medir_memoria: Medir el pico de memoria con tracemalloc (hace más
+                       lentas ambas corridas)
+
+    Returns:
+        dict: {'streaming': {...}, 'en_memoria': {...}} con segundos,
+              pico_mb (o None), bytes y ruta de cada corrida
+    """
+    manager = ExcelManager(db)
+    resultados = {}
+
+    for nombre, streaming in (('streaming', True), ('en_memoria', False)):
+        if medir_memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        ruta = manager.exportar_proyecto(id_proyecto, carpeta, streaming=streaming)
+        segundos = time.perf_counter() - inicio
+        pico = None
+        if medir_memoria:
+            pico = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+
+        resultados[nombre] = {
+            'segundos': segundos,
+            'pico_mb': pico,
+            'bytes': os.path.getsize(ruta),
+            'ruta': ruta
+        }
+
+    return resultados
@@ -0,0 +1,462 @@
+"""
+importador_cotizaciones.py - Creación masiva de cotizaciones desde archivos
+
+Lee cotizaciones desde CSV o JSON, les aplica las mismas reglas de precio
+que la ventana de nueva cotización (factor de venta, INS/CCSS e IVA) y las
+guarda en una sola transacción.
+
+Los archivos se procesan en streaming: solo se mantiene en memoria la
+cotización que se está leyendo y un lote de líneas pendientes de insertar,
+así que el consumo de memoria no depende del tamaño del archivo.
+
+FORMATO CSV (una fila por línea, filas de la misma cotización seguidas):
+    referencia, id_cliente | cliente, tipo_servicio, visitas_anuales,
+    fecha_emision, iva_porcentaje, incluir_ins_ccss, mostrar_colones,
+    id_proyecto, notas, categoria, id_referencia, descripcion,
+    cantidad, medida, precio_unitario
+
+FORMATO JSON (arreglo de objetos o un objeto por línea):
+    {"referencia": "...", "id_cliente": 1, "tipo_servicio": "...",
+     "lineas": [{"categoria": "equipo", "id_referencia": 3, "cantidad": 2}]}
+"""
+
+import csv
+import itertools
+import json
+import os
+import time
+from datetime import datetime
+
+from models.cotizaciones import (
+    CATEGORIAS, calcular_totales, construir_lineas, precio_equipo
+)
+from models.database import FECHA_MODIFICACION_SQL
+from models.secuencias import reservar_numeros_cotizacion, devolver_numeros_cotizacion
+
+
+# Campos de encabezado que se toman de la primera fila de cada cotización (CSV)
+CAMPOS_ENCABEZADO = (
+    'referencia', 'id_cliente', 'cliente', 'tipo_servicio', 'visitas_anuales',
+    'fecha_emision', 'iva_porcentaje', 'incluir_ins_ccss', 'mostrar_colones',
+    'id_proyecto', 'notas'
+)
+
+# Campos de cada línea
+CAMPOS_LINEA = (
+    'categoria', 'id_referencia', 'descripcion', 'cantidad', 'medida', 'precio_unitario'
+)
+
+# Tamaño máximo de un objeto JSON (caracteres); más que eso se toma como
+# un archivo mal formado en lugar de seguir acumulando el archivo en memoria
+MAX_OBJETO_JSON = 16 * 1024 * 1024
+
+
+class ErrorCotizacion(Exception):
+    """Error de validación de una cotización del archivo"""
+
+
+class ImportadorCotizaciones:
+    """Crea cotizaciones en lote a partir de archivos CSV o JSON"""
+
+    def __init__(self, db, tamano_lote=500):
+        """
+        Inicializa el importador
+
+        Args:
+            db: Instancia de DatabaseManager conectada
+            tamano_lote: Cotizaciones por cada executemany de líneas
+        """
+        self.db = db
+        self.tamano_lote = tamano_lote
+
+        # Configuración de precios (igual que NuevaCotizacionWindow)
+        self.factor_venta = float(db.obtener_configuracion('factor_venta') or 1.5)
+        self.iva = float(db.obtener_configuracion('iva') or 0.13)
+        self.tipo_cambio = float(db.obtener_configuracion('tipo_cambio') or 515)
+        self.costo_hora = float(db.obtener_configuracion('costo_hora_tecnico') or 15)
+
+        self._cargar_catalogos()
+
+    def _cargar_catalogos(self):
+        """Carga clientes, equipos y materiales una sola vez"""
+        cursor = self.db.cursor
+
+        cursor.execute('SELECT id_cliente, nombre_empresa FROM clientes WHERE activo = 1')
+        self.clientes = {}
+        self.clientes_por_nombre = {}
+        for id_cliente, nombre in cursor.fetchall():
+            self.clientes[id_cliente] = nombre
+            self.clientes_por_nombre[(nombre or '').strip().lower()] = id_cliente
+
+        cursor.execute('SELECT id_equipo, tipo_equipo, horas_mantenimiento FROM productos_equipos')
+        self.equipos = {id_e: (tipo, horas or 0) for id_e, tipo, horas in cursor.fetchall()}
+
+        cursor.execute('SELECT id_material, nombre_material, precio_unitario FROM materiales_repuestos')
+        self.materiales = {id_m: (nombre, precio or 0) for id_m, nombre, precio in cursor.fetchall()}
+
+    # --- LECTURA EN STREAMING ---
+
+    def leer_archivo(self, ruta):
+        """
+        Itera las cotizaciones de un archivo según su extensión
+
+        Args:
+            ruta: Ruta al archivo .csv, .json, .jsonl o .ndjson
+
+        Yields:
+            dict: Cotización con sus campos de encabezado y 'lineas', o
+                  ErrorCotizacion si un elemento del archivo no es válido
+        """
+        extension = os.path.splitext(ruta)[1].lower()
+
+        if extension == '.csv':
+            return self.leer_csv(ruta)
+        if extension in ('.json', '.jsonl', '.ndjson'):
+            return self.leer_json(ruta)
+
+        raise ValueError(f"Formato no soportado: {extension}")
+
+    def leer_csv(self, ruta):
+        """Itera las cotizaciones de un CSV agrupando filas consecutivas por referencia"""
+        with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+            lector = csv.DictReader(archivo)
+
+            for referencia, filas in itertools.groupby(lector, key=lambda f: f.get('referencia')):
+                cotizacion = None
+
+                for fila in filas:
+                    if cotizacion is None:
+                        cotizacion = {campo: fila.get(campo) for campo in CAMPOS_ENCABEZADO}
+                        cotizacion['lineas'] = []
+                        # Línea del archivo donde empieza la cotización (para los errores)
+                        cotizacion['fila'] = lector.line_num
+
+                    if fila.get('categoria'):
+                        cotizacion['lineas'].append({campo: fila.get(campo) for campo in CAMPOS_LINEA})
+
+                yield cotizacion
+
+    def leer_json(self, ruta, tamano_bloque=64 * 1024):
+        """
+        Itera los objetos de un archivo JSON sin cargarlo completo
+
+        Acepta un arreglo de objetos ([{...}, {...}]) o un objeto por línea.
+        Cada objeto lleva en 'fila' su posición en el archivo (para los errores).
+        Los elementos que no son objetos se entregan como ErrorCotizacion.
+
+        Raises:
+            ValueError: Si el JSON está mal formado o un objeto supera MAX_OBJETO_JSON
+        """
+        decoder = json.JSONDecoder()
+        numero = 0
+
+        with open(ruta, encoding='utf-8-sig') as archivo:
+            buffer = ''
+            pos = 0
+
+            while True:
+                # Saltar separadores entre objetos del nivel superior
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n,[]':
+                    pos += 1
+
+                if pos >= len(buffer):
+                    buffer = archivo.read(tamano_bloque)
+                    pos = 0
+                    if not buffer:
+                        return
+                    continue
+
+                try:
+                    objeto, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as e:
+                    # El objeto quedó cortado al final del bloque: leer más.
+                    # Se lee tanto como lo pendiente, así un objeto grande se
+                    # vuelve a decodificar pocas veces y no una por bloque.
+                    pendiente = len(buffer) - pos
+                    if pendiente > MAX_OBJETO_JSON:
+                        raise ValueError(
+                            f"Fila {numero + 1}: objeto JSON mal formado o de más de "
+                            f"{MAX_OBJETO_JSON // (1024 * 1024)} MB ({e.msg})"
+                        ) from e
+                    bloque = archivo.read(max(tamano_bloque, pendiente))
+                    if not bloque:
+                        raise
+                    buffer = buffer[pos:] + bloque
+                    pos = 0
+                    continue
+
+                numero += 1
+                if isinstance(objeto, dict):
+                    objeto.setdefault('fila', numero)
+                    yield objeto
+                else:
+                    yield ErrorCotizacion(
+                        f"Fila {numero}: se esperaba un objeto, no {type(objeto).__name__}"
+                    )
+
+    # --- CÁLCULO ---
+
+    def preparar_cotizacion(self, datos):
+        """
+        Valida una cotización y calcula sus líneas y totales
+
+        Args:
+            datos: Diccionario leído del archivo
+
+        Returns:
+            tuple: (encabezado, lineas, totales)
+
+        Raises:
+            ErrorCotizacion: Si faltan datos o hay valores inválidos
+        """
+        referencia = datos.get('referencia') or '?'
+        if datos.get('fila'):
+            referencia = f"Fila {datos['fila']} ({referencia})"
+
+        # Cliente por ID o por nombre de empresa
+        try:
+            id_cliente = _entero(datos.get('id_cliente'))
+        except ValueError:
+            id_cliente = None
+        if id_cliente is None and datos.get('cliente'):
+            id_cliente = self.clientes_por_nombre.get(str(datos['cliente']).strip().lower())
+        if id_cliente not in self.clientes:
+            raise ErrorCotizacion(f"{referencia}: cliente no encontrado")
+
+        items = {categoria: [] for categoria in CATEGORIAS}
+
+        for linea in datos.get('lineas') or []:
+            categoria = (linea.get('categoria') or '').strip().lower()
+            if categoria not in items:
+                raise ErrorCotizacion(f"{referencia}: categoría inválida '{categoria}'")
+
+            try:
+                items[categoria].append(self._precio_linea(categoria, linea))
+            except (TypeError, ValueError) as e:
+                raise ErrorCotizacion(f"{referencia}: línea de {categoria} inválida ({e})")
+
+        if not any(items[c] for c in CATEGORIAS if c != 'gasto'):
+            raise ErrorCotizacion(f"{referencia}: la cotización no tiene items")
+
+        try:
+            iva_porcentaje = _decimal(datos.get('iva_porcentaje'), self.iva * 100)
+            id_proyecto = _entero(datos.get('id_proyecto'))
+            visitas_anuales = _entero(datos.get('visitas_anuales')) or 1
+        except (TypeError, ValueError) as e:
+            raise ErrorCotizacion(f"{referencia}: encabezado inválido ({e})")
+        incluir_ins_ccss = _booleano(datos.get('incluir_ins_ccss'))
+
+        argumentos = {
+            'equipos': items['equipo'], 'ductos': items['ducto'],
+            'difusores': items['difusor'], 'rejillas': items['rejilla'],
+            'tuberias': items['tuberia'], 'mano_obra': items['mano_obra'],
+            'materiales': items['material'], 'gastos': items['gasto'],
+        }
+        totales = calcular_totales(
+            iva_porcentaje=iva_porcentaje,
+            incluir_ins_ccss=incluir_ins_ccss,
+            **argumentos
+        )
+
+        encabezado = {
+            'id_cliente': id_cliente,
+            'id_proyecto': id_proyecto,
+            'fecha_emision': datos.get('fecha_emision') or datetime.now().strftime('%Y-%m-%d'),
+            'tipo_servicio': datos.get('tipo_servicio') or 'Mantenimiento',
+            'visitas_anuales': visitas_anuales,
+            'iva_porcentaje': iva_porcentaje,
+            'mostrar_colones': 1 if _booleano(datos.get('mostrar_colones')) else 0,
+            'notas': datos.get('notas') or None,
+        }
+
+        return encabezado, construir_lineas(**argumentos), totales
+
+    def _precio_linea(self, categoria, linea):
+        """Convierte una línea del archivo en el item que usa la interfaz"""
+        descripcion = (linea.get('descripcion') or '').strip()
+        cantidad = _decimal(linea.get('cantidad'), 1)
+        precio = _decimal(linea.get('precio_unitario'), None)
+
+        if cantidad < 0 or (precio is not None and precio < 0):
+            raise ValueError("valores negativos")
+
+        if categoria == 'equipo':
+            id_equipo = _entero(linea.get('id_referencia'))
+            if id_equipo not in self.equipos:
+                raise ValueError(f"equipo {id_equipo} no existe")
+            tipo, horas = self.equipos[id_equipo]
+            cantidad = int(cantidad)
+            horas_total, subtotal = precio_equipo(horas, cantidad, self.costo_hora, self.factor_venta)
+            return {'id': id_equipo, 'nombre': tipo, 'cantidad': cantidad,
+                    'horas': horas_total, 'subtotal': subtotal}
+
+        if categoria == 'material':
+            id_material = _entero(linea.get('id_referencia'))
+            if id_material not in self.materiales:
+                raise ValueError(f"material {id_material} no existe")
+            nombre, precio_catalogo = self.materiales[id_material]
+            precio = precio_catalogo if precio is None else precio
+            return {'id': id_material, 'nombre': nombre, 'cantidad': cantidad,
+                    'precio_unit': precio, 'subtotal': cantidad * precio}
+
+        precio = precio or 0
+
+        if categoria == 'ducto':
+            largo_retorno = _decimal(linea.get('medida'), 0)
+            return {'tipo': descripcion, 'largo_suministro': cantidad,
+                    'largo_retorno': largo_retorno, 'precio_metro': precio,
+                    'subtotal': (cantidad + largo_retorno) * precio}
+
+        if categoria == 'tuberia':
+            return {'tipo': descripcion, 'largo': cantidad, 'precio_metro': precio,
+                    'subtotal': cantidad * precio}
+
+        if categoria == 'gasto':
+            return {'concepto': descripcion, 'monto': precio}
+
+        if categoria == 'mano_obra':
+            return {'tipo': '', 'descripcion': descripcion, 'cantidad': cantidad,
+                    'precio_unit': precio, 'subtotal': cantidad * precio}
+
+        # Difusores y rejillas
+        return {'tipo': descripcion, 'cantidad': int(cantidad), 'precio_unit': precio,
+                'subtotal': int(cantidad) * precio}
+
+    # --- IMPORTACIÓN ---
+
+    def importar(self, ruta, omitir_errores=False, simular=False, progreso=None):
+        """
+        Importa todas las cotizaciones de un archivo en una sola transacción
+
+        Args:
+            ruta: Ruta al archivo CSV o JSON
+            omitir_errores: Si es True, salta las cotizaciones inválidas;
+                            si es False, la primera inválida cancela todo
+            simular: Calcula y valida sin guardar nada
+            progreso: Función opcional progreso(cotizaciones, lineas)
+
+        Returns:
+            dict: Estadísticas (cotizaciones, lineas, errores, segundos, por_segundo)
+        """
+        estadisticas = {'cotizaciones': 0, 'lineas': 0, 'total': 0.0, 'errores': []}
+        inicio = time.perf_counter()
+
+        cursor = self.db.cursor
+        pendientes = []
+        numeros = iter(())
+        fecha_numeros = datetime.now()
+
+        try:
+            for datos in self.leer_archivo(ruta):
+                try:
+                    if isinstance(datos, ErrorCotizacion):
+                        raise datos
+                    encabezado, lineas, totales = self.preparar_cotizacion(datos)
+                except ErrorCotizacion as e:
+                    if not omitir_errores:
+                        raise
+                    estadisticas['errores'].append(str(e))
+                    continue
+
+                # Los números se reservan por bloques de tamano_lote; los que
+                # sobran del último bloque se devuelven antes del commit
+                numero = next(numeros, None)
+                if numero is None:
+                    numeros = iter(reservar_numeros_cotizacion(
+                        cursor, self.tamano_lote, fecha_numeros
+                    ))
+                    numero = next(numeros)
+                id_cotizacion = self._insertar_encabezado(numero, encabezado, totales)
+                pendientes.append((id_cotizacion, lineas))
+
+                estadisticas['cotizaciones'] += 1
+                estadisticas['lineas'] += len(lineas)
+                estadisticas['total'] += totales['total']
+
+                if len(pendientes) >= self.tamano_lote:
+                    self._insertar_lineas(pendientes)
+                    pendientes = []
+                    if progreso:
+                        progreso(estadisticas['cotizaciones'], estadisticas['lineas'])
+
+            self._insertar_lineas(pendientes)
+            devolver_numeros_cotizacion(cursor, sum(1 for _ in numeros), fecha_numeros)
+
+            if simular:
+                self.db.conn.rollback()
+            else:
+                self.db.conn.commit()
+
+        except Exception:
+            self.db.conn.rollback()
+            raise
+
+        segundos = time.perf_counter() - inicio
+        estadisticas['segundos'] = segundos
+        estadisticas['por_segundo'] = estadisticas['cotizaciones'] / segundos if segundos else 0
+        estadisticas['lineas_por_segundo'] = estadisticas['lineas'] / segundos if segundos else 0
+
+        return estadisticas
+
+    def _insertar_encabezado(self, numero, encabezado, totales):
+        """Inserta el encabezado de una cotización y devuelve su ID"""
+        self.db.cursor.execute(f'''
+            INSERT INTO cotizaciones (
+                numero_cotizacion, id_cliente, id_proyecto, fecha_emision, tipo_servicio,
+                visitas_anuales, factor_venta, iva, tipo_cambio,
+                total_mano_obra, total_materiales, total_gastos,
+                total_ductos, total_difusores, total_rejillas, total_tuberias,
+                ins_ccss, subtotal, total_iva, total, estado,
+                iva_porcentaje, mostrar_colones, notas, fecha_modificacion
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                      {FECHA_MODIFICACION_SQL})
+        ''', (
+            numero, encabezado['id_cliente'], encabezado['id_proyecto'],
+            encabezado['fecha_emision'], encabezado['tipo_servicio'],
+            encabezado['visitas_anuales'], self.factor_venta, self.iva, self.tipo_cambio,
+            totales['total_mano_obra'], totales['total_materiales'], totales['total_gastos'],
+            totales['total_ductos'], totales['total_difusores'],
+            totales['total_rejillas'], totales['total_tuberias'],
+            totales['ins_ccss'], totales['subtotal'], totales['total_iva'], totales['total'],
+            'pendiente', encabezado['iva_porcentaje'], encabezado['mostrar_colones'],
+            encabezado['notas']
+        ))
+        return self.db.cursor.lastrowid
+
+    def _insertar_lineas(self, pendientes):
+        """Inserta las líneas de un lote de cotizaciones con un solo executemany"""
+        if not pendientes:
+            return
+
+        filas = (
+            (id_cotizacion,) + tuple(linea)
+            for id_cotizacion, lineas in pendientes
+            for linea in lineas
+        )
+        self.db.cursor.executemany(f'''
+            INSERT INTO cotizacion_lineas (
+                id_cotizacion, categoria, id_referencia, descripcion,
+                cantidad, medida, precio_unitario, subtotal, orden, fecha_modificacion
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, {FECHA_MODIFICACION_SQL})
+        ''', filas)
+
+
+def _entero(valor):
+    """Convierte a int; None o vacío devuelve None"""
+    if valor is None or valor == '':
+        return None
+    return int(float(valor))
+
+
+def _decimal(valor, defecto):
+    """Convierte a float; None o vacío devuelve el valor por defecto"""
+    if valor is None or valor == '':
+        return defecto
+    return float(valor)
+
+
+def _booleano(valor):
+    """Interpreta 1/0, si/no, true/false"""
+    if isinstance(valor, bool):
+        return valor
+    return str(valor or '').strip().lower() in ('1', 'si', 'sí', 'true', 'x', 'yes')
@@ -0,0 +1,546 @@
+"""
+importador_precios.py - Importación de listas de precios de proveedores
+
+Carga listas de precios (CSV o Excel) en los catálogos de equipos,
+materiales y componentes HVAC, actualizando por código:
+
+    equipos     -> productos_equipos   (clave: codigo)
+    materiales  -> materiales_repuestos (clave: codigo_producto)
+    catalogo    -> catalogo_hvac        (clave: codigo)
+
+Cada proveedor usa sus propios encabezados, así que las columnas se
+asignan con un mapeo {campo: encabezado del archivo}. Los campos sin mapeo
+se buscan por nombre y por sinónimos comunes (SKU, Precio, Unidad, ...).
+
+El archivo se procesa por bloques de filas: cada bloque se limpia (texto
+sin espacios, montos con símbolos y separadores de miles convertidos a
+número, filas sin código descartadas, códigos repetidos -> queda la
+última fila) y se guarda con executemany. Si pandas está instalado la
+limpieza se hace por columnas con pandas; si no, fila por fila con el
+mismo resultado. Todo el archivo se guarda en una sola transacción.
+
+CONFIGURACIÓN (JSON, opcional):
+    {"destino": "materiales", "hoja": "Lista 2025", "fila_encabezado": 3,
+     "columnas": {"codigo_producto": "SKU", "precio_unitario": "Precio USD"},
+     "valores": {"unidad_medida": "unidad"}}
+"""
+
+import csv
+import json
+import os
+import re
+import time
+import unicodedata
+from operator import itemgetter
+
+from openpyxl import load_workbook
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+# Tablas de destino: clave de actualización, tipos de campo, campos de
+# precio (al menos uno debe venir en el archivo) y valores por defecto de las
+# columnas NOT NULL al insertar
+DESTINOS = {
+    'equipos': {
+        'tabla': 'productos_equipos',
+        'clave': 'codigo',
+        'texto': ('codigo', 'tipo_equipo', 'categoria', 'descripcion'),
+        'numeros': ('precio_base', 'horas_mantenimiento'),
+        'precios': ('precio_base',),
+        'obligatorios': ('codigo', 'tipo_equipo'),
+        'defectos': {'categoria': 'Otro'},
+    },
+    'materiales': {
+        'tabla': 'materiales_repuestos',
+        'clave': 'codigo_producto',
+        'texto': ('codigo_producto', 'nombre_material', 'unidad_medida'),
+        'numeros': ('precio_unitario', 'stock_actual'),
+        'precios': ('precio_unitario',),
+        'obligatorios': ('codigo_producto', 'nombre_material'),
+        'defectos': {'unidad_medida': 'unidad'},
+    },
+    'catalogo': {
+        'tabla': 'catalogo_hvac',
+        'clave': 'codigo',
+        'texto': ('codigo', 'descripcion', 'categoria', 'unidad_medida', 'notas'),
+        'numeros': ('costo_equipo_base', 'costo_material_base', 'costo_mano_obra_base'),
+        'precios': ('costo_equipo_base', 'costo_material_base', 'costo_mano_obra_base'),
+        'obligatorios': ('codigo', 'descripcion'),
+        'defectos': {'categoria': 'General', 'unidad_medida': 'unidad'},
+    },
+}
+
+# Encabezados que se reconocen sin mapeo (sin tildes y en minúscula)
+SINONIMOS = {
+    'codigo': ('codigo', 'sku', 'code', 'item', 'referencia', 'part number', 'numero de parte'),
+    'codigo_producto': ('codigo', 'sku', 'code', 'item', 'referencia', 'part number',
+                        'numero de parte'),
+    'tipo_equipo': ('equipo', 'modelo', 'descripcion', 'description', 'producto'),
+    'nombre_material': ('nombre', 'material', 'descripcion', 'description', 'producto'),
+    'descripcion': ('descripcion', 'description', 'producto', 'nombre'),
+    'categoria': ('categoria', 'category', 'familia', 'linea'),
+    'unidad_medida': ('unidad', 'um', 'u/m', 'unit', 'uom'),
+    'precio_base': ('precio', 'price', 'precio unitario', 'costo', 'cost'),
+    'precio_unitario': ('precio', 'price', 'precio unitario', 'costo', 'cost'),
+    'costo_equipo_base': ('costo equipo', 'precio equipo', 'precio', 'price', 'costo'),
+    'costo_material_base': ('costo material', 'costo materiales', 'materiales'),
+    'costo_mano_obra_base': ('costo mano obra', 'mano de obra', 'mano obra'),
+    'horas_mantenimiento': ('horas', 'horas mantenimiento', 'hours'),
+    'stock_actual': ('stock', 'existencia', 'existencias', 'inventario'),
+    'notas': ('notas', 'notes', 'observaciones'),
+}
+
+_NO_NUMERICO = re.compile(r'[^\d,.\-]')
+_COMA_DECIMAL = re.compile(r'^-?\d+,\d{1,2}$')
+
+
+class ErrorImportacion(Exception):
+    """Archivo o configuración que no se puede importar"""
+
+
+class ImportadorPrecios:
+    """Importa listas de precios de proveedores a un catálogo"""
+
+    def __init__(self, db, destino, columnas=None, valores=None, hoja=None,
+                 fila_encabezado=1, tamano_bloque=5000, usar_pandas=True):
+        """
+        Inicializa el importador
+
+        Args:
+            db: Instancia conectada de DatabaseManager
+            destino: 'equipos', 'materiales' o 'catalogo'
+            columnas: Mapeo opcional {campo: encabezado del archivo}
+            valores: Valores fijos opcionales {campo: valor} para todas las filas
+            hoja: Hoja del Excel (por defecto, la activa)
+            fila_encabezado: Fila con los encabezados (1 = primera)
+            tamano_bloque: Filas que se limpian y guardan juntas
+            usar_pandas: Limpiar con pandas si está instalado
+        """
+        if destino not in DESTINOS:
+            raise ErrorImportacion(
+                f"Destino desconocido: {destino} (use {', '.join(DESTINOS)})"
+            )
+
+        self.db = db
+        self.destino = destino
+        self.config = DESTINOS[destino]
+        self.columnas = dict(columnas or {})
+        self.valores = dict(valores or {})
+        self.hoja = hoja
+        self.fila_encabezado = fila_encabezado
+        self.tamano_bloque = tamano_bloque
+        self.usar_pandas = usar_pandas and pd is not None
+
+        if self.config['clave'] in self.valores:
+            raise ErrorImportacion(f"{self.config['clave']} no puede tener un valor fijo")
+
+        campos_validos = self.config['texto'] + self.config['numeros']
+        for campo in list(self.columnas) + list(self.valores):
+            if campo not in campos_validos:
+                raise ErrorImportacion(f"Campo desconocido para {destino}: {campo}")
+
+        # Se completan al leer los encabezados del archivo
+        self.campos = ()
+        self._proyeccion = None
+
+    @classmethod
+    def desde_configuracion(cls, db, ruta_config, **opciones):
+        """
+        Crea el importador a partir de un archivo de configuración JSON
+
+        Las opciones no nulas reemplazan a las del archivo; las columnas de
+        opciones se agregan a las del archivo (y se validan igual).
+        """
+        try:
+            with open(ruta_config, encoding='utf-8') as archivo:
+                config = json.load(archivo)
+        except OSError as e:
+            raise ErrorImportacion(f"No se pudo leer la configuración {ruta_config}: {e}")
+        except json.JSONDecodeError as e:
+            raise ErrorImportacion(f"La configuración {ruta_config} no es JSON válido: {e}")
+        if not isinstance(config, dict):
+            raise ErrorImportacion(f"La configuración {ruta_config} debe ser un objeto JSON")
+
+        columnas = dict(config.get('columnas') or {})
+        columnas.update(opciones.pop('columnas', None) or {})
+
+        parametros = {
+            'destino': config.get('destino'),
+            'columnas': columnas,
+            'valores': config.get('valores'),
+            'hoja': config.get('hoja'),
+            'fila_encabezado': config.get('fila_encabezado', 1),
+        }
+        parametros.update({k: v for k, v in opciones.items() if v is not None})
+        return cls(db, **parametros)
+
+    # --- LECTURA POR BLOQUES ---
+
+    def leer_bloques(self, ruta):
+        """
+        Itera el archivo en bloques de filas con solo las columnas mapeadas
+
+        Args:
+            ruta: Archivo .csv, .xlsx o .xlsm
+
+        Yields:
+            list: Tuplas con los valores crudos de self.campos
+        """
+        extension = os.path.splitext(ruta)[1].lower()
+
+        if extension == '.csv':
+            filas = self._filas_csv(ruta)
+        elif extension in ('.xlsx', '.xlsm'):
+            filas = self._filas_excel(ruta)
+        else:
+            raise ErrorImportacion(f"Formato no soportado: {extension}")
+
+        try:
+            for _ in range(self.fila_encabezado - 1):
+                next(filas)
+            encabezados = next(filas)
+        except StopIteration:
+            raise ErrorImportacion("El archivo no tiene la fila de encabezados")
+
+        self._resolver_columnas(encabezados)
+
+        bloque = []
+        for fila in filas:
+            if len(fila) < self._ancho:
+                fila = tuple(fila) + (None,) * (self._ancho - len(fila))
+            valores = self._proyeccion(fila)
+            if all(valor is None or valor == '' for valor in valores):
+                continue  # fila vacía
+            bloque.append(valores)
+            if len(bloque) >= self.tamano_bloque:
+                yield bloque
+                bloque = []
+        if bloque:
+            yield bloque
+
+    def _filas_csv(self, ruta):
+        with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+            muestra = archivo.read(4096)
+            archivo.seek(0)
+            try:
+                dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+            except csv.Error:
+                dialecto = csv.excel
+            yield from csv.reader(archivo, dialecto)
+
+    def _filas_excel(self, ruta):
+        wb = load_workbook(ruta, read_only=True, data_only=True)
+        try:
+            if self.hoja:
+                if self.hoja not in wb.sheetnames:
+                    raise ErrorImportacion(f"El archivo no tiene la hoja '{self.hoja}'")
+                ws = wb[self.hoja]
+            else:
+                ws = wb.active
+            yield from ws.iter_rows(values_only=True)
+        finally:
+            wb.close()
+
+    def _resolver_columnas(self, encabezados):
+        """Decide qué columna del archivo corresponde a cada campo"""
+        posiciones = {}
+        for i, encabezado in enumerate(encabezados):
+            if encabezado is not None:
+                posiciones.setdefault(_normalizar(encabezado), i)
+
+        indices = {}
+        for campo, encabezado in self.columnas.items():
+            if _normalizar(encabezado) not in posiciones:
+                raise ErrorImportacion(f"No se encontró la columna '{encabezado}' ({campo})")
+            indices[campo] = posiciones[_normalizar(encabezado)]
+
+        usadas = set(indices.values())
+        for campo in self.config['texto'] + self.config['numeros']:
+            if campo in indices or campo in self.valores:
+                continue
+            for nombre in (campo.replace('_', ' '),) + SINONIMOS.get(campo, ()):
+                i = posiciones.get(nombre)
+                if i is not None and i not in usadas:
+                    indices[campo] = i
+                    usadas.add(i)
+                    break
+
+        encabezados_archivo = ', '.join(str(e) for e in encabezados if e)
+        faltantes = [c for c in self.config['obligatorios']
+                     if c not in indices and c not in self.valores]
+        if faltantes:
+            raise ErrorImportacion(
+                f"Faltan columnas obligatorias: {', '.join(faltantes)} "
+                f"(encabezados del archivo: {encabezados_archivo})"
+            )
+
+        # Sin columna de precio los productos nuevos quedarían con precio 0
+        precios = self.config['precios']
+        if not any(c in indices or c in self.valores for c in precios):
+            raise ErrorImportacion(
+                f"No se reconoció ninguna columna de precio ({', '.join(precios)}); "
+                f"indique cuál usar en el mapeo de columnas ({precios[0]}=<encabezado>). "
+                f"Encabezados del archivo: {encabezados_archivo}"
+            )
+
+        self.campos = tuple(indices)
+        self._ancho = max(indices.values()) + 1
+        posiciones_campos = [indices[c] for c in self.campos]
+        if len(posiciones_campos) == 1:
+            self._proyeccion = lambda fila, i=posiciones_campos[0]: (fila[i],)
+        else:
+            self._proyeccion = itemgetter(*posiciones_campos)
+
+    # --- LIMPIEZA ---
+
+    def limpiar_bloque(self, bloque):
+        """
+        Limpia un bloque de filas crudas
+
+        Returns:
+            tuple: (filas limpias en el orden de self.campos, rechazadas, duplicadas)
+        """
+        if self.usar_pandas:
+            return self._limpiar_pandas(bloque)
+        return self._limpiar_python(bloque)
+
+    def _limpiar_pandas(self, bloque):
+        df = pd.DataFrame.from_records(bloque, columns=self.campos)
+
+        # Montos escritos que no se pudieron leer ('abc'): la fila se rechaza
+        ilegibles = pd.Series(False, index=df.index)
+        for campo in self.campos:
+            texto = df[campo].astype('string').str.strip()
+            if campo in self.config['numeros']:
+                df[campo] = _numeros_pandas(df[campo])
+                ilegibles |= df[campo].isna() & (texto.fillna('') != '')
+            else:
+                df[campo] = texto.mask(texto == '')
+
+        validas = df[[c for c in self.config['obligatorios'] if c in df]].notna().all(axis=1)
+        validas &= ~ilegibles
+        rechazadas = int((~validas).sum())
+        df = df[validas]
+
+        total = len(df)
+        df = df.drop_duplicates(subset=self.config['clave'], keep='last')
+        duplicadas = total - len(df)
+
+        df = df.astype(object).where(df.notna(), None)
+        return list(df.itertuples(index=False, name=None)), rechazadas, duplicadas
+
+    def _limpiar_python(self, bloque):
+        numericos = [campo in self.config['numeros'] for campo in self.campos]
+        posiciones_numericas = [i for i, numerico in enumerate(numericos) if numerico]
+        obligatorios = [i for i, campo in enumerate(self.campos)
+                        if campo in self.config['obligatorios']]
+        clave = self.campos.index(self.config['clave'])
+
+        limpias = {}
+        rechazadas = 0
+        duplicadas = 0
+
+        for crudo in bloque:
+            fila = tuple(
+                _numero(valor) if numerico else _texto(valor)
+                for valor, numerico in zip(crudo, numericos)
+            )
+            if any(fila[i] is None for i in obligatorios):
+                rechazadas += 1
+                continue
+            # Montos escritos que no se pudieron leer ('abc'): la fila se rechaza
+            if any(fila[i] is None and _texto(crudo[i]) is not None for i in posiciones_numericas):
+                rechazadas += 1
+                continue
+            if fila[clave] in limpias:
+                duplicadas += 1
+                del limpias[fila[clave]]  # la última fila queda en su posición
+            limpias[fila[clave]] = fila
+
+        return list(limpias.values()), rechazadas, duplicadas
+
+    # --- IMPORTACIÓN ---
+
+    def importar(self, ruta, simular=False, progreso=None):
+        """
+        Importa un archivo completo en una sola transacción
+
+        Args:
+            ruta: Archivo .csv, .xlsx o .xlsm
+            simular: Leer, limpiar y calcular sin guardar nada
+            progreso: Función opcional progreso(estadisticas) llamada por bloque
+
+        Returns:
+            dict: Estadísticas (filas, insertados, actualizados, rechazados,
+                  duplicados, bloques, segundos por etapa, filas_por_segundo)
+        """
+        estadisticas = {
+            'destino': self.destino, 'motor': 'pandas' if self.usar_pandas else 'python',
+            'filas': 0, 'insertados': 0, 'actualizados': 0, 'rechazados': 0,
+            'duplicados': 0, 'bloques': 0,
+            'segundos_lectura': 0.0, 'segundos_limpieza': 0.0, 'segundos_escritura': 0.0,
+        }
+        inicio = time.perf_counter()
+
+        tabla = self.config['tabla']
+        clave = self.config['clave']
+        cursor = self.db.conn.cursor()
+        existentes = None
+
+        try:
+            bloques = self.leer_bloques(ruta)
+            while True:
+                t0 = time.perf_counter()
+                bloque = next(bloques, None)
+                t1 = time.perf_counter()
+                estadisticas['segundos_lectura'] += t1 - t0
+                if bloque is None:
+                    break
+
+                if existentes is None:
+                    # Una sola consulta: códigos que ya están en la tabla
+                    cursor.execute(f"SELECT {clave} FROM {tabla} WHERE {clave} IS NOT NULL")
+                    existentes = {str(codigo) for codigo, in cursor}
+                    sql_insertar, sql_actualizar, extra_insercion = self._sentencias()
+
+                filas, rechazadas, duplicadas = self.limpiar_bloque(bloque)
+                t2 = time.perf_counter()
+                estadisticas['segundos_limpieza'] += t2 - t1
+
+                i_clave = self.campos.index(clave)
+                fijos = tuple(self.valores.values())
+                inserciones = []
+                actualizaciones = []
+                for fila in filas:
+                    codigo = fila[i_clave]
+                    if codigo in existentes:
+                        actualizaciones.append(fila[:i_clave] + fila[i_clave + 1:] + fijos + (codigo,))
+                    else:
+                        existentes.add(codigo)
+                        inserciones.append(self._fila_insercion(fila) + fijos + extra_insercion)
+
+                cursor.executemany(sql_actualizar, actualizaciones)
+                cursor.executemany(sql_insertar, inserciones)
+                estadisticas['segundos_escritura'] += time.perf_counter() - t2
+
+                estadisticas['bloques'] += 1
+                estadisticas['filas'] += len(bloque)
+                estadisticas['insertados'] += len(inserciones)
+                estadisticas['actualizados'] += len(actualizaciones)
+                estadisticas['rechazados'] += rechazadas
+                estadisticas['duplicados'] += duplicadas
+                if progreso:
+                    progreso(estadisticas)
+
+            if simular:
+                self.db.conn.rollback()
+            else:
+                self.db.conn.commit()
+
+        except Exception:
+            self.db.conn.rollback()
+            raise
+
+        segundos = time.perf_counter() - inicio
+        estadisticas['segundos'] = segundos
+        estadisticas['filas_por_segundo'] = estadisticas['filas'] / segundos if segundos else 0
+        return estadisticas
+
+    def _sentencias(self):
+        """INSERT y UPDATE según las columnas mapeadas del archivo"""
+        tabla = self.config['tabla']
+        clave = self.config['clave']
+
+        # Al insertar, las columnas sin dato toman los valores por defecto
+        extra = {campo: valor for campo, valor in self.config['defectos'].items()
+                 if campo not in self.campos and campo not in self.valores}
+
+        columnas = self.campos + tuple(self.valores) + tuple(extra)
+        sql_insertar = (
+            f"INSERT INTO {tabla} ({', '.join(columnas)}) "
+            f"VALUES ({', '.join('?' for _ in columnas)})"
+        )
+
+        # Al actualizar, una celda vacía conserva el valor actual
+        asignaciones = [f"{c} = COALESCE(?, {c})" for c in self.campos if c != clave]
+        asignaciones += [f"{c} = ?" for c in self.valores]
+        if asignaciones:
+            sql_actualizar = f"UPDATE {tabla} SET {', '.join(asignaciones)} WHERE {clave} = ?"
+        else:
+            sql_actualizar = f"UPDATE {tabla} SET {clave} = {clave} WHERE {clave} = ?"
+
+        return sql_insertar, sql_actualizar, tuple(extra.values())
+
+    def _fila_insercion(self, fila):
+        """Fila para INSERT: montos vacíos en 0 y textos vacíos con su valor por defecto"""
+        defectos = self.config['defectos']
+        numeros = self.config['numeros']
+        return tuple(
+            (0 if campo in numeros else defectos.get(campo)) if valor is None else valor
+            for campo, valor in zip(self.campos, fila)
+        )
+
+
+def _normalizar(texto):
+    """Encabezado en minúscula, sin tildes ni espacios extra"""
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode()
+    return ' '.join(texto.lower().split())
+
+
+def _texto(valor):
+    """Texto sin espacios; vacío devuelve None"""
+    if valor is None:
+        return None
+    valor = str(valor).strip()
+    return valor or None
+
+
+def _numero(valor):
+    """
+    Convierte montos como '$1,234.50', '₡ 1.234,50' o '12,5' a float
+
+    El último separador es el decimal; una sola coma seguida de 1 o 2
+    dígitos también se toma como decimal. Lo que no es número devuelve None.
+    """
+    if valor is None or isinstance(valor, (int, float)):
+        return None if valor is None else float(valor)
+
+    texto = _NO_NUMERICO.sub('', str(valor))
+    if ',' in texto and '.' in texto:
+        coma_decimal = texto.rfind(',') > texto.rfind('.')
+    else:
+        coma_decimal = bool(_COMA_DECIMAL.match(texto))
+
+    if coma_decimal:
+        texto = texto.replace('.', '').replace(',', '.')
+    else:
+        texto = texto.replace(',', '')
+
+    try:
+        return float(texto)
+    except ValueError:
+        return None
+
+
+def _numeros_pandas(serie):
+    """Versión por columnas de _numero para una serie de pandas"""
+    numeros = pd.to_numeric(serie, errors='coerce').astype('float64')
+    pendientes = numeros.isna() & serie.notna()
+    if not pendientes.any():
+        return numeros
+
+    texto = serie[pendientes].astype('string').str.replace(_NO_NUMERICO.pattern, '', regex=True)
+    # Coma decimal: hay un punto antes de la última coma, o una sola coma con 1-2 decimales
+    coma_decimal = texto.str.contains(r'\..*,\d*$|' + _COMA_DECIMAL.pattern, regex=True)
+    convertido = texto.str.replace(',', '', regex=False)
+    if coma_decimal.any():
+        convertido[coma_decimal] = (
+            texto[coma_decimal].str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+        )
+
+    numeros[pendientes] = pd.to_numeric(convertido, errors='coerce').astype('float64')
+    return numeros
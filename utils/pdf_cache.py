@@ -0,0 +1,217 @@
+"""
+pdf_cache.py - Caché en disco de PDFs de cotizaciones
+
+Evita volver a dibujar un PDF cuando la cotización no cambió desde la
+última vez (por ejemplo, "Generar PDF" y luego "Enviar por email").
+
+- La clave es un hash SHA-256 de los datos del documento, la versión de
+  la plantilla del PDF, la huella del logo y la fecha de generación
+  (el PDF imprime la fecha del día)
+- Cada entrada es un archivo <hash>.pdf dentro de cotizaciones/cache
+- Al encontrarla se copia al nombre normal del PDF (COT_<numero>_<fecha>.pdf)
+- El tamaño total está limitado: al superarlo se eliminan las entradas
+  usadas hace más tiempo (LRU según la fecha de modificación, que se
+  actualiza en cada acierto) hasta bajar al 90% del límite
+- La carpeta no se recorre en cada escritura: se lleva un tamaño estimado
+  por carpeta y se revisa al superar el límite o cada DESALOJO_CADA
+  escrituras (por si otro proceso también escribe)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import date
+
+from utils.pdf_generator import PDF_DIR, VERSION_PLANTILLA, LOGO_PATH
+
+# Carpeta y tamaño máximo del caché
+CACHE_DIR = os.path.join(PDF_DIR, 'cache')
+TAMANO_MAXIMO_MB = 200
+
+# Al desalojar se baja hasta esta fracción del máximo, para no recorrer la
+# carpeta en cada escritura cuando el caché está lleno
+MARGEN_DESALOJO = 0.9
+
+# Escrituras entre revisiones completas de la carpeta
+DESALOJO_CADA = 50
+
+# Tamaño estimado y escrituras desde la última revisión, por carpeta
+_estado_carpetas = {}
+_estado_lock = threading.Lock()
+
+# Huella del logo por (ruta, mtime, tamaño), para no leerlo en cada clave
+_huellas_logo = {}
+
+
+def _huella_logo(ruta=LOGO_PATH):
+    """Hash del contenido del logo (cambia si se reemplaza la imagen)"""
+    try:
+        info = os.stat(ruta)
+    except OSError:
+        return 'sin-logo'
+
+    llave = (ruta, info.st_mtime_ns, info.st_size)
+    huella = _huellas_logo.get(llave)
+    if huella is None:
+        with open(ruta, 'rb') as f:
+            huella = hashlib.sha256(f.read()).hexdigest()
+        _huellas_logo[llave] = huella
+    return huella
+
+
+class CachePDF:
+    """Caché de PDFs generados, con límite de tamaño y desalojo LRU"""
+
+    def __init__(self, directorio=CACHE_DIR, tamano_maximo_mb=TAMANO_MAXIMO_MB):
+        """
+        Inicializa el caché
+
+        Args:
+            directorio: Carpeta donde se guardan las entradas
+            tamano_maximo_mb: Tamaño total máximo en MB
+        """
+        self.directorio = directorio
+        self.tamano_maximo = int(tamano_maximo_mb * 1024 * 1024)
+        self.aciertos = 0
+        self.fallos = 0
+        os.makedirs(self.directorio, exist_ok=True)
+
+    def clave(self, data):
+        """
+        Calcula la clave de un documento
+
+        Args:
+            data: Diccionario de datos que recibe PDFCotizacionProfesional
+        """
+        contenido = json.dumps(
+            {
+                'data': data,
+                'plantilla': VERSION_PLANTILLA,
+                'logo': _huella_logo(),
+                'fecha_generacion': date.today().isoformat()
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+    def ruta(self, clave):
+        """Ruta de la entrada de una clave"""
+        return os.path.join(self.directorio, f"{clave}.pdf")
+
+    def obtener(self, clave, pdf_path):
+        """
+        Busca un PDF en el caché y lo deja en pdf_path
+
+        Returns:
+            str: Ruta del PDF (pdf_path, o la entrada del caché si no se
+                 pudo escribir pdf_path) o None si no está en caché
+        """
+        entrada = self.ruta(clave)
+
+        # Sin comprobar antes si existe: otro proceso puede desalojar la
+        # entrada en cualquier momento, así que eso cuenta como no estar
+        try:
+            os.utime(entrada)  # marcar como usado recientemente
+            if os.path.abspath(pdf_path) != os.path.abspath(entrada):
+                os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+                shutil.copyfile(entrada, pdf_path)
+            resultado = pdf_path
+        except FileNotFoundError:
+            self.fallos += 1
+            return None
+        except OSError:
+            # pdf_path puede estar abierto en el visor de PDF (Windows)
+            resultado = entrada
+
+        self.aciertos += 1
+        return resultado
+
+    def guardar(self, clave, pdf_path):
+        """
+        Agrega al caché un PDF recién generado
+
+        Args:
+            clave: Clave calculada con clave()
+            pdf_path: PDF generado
+        """
+        entrada = self.ruta(clave)
+        temporal = None
+
+        try:
+            # Nombre temporal único: varios hilos pueden guardar la misma clave
+            descriptor, temporal = tempfile.mkstemp(suffix='.tmp', dir=self.directorio)
+            with os.fdopen(descriptor, 'wb') as destino, open(pdf_path, 'rb') as origen:
+                shutil.copyfileobj(origen, destino)
+            anterior = os.path.getsize(entrada) if os.path.exists(entrada) else 0
+            os.replace(temporal, entrada)
+            tamano = os.path.getsize(entrada) - anterior
+        except OSError as e:
+            print(f"[AVISO] No se pudo guardar el PDF en caché: {e}")
+            if temporal and os.path.exists(temporal):
+                os.remove(temporal)
+            return
+
+        self._registrar_escritura(tamano)
+
+    def _registrar_escritura(self, tamano):
+        """Suma los bytes agregados al tamaño estimado y desaloja si hace falta"""
+        with _estado_lock:
+            estado = _estado_carpetas.get(self.directorio)
+            if estado is not None:
+                estado['total'] += tamano
+                estado['escrituras'] += 1
+                if (estado['total'] <= self.tamano_maximo
+                        and estado['escrituras'] < DESALOJO_CADA):
+                    return
+
+        self.desalojar()
+
+    def desalojar(self):
+        """
+        Elimina las entradas usadas hace más tiempo si se supera el límite
+
+        Recorre la carpeta y, si el total supera el máximo, baja hasta
+        MARGEN_DESALOJO del máximo. Actualiza el tamaño estimado.
+
+        Returns:
+            int: Cantidad de entradas eliminadas
+        """
+        entradas = []
+        total = 0
+        with os.scandir(self.directorio) as it:
+            for e in it:
+                if e.is_file() and e.name.endswith('.pdf'):
+                    info = e.stat()
+                    entradas.append((info.st_mtime, info.st_size, e.path))
+                    total += info.st_size
+
+        eliminadas = 0
+        if total > self.tamano_maximo:
+            objetivo = self.tamano_maximo * MARGEN_DESALOJO
+            for _, tamano, ruta in sorted(entradas):
+                if total <= objetivo:
+                    break
+                try:
+                    os.remove(ruta)
+                    total -= tamano
+                    eliminadas += 1
+                except OSError:
+                    pass
+
+        with _estado_lock:
+            _estado_carpetas[self.directorio] = {'total': total, 'escrituras': 0}
+        return eliminadas
+
+    def vaciar(self):
+        """Elimina todas las entradas del caché"""
+        with os.scandir(self.directorio) as it:
+            for e in it:
+                if e.is_file() and e.name.endswith('.pdf'):
+                    os.remove(e.path)
+
+        with _estado_lock:
+            _estado_carpetas[self.directorio] = {'total': 0, 'escrituras': 0}
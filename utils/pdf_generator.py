@@ -13,35 +13,144 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
+from reportlab.lib.utils import ImageReader
+from types import MappingProxyType
+
+from models.tipo_cambio import obtener_historial
+from models.registros import CotizacionPDF
+from utils.tareas import TareaCancelada
+
+# Versión del diseño del PDF: incrementarla al cambiar el formato para que
+# el caché de PDFs (pdf_cache.py) no devuelva documentos con el diseño viejo
+VERSION_PLANTILLA = 1
+
+# Pasos que informa PDFCotizacionProfesional.generar: cuatro secciones y el armado
+PASOS_PDF = 5
+
+# Logo de la empresa
+LOGO_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    'resources', 'images', 'logo.jpg'
+)
+
+
+# Estilo de la tabla de presupuesto (índices negativos: no depende de la
+# cantidad de equipos)
+ESTILO_TABLA_PRESUPUESTO = (
+    # Fila del header con logo
+    ('SPAN', (0, 0), (1, 0)),
+    ('BACKGROUND', (0, 0), (1, 0), colors.HexColor('#e3f2fd')),
+    ('ALIGN', (0, 0), (1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (1, 0), 9),
+
+    # Fila de información del cliente
+    ('BACKGROUND', (0, 1), (-1, 1), colors.white),
+    ('FONTNAME', (0, 1), (-1, 1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, 1), 9),
+    ('ALIGN', (0, 1), (-1, 1), 'LEFT'),
+
+    # Encabezado "PRESUPUESTO MANTENIMIENTO PREVENTIVO"
+    ('SPAN', (0, 2), (-1, 2)),
+    ('BACKGROUND', (0, 2), (-1, 2), colors.HexColor('#2563eb')),
+    ('TEXTCOLOR', (0, 2), (-1, 2), colors.white),
+    ('ALIGN', (0, 2), (-1, 2), 'CENTER'),
+    ('FONTNAME', (0, 2), (-1, 2), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 2), (-1, 2), 11),
+
+    # Encabezado de columnas
+    ('BACKGROUND', (0, 3), (-1, 3), colors.HexColor('#64748b')),
+    ('TEXTCOLOR', (0, 3), (-1, 3), colors.white),
+    ('ALIGN', (0, 3), (-1, 3), 'CENTER'),
+    ('FONTNAME', (0, 3), (-1, 3), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 3), (-1, 3), 8),
+
+    # Filas de equipos
+    ('ALIGN', (1, 4), (-1, -4), 'CENTER'),
+    ('FONTSIZE', (0, 4), (-1, -4), 9),
+
+    # Fila de subtotales
+    ('BACKGROUND', (0, -3), (-1, -3), colors.HexColor('#2563eb')),
+    ('TEXTCOLOR', (0, -3), (-1, -3), colors.white),
+    ('FONTNAME', (0, -3), (-1, -3), 'Helvetica-Bold'),
+    ('ALIGN', (0, -3), (-1, -3), 'CENTER'),
+
+    # Fila de IVA
+    ('BACKGROUND', (0, -2), (-1, -2), colors.HexColor('#e3f2fd')),
+    ('FONTNAME', (0, -2), (-1, -2), 'Helvetica-Bold'),
+    ('ALIGN', (0, -2), (-1, -2), 'CENTER'),
+
+    # Fila de total
+    ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#2563eb')),
+    ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, -1), (-1, -1), 11),
+    ('ALIGN', (0, -1), (-1, -1), 'CENTER'),
+
+    # Bordes
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+)
+
+# Estilo de la tabla de contacto de la última página
+ESTILO_TABLA_CONTACTO = (
+    ('ALIGN', (0, 0), (0, -1), 'CENTER'),
+    ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+    ('FONTNAME', (0, 2), (0, 3), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 2), (0, 3), 12),
+    ('FONTSIZE', (1, 2), (1, -1), 10),
+    ('TEXTCOLOR', (1, 2), (1, 2), colors.HexColor('#2563eb')),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+)
+
+
+class RecursosPDF:
+    """
+    Recursos compartidos por todos los PDFs de cotización
 
+    Se construyen una sola vez por proceso (ver obtener_recursos()) y no se
+    modifican después: estilos de párrafo, estilos de tabla y el logo ya
+    leído y decodificado en un ImageReader. Antes cada documento recreaba
+    la hoja de estilos y volvía a abrir y decodificar el logo.
+    """
 
-class PDFCotizacionProfesional:
-    """Generador de PDFs con formato profesional"""
-
-    def __init__(self, data):
+    def __init__(self, logo_path=LOGO_PATH):
         """
-        Inicializa el generador de PDF
+        Construye los recursos
 
         Args:
-            data: Diccionario con los datos de la cotización
+            logo_path: Ruta del logo
         """
-        self.data = data
-        self.styles = getSampleStyleSheet()
-        self._crear_estilos_personalizados()
+        styles = getSampleStyleSheet()
+        self._crear_estilos_personalizados(styles)
+        self.estilos = MappingProxyType(dict(styles.byName))
 
-        # Rutas de logos
-        self.logo_path = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)),
-            'resources', 'images', 'logo.jpg'
-        )
+        self.logo_path = logo_path if os.path.exists(logo_path) else None
+        self._logo_lector = None
+        if self.logo_path:
+            try:
+                self._logo_lector = ImageReader(self.logo_path)
+            except (OSError, ValueError) as e:
+                print(f"[AVISO] No se pudo leer el logo: {e}")
+                self.logo_path = None
 
-    def _crear_estilos_personalizados(self):
-        """Crea estilos personalizados para el documento"""
+        self.estilo_tabla_presupuesto = TableStyle(ESTILO_TABLA_PRESUPUESTO)
+        self.estilo_tabla_contacto = TableStyle(ESTILO_TABLA_CONTACTO)
+
+    def dibujar_logo(self, canvas, x, y, ancho, alto):
+        """Dibuja el logo desde el ImageReader compartido"""
+        if self._logo_lector is not None:
+            canvas.drawImage(self._logo_lector, x, y, width=ancho, height=alto,
+                             preserveAspectRatio=True)
+
+    @staticmethod
+    def _crear_estilos_personalizados(styles):
+        """Agrega los estilos personalizados a la hoja de estilos"""
 
         # Título principal
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='TituloPrincipal',
-            parent=self.styles['Heading1'],
+            parent=styles['Heading1'],
             fontSize=16,
             textColor=colors.HexColor('#1e40af'),
             spaceAfter=12,
@@ -50,9 +159,9 @@ class PDFCotizacionProfesional:
         ))
 
         # Subtítulo
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='Subtitulo',
-            parent=self.styles['Heading2'],
+            parent=styles['Heading2'],
             fontSize=14,
             textColor=colors.HexColor('#2563eb'),
             spaceAfter=10,
@@ -60,32 +169,99 @@ class PDFCotizacionProfesional:
         ))
 
         # Texto normal
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='TextoNormal',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontSize=10,
             alignment=TA_JUSTIFY,
             spaceAfter=6
         ))
 
         # Texto pequeño
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='TextoPequeño',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontSize=9,
             alignment=TA_LEFT
         ))
 
-    def generar(self, output_path):
+
+# Recursos del proceso actual (se crean en el primer PDF)
+_recursos = None
+
+
+def obtener_recursos():
+    """Devuelve los recursos compartidos, creándolos la primera vez"""
+    global _recursos
+    if _recursos is None:
+        _recursos = RecursosPDF()
+    return _recursos
+
+
+def dibujar_encabezado_pie(canvas, recursos):
+    """Dibuja el encabezado con logo y el pie de página de AirSolutions"""
+    canvas.saveState()
+
+    # Encabezado con logo
+    if recursos.logo_path:
+        try:
+            recursos.dibujar_logo(canvas, 0.75*inch, letter[1] - 1*inch, 1.2*inch, 0.8*inch)
+        except (OSError, ValueError) as e:
+            print(f"[AVISO] No se pudo dibujar el logo: {e}")
+
+    # Texto del encabezado
+    canvas.setFont('Helvetica-Bold', 14)
+    canvas.setFillColor(colors.HexColor('#1e40af'))
+    canvas.drawString(2.2*inch, letter[1] - 0.7*inch, "AIR SOLUTIONS")
+
+    # Pie de página con línea azul
+    canvas.setStrokeColor(colors.HexColor('#2563eb'))
+    canvas.setLineWidth(3)
+    canvas.line(0.75*inch, 0.6*inch, letter[0] - 0.75*inch, 0.6*inch)
+
+    # Información del pie
+    canvas.setFont('Helvetica', 8)
+    canvas.setFillColor(colors.HexColor('#666666'))
+    canvas.drawCentredString(letter[0]/2, 0.4*inch, "WWW.AIRSOLUTIONSCR.COM")
+    canvas.drawCentredString(letter[0]/2, 0.25*inch, "Escazú, San José, Costa Rica | INFO@AIRSOLUTIONSCR.COM")
+
+    canvas.restoreState()
+
+
+class PDFCotizacionProfesional:
+    """Generador de PDFs con formato profesional"""
+
+    def __init__(self, data, recursos=None):
+        """
+        Inicializa el generador de PDF
+
+        Args:
+            data: Diccionario con los datos de la cotización
+            recursos: RecursosPDF a usar (por defecto, los compartidos)
+        """
+        self.data = data
+        self.recursos = recursos or obtener_recursos()
+        self.styles = self.recursos.estilos
+
+    def generar(self, output_path, progreso=None):
         """
         Genera el PDF completo
 
         Args:
             output_path: Ruta donde guardar el PDF
+            progreso: Función opcional progreso(hechos, total, etapa), con
+                      etapa 'secciones' antes de cada página y 'armado'
+                      antes de escribir el documento. Si lanza
+                      TareaCancelada la generación se interrumpe y la
+                      excepción se propaga
 
         Returns:
             bool: True si se generó correctamente
         """
+        def avanzar(hechos, etapa):
+            if progreso:
+                progreso(hechos, PASOS_PDF, etapa)
+
         try:
             # Crear directorio si no existe
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
@@ -104,27 +280,34 @@ class PDFCotizacionProfesional:
             story = []
 
             # Página 1: Portada con descripción del servicio
+            avanzar(0, 'secciones')
             story.extend(self._crear_portada())
             story.append(PageBreak())
 
             # Páginas 2-3: Detalle técnico del mantenimiento
+            avanzar(1, 'secciones')
             story.extend(self._crear_detalle_tecnico())
             story.append(PageBreak())
 
             # Página 4: Propuesta económica
+            avanzar(2, 'secciones')
             story.extend(self._crear_propuesta_economica())
             story.append(PageBreak())
 
             # Página 5: Notas y firma
+            avanzar(3, 'secciones')
             story.extend(self._crear_notas_firma())
 
             # Generar PDF
+            avanzar(4, 'armado')
             doc.build(story, onFirstPage=self._agregar_encabezado_pie,
                      onLaterPages=self._agregar_encabezado_pie)
 
             print(f"[OK] PDF generado: {output_path}")
             return True
 
+        except TareaCancelada:
+            raise
         except Exception as e:
             print(f"Error al generar PDF: {e}")
             import traceback
@@ -133,33 +316,7 @@ class PDFCotizacionProfesional:
 
     def _agregar_encabezado_pie(self, canvas, doc):
         """Agrega encabezado y pie de página a cada página"""
-        canvas.saveState()
-
-        # Encabezado con logo
-        if os.path.exists(self.logo_path):
-            try:
-                canvas.drawImage(self.logo_path, 0.75*inch, letter[1] - 1*inch,
-                               width=1.2*inch, height=0.8*inch, preserveAspectRatio=True)
-            except:
-                pass
-
-        # Texto del encabezado
-        canvas.setFont('Helvetica-Bold', 14)
-        canvas.setFillColor(colors.HexColor('#1e40af'))
-        canvas.drawString(2.2*inch, letter[1] - 0.7*inch, "AIR SOLUTIONS")
-
-        # Pie de página con línea azul
-        canvas.setStrokeColor(colors.HexColor('#2563eb'))
-        canvas.setLineWidth(3)
-        canvas.line(0.75*inch, 0.6*inch, letter[0] - 0.75*inch, 0.6*inch)
-
-        # Información del pie
-        canvas.setFont('Helvetica', 8)
-        canvas.setFillColor(colors.HexColor('#666666'))
-        canvas.drawCentredString(letter[0]/2, 0.4*inch, "WWW.AIRSOLUTIONSCR.COM")
-        canvas.drawCentredString(letter[0]/2, 0.25*inch, "Escazú, San José, Costa Rica | INFO@AIRSOLUTIONSCR.COM")
-
-        canvas.restoreState()
+        dibujar_encabezado_pie(canvas, self.recursos)
 
     def _crear_portada(self):
         """Crea la portada con información del servicio"""
@@ -300,6 +457,16 @@ class PDFCotizacionProfesional:
         tabla_presupuesto = self._crear_tabla_presupuesto()
         elementos.append(tabla_presupuesto)
 
+        # Monto en colones al tipo de cambio de la fecha de la cotización
+        if self.data.get('mostrar_colones'):
+            tipo_cambio = self.data.get('tipo_cambio', 515)
+            elementos.append(Spacer(1, 0.15*inch))
+            elementos.append(Paragraph(
+                f"<b>Monto total en colones:</b> ¢{self.total_oferta * tipo_cambio:,.2f} "
+                f"(tipo de cambio ¢{tipo_cambio:,.2f} al {self.data.get('fecha', '')})",
+                self.styles['TextoPequeño']
+            ))
+
         return elementos
 
     def _crear_tabla_presupuesto(self):
@@ -364,6 +531,7 @@ class PDFCotizacionProfesional:
         iva_porcentaje = self.data.get('iva_porcentaje', 13.0)
         iva = subtotal_anual * (iva_porcentaje / 100)
         total = subtotal_anual + iva
+        self.total_oferta = total
 
         # Filas de IVA y total
         columnas_tabla.append([
@@ -384,61 +552,7 @@ class PDFCotizacionProfesional:
         tabla = Table(data, colWidths=[2*inch, 1*inch, 1*inch, 1*inch, 1.2*inch, 1*inch])
 
         # Estilos de la tabla
-        tabla.setStyle(TableStyle([
-            # Fila del header con logo
-            ('SPAN', (0, 0), (1, 0)),
-            ('BACKGROUND', (0, 0), (1, 0), colors.HexColor('#e3f2fd')),
-            ('ALIGN', (0, 0), (1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (1, 0), 9),
-
-            # Fila de información del cliente
-            ('BACKGROUND', (0, 1), (-1, 1), colors.white),
-            ('FONTNAME', (0, 1), (-1, 1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, 1), 9),
-            ('ALIGN', (0, 1), (-1, 1), 'LEFT'),
-
-            # Encabezado "PRESUPUESTO MANTENIMIENTO PREVENTIVO"
-            ('SPAN', (0, 2), (-1, 2)),
-            ('BACKGROUND', (0, 2), (-1, 2), colors.HexColor('#2563eb')),
-            ('TEXTCOLOR', (0, 2), (-1, 2), colors.white),
-            ('ALIGN', (0, 2), (-1, 2), 'CENTER'),
-            ('FONTNAME', (0, 2), (-1, 2), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 2), (-1, 2), 11),
-
-            # Encabezado de columnas
-            ('BACKGROUND', (0, 3), (-1, 3), colors.HexColor('#64748b')),
-            ('TEXTCOLOR', (0, 3), (-1, 3), colors.white),
-            ('ALIGN', (0, 3), (-1, 3), 'CENTER'),
-            ('FONTNAME', (0, 3), (-1, 3), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 3), (-1, 3), 8),
-
-            # Filas de equipos
-            ('ALIGN', (1, 4), (-1, -4), 'CENTER'),
-            ('FONTSIZE', (0, 4), (-1, -4), 9),
-
-            # Fila de subtotales
-            ('BACKGROUND', (0, -3), (-1, -3), colors.HexColor('#2563eb')),
-            ('TEXTCOLOR', (0, -3), (-1, -3), colors.white),
-            ('FONTNAME', (0, -3), (-1, -3), 'Helvetica-Bold'),
-            ('ALIGN', (0, -3), (-1, -3), 'CENTER'),
-
-            # Fila de IVA
-            ('BACKGROUND', (0, -2), (-1, -2), colors.HexColor('#e3f2fd')),
-            ('FONTNAME', (0, -2), (-1, -2), 'Helvetica-Bold'),
-            ('ALIGN', (0, -2), (-1, -2), 'CENTER'),
-
-            # Fila de total
-            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#2563eb')),
-            ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, -1), (-1, -1), 11),
-            ('ALIGN', (0, -1), (-1, -1), 'CENTER'),
-
-            # Bordes
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
+        tabla.setStyle(self.recursos.estilo_tabla_presupuesto)
 
         return tabla
 
@@ -474,92 +588,161 @@ class PDFCotizacionProfesional:
         ]
 
         contacto_tabla = Table(contacto_data, colWidths=[3*inch, 3*inch])
-        contacto_tabla.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (0, -1), 'CENTER'),
-            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-            ('FONTNAME', (0, 2), (0, 3), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 2), (0, 3), 12),
-            ('FONTSIZE', (1, 2), (1, -1), 10),
-            ('TEXTCOLOR', (1, 2), (1, 2), colors.HexColor('#2563eb')),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
+        contacto_tabla.setStyle(self.recursos.estilo_tabla_contacto)
 
         elementos.append(contacto_tabla)
 
         return elementos
 
 
-def generar_pdf_cotizacion(numero_cotizacion, db):
+# Carpeta donde se guardan los PDFs de cotizaciones
+PDF_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cotizaciones')
+
+# Máximo de parámetros por consulta IN (...) (límite de SQLite)
+_TAMANO_BLOQUE_CONSULTA = 500
+
+
+def obtener_datos_cotizaciones(db, numeros_cotizacion):
+    """
+    Carga los datos para el PDF de varias cotizaciones
+
+    Usa una consulta para los encabezados y otra para los equipos por cada
+    bloque de hasta 500 cotizaciones, en lugar de dos consultas por
+    cotización.
+
+    Args:
+        db: Instancia de DatabaseManager
+        numeros_cotizacion: Lista de números de cotización
+
+    Returns:
+        dict: {numero_cotizacion: data} para las cotizaciones encontradas
+    """
+    cursor = db.conn.cursor()
+    historial = obtener_historial(db)
+    numeros = list(dict.fromkeys(numeros_cotizacion))
+    datos = {}
+
+    for inicio in range(0, len(numeros), _TAMANO_BLOQUE_CONSULTA):
+        bloque = numeros[inicio:inicio + _TAMANO_BLOQUE_CONSULTA]
+        marcas = ', '.join('?' * len(bloque))
+
+        por_id = {}
+        for cotizacion in CotizacionPDF.consultar(
+            db, f"c.numero_cotizacion IN ({marcas})", bloque
+        ):
+            data = {
+                'numero_cotizacion': cotizacion.numero_cotizacion,
+                'cliente': cotizacion.cliente or 'Cliente',
+                'contacto': cotizacion.contacto or 'N/A',
+                'direccion_cliente': cotizacion.direccion_cliente or 'Dirección del cliente',
+                'fecha': cotizacion.fecha_emision,
+                'tipo_servicio': cotizacion.tipo_servicio or 'Mantenimiento Preventivo',
+                'visitas_anuales': cotizacion.visitas_anuales or 1,
+                'subtotal': cotizacion.subtotal or 0,
+                'ins_ccss': cotizacion.ins_ccss or 0,
+                'iva': cotizacion.total_iva or 0,
+                'total': cotizacion.total or 0,
+                'tipo_cambio': historial.valor_en(cotizacion.fecha_emision),
+                'iva_porcentaje': cotizacion.iva_porcentaje or 13.0,
+                'mostrar_colones': cotizacion.mostrar_colones or 0,
+                'equipos': []
+            }
+            por_id[cotizacion.id_cotizacion] = data
+            datos[cotizacion.numero_cotizacion] = data
+
+        if not por_id:
+            continue
+
+        # Equipos de todas las cotizaciones del bloque
+        marcas = ', '.join('?' * len(por_id))
+        cursor.execute(f"""
+            SELECT id_cotizacion, nombre, cantidad, medida, subtotal
+            FROM vista_lineas_cotizacion
+            WHERE id_cotizacion IN ({marcas}) AND categoria = 'equipo'
+            ORDER BY id_cotizacion, orden, id_linea
+        """, list(por_id))
+
+        for id_cotizacion, *equipo in cursor.fetchall():
+            por_id[id_cotizacion]['equipos'].append(tuple(equipo))
+
+    return datos
+
+
+def ruta_pdf_cotizacion(numero_cotizacion, pdf_dir=PDF_DIR):
+    """Ruta del PDF de una cotización generado hoy"""
+    pdf_filename = f"COT_{numero_cotizacion}_{datetime.now().strftime('%Y%m%d')}.pdf"
+    return os.path.join(pdf_dir, pdf_filename)
+
+
+def generar_pdf_cotizacion(numero_cotizacion, db, usar_cache=True):
     """
     Función principal para generar PDF de cotización profesional
 
+    Si la cotización no cambió desde el último PDF generado hoy, se
+    reutiliza el del caché en lugar de dibujarlo de nuevo.
+
     Args:
         numero_cotizacion: Número de la cotización
         db: Instancia de DatabaseManager
+        usar_cache: Buscar y guardar el PDF en el caché
 
     Returns:
         Path del archivo PDF generado o None si hay error
     """
     try:
         # Obtener datos de la cotización
-        query = """
-            SELECT c.*, cl.nombre_empresa, cl.contacto_nombre, cl.direccion
-            FROM cotizaciones c
-            LEFT JOIN clientes cl ON c.id_cliente = cl.id_cliente
-            WHERE c.numero_cotizacion = ?
-        """
-        result = db.ejecutar_query(query, (numero_cotizacion,))
-        cotizacion = result.fetchone()
+        data = obtener_datos_cotizaciones(db, [numero_cotizacion]).get(numero_cotizacion)
 
-        if not cotizacion:
+        if not data:
             print("Cotización no encontrada")
             return None
 
-        id_cotizacion = cotizacion[0]
-
-        # Preparar datos
-        data = {
-            'numero_cotizacion': numero_cotizacion,
-            'cliente': cotizacion[26] or 'Cliente',
-            'contacto': cotizacion[27] or 'N/A',
-            'direccion_cliente': cotizacion[28] or 'Dirección del cliente',
-            'fecha': cotizacion[3],
-            'tipo_servicio': cotizacion[5] or 'Mantenimiento Preventivo',
-            'visitas_anuales': cotizacion[6] or 1,
-            'subtotal': cotizacion[10] or 0,
-            'ins_ccss': cotizacion[19] or 0,
-            'iva': cotizacion[14] or 0,
-            'total': cotizacion[15] or 0,
-            'tipo_cambio': cotizacion[9] or 515,
-            'iva_porcentaje': cotizacion[24] if len(cotizacion) > 24 and cotizacion[24] else 13.0,
-            'mostrar_colones': cotizacion[25] if len(cotizacion) > 25 else 0
-        }
-
-        # Cargar equipos
-        data['equipos'] = db.ejecutar_query("""
-            SELECT pe.tipo_equipo, dc.cantidad, dc.horas_por_equipo, dc.subtotal
-            FROM detalle_cotizacion dc
-            LEFT JOIN productos_equipos pe ON dc.id_equipo = pe.id_equipo
-            WHERE dc.id_cotizacion = ?
-        """, (id_cotizacion,)).fetchall()
-
-        # Generar PDF
-        pdf_dir = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)),
-            'cotizaciones'
-        )
-        pdf_filename = f"COT_{numero_cotizacion}_{datetime.now().strftime('%Y%m%d')}.pdf"
-        pdf_path = os.path.join(pdf_dir, pdf_filename)
-
-        generador = PDFCotizacionProfesional(data)
-
-        if generador.generar(pdf_path):
-            return pdf_path
-        else:
-            return None
+        return renderizar_pdf_cotizacion(data, usar_cache)
 
     except Exception as e:
         print(f"Error generando PDF: {e}")
         import traceback
         traceback.print_exc()
         return None
+
+
+def renderizar_pdf_cotizacion(data, usar_cache=True, pdf_dir=PDF_DIR, progreso=None):
+    """
+    Dibuja (o toma del caché) el PDF a partir de los datos ya cargados
+
+    No usa la base de datos, así que puede ejecutarse en un hilo o proceso
+    aparte (ver utils/tareas.py).
+
+    Args:
+        data: Diccionario de obtener_datos_cotizaciones()
+        usar_cache: Buscar y guardar el PDF en el caché
+        pdf_dir: Carpeta de salida
+        progreso: Función opcional progreso(hechos, total, etapa), ver
+                  PDFCotizacionProfesional.generar; se llama además con
+                  etapa 'cache' antes de copiar el PDF al caché
+
+    Returns:
+        Path del archivo PDF generado o None si hay error
+    """
+    pdf_path = ruta_pdf_cotizacion(data['numero_cotizacion'], pdf_dir)
+
+    cache = None
+    if usar_cache:
+        from utils.pdf_cache import CachePDF
+        cache = CachePDF()
+        clave = cache.clave(data)
+        en_cache = cache.obtener(clave, pdf_path)
+        if en_cache:
+            print(f"[OK] PDF reutilizado del caché: {en_cache}")
+            return en_cache
+
+    generador = PDFCotizacionProfesional(data)
+
+    if generador.generar(pdf_path, progreso):
+        if cache:
+            if progreso:
+                progreso(PASOS_PDF, PASOS_PDF, 'cache')
+            cache.guardar(clave, pdf_path)
+        return pdf_path
+    else:
+        return None
@@ -0,0 +1,214 @@
+"""
+pdf_lote.py - Generación de PDFs de cotizaciones en lote
+
+Para regenerar cientos de ofertas (por ejemplo a fin de mes):
+- Carga los datos de todas las cotizaciones con pocas consultas
+  (obtener_datos_cotizaciones), antes de empezar a dibujar
+- Dibuja los PDFs en un pool de procesos, uno por núcleo disponible,
+  porque reportlab es puro Python y no aprovecha hilos
+- Informa el avance y el tiempo de cada documento
+
+Los procesos trabajadores no abren la base de datos: reciben el
+diccionario de datos ya armado y solo escriben el archivo. Las
+cotizaciones que no cambiaron desde su último PDF se toman del caché
+(pdf_cache.py) sin pasar por el pool.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils.pdf_generator import (
+    PDFCotizacionProfesional, RecursosPDF, obtener_recursos,
+    obtener_datos_cotizaciones, ruta_pdf_cotizacion, PDF_DIR
+)
+from utils.pdf_cache import CachePDF
+
+
+def _renderizar(numero_cotizacion, data, pdf_path):
+    """
+    Dibuja un PDF (se ejecuta dentro de un proceso trabajador)
+
+    Returns:
+        tuple: (numero_cotizacion, ruta o None, segundos)
+    """
+    inicio = time.perf_counter()
+    exito = PDFCotizacionProfesional(data).generar(pdf_path)
+    return numero_cotizacion, pdf_path if exito else None, time.perf_counter() - inicio
+
+
+class GeneradorPDFLote:
+    """Genera los PDFs de muchas cotizaciones en paralelo"""
+
+    def __init__(self, db, procesos=None, pdf_dir=PDF_DIR, usar_cache=True):
+        """
+        Inicializa el generador
+
+        Args:
+            db: Instancia conectada de DatabaseManager
+            procesos: Procesos trabajadores (por defecto, uno por núcleo;
+                      1 dibuja en el proceso actual sin pool)
+            pdf_dir: Carpeta de salida
+            usar_cache: Reutilizar PDFs de cotizaciones sin cambios
+        """
+        self.db = db
+        self.procesos = procesos or os.cpu_count() or 1
+        self.pdf_dir = pdf_dir
+        self.cache = CachePDF() if usar_cache else None
+
+    def generar(self, numeros_cotizacion, progreso=None):
+        """
+        Genera los PDFs de una lista de cotizaciones
+
+        Args:
+            numeros_cotizacion: Lista de números de cotización
+            progreso: Función opcional progreso(hechos, total, numero, segundos)
+
+        Returns:
+            dict: Estadísticas (documentos, en_cache, generados, rutas, tiempos,
+                  errores, no_encontradas, segundos, por_segundo, promedio)
+        """
+        inicio = time.perf_counter()
+
+        datos = obtener_datos_cotizaciones(self.db, numeros_cotizacion)
+        os.makedirs(self.pdf_dir, exist_ok=True)
+
+        # Separar los que ya están en caché de los que hay que dibujar
+        trabajos = []
+        claves = {}
+        en_cache = {}
+        for numero, data in datos.items():
+            pdf_path = ruta_pdf_cotizacion(numero, self.pdf_dir)
+            if self.cache:
+                claves[numero] = self.cache.clave(data)
+                ruta = self.cache.obtener(claves[numero], pdf_path)
+                if ruta:
+                    en_cache[numero] = ruta
+                    continue
+            trabajos.append((numero, data, pdf_path))
+
+        estadisticas = {
+            'documentos': len(datos),
+            'en_cache': len(en_cache),
+            'generados': 0,
+            'rutas': {},
+            'tiempos': {},
+            'errores': [],
+            'no_encontradas': [n for n in dict.fromkeys(numeros_cotizacion) if n not in datos],
+            'procesos': min(self.procesos, len(trabajos)) or 1,
+            'segundos_carga': time.perf_counter() - inicio
+        }
+        estadisticas['rutas'].update(en_cache)
+
+        total = len(datos)
+        for hechos, numero in enumerate(en_cache, 1):
+            if progreso:
+                progreso(hechos, total, numero, 0.0)
+
+        resultados = self._ejecutar(trabajos)
+        for hechos, (numero, ruta, segundos) in enumerate(resultados, len(en_cache) + 1):
+            estadisticas['tiempos'][numero] = segundos
+            if ruta:
+                estadisticas['generados'] += 1
+                estadisticas['rutas'][numero] = ruta
+                if self.cache:
+                    self.cache.guardar(claves[numero], ruta)
+            else:
+                estadisticas['errores'].append(numero)
+
+            if progreso:
+                progreso(hechos, total, numero, segundos)
+
+        segundos = time.perf_counter() - inicio
+        tiempos = estadisticas['tiempos'].values()
+        listos = estadisticas['generados'] + estadisticas['en_cache']
+        estadisticas['segundos'] = segundos
+        estadisticas['por_segundo'] = listos / segundos if segundos else 0
+        estadisticas['promedio'] = sum(tiempos) / len(tiempos) if tiempos else 0
+
+        return estadisticas
+
+    def _ejecutar(self, trabajos):
+        """Dibuja los trabajos y entrega los resultados a medida que terminan"""
+        if self.procesos == 1 or len(trabajos) <= 1:
+            for trabajo in trabajos:
+                yield _renderizar(*trabajo)
+            return
+
+        with ProcessPoolExecutor(max_workers=min(self.procesos, len(trabajos))) as pool:
+            futuros = {pool.submit(_renderizar, *trabajo): trabajo[0] for trabajo in trabajos}
+            for futuro in as_completed(futuros):
+                try:
+                    yield futuro.result()
+                except Exception as e:
+                    print(f"Error generando PDF de {futuros[futuro]}: {e}")
+                    yield futuros[futuro], None, 0.0
+
+
+def benchmark(db, numeros_cotizacion, procesos=None, pdf_dir=None):
+    """
+    Compara la generación secuencial contra la generación en paralelo
+
+    Ninguna de las dos corridas usa el caché, para medir solo el dibujo.
+    Sin pdf_dir los PDFs se escriben en una carpeta temporal que se borra
+    al terminar, así no reemplazan los de la carpeta de cotizaciones.
+
+    Returns:
+        dict: {'secuencial': estadisticas, 'paralelo': estadisticas, 'aceleracion': x}
+    """
+    if pdf_dir is None:
+        with tempfile.TemporaryDirectory(prefix='pdf_benchmark_') as carpeta:
+            return benchmark(db, numeros_cotizacion, procesos, carpeta)
+
+    secuencial = GeneradorPDFLote(
+        db, procesos=1, pdf_dir=pdf_dir, usar_cache=False
+    ).generar(numeros_cotizacion)
+    paralelo = GeneradorPDFLote(
+        db, procesos=procesos, pdf_dir=pdf_dir, usar_cache=False
+    ).generar(numeros_cotizacion)
+
+    return {
+        'secuencial': secuencial,
+        'paralelo': paralelo,
+        'aceleracion': secuencial['segundos'] / paralelo['segundos'] if paralelo['segundos'] else 0
+    }
+
+
+def benchmark_recursos(db, numeros_cotizacion):
+    """
+    Mide el tiempo por documento con y sin los recursos compartidos
+
+    "Antes" crea una hoja de estilos nueva por documento y lee y decodifica
+    el logo desde el archivo en cada documento; "después" usa los
+    RecursosPDF del proceso. Todo se dibuja en el proceso actual, en una carpeta temporal.
+
+    Returns:
+        dict: {'documentos', 'antes_ms', 'despues_ms', 'aceleracion'}
+    """
+    datos = obtener_datos_cotizaciones(db, numeros_cotizacion)
+    carpeta = tempfile.mkdtemp(prefix='pdf_benchmark_')
+    obtener_recursos()  # construir fuera de la medición
+
+    def medir(recursos_por_documento):
+        inicio = time.perf_counter()
+        for numero, data in datos.items():
+            recursos = recursos_por_documento()
+            PDFCotizacionProfesional(data, recursos).generar(
+                ruta_pdf_cotizacion(numero, carpeta)
+            )
+        return (time.perf_counter() - inicio) / len(datos) if datos else 0
+
+    try:
+        antes = medir(RecursosPDF)
+        despues = medir(obtener_recursos)
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    return {
+        'documentos': len(datos),
+        'antes_ms': antes * 1000,
+        'despues_ms': despues * 1000,
+        'aceleracion': antes / despues if despues else 0
+    }
@@ -0,0 +1,404 @@
+"""
+pdf_proyecto.py - Presupuesto de proyecto en PDF
+
+Genera el presupuesto de un proyecto por niveles (S100, N1, N2, ...) con
+todos sus items, subtotales por nivel y el total del proyecto.
+
+Un proyecto de edificio puede tener miles de items, así que el documento
+no se arma completo en memoria:
+- Los items se leen de un cursor, ordenados por nivel, fila por fila
+- Se agrupan en tablas (LongTable) de FILAS_POR_TABLA filas que repiten
+  el encabezado de columnas en cada página
+- Las tablas se crean a medida que reportlab las va pidiendo, así que en
+  memoria solo hay unas pocas a la vez, sin importar el tamaño del proyecto
+"""
+
+import os
+from datetime import datetime
+from itertools import groupby, islice
+from operator import itemgetter
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, LongTable, TableStyle, Paragraph, Spacer
+
+from utils.pdf_generator import PDF_DIR, obtener_recursos, dibujar_encabezado_pie
+from utils.tareas import TareaCancelada
+
+# Filas de items por tabla (cada tabla ocupa unas pocas páginas)
+FILAS_POR_TABLA = 200
+
+# Flowables que se preparan por adelantado mientras se dibuja
+_ANTICIPO = 4
+
+COLUMNAS = [
+    'Especificación', 'Descripción', 'Cant.', 'Unidad',
+    'Equipo', 'Materiales', 'Mano Obra', 'Total'
+]
+ANCHOS_COLUMNAS = [1.2*inch, 1.9*inch, 0.5*inch, 0.55*inch,
+                   0.7*inch, 0.7*inch, 0.7*inch, 0.75*inch]
+
+ESTILO_TABLA_ITEMS = (
+    # Encabezado de columnas (se repite en cada página)
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+
+    # Filas de items
+    ('FONTSIZE', (0, 0), (-1, -1), 7),
+    ('ALIGN', (2, 1), (-1, -1), 'RIGHT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8fafc')]),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#94a3b8')),
+)
+
+ESTILO_FILA_SUBTOTAL = (
+    ('SPAN', (0, -1), (3, -1)),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#e5e7eb')),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+)
+
+ESTILO_TABLA_TOTAL = (
+    ('SPAN', (0, 0), (3, 0)),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10b981')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 8),
+    ('ALIGN', (4, 0), (-1, 0), 'RIGHT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#94a3b8')),
+)
+
+# Columnas de la consulta de items (ver _leer_items)
+_NIVEL = itemgetter(0, 1, 2)
+
+
+class _FlowablesPerezosos(list):
+    """
+    Lista de flowables que se llena desde un generador
+
+    SimpleDocTemplate.build() consume la lista por el frente (y devuelve
+    al frente las partes de una tabla que se divide entre páginas); esta
+    lista solo pide al generador los siguientes elementos cuando quedan
+    menos de `anticipo`.
+    """
+
+    def __init__(self, fuente, anticipo=_ANTICIPO):
+        super().__init__()
+        self._fuente = iter(fuente)
+        self._anticipo = anticipo
+
+    def _llenar(self):
+        while self._fuente is not None and list.__len__(self) < self._anticipo:
+            try:
+                self.append(next(self._fuente))
+            except StopIteration:
+                self._fuente = None
+
+    def __len__(self):
+        self._llenar()
+        return list.__len__(self)
+
+    def __getitem__(self, indice):
+        self._llenar()
+        return list.__getitem__(self, indice)
+
+
+def _dinero(valor):
+    """Formato de moneda de las tablas"""
+    return f"${valor or 0:,.2f}"
+
+
+class PDFPresupuestoProyecto:
+    """Generador del presupuesto de un proyecto por niveles"""
+
+    def __init__(self, db, id_proyecto, recursos=None, filas_por_tabla=FILAS_POR_TABLA):
+        """
+        Inicializa el generador
+
+        Args:
+            db: Instancia conectada de DatabaseManager
+            id_proyecto: ID del proyecto
+            recursos: RecursosPDF a usar (por defecto, los compartidos)
+            filas_por_tabla: Items por tabla
+        """
+        self.db = db
+        self.id_proyecto = id_proyecto
+        self.recursos = recursos or obtener_recursos()
+        self.styles = self.recursos.estilos
+        self.filas_por_tabla = filas_por_tabla
+
+        self.estilo_celda = ParagraphStyle(
+            'CeldaItem', parent=self.styles['Normal'], fontSize=7, leading=8
+        )
+        self.estilo_tabla_items = TableStyle(ESTILO_TABLA_ITEMS)
+        self.estilo_tabla_subtotal = TableStyle(ESTILO_TABLA_ITEMS + ESTILO_FILA_SUBTOTAL)
+        self.estilo_tabla_total = TableStyle(ESTILO_TABLA_TOTAL)
+
+        # Resultado de la última generación
+        self.items = 0
+        self.niveles = 0
+        self.paginas = 0
+        self._numero_proyecto = None
+        self._total_items = 0
+        self._progreso = None
+
+    def cargar_proyecto(self):
+        """
+        Datos generales del proyecto
+
+        Returns:
+            tuple: (numero, nombre, cliente, ubicacion, responsable,
+                    fecha_inicio, descripcion) o None si no existe
+        """
+        cursor = self.db.conn.cursor()
+        cursor.execute('''
+            SELECT
+                p.numero_proyecto, p.nombre_proyecto,
+                c.nombre_empresa, p.ubicacion, p.responsable,
+                p.fecha_inicio, p.descripcion
+            FROM proyectos p
+            LEFT JOIN clientes c ON p.id_cliente = c.id_cliente
+            WHERE p.id_proyecto = ?
+        ''', (self.id_proyecto,))
+        return cursor.fetchone()
+
+    def contar_items(self):
+        """Cantidad de items del proyecto"""
+        cursor = self.db.conn.cursor()
+        cursor.execute('''
+            SELECT COUNT(*)
+            FROM proyecto_items i
+            JOIN proyecto_niveles n ON i.id_nivel = n.id_nivel
+            WHERE n.id_proyecto = ?
+        ''', (self.id_proyecto,))
+        return cursor.fetchone()[0]
+
+    def generar(self, output_path, progreso=None):
+        """
+        Genera el PDF del presupuesto
+
+        Args:
+            output_path: Ruta donde guardar el PDF
+            progreso: Función opcional progreso(hechos, total, etapa), con
+                      etapa 'items' mientras se arman las tablas y 'armado'
+                      antes de escribir el documento. Se llama entre
+                      secciones; si lanza TareaCancelada la generación se
+                      interrumpe y la excepción se propaga
+
+        Returns:
+            bool: True si se generó correctamente
+        """
+        try:
+            proyecto = self.cargar_proyecto()
+            if not proyecto:
+                print("Proyecto no encontrado")
+                return False
+
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+            doc = SimpleDocTemplate(
+                output_path,
+                pagesize=letter,
+                rightMargin=0.75*inch,
+                leftMargin=0.75*inch,
+                topMargin=1.1*inch,
+                bottomMargin=0.8*inch,
+                title=f"Presupuesto {proyecto[0]}"
+            )
+
+            self.items = 0
+            self.niveles = 0
+            self._numero_proyecto = proyecto[0]
+            self._progreso = progreso
+            self._total_items = self.contar_items() if progreso else 0
+            self._avanzar('armado')
+            doc.build(
+                _FlowablesPerezosos(self._contenido(proyecto)),
+                onFirstPage=self._agregar_encabezado_pie,
+                onLaterPages=self._agregar_encabezado_pie
+            )
+            self.paginas = doc.page
+
+            print(f"[OK] PDF generado: {output_path}")
+            return True
+
+        except TareaCancelada:
+            raise
+        except Exception as e:
+            print(f"Error al generar PDF del proyecto: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+        finally:
+            self._progreso = None
+
+    def _avanzar(self, etapa):
+        """Informa el avance al llamador (punto de cancelación)"""
+        if self._progreso:
+            self._progreso(self.items, self._total_items, etapa)
+
+    def _agregar_encabezado_pie(self, canvas, doc):
+        """Encabezado, pie y número de página"""
+        dibujar_encabezado_pie(canvas, self.recursos)
+
+        canvas.saveState()
+        canvas.setFont('Helvetica', 8)
+        canvas.setFillColor(colors.HexColor('#666666'))
+        canvas.drawRightString(letter[0] - 0.75*inch, letter[1] - 0.7*inch,
+                               f"{self._numero_proyecto}  |  Página {doc.page}")
+        canvas.restoreState()
+
+    # --- CONTENIDO ---
+
+    def _contenido(self, proyecto):
+        """Genera los flowables del documento en orden, nivel por nivel"""
+        numero, nombre, cliente, ubicacion, responsable, fecha_inicio, descripcion = (
+            escape(str(valor)) if valor is not None else None for valor in proyecto
+        )
+
+        yield Paragraph(f"PRESUPUESTO DE PROYECTO {numero}", self.styles['TituloPrincipal'])
+        yield Paragraph(nombre, self.styles['Subtitulo'])
+
+        info = f"<b>Cliente:</b> {cliente or 'N/A'}"
+        if ubicacion:
+            info += f" &nbsp;|&nbsp; <b>Ubicación:</b> {ubicacion}"
+        if responsable:
+            info += f" &nbsp;|&nbsp; <b>Responsable:</b> {responsable}"
+        if fecha_inicio:
+            info += f" &nbsp;|&nbsp; <b>Inicio:</b> {fecha_inicio}"
+        yield Paragraph(info, self.styles['TextoPequeño'])
+        if descripcion:
+            yield Paragraph(f"<i>{descripcion}</i>", self.styles['TextoPequeño'])
+        yield Paragraph(
+            f"Fecha de emisión: {datetime.now().strftime('%d/%m/%Y')}",
+            self.styles['TextoPequeño']
+        )
+        yield Spacer(1, 0.2*inch)
+
+        totales = [0.0, 0.0, 0.0, 0.0]
+        for (_, codigo, nombre_nivel), filas in groupby(self._leer_items(), key=_NIVEL):
+            self.niveles += 1
+            subtotales = [0.0, 0.0, 0.0, 0.0]
+            self._avanzar('items')
+
+            titulo = Paragraph(escape(f"{codigo} - {nombre_nivel}"), self.styles['Subtitulo'])
+            titulo.keepWithNext = True
+            yield titulo
+
+            # Cada tabla se arma al pedirla; la última lleva el subtotal del nivel
+            filas = (fila for fila in filas if fila[3] is not None)
+            bloque = list(islice(filas, self.filas_por_tabla))
+            while True:
+                siguiente = list(islice(filas, self.filas_por_tabla))
+                cuerpo = [self._fila_item(fila, subtotales) for fila in bloque]
+
+                if siguiente:
+                    yield self._tabla(cuerpo, self.estilo_tabla_items)
+                    self._avanzar('items')
+                    bloque = siguiente
+                    continue
+
+                if not cuerpo:
+                    cuerpo.append(['Sin items', '', '', '', '', '', '', ''])
+                cuerpo.append([f"Subtotal {codigo}", '', '', ''] + [_dinero(v) for v in subtotales])
+                yield self._tabla(cuerpo, self.estilo_tabla_subtotal)
+                break
+
+            for i, valor in enumerate(subtotales):
+                totales[i] += valor
+            yield Spacer(1, 0.15*inch)
+
+        if not self.niveles:
+            yield Paragraph("El proyecto no tiene niveles registrados.", self.styles['TextoNormal'])
+
+        total = LongTable(
+            [[f"TOTAL PROYECTO {numero}", '', '', ''] + [_dinero(v) for v in totales]],
+            colWidths=ANCHOS_COLUMNAS
+        )
+        total.setStyle(self.estilo_tabla_total)
+        yield total
+
+    def _leer_items(self):
+        """
+        Recorre los items del proyecto ordenados por nivel, sin cargarlos todos
+
+        Los niveles sin items aparecen una vez con las columnas del item en NULL.
+        """
+        cursor = self.db.conn.cursor()
+        cursor.execute('''
+            SELECT
+                n.id_nivel, n.codigo_nivel, n.nombre_nivel,
+                i.especificacion, i.descripcion, i.cantidad, i.unidad,
+                i.costo_equipo, i.costo_materiales, i.costo_mano_obra, i.total_item
+            FROM proyecto_niveles n
+            LEFT JOIN proyecto_items i ON i.id_nivel = n.id_nivel
+            WHERE n.id_proyecto = ?
+            ORDER BY n.orden, n.codigo_nivel, n.id_nivel, i.orden, i.especificacion
+        ''', (self.id_proyecto,))
+        try:
+            yield from cursor
+        finally:
+            cursor.close()
+
+    def _fila_item(self, fila, subtotales):
+        """Convierte un item en una fila de la tabla y acumula el subtotal del nivel"""
+        (_, _, _, especificacion, descripcion, cantidad, unidad,
+         costo_equipo, costo_materiales, costo_mano_obra, total_item) = fila
+        cantidad = cantidad or 0
+
+        subtotales[0] += (costo_equipo or 0) * cantidad
+        subtotales[1] += (costo_materiales or 0) * cantidad
+        subtotales[2] += (costo_mano_obra or 0) * cantidad
+        subtotales[3] += total_item or 0
+        self.items += 1
+
+        return [
+            Paragraph(escape(especificacion), self.estilo_celda),
+            Paragraph(escape(descripcion or '-'), self.estilo_celda),
+            f"{cantidad:g}",
+            unidad or '',
+            _dinero(costo_equipo),
+            _dinero(costo_materiales),
+            _dinero(costo_mano_obra),
+            _dinero(total_item)
+        ]
+
+    def _tabla(self, cuerpo, estilo):
+        """Tabla de items con el encabezado de columnas repetido en cada página"""
+        tabla = LongTable([COLUMNAS] + cuerpo, colWidths=ANCHOS_COLUMNAS, repeatRows=1)
+        tabla.setStyle(estilo)
+        return tabla
+
+
+def ruta_pdf_proyecto(numero_proyecto, pdf_dir=PDF_DIR):
+    """Ruta del PDF de presupuesto de un proyecto generado hoy"""
+    pdf_filename = f"PROY_{numero_proyecto}_{datetime.now().strftime('%Y%m%d')}.pdf"
+    return os.path.join(pdf_dir, pdf_filename)
+
+
+def generar_pdf_proyecto(id_proyecto, db, progreso=None):
+    """
+    Genera el PDF de presupuesto de un proyecto
+
+    Args:
+        id_proyecto: ID del proyecto
+        db: Instancia de DatabaseManager
+        progreso: Función opcional progreso(hechos, total, etapa), ver
+                  PDFPresupuestoProyecto.generar
+
+    Returns:
+        Path del archivo PDF generado o None si hay error
+    """
+    generador = PDFPresupuestoProyecto(db, id_proyecto)
+    proyecto = generador.cargar_proyecto()
+    if not proyecto:
+        print("Proyecto no encontrado")
+        return None
+
+    pdf_path = ruta_pdf_proyecto(proyecto[0])
+    return pdf_path if generador.generar(pdf_path, progreso) else None
@@ -0,0 +1,518 @@
+"""
+plantillas_email.py - Plantillas editables para los emails de cotizaciones
+
+Permite:
+- Guardar en la base de datos plantillas de asunto y cuerpo HTML con campos
+  como {{cliente}}, {{numero_cotizacion}} o {{total}}
+- Activar la plantilla que usan todos los envíos (si no hay ninguna activa
+  se usa la predeterminada)
+- Usar los mismos campos dentro del mensaje personalizado, para que una
+  campaña salude a cada cliente por su nombre
+
+Cada plantilla se compila una sola vez (se separa en texto fijo y campos) y
+queda en un caché compartido por todos los hilos. Al editarla se incrementa
+su versión, así que el caché se invalida también en otros procesos que
+usen la misma base.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from html import escape
+
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+
+_CAMPO = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+# Campos disponibles en el asunto, el cuerpo y el mensaje personalizado
+CAMPOS = {
+    'cliente': 'Nombre del cliente',
+    'contacto': 'Persona de contacto del cliente',
+    'numero_cotizacion': 'Número de la cotización',
+    'tipo_servicio': 'Tipo de servicio',
+    'fecha': 'Fecha de emisión',
+    'subtotal': 'Subtotal de la cotización',
+    'iva': 'Monto del IVA',
+    'total': 'Total de la cotización',
+    'empresa': 'Nombre del remitente (configuración de email)',
+    'mensaje': 'Mensaje personalizado (vacío si no hay)',
+    'anio': 'Año actual',
+}
+
+# Campos que ya llegan como HTML y no se escapan
+_CAMPOS_HTML = {'mensaje'}
+
+ASUNTO_PREDETERMINADO = "Cotización {{numero_cotizacion}} - {{empresa}}"
+
+CUERPO_PREDETERMINADO = """<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+        .header { background-color: #2563eb; color: white; padding: 20px; text-align: center; border-radius: 5px 5px 0 0; }
+        .content { background-color: #f9fafb; padding: 30px; border: 1px solid #e5e7eb; }
+        .footer { background-color: #f3f4f6; padding: 15px; text-align: center; font-size: 12px; color: #6b7280; border-radius: 0 0 5px 5px; }
+        .mensaje-personalizado { background-color: #fef3c7; border-left: 4px solid #f59e0b; padding: 15px; margin: 20px 0; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>{{empresa}}</h1>
+            <p>Soluciones en Aires Acondicionados</p>
+        </div>
+
+        <div class="content">
+            <h2>Estimado/a {{cliente}},</h2>
+
+            <p>Es un placer saludarle y hacerle llegar la cotización <strong>{{numero_cotizacion}}</strong>
+            que hemos preparado especialmente para usted.</p>
+
+            {{mensaje}}
+
+            <p>Adjunto a este correo encontrará el documento PDF con todos los detalles de la cotización,
+            incluyendo:</p>
+
+            <ul>
+                <li>Equipos y materiales cotizados</li>
+                <li>Precios detallados</li>
+                <li>Condiciones comerciales</li>
+                <li>Información de contacto</li>
+            </ul>
+
+            <p>Quedamos atentos a cualquier consulta o aclaración que pueda tener.
+            Estamos comprometidos en brindarle el mejor servicio.</p>
+
+            <p>Saludos cordiales,<br>
+            <strong>{{empresa}}</strong></p>
+        </div>
+
+        <div class="footer">
+            <p>Este es un correo automático, por favor no responder a esta dirección.</p>
+            <p>Para consultas, contáctenos directamente.</p>
+            <p>&copy; {{anio}} {{empresa}}. Todos los derechos reservados.</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+# Valores para la vista previa del editor
+VALORES_EJEMPLO = {
+    'cliente': 'Hotel Las Palmas S.A.',
+    'contacto': 'María Rodríguez',
+    'numero_cotizacion': 'COT-MT-25-03-00012',
+    'tipo_servicio': 'Mantenimiento Preventivo',
+    'fecha': '2025-03-14',
+    'subtotal': '$12,400.00',
+    'iva': '$1,612.00',
+    'total': '$14,012.00',
+    'empresa': 'AirSolutions',
+    'anio': str(datetime.now().year),
+}
+
+
+def _compilar(texto, estricta=True, transformar=None):
+    """
+    Separa un texto en partes fijas y campos
+
+    Args:
+        texto: Texto con campos {{nombre}}
+        estricta: Rechazar campos desconocidos (si no, se dejan como texto)
+        transformar: Función opcional aplicada a cada parte fija
+
+    Returns:
+        tuple: (partes_fijas, campos), con una parte fija más que campos
+
+    Raises:
+        ValueError: Si estricta y hay un campo desconocido
+    """
+    partes = _CAMPO.split(texto)
+    fijas = [partes[0]]
+    campos = []
+
+    for campo, fija in zip(partes[1::2], partes[2::2]):
+        if campo in CAMPOS:
+            campos.append(campo)
+            fijas.append(fija)
+        elif estricta:
+            raise ValueError(f"Campo desconocido en la plantilla: {{{{{campo}}}}}")
+        else:
+            fijas[-1] += f"{{{{{campo}}}}}" + fija
+
+    if transformar:
+        fijas = [transformar(fija) for fija in fijas]
+    return tuple(fijas), tuple(campos)
+
+
+def _unir(compilado, valores):
+    """Arma el texto de una plantilla compilada con los valores dados"""
+    fijas, campos = compilado
+    salida = [fijas[0]]
+    for campo, fija in zip(campos, fijas[1:]):
+        salida.append(valores[campo])
+        salida.append(fija)
+    return ''.join(salida)
+
+
+def _texto_a_html(texto):
+    return escape(texto).replace('\n', '<br>')
+
+
+@lru_cache(maxsize=64)
+def _mensaje_compilado(mensaje):
+    """Compila un mensaje personalizado (el de una campaña se repite en cada email)"""
+    return _compilar(mensaje, estricta=False, transformar=_texto_a_html)
+
+
+class PlantillaEmail:
+    """Plantilla de asunto y cuerpo compilada, lista para renderizar"""
+
+    def __init__(self, asunto, cuerpo, nombre="Predeterminada", version=0):
+        """
+        Compila la plantilla
+
+        Raises:
+            ValueError: Si el asunto o el cuerpo usan un campo desconocido
+        """
+        self.nombre = nombre
+        self.version = version
+        self._asunto = _compilar(asunto)
+        self._cuerpo = _compilar(cuerpo)
+        self._campos_cuerpo = frozenset(self._cuerpo[1]) - _CAMPOS_HTML
+
+    @property
+    def campos(self):
+        """Campos usados en el asunto o el cuerpo"""
+        return set(self._asunto[1]) | set(self._cuerpo[1])
+
+    def renderizar(self, valores, mensaje_personalizado=""):
+        """
+        Arma el asunto y el cuerpo de un email
+
+        Args:
+            valores: Diccionario con los campos (texto sin escapar); ver valores_email()
+            mensaje_personalizado: Texto libre, puede usar los mismos campos
+
+        Returns:
+            tuple: (asunto, cuerpo_html)
+        """
+        # Solo se escapan los campos que aparecen en el cuerpo o el mensaje
+        mensaje = _mensaje_compilado(mensaje_personalizado) if mensaje_personalizado else None
+        usados = self._campos_cuerpo.union(mensaje[1]) if mensaje else self._campos_cuerpo
+        html = {campo: escape(str(valores.get(campo, ''))) for campo in usados}
+
+        if mensaje:
+            html['mensaje'] = f"<div class='mensaje-personalizado'>{_unir(mensaje, html)}</div>"
+        else:
+            html['mensaje'] = ''
+
+        texto = {campo: str(valores.get(campo, '')) for campo in self._asunto[1]}
+        for campo in _CAMPOS_HTML:
+            texto[campo] = ''
+
+        return _unir(self._asunto, texto), _unir(self._cuerpo, html)
+
+
+_predeterminada = PlantillaEmail(ASUNTO_PREDETERMINADO, CUERPO_PREDETERMINADO)
+
+# Plantillas compiladas por (ruta de la base, id_plantilla)
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def plantilla_predeterminada():
+    """Plantilla usada cuando no hay ninguna activa"""
+    return _predeterminada
+
+
+def obtener_plantilla(db=None):
+    """
+    Plantilla activa compilada
+
+    Solo consulta la versión de la plantilla activa; el texto se lee y
+    compila de nuevo únicamente si cambió desde la última vez.
+
+    Args:
+        db: Instancia conectada de DatabaseManager (None: predeterminada)
+
+    Returns:
+        PlantillaEmail
+    """
+    if db is None or db.conn is None:
+        return _predeterminada
+
+    try:
+        fila = db.conn.execute(
+            "SELECT id_plantilla, version FROM plantillas_email WHERE activa = 1"
+        ).fetchone()
+        if not fila:
+            return _predeterminada
+
+        clave = (db.db_path, fila[0])
+        with _cache_lock:
+            plantilla = _cache.get(clave)
+        if plantilla and plantilla.version == fila[1]:
+            return plantilla
+
+        nombre, asunto, cuerpo, version = db.conn.execute(
+            "SELECT nombre, asunto, cuerpo, version FROM plantillas_email WHERE id_plantilla = ?",
+            (fila[0],)
+        ).fetchone()
+        plantilla = PlantillaEmail(asunto, cuerpo, nombre, version)
+    except (sqlite3.Error, TypeError, ValueError) as e:
+        print(f"Error cargando plantilla de email: {e}")
+        return _predeterminada
+
+    with _cache_lock:
+        _cache[clave] = plantilla
+    return plantilla
+
+
+def invalidar_cache(db_path=None, id_plantilla=None):
+    """Descarta plantillas compiladas (todas, las de una base o una sola)"""
+    with _cache_lock:
+        for clave in list(_cache):
+            if db_path is not None and clave[0] != db_path:
+                continue
+            if id_plantilla is not None and clave[1] != id_plantilla:
+                continue
+            del _cache[clave]
+
+
+def _moneda(valor):
+    return f"${valor or 0:,.2f}"
+
+
+def datos_cotizacion(db, numero_cotizacion):
+    """
+    Datos de una cotización para los campos de la plantilla
+
+    Returns:
+        dict: Mismas claves que obtener_datos_cotizaciones() (sin equipos),
+              o None si la cotización no existe
+    """
+    fila = db.conn.execute('''
+        SELECT cl.nombre_empresa, cl.contacto_nombre, c.tipo_servicio, c.fecha_emision,
+               c.subtotal, c.total_iva, c.total
+        FROM cotizaciones c
+        LEFT JOIN clientes cl ON c.id_cliente = cl.id_cliente
+        WHERE c.numero_cotizacion = ?
+    ''', (numero_cotizacion,)).fetchone()
+    if not fila:
+        return None
+
+    cliente, contacto, tipo_servicio, fecha, subtotal, iva, total = fila
+    return {
+        'numero_cotizacion': numero_cotizacion,
+        'cliente': cliente or 'Cliente',
+        'contacto': contacto or '',
+        'tipo_servicio': tipo_servicio or '',
+        'fecha': fecha or '',
+        'subtotal': subtotal or 0,
+        'iva': iva or 0,
+        'total': total or 0,
+    }
+
+
+def valores_email(empresa, nombre_cliente, numero_cotizacion, datos=None):
+    """
+    Valores de los campos de la plantilla para un email
+
+    Args:
+        empresa: Nombre del remitente
+        nombre_cliente: Nombre del cliente
+        numero_cotizacion: Número de cotización
+        datos: Datos de la cotización (datos_cotizacion() u
+               obtener_datos_cotizaciones()); sin ellos los montos quedan vacíos
+
+    Returns:
+        dict: {campo: texto}
+    """
+    datos = datos or {}
+    tiene_montos = 'total' in datos
+    return {
+        'cliente': nombre_cliente,
+        'contacto': datos.get('contacto') or '',
+        'numero_cotizacion': numero_cotizacion,
+        'tipo_servicio': datos.get('tipo_servicio') or '',
+        'fecha': datos.get('fecha') or '',
+        'subtotal': _moneda(datos.get('subtotal')) if tiene_montos else '',
+        'iva': _moneda(datos.get('iva')) if tiene_montos else '',
+        'total': _moneda(datos.get('total')) if tiene_montos else '',
+        'empresa': empresa,
+        'anio': str(datetime.now().year),
+    }
+
+
+class GestorPlantillasEmail:
+    """Alta, edición y activación de las plantillas de email"""
+
+    def __init__(self, db):
+        """
+        Inicializa el gestor
+
+        Args:
+            db: Instancia conectada de DatabaseManager
+        """
+        self.db = db
+
+    def listar(self):
+        """
+        Plantillas guardadas
+
+        Returns:
+            list: Tuplas (id_plantilla, nombre, activa, version, fecha_modificacion)
+        """
+        self.db.cursor.execute('''
+            SELECT id_plantilla, nombre, activa, version, fecha_modificacion
+            FROM plantillas_email
+            ORDER BY nombre
+        ''')
+        return self.db.cursor.fetchall()
+
+    def obtener(self, id_plantilla):
+        """
+        Texto de una plantilla
+
+        Returns:
+            tuple: (nombre, asunto, cuerpo, activa) o None
+        """
+        self.db.cursor.execute(
+            "SELECT nombre, asunto, cuerpo, activa FROM plantillas_email WHERE id_plantilla = ?",
+            (id_plantilla,)
+        )
+        return self.db.cursor.fetchone()
+
+    def guardar(self, nombre, asunto, cuerpo, id_plantilla=None):
+        """
+        Crea o modifica una plantilla
+
+        Args:
+            nombre: Nombre de la plantilla
+            asunto: Asunto con campos {{...}}
+            cuerpo: Cuerpo HTML con campos {{...}}
+            id_plantilla: ID de la plantilla a modificar (None: nueva)
+
+        Returns:
+            tuple: (éxito, id_plantilla o mensaje_error)
+        """
+        nombre = (nombre or '').strip()
+        if not nombre:
+            return False, "La plantilla necesita un nombre"
+        if not asunto.strip() or not cuerpo.strip():
+            return False, "El asunto y el cuerpo no pueden estar vacíos"
+
+        try:
+            PlantillaEmail(asunto, cuerpo, nombre)
+        except ValueError as e:
+            return False, str(e)
+
+        fecha = datetime.now().strftime(FORMATO_FECHA)
+        try:
+            if id_plantilla is None:
+                self.db.cursor.execute('''
+                    INSERT INTO plantillas_email (nombre, asunto, cuerpo, fecha_modificacion)
+                    VALUES (?, ?, ?, ?)
+                ''', (nombre, asunto, cuerpo, fecha))
+                id_plantilla = self.db.cursor.lastrowid
+            else:
+                self.db.cursor.execute('''
+                    UPDATE plantillas_email
+                    SET nombre = ?, asunto = ?, cuerpo = ?, version = version + 1,
+                        fecha_modificacion = ?
+                    WHERE id_plantilla = ?
+                ''', (nombre, asunto, cuerpo, fecha, id_plantilla))
+                if not self.db.cursor.rowcount:
+                    return False, "La plantilla no existe"
+            self.db.conn.commit()
+        except sqlite3.IntegrityError:
+            self.db.conn.rollback()
+            return False, f"Ya existe una plantilla llamada '{nombre}'"
+
+        invalidar_cache(self.db.db_path, id_plantilla)
+        return True, id_plantilla
+
+    def activar(self, id_plantilla=None):
+        """
+        Elige la plantilla que usan los envíos
+
+        Args:
+            id_plantilla: ID de la plantilla (None: volver a la predeterminada)
+
+        Returns:
+            tuple: (éxito, mensaje)
+        """
+        try:
+            self.db.cursor.execute("UPDATE plantillas_email SET activa = 0 WHERE activa = 1")
+            if id_plantilla is not None:
+                self.db.cursor.execute(
+                    "UPDATE plantillas_email SET activa = 1 WHERE id_plantilla = ?",
+                    (id_plantilla,)
+                )
+                if not self.db.cursor.rowcount:
+                    self.db.conn.rollback()
+                    return False, "La plantilla no existe"
+            self.db.conn.commit()
+        except sqlite3.Error as e:
+            self.db.conn.rollback()
+            return False, f"Error activando la plantilla: {e}"
+
+        if id_plantilla is None:
+            return True, "Se usará la plantilla predeterminada"
+        return True, "Plantilla activada"
+
+    def eliminar(self, id_plantilla):
+        """
+        Elimina una plantilla (si estaba activa se vuelve a la predeterminada)
+
+        Returns:
+            tuple: (éxito, mensaje)
+        """
+        self.db.cursor.execute("DELETE FROM plantillas_email WHERE id_plantilla = ?", (id_plantilla,))
+        if not self.db.cursor.rowcount:
+            return False, "La plantilla no existe"
+        self.db.conn.commit()
+        invalidar_cache(self.db.db_path, id_plantilla)
+        return True, "Plantilla eliminada"
+
+
+def medir_renderizado(plantilla, valores, cantidad=5000, mensaje_personalizado=""):
+    """
+    Compara renderizar con la plantilla compilada contra compilarla en cada email
+
+    Args:
+        plantilla: Tupla (asunto, cuerpo) con el texto de la plantilla
+        valores: Lista de diccionarios de valores_email(); se recorren en ciclo
+        cantidad: Emails a renderizar con cada método
+        mensaje_personalizado: Mensaje con campos, como en una campaña
+
+    Returns:
+        dict: {metodo: {'segundos', 'por_segundo'}} para 'compilando'
+              (compilar en cada email) y 'compilada' (una sola vez)
+    """
+    asunto, cuerpo = plantilla
+    resultados = {}
+
+    def medir(nombre, renderizar_uno):
+        inicio = time.perf_counter()
+        for i in range(cantidad):
+            renderizar_uno(valores[i % len(valores)])
+        segundos = time.perf_counter() - inicio
+        resultados[nombre] = {
+            'segundos': segundos,
+            'por_segundo': cantidad / segundos if segundos else 0,
+        }
+
+    def compilando(valores_uno):
+        _mensaje_compilado.cache_clear()
+        PlantillaEmail(asunto, cuerpo).renderizar(valores_uno, mensaje_personalizado)
+
+    compilada = PlantillaEmail(asunto, cuerpo)
+    medir('compilando', compilando)
+    medir('compilada', lambda v: compilada.renderizar(v, mensaje_personalizado))
+    return resultados
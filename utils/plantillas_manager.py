@@ -0,0 +1,279 @@
+"""
+plantillas_manager.py - Duplicación de cotizaciones y plantillas
+
+Permite:
+- Duplicar una cotización existente (mismo cliente u otros clientes)
+- Guardar una cotización como plantilla reutilizable
+- Crear cotizaciones desde una plantilla para varios clientes a la vez
+
+Todas las copias se hacen con INSERT ... SELECT dentro de una sola
+transacción: el encabezado y las líneas nunca pasan por Python, así que
+clonar una cotización de cientos de líneas para muchos clientes cuesta
+unas pocas sentencias SQL.
+"""
+
+import os
+import sys
+from datetime import datetime
+import sqlite3
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.cotizaciones import COLUMNAS_ENCABEZADO_COPIABLES, COLUMNAS_LINEA
+from models.database import FECHA_MODIFICACION_SQL
+from models.secuencias import reservar_numeros_cotizacion
+
+_ENCABEZADO = ', '.join(COLUMNAS_ENCABEZADO_COPIABLES)
+_ENCABEZADO_ORIGEN = ', '.join(f"o.{c}" for c in COLUMNAS_ENCABEZADO_COPIABLES)
+_LINEA = ', '.join(COLUMNAS_LINEA)
+_LINEA_ORIGEN = ', '.join(f"l.{c}" for c in COLUMNAS_LINEA)
+
+
+class PlantillasManager:
+    """Gestor de copias de cotizaciones y plantillas"""
+
+    def __init__(self, db):
+        """
+        Inicializa el gestor de plantillas
+
+        Args:
+            db: Instancia conectada de DatabaseManager
+        """
+        self.db = db
+
+    # --- DUPLICAR COTIZACIONES ---
+
+    def clonar_cotizacion(self, id_cotizacion, id_cliente=None):
+        """
+        Duplica una cotización con todas sus líneas
+
+        Args:
+            id_cotizacion: ID de la cotización original
+            id_cliente: Cliente de la copia (por defecto, el mismo)
+
+        Returns:
+            tuple: (éxito, id de la nueva cotización o mensaje_error)
+        """
+        if id_cliente is None:
+            self.db.cursor.execute(
+                "SELECT id_cliente FROM cotizaciones WHERE id_cotizacion = ?",
+                (id_cotizacion,)
+            )
+            fila = self.db.cursor.fetchone()
+            if not fila:
+                return False, "La cotización no existe"
+            id_cliente = fila[0]
+
+        exito, resultado = self.clonar_para_clientes(id_cotizacion, [id_cliente])
+        if not exito:
+            return False, resultado
+        return True, resultado[0]
+
+    def clonar_para_clientes(self, id_cotizacion, ids_clientes):
+        """
+        Duplica una cotización para varios clientes en una sola transacción
+
+        Si la copia es para el mismo cliente de la original se conserva el
+        proyecto asociado; para otros clientes queda sin proyecto.
+
+        Args:
+            id_cotizacion: ID de la cotización original
+            ids_clientes: Lista de IDs de clientes destino
+
+        Returns:
+            tuple: (éxito, lista de IDs nuevos o mensaje_error)
+        """
+        return self._clonar(
+            origen='cotizaciones',
+            columna_id='id_cotizacion',
+            tabla_lineas='cotizacion_lineas',
+            id_origen=id_cotizacion,
+            ids_clientes=ids_clientes,
+            conservar_proyecto=True
+        )
+
+    # --- PLANTILLAS ---
+
+    def crear_plantilla(self, id_cotizacion, nombre):
+        """
+        Guarda una cotización como plantilla
+
+        Args:
+            id_cotizacion: ID de la cotización original
+            nombre: Nombre único de la plantilla
+
+        Returns:
+            tuple: (éxito, id_plantilla o mensaje_error)
+        """
+        nombre = (nombre or '').strip()
+        if not nombre:
+            return False, "La plantilla necesita un nombre"
+
+        cursor = self.db.cursor
+        try:
+            cursor.execute(f'''
+                INSERT INTO plantillas_cotizacion (nombre, {_ENCABEZADO})
+                SELECT ?, {_ENCABEZADO_ORIGEN}
+                FROM cotizaciones o
+                WHERE o.id_cotizacion = ?
+            ''', (nombre, id_cotizacion))
+
+            if cursor.rowcount == 0:
+                self.db.conn.rollback()
+                return False, "La cotización no existe"
+
+            id_plantilla = cursor.lastrowid
+            cursor.execute(f'''
+                INSERT INTO plantilla_lineas (id_plantilla, {_LINEA})
+                SELECT ?, {_LINEA_ORIGEN}
+                FROM cotizacion_lineas l
+                WHERE l.id_cotizacion = ?
+            ''', (id_plantilla, id_cotizacion))
+
+            self.db.conn.commit()
+            return True, id_plantilla
+
+        except sqlite3.IntegrityError:
+            self.db.conn.rollback()
+            return False, f"Ya existe una plantilla llamada '{nombre}'"
+        except sqlite3.Error as e:
+            self.db.conn.rollback()
+            return False, f"Error al crear plantilla: {str(e)}"
+
+    def crear_desde_plantilla(self, id_plantilla, ids_clientes):
+        """
+        Crea una cotización por cada cliente a partir de una plantilla
+
+        Args:
+            id_plantilla: ID de la plantilla
+            ids_clientes: Lista de IDs de clientes destino
+
+        Returns:
+            tuple: (éxito, lista de IDs nuevos o mensaje_error)
+        """
+        return self._clonar(
+            origen='plantillas_cotizacion',
+            columna_id='id_plantilla',
+            tabla_lineas='plantilla_lineas',
+            id_origen=id_plantilla,
+            ids_clientes=ids_clientes,
+            conservar_proyecto=False
+        )
+
+    def listar_plantillas(self):
+        """
+        Lista las plantillas disponibles
+
+        Returns:
+            list: Tuplas (id_plantilla, nombre, tipo_servicio, total, líneas)
+        """
+        self.db.cursor.execute('''
+            SELECT p.id_plantilla, p.nombre, p.tipo_servicio, p.total,
+                   (SELECT COUNT(*) FROM plantilla_lineas l
+                    WHERE l.id_plantilla = p.id_plantilla)
+            FROM plantillas_cotizacion p
+            ORDER BY p.nombre
+        ''')
+        return self.db.cursor.fetchall()
+
+    def eliminar_plantilla(self, id_plantilla):
+        """
+        Elimina una plantilla y sus líneas
+
+        Returns:
+            tuple: (éxito, mensaje)
+        """
+        try:
+            self.db.cursor.execute(
+                "DELETE FROM plantillas_cotizacion WHERE id_plantilla = ?",
+                (id_plantilla,)
+            )
+            self.db.conn.commit()
+            return True, "Plantilla eliminada"
+        except sqlite3.Error as e:
+            self.db.conn.rollback()
+            return False, f"Error al eliminar plantilla: {str(e)}"
+
+    # --- COPIA EN BLOQUE ---
+
+    def _clonar(self, origen, columna_id, tabla_lineas, id_origen,
+                ids_clientes, conservar_proyecto):
+        """
+        Copia encabezado y líneas de una cotización o plantilla para N clientes
+
+        Los clientes destino y sus números se cargan en una tabla temporal;
+        después un INSERT ... SELECT crea todos los encabezados y otro copia
+        todas las líneas, sin importar cuántos clientes haya.
+        """
+        ids_clientes = list(dict.fromkeys(ids_clientes))
+        if not ids_clientes:
+            return False, "Seleccione al menos un cliente"
+
+        cursor = self.db.cursor
+        hoy = datetime.now().strftime('%Y-%m-%d')
+
+        if conservar_proyecto:
+            # Solo las copias para el mismo cliente siguen en el mismo proyecto
+            proyecto = "CASE WHEN d.id_cliente = o.id_cliente THEN o.id_proyecto END"
+        else:
+            proyecto = "NULL"
+
+        try:
+            cursor.execute('''
+                CREATE TEMP TABLE IF NOT EXISTS _clones (
+                    numero_cotizacion TEXT PRIMARY KEY,
+                    id_cliente INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute("DELETE FROM _clones")
+
+            numeros = reservar_numeros_cotizacion(cursor, len(ids_clientes))
+            cursor.executemany(
+                "INSERT INTO _clones (numero_cotizacion, id_cliente) VALUES (?, ?)",
+                list(zip(numeros, ids_clientes))
+            )
+
+            cursor.execute(f'''
+                INSERT INTO cotizaciones (
+                    numero_cotizacion, id_cliente, fecha_emision, estado,
+                    id_proyecto, {_ENCABEZADO}, fecha_modificacion
+                )
+                SELECT d.numero_cotizacion, d.id_cliente, ?, 'pendiente',
+                       {proyecto}, {_ENCABEZADO_ORIGEN}, {FECHA_MODIFICACION_SQL}
+                FROM _clones d
+                JOIN clientes cl ON cl.id_cliente = d.id_cliente
+                CROSS JOIN {origen} o
+                WHERE o.{columna_id} = ?
+                ORDER BY d.rowid
+            ''', (hoy, id_origen))
+
+            if cursor.rowcount != len(ids_clientes):
+                self.db.conn.rollback()
+                if cursor.rowcount == 0:
+                    return False, "El origen no existe"
+                return False, "Uno o más clientes no existen"
+
+            cursor.execute(f'''
+                INSERT INTO cotizacion_lineas (id_cotizacion, {_LINEA}, fecha_modificacion)
+                SELECT c.id_cotizacion, {_LINEA_ORIGEN}, {FECHA_MODIFICACION_SQL}
+                FROM _clones d
+                JOIN cotizaciones c ON c.numero_cotizacion = d.numero_cotizacion
+                JOIN {tabla_lineas} l ON l.{columna_id} = ?
+                ORDER BY c.id_cotizacion, l.id_linea
+            ''', (id_origen,))
+
+            cursor.execute('''
+                SELECT c.id_cotizacion
+                FROM _clones d
+                JOIN cotizaciones c ON c.numero_cotizacion = d.numero_cotizacion
+                ORDER BY d.rowid
+            ''')
+            nuevos = [fila[0] for fila in cursor.fetchall()]
+
+            cursor.execute("DELETE FROM _clones")
+            self.db.conn.commit()
+            return True, nuevos
+
+        except sqlite3.Error as e:
+            self.db.conn.rollback()
+            return False, f"Error al duplicar cotización: {str(e)}"
@@ -0,0 +1,243 @@
+"""
+tareas.py - Tareas en segundo plano para las ventanas Tkinter
+
+Generar un PDF o enviar un email tarda varios segundos (reportlab, conexión
+SMTP, subida del adjunto). Ejecutado dentro de un callback de Tkinter, la
+ventana deja de responder todo ese tiempo.
+
+EjecutorTareas corre esas funciones en hilos y entrega el avance, el
+resultado y los errores de vuelta al hilo de Tkinter (con widget.after),
+así que los callbacks pueden tocar la interfaz con normalidad. Se pueden
+ejecutar varias tareas a la vez.
+
+La cancelación es cooperativa: la función recibe su Tarea y llama a
+tarea.verificar() entre pasos; una tarea que todavía no empezó se
+cancela sin ejecutarse.
+
+Las funciones de las tareas no deben usar la conexión SQLite de la
+ventana (sqlite3 no permite usarla desde otro hilo): los datos se leen
+antes de lanzar la tarea y lo que haya que guardar se guarda en al_completar.
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Cada cuánto revisa la ventana los mensajes de las tareas (ms)
+INTERVALO_SONDEO_MS = 100
+
+PENDIENTE = 'pendiente'
+EJECUTANDO = 'ejecutando'
+COMPLETADA = 'completada'
+FALLIDA = 'fallida'
+CANCELADA = 'cancelada'
+
+
+class TareaCancelada(Exception):
+    """La tarea se canceló antes de terminar"""
+
+
+class Tarea:
+    """Una función ejecutándose en segundo plano"""
+
+    def __init__(self, id_tarea, descripcion, funcion, args, kwargs,
+                 al_completar=None, al_error=None, al_progreso=None, al_cancelar=None):
+        self.id = id_tarea
+        self.descripcion = descripcion
+        self.estado = PENDIENTE
+        self.progreso = 0
+        self.mensaje = ''
+        self.resultado = None
+        self.error = None
+
+        self._funcion = funcion
+        self._args = args
+        self._kwargs = kwargs
+        self._al_completar = al_completar
+        self._al_error = al_error
+        self._al_progreso = al_progreso
+        self._al_cancelar = al_cancelar
+        self._cancelar = threading.Event()
+        self._futuro = None
+        self._cola = None
+
+    @property
+    def cancelada(self):
+        """True si se pidió cancelar la tarea"""
+        return self._cancelar.is_set()
+
+    @property
+    def terminada(self):
+        return self.estado in (COMPLETADA, FALLIDA, CANCELADA)
+
+    def cancelar(self):
+        """Pide cancelar la tarea (si no ha empezado, ya no se ejecuta)"""
+        self._cancelar.set()
+        if self._futuro is not None and self._futuro.cancel():
+            self._cola.put((self, CANCELADA, None))
+
+    def verificar(self):
+        """Lanza TareaCancelada si se pidió cancelar (llamar entre pasos)"""
+        if self._cancelar.is_set():
+            raise TareaCancelada()
+
+    def reportar(self, progreso, mensaje=''):
+        """
+        Informa el avance desde el hilo de la tarea
+
+        Args:
+            progreso: Porcentaje de 0 a 100
+            mensaje: Texto opcional del paso actual
+        """
+        self.verificar()
+        self._cola.put((self, 'progreso', (progreso, mensaje)))
+
+    def _ejecutar(self):
+        """Cuerpo que corre en el hilo trabajador"""
+        if self._cancelar.is_set():
+            self._cola.put((self, CANCELADA, None))
+            return
+
+        self._cola.put((self, EJECUTANDO, None))
+        try:
+            resultado = self._funcion(self, *self._args, **self._kwargs)
+        except TareaCancelada:
+            self._cola.put((self, CANCELADA, None))
+        except Exception as e:
+            self._cola.put((self, FALLIDA, e))
+        else:
+            self._cola.put((self, COMPLETADA, resultado))
+
+
+class EjecutorTareas:
+    """Pool de hilos cuyas notificaciones llegan al hilo de Tkinter"""
+
+    def __init__(self, widget, max_hilos=4, al_cambiar=None):
+        """
+        Inicializa el ejecutor
+
+        Args:
+            widget: Widget de Tkinter cuyo after() se usa para recibir mensajes
+            max_hilos: Tareas que pueden correr al mismo tiempo
+            al_cambiar: Función opcional al_cambiar(tarea) llamada en cada
+                        cambio de estado o progreso (para refrescar la lista)
+        """
+        self.widget = widget
+        self.al_cambiar = al_cambiar
+        self.tareas = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix='tarea')
+        self._cola = queue.Queue()
+        self._siguiente_id = 1
+        self._sondeo = None
+        self._cerrado = False
+
+    def lanzar(self, descripcion, funcion, *args, al_completar=None, al_error=None,
+               al_progreso=None, al_cancelar=None, **kwargs):
+        """
+        Ejecuta funcion(tarea, *args, **kwargs) en segundo plano
+
+        Los callbacks se llaman en el hilo de Tkinter:
+        al_completar(resultado), al_error(excepcion),
+        al_progreso(porcentaje, mensaje) y al_cancelar().
+
+        Returns:
+            Tarea: La tarea creada
+        """
+        if self._cerrado:
+            raise RuntimeError("El ejecutor de tareas está cerrado")
+
+        tarea = Tarea(
+            self._siguiente_id, descripcion, funcion, args, kwargs,
+            al_completar, al_error, al_progreso, al_cancelar
+        )
+        self._siguiente_id += 1
+        tarea._cola = self._cola
+        self.tareas[tarea.id] = tarea
+
+        tarea._futuro = self._pool.submit(tarea._ejecutar)
+        self._notificar(tarea)
+        self._programar_sondeo()
+        return tarea
+
+    def activas(self):
+        """Tareas pendientes o en ejecución"""
+        return [t for t in self.tareas.values() if not t.terminada]
+
+    def cancelar_todas(self):
+        """Pide cancelar todas las tareas activas"""
+        for tarea in self.activas():
+            tarea.cancelar()
+
+    def cerrar(self):
+        """
+        Cancela las tareas y libera los hilos sin bloquear la interfaz
+
+        Los hilos que estén a mitad de un paso terminan ese paso en segundo
+        plano; sus resultados se descartan.
+        """
+        self._cerrado = True
+        self.cancelar_todas()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._sondeo is not None:
+            try:
+                self.widget.after_cancel(self._sondeo)
+            except Exception:
+                pass
+            self._sondeo = None
+
+    def _programar_sondeo(self):
+        if self._sondeo is None and not self._cerrado:
+            self._sondeo = self.widget.after(INTERVALO_SONDEO_MS, self._procesar_cola)
+
+    def _procesar_cola(self):
+        """Entrega a la interfaz los mensajes pendientes de las tareas"""
+        self._sondeo = None
+
+        while True:
+            try:
+                tarea, tipo, valor = self._cola.get_nowait()
+            except queue.Empty:
+                break
+
+            if tarea.terminada:
+                continue  # p. ej. cancelada antes de empezar y luego reportada por el hilo
+
+            if tipo == 'progreso':
+                tarea.progreso, tarea.mensaje = valor
+                self._llamar(tarea._al_progreso, *valor)
+            elif tipo == EJECUTANDO:
+                tarea.estado = EJECUTANDO
+            elif tipo == COMPLETADA:
+                tarea.estado = COMPLETADA
+                tarea.progreso = 100
+                tarea.resultado = valor
+                self._llamar(tarea._al_completar, valor)
+            elif tipo == FALLIDA:
+                tarea.estado = FALLIDA
+                tarea.error = valor
+                if tarea._al_error:
+                    self._llamar(tarea._al_error, valor)
+                else:
+                    print(f"Error en tarea '{tarea.descripcion}': {valor}")
+            elif tipo == CANCELADA:
+                tarea.estado = CANCELADA
+                self._llamar(tarea._al_cancelar)
+
+            self._notificar(tarea)
+            if tarea.terminada:
+                self.tareas.pop(tarea.id, None)
+
+        if self.tareas:
+            self._programar_sondeo()
+
+    def _notificar(self, tarea):
+        self._llamar(self.al_cambiar, tarea)
+
+    @staticmethod
+    def _llamar(funcion, *args):
+        if funcion is None:
+            return
+        try:
+            funcion(*args)
+        except Exception as e:
+            print(f"Error en callback de tarea: {e}")
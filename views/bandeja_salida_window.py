@@ -0,0 +1,234 @@
+"""
+bandeja_salida_window.py - Bandeja de salida de emails
+
+Muestra los emails encolados con su estado, el historial de intentos del
+email seleccionado, y permite reintentar los fallidos o cancelar los
+pendientes. La lista se refresca sola mientras la ventana está abierta.
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from utils.bandeja_salida import BandejaSalida
+
+# Milisegundos entre actualizaciones automáticas de la lista
+INTERVALO_ACTUALIZACION = 5000
+
+COLORES_ESTADO = {
+    'pendiente': '#d97706',
+    'enviando': '#2563eb',
+    'enviado': '#059669',
+    'fallido': '#dc2626',
+    'cancelado': '#6b7280',
+}
+
+
+class BandejaSalidaWindow:
+    """Ventana con el estado de los emails de la bandeja de salida"""
+
+    def __init__(self, parent, db):
+        """
+        Inicializa la ventana
+
+        Args:
+            parent: Ventana padre
+            db: Instancia de DatabaseManager
+        """
+        self.bandeja = BandejaSalida(db)
+        self._actualizacion = None
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Bandeja de Salida")
+        self.dialog.geometry("950x600")
+        self.dialog.transient(parent)
+        self.dialog.protocol("WM_DELETE_WINDOW", self.cerrar)
+
+        # Centrar ventana
+        self.centrar_ventana()
+
+        # Crear interfaz
+        self.crear_interfaz()
+        self.cargar_mensajes()
+
+    def centrar_ventana(self):
+        """Centra la ventana en la pantalla"""
+        self.dialog.update_idletasks()
+        width = 950
+        height = 600
+        x = (self.dialog.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.dialog.winfo_screenheight() // 2) - (height // 2)
+        self.dialog.geometry(f'{width}x{height}+{x}+{y}')
+
+    def crear_interfaz(self):
+        """Crea la interfaz de la ventana"""
+        # Header
+        header = tk.Frame(self.dialog, bg='#1e293b', height=60)
+        header.pack(fill=tk.X)
+        header.pack_propagate(False)
+
+        tk.Label(
+            header,
+            text="📤 Bandeja de Salida",
+            font=("Arial", 14, "bold"),
+            bg='#1e293b',
+            fg='white'
+        ).pack(pady=15)
+
+        # Contenedor principal
+        main_container = tk.Frame(self.dialog, bg='white')
+        main_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+
+        # Resumen por estado
+        self.resumen_var = tk.StringVar()
+        tk.Label(
+            main_container,
+            textvariable=self.resumen_var,
+            font=("Arial", 10),
+            bg='#f3f4f6',
+            fg='#1e293b',
+            padx=10,
+            pady=10,
+            anchor='w'
+        ).pack(fill=tk.X, pady=(0, 15))
+
+        # Tabla de emails
+        table_frame = tk.Frame(main_container, bg='white')
+        table_frame.pack(fill=tk.BOTH, expand=True)
+
+        scrollbar = ttk.Scrollbar(table_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        columnas = ('Cotización', 'Destino', 'Estado', 'Intentos', 'Próximo Intento', 'Último Error')
+        self.tree_mensajes = ttk.Treeview(
+            table_frame,
+            columns=columnas,
+            show='headings',
+            height=12,
+            yscrollcommand=scrollbar.set
+        )
+        for columna, ancho in zip(columnas, (110, 190, 80, 60, 130, 300)):
+            self.tree_mensajes.heading(columna, text=columna)
+            self.tree_mensajes.column(columna, width=ancho)
+
+        for estado, color in COLORES_ESTADO.items():
+            self.tree_mensajes.tag_configure(estado, foreground=color)
+
+        self.tree_mensajes.pack(fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.tree_mensajes.yview)
+        self.tree_mensajes.bind('<<TreeviewSelect>>', lambda e: self.cargar_intentos())
+
+        # Historial de intentos del email seleccionado
+        tk.Label(
+            main_container,
+            text="Intentos del email seleccionado",
+            font=("Arial", 10, "bold"),
+            bg='white'
+        ).pack(anchor='w', pady=(15, 5))
+
+        self.tree_intentos = ttk.Treeview(
+            main_container,
+            columns=('Fecha', 'Resultado', 'Duración', 'Error'),
+            show='headings',
+            height=5
+        )
+        for columna, ancho in zip(('Fecha', 'Resultado', 'Duración', 'Error'), (140, 90, 80, 560)):
+            self.tree_intentos.heading(columna, text=columna)
+            self.tree_intentos.column(columna, width=ancho)
+        self.tree_intentos.pack(fill=tk.X)
+
+        # Botones
+        bottom_frame = tk.Frame(main_container, bg='white')
+        bottom_frame.pack(fill=tk.X, pady=(15, 0))
+
+        for texto, color, comando in (
+            ("🔁 Reintentar", '#2563eb', self.reintentar),
+            ("⛔ Cancelar Envío", '#dc2626', self.cancelar),
+            ("🔄 Actualizar", '#6b7280', self.cargar_mensajes),
+        ):
+            tk.Button(
+                bottom_frame,
+                text=texto,
+                font=("Arial", 10),
+                bg=color,
+                fg='white',
+                cursor='hand2',
+                relief=tk.FLAT,
+                padx=15,
+                pady=6,
+                command=comando
+            ).pack(side=tk.LEFT, padx=(0, 10))
+
+    def cargar_mensajes(self):
+        """Llena la tabla de emails y programa la siguiente actualización"""
+        if self._actualizacion:
+            self.dialog.after_cancel(self._actualizacion)
+
+        seleccion = self.tree_mensajes.selection()
+        self.tree_mensajes.delete(*self.tree_mensajes.get_children())
+
+        for (id_mensaje, numero, destino, estado, intentos,
+             proximo, error, _, fecha_envio) in self.bandeja.listar(limite=500):
+            momento = fecha_envio if estado == 'enviado' else (proximo if estado == 'pendiente' else '')
+            self.tree_mensajes.insert('', tk.END, iid=str(id_mensaje), values=(
+                numero or '', destino, estado, intentos, momento or '', error or ''
+            ), tags=(estado,))
+
+        seleccion = [iid for iid in seleccion if self.tree_mensajes.exists(iid)]
+        if seleccion:
+            self.tree_mensajes.selection_set(seleccion)
+
+        resumen = self.bandeja.resumen()
+        self.resumen_var.set("   ".join(
+            f"{estado.capitalize()}: {cantidad}" for estado, cantidad in resumen.items()
+        ))
+
+        self._actualizacion = self.dialog.after(INTERVALO_ACTUALIZACION, self.cargar_mensajes)
+
+    def cargar_intentos(self):
+        """Muestra el historial de intentos del email seleccionado"""
+        self.tree_intentos.delete(*self.tree_intentos.get_children())
+        id_mensaje = self._seleccionado()
+        if id_mensaje is None:
+            return
+
+        for fecha, exito, error, segundos in self.bandeja.intentos(id_mensaje):
+            self.tree_intentos.insert('', tk.END, values=(
+                fecha,
+                'Enviado' if exito else 'Error',
+                f"{segundos:.2f} s" if segundos is not None else '',
+                error or ''
+            ))
+
+    def _seleccionado(self):
+        seleccion = self.tree_mensajes.selection()
+        return int(seleccion[0]) if seleccion else None
+
+    def reintentar(self):
+        """Vuelve a poner en cola el email seleccionado"""
+        id_mensaje = self._seleccionado()
+        if id_mensaje is None:
+            messagebox.showwarning("Sin Selección", "Selecciona un email", parent=self.dialog)
+            return
+
+        exito, mensaje = self.bandeja.reintentar(id_mensaje)
+        if not exito:
+            messagebox.showwarning("Reintentar", mensaje, parent=self.dialog)
+        self.cargar_mensajes()
+
+    def cancelar(self):
+        """Cancela el envío del email seleccionado"""
+        id_mensaje = self._seleccionado()
+        if id_mensaje is None:
+            messagebox.showwarning("Sin Selección", "Selecciona un email", parent=self.dialog)
+            return
+
+        exito, mensaje = self.bandeja.cancelar(id_mensaje)
+        if not exito:
+            messagebox.showwarning("Cancelar", mensaje, parent=self.dialog)
+        self.cargar_mensajes()
+
+    def cerrar(self):
+        """Detiene la actualización automática y cierra la ventana"""
+        if self._actualizacion:
+            self.dialog.after_cancel(self._actualizacion)
+        self.dialog.destroy()
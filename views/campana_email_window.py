@@ -0,0 +1,336 @@
+"""
+campana_email_window.py - Envío masivo de cotizaciones por email
+
+Lista las cotizaciones elegidas con el email de cada cliente, envía la
+campaña en segundo plano (varias sesiones SMTP, con límite de mensajes por
+minuto) y muestra el resultado de cada destinatario a medida que llega.
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from utils.campana_email import CampanaEmail, SESIONES, POR_MINUTO
+from utils.tareas import EjecutorTareas
+
+COLORES_ESTADO = {
+    'enviado': '#059669',
+    'fallido': '#dc2626',
+    'en_bandeja': '#d97706',
+    'sin_email': '#6b7280',
+    'sin_pdf': '#6b7280',
+    'cancelado': '#6b7280',
+}
+
+NOMBRES_ESTADO = {
+    'enviado': 'Enviado',
+    'fallido': 'Fallido',
+    'en_bandeja': 'En bandeja de salida',
+    'sin_email': 'Cliente sin email',
+    'sin_pdf': 'Sin PDF',
+    'cancelado': 'Cancelado (no se envió)',
+}
+
+
+class CampanaEmailWindow:
+    """Ventana para enviar una campaña de cotizaciones por email"""
+
+    def __init__(self, parent, db, numeros_cotizacion):
+        """
+        Inicializa la ventana
+
+        Args:
+            parent: Ventana padre
+            db: Instancia de DatabaseManager
+            numeros_cotizacion: Cotizaciones de la campaña
+        """
+        self.db = db
+        self.campana = None
+        self.numeros = list(numeros_cotizacion)
+        self.envios = CampanaEmail(db).preparar(self.numeros)
+        self.tarea = None
+        self.cerrar_al_terminar = False
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Campaña de Cotizaciones por Email")
+        self.dialog.geometry("900x650")
+        self.dialog.transient(parent)
+        self.dialog.protocol("WM_DELETE_WINDOW", self.cerrar)
+
+        self.tareas = EjecutorTareas(self.dialog, max_hilos=1)
+
+        # Centrar ventana
+        self.centrar_ventana()
+
+        # Crear interfaz
+        self.crear_interfaz()
+        self.cargar_envios()
+
+    def centrar_ventana(self):
+        """Centra la ventana en la pantalla"""
+        self.dialog.update_idletasks()
+        width = 900
+        height = 650
+        x = (self.dialog.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.dialog.winfo_screenheight() // 2) - (height // 2)
+        self.dialog.geometry(f'{width}x{height}+{x}+{y}')
+
+    def crear_interfaz(self):
+        """Crea la interfaz de la ventana"""
+        # Header
+        header = tk.Frame(self.dialog, bg='#1e293b', height=60)
+        header.pack(fill=tk.X)
+        header.pack_propagate(False)
+
+        tk.Label(
+            header,
+            text="📧 Campaña de Cotizaciones",
+            font=("Arial", 14, "bold"),
+            bg='#1e293b',
+            fg='white'
+        ).pack(pady=15)
+
+        # Contenedor principal
+        main_container = tk.Frame(self.dialog, bg='white')
+        main_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+
+        # Opciones de la campaña
+        opciones = tk.Frame(main_container, bg='white')
+        opciones.pack(fill=tk.X)
+
+        tk.Label(opciones, text="Nombre:", font=("Arial", 10), bg='white').grid(
+            row=0, column=0, sticky=tk.W)
+        self.nombre_var = tk.StringVar(value="Ofertas de mantenimiento")
+        tk.Entry(opciones, textvariable=self.nombre_var, font=("Arial", 10), width=35).grid(
+            row=0, column=1, sticky=tk.W, padx=(5, 20))
+
+        tk.Label(opciones, text="Sesiones:", font=("Arial", 10), bg='white').grid(
+            row=0, column=2, sticky=tk.W)
+        self.sesiones_var = tk.IntVar(value=SESIONES)
+        tk.Spinbox(opciones, from_=1, to=10, textvariable=self.sesiones_var, width=4).grid(
+            row=0, column=3, sticky=tk.W, padx=(5, 20))
+
+        tk.Label(opciones, text="Mensajes por minuto:", font=("Arial", 10), bg='white').grid(
+            row=0, column=4, sticky=tk.W)
+        self.por_minuto_var = tk.IntVar(value=POR_MINUTO)
+        tk.Spinbox(opciones, from_=0, to=600, textvariable=self.por_minuto_var, width=5).grid(
+            row=0, column=5, sticky=tk.W, padx=5)
+
+        tk.Label(
+            main_container,
+            text="Mensaje personalizado (opcional):",
+            font=("Arial", 10),
+            bg='white'
+        ).pack(anchor='w', pady=(10, 2))
+        self.mensaje_text = tk.Text(main_container, font=("Arial", 10), height=3, wrap=tk.WORD)
+        self.mensaje_text.pack(fill=tk.X)
+
+        # Tabla de destinatarios
+        table_frame = tk.Frame(main_container, bg='white')
+        table_frame.pack(fill=tk.BOTH, expand=True, pady=(15, 0))
+
+        scrollbar = ttk.Scrollbar(table_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        columnas = ('Cotización', 'Cliente', 'Email', 'Resultado', 'Detalle')
+        self.tree_envios = ttk.Treeview(
+            table_frame,
+            columns=columnas,
+            show='headings',
+            yscrollcommand=scrollbar.set
+        )
+        for columna, ancho in zip(columnas, (140, 200, 200, 130, 200)):
+            self.tree_envios.heading(columna, text=columna)
+            self.tree_envios.column(columna, width=ancho)
+
+        for estado, color in COLORES_ESTADO.items():
+            self.tree_envios.tag_configure(estado, foreground=color)
+
+        self.tree_envios.pack(fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.tree_envios.yview)
+
+        # Avance
+        self.progreso = ttk.Progressbar(main_container, mode='determinate', maximum=100)
+        self.progreso.pack(fill=tk.X, pady=(10, 0))
+        self.estado_var = tk.StringVar()
+        tk.Label(
+            main_container,
+            textvariable=self.estado_var,
+            font=("Arial", 9),
+            bg='white',
+            fg='#6b7280'
+        ).pack(anchor='w')
+
+        # Botones
+        bottom_frame = tk.Frame(main_container, bg='white')
+        bottom_frame.pack(fill=tk.X, pady=(10, 0))
+
+        self.boton_enviar = tk.Button(
+            bottom_frame,
+            text="📧 Enviar Campaña",
+            font=("Arial", 10, "bold"),
+            bg='#8b5cf6',
+            fg='white',
+            cursor='hand2',
+            relief=tk.FLAT,
+            padx=20,
+            pady=8,
+            command=self.enviar
+        )
+        self.boton_enviar.pack(side=tk.LEFT, padx=(0, 10))
+
+        tk.Button(
+            bottom_frame,
+            text="Cerrar",
+            font=("Arial", 10),
+            bg='#6b7280',
+            fg='white',
+            cursor='hand2',
+            relief=tk.FLAT,
+            padx=20,
+            pady=8,
+            command=self.cerrar
+        ).pack(side=tk.LEFT)
+
+    def cargar_envios(self):
+        """Llena la tabla con los destinatarios de la campaña"""
+        con_email = 0
+        for envio in self.envios:
+            email = envio['email_destino']
+            con_email += bool(email)
+            self.tree_envios.insert('', tk.END, iid=envio['numero_cotizacion'], values=(
+                envio['numero_cotizacion'], envio['nombre_cliente'], email or '(sin email)', '', ''
+            ), tags=('' if email else 'sin_email',))
+
+        self.estado_var.set(f"{len(self.envios)} cotizaciones, {con_email} con email")
+
+    def mostrar_resultado(self, resultado):
+        """Actualiza la fila de un destinatario"""
+        numero = resultado['numero_cotizacion']
+        if self.tree_envios.exists(numero):
+            valores = list(self.tree_envios.item(numero)['values'])
+            valores[3] = NOMBRES_ESTADO[resultado['estado']]
+            valores[4] = resultado['error'] or f"{resultado['segundos']:.1f} s"
+            self.tree_envios.item(numero, values=valores, tags=(resultado['estado'],))
+
+    def enviar(self):
+        """Envía la campaña en segundo plano"""
+        destinatarios = sum(1 for envio in self.envios if envio['email_destino'])
+        if not destinatarios:
+            messagebox.showwarning(
+                "Sin Destinatarios", "Ningún cliente tiene email registrado", parent=self.dialog
+            )
+            return
+
+        try:
+            sesiones = self.sesiones_var.get()
+            por_minuto = self.por_minuto_var.get()
+        except tk.TclError:
+            messagebox.showwarning(
+                "Valor Inválido", "Sesiones y mensajes por minuto deben ser números",
+                parent=self.dialog
+            )
+            return
+
+        if not messagebox.askyesno(
+            "Confirmar",
+            f"¿Enviar {destinatarios} emails?",
+            parent=self.dialog
+        ):
+            return
+
+        # preparar() lee los datos y la configuración de email en este hilo
+        mensaje = self.mensaje_text.get("1.0", tk.END).strip()
+        self.campana = CampanaEmail(self.db, sesiones=sesiones, por_minuto=por_minuto)
+        self.envios = self.campana.preparar(self.numeros, mensaje)
+
+        self.boton_enviar.config(state=tk.DISABLED)
+        self.tarea = self.tareas.lanzar(
+            "Campaña de email",
+            self._tarea_enviar,
+            self.campana, self.envios,
+            al_progreso=self._avance,
+            al_completar=self._terminada,
+            al_error=self._error,
+            al_cancelar=self._cancelada
+        )
+
+    @staticmethod
+    def _tarea_enviar(tarea, campana, envios):
+        """Envía la campaña (se ejecuta en un hilo aparte)"""
+        def progreso(hechos, total, resultado):
+            if not tarea.cancelada:
+                tarea.reportar(hechos * 100 // total, resultado)
+
+        return campana.enviar(envios, progreso=progreso, cancelado=lambda: tarea.cancelada)
+
+    def _avance(self, porcentaje, resultado):
+        self.progreso['value'] = porcentaje
+        self.mostrar_resultado(resultado)
+        self.estado_var.set(f"Enviando... {porcentaje}%")
+
+    def _terminada(self, estadisticas):
+        """Guarda el resultado de la campaña (también si se canceló) y muestra el resumen"""
+        self.tarea = None
+        id_campana = self.campana.guardar(estadisticas, self.nombre_var.get().strip() or "Campaña")
+        if self.cerrar_al_terminar:
+            self.tareas.cerrar()
+            self.dialog.destroy()
+            return
+
+        for resultado in estadisticas['resultados']:
+            self.mostrar_resultado(resultado)
+
+        en_bandeja = sum(1 for r in estadisticas['resultados'] if r['estado'] == 'en_bandeja')
+        self.progreso['value'] = 100
+        self.estado_var.set(
+            f"Campaña #{id_campana}: {estadisticas['enviados']} enviados de {estadisticas['total']} "
+            f"en {estadisticas['segundos']:.0f} s ({estadisticas['por_minuto_real']:.0f} mensajes/min)"
+        )
+        messagebox.showinfo(
+            "Campaña Terminada",
+            f"Enviados: {estadisticas['enviados']}\n"
+            f"Fallidos: {estadisticas['fallidos']} ({en_bandeja} se reintentarán desde la bandeja de salida)\n"
+            f"Clientes sin email: {estadisticas['sin_email']}\n"
+            f"Cancelados: {estadisticas['cancelados']}",
+            parent=self.dialog
+        )
+
+    def _cancelada(self):
+        """La campaña se canceló antes de empezar a enviar: no hay nada que guardar"""
+        self.tarea = None
+        if self.cerrar_al_terminar:
+            self.tareas.cerrar()
+            self.dialog.destroy()
+
+    def _error(self, error):
+        self.tarea = None
+        if self.cerrar_al_terminar:
+            self.tareas.cerrar()
+            self.dialog.destroy()
+            return
+        self.boton_enviar.config(state=tk.NORMAL)
+        messagebox.showerror("Error", f"Error enviando la campaña:\n{error}", parent=self.dialog)
+
+    def cerrar(self):
+        """
+        Cierra la ventana
+
+        Una campaña en curso se cancela: los emails que todavía no salieron
+        se descartan y la ventana se oculta hasta que terminan los que se
+        están enviando, para registrar lo ya enviado antes de destruirla.
+        """
+        if not self.tarea:
+            self.tareas.cerrar()
+            self.dialog.destroy()
+            return
+
+        if not messagebox.askyesno(
+            "Campaña en Curso",
+            "La campaña todavía se está enviando. ¿Detenerla y cerrar?\n\n"
+            "Los emails ya enviados quedarán registrados.",
+            parent=self.dialog
+        ):
+            return
+        self.cerrar_al_terminar = True
+        self.tarea.cancelar()
+        self.dialog.withdraw()
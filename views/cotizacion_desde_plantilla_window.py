@@ -0,0 +1,253 @@
+"""
+cotizacion_desde_plantilla_window.py - Cotizaciones desde Plantilla
+
+Permite elegir una plantilla guardada y crear una cotización idéntica para
+uno o varios clientes en una sola operación.
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.plantillas_manager import PlantillasManager
+
+
+class CotizacionDesdePlantillaWindow:
+    """Ventana para crear cotizaciones a partir de una plantilla"""
+
+    def __init__(self, parent):
+        """
+        Inicializa la ventana
+
+        Args:
+            parent: MainWindow (se usa su db y su root)
+        """
+        self.parent = parent
+        self.db = parent.db
+        self.manager = PlantillasManager(self.db)
+
+        self.dialog = tk.Toplevel(parent.root)
+        self.dialog.title("Cotizaciones desde Plantilla")
+        self.dialog.geometry("600x560")
+        self.dialog.resizable(True, True)
+        self.dialog.transient(parent.root)
+        self.dialog.grab_set()
+
+        self.plantillas = []
+        self.clientes = []
+
+        # Centrar ventana
+        self.centrar_ventana()
+
+        # Crear interfaz
+        self.crear_interfaz()
+        self.cargar_datos()
+
+    def centrar_ventana(self):
+        """Centra la ventana en la pantalla"""
+        self.dialog.update_idletasks()
+        width = 600
+        height = 560
+        x = (self.dialog.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.dialog.winfo_screenheight() // 2) - (height // 2)
+        self.dialog.geometry(f'{width}x{height}+{x}+{y}')
+
+    def crear_interfaz(self):
+        """Crea la interfaz de la ventana"""
+        # Header
+        header = tk.Frame(self.dialog, bg='#1e293b', height=60)
+        header.pack(fill=tk.X)
+        header.pack_propagate(False)
+
+        tk.Label(
+            header,
+            text="Crear Cotizaciones desde Plantilla",
+            font=("Arial", 14, "bold"),
+            bg='#1e293b',
+            fg='white'
+        ).pack(pady=15)
+
+        # Contenedor principal
+        main_frame = tk.Frame(self.dialog, bg='white')
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=30, pady=20)
+
+        # Plantilla
+        tk.Label(
+            main_frame,
+            text="Plantilla: *",
+            font=("Arial", 10),
+            bg='white'
+        ).pack(anchor='w')
+
+        plantilla_frame = tk.Frame(main_frame, bg='white')
+        plantilla_frame.pack(fill=tk.X, pady=(5, 15))
+
+        self.plantilla_var = tk.StringVar()
+        self.combo_plantillas = ttk.Combobox(
+            plantilla_frame,
+            textvariable=self.plantilla_var,
+            font=("Arial", 10),
+            state='readonly'
+        )
+        self.combo_plantillas.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        tk.Button(
+            plantilla_frame,
+            text="🗑️",
+            font=("Arial", 10),
+            bg='#ef4444',
+            fg='white',
+            cursor='hand2',
+            relief=tk.FLAT,
+            padx=8,
+            command=self.eliminar_plantilla
+        ).pack(side=tk.LEFT, padx=(10, 0))
+
+        # Clientes
+        tk.Label(
+            main_frame,
+            text="Clientes: * (Ctrl/Shift para seleccionar varios)",
+            font=("Arial", 10),
+            bg='white'
+        ).pack(anchor='w')
+
+        lista_frame = tk.Frame(main_frame, bg='white')
+        lista_frame.pack(fill=tk.BOTH, expand=True, pady=(5, 10))
+
+        scrollbar = ttk.Scrollbar(lista_frame, orient=tk.VERTICAL)
+        self.lista_clientes = tk.Listbox(
+            lista_frame,
+            selectmode=tk.EXTENDED,
+            font=("Arial", 10),
+            yscrollcommand=scrollbar.set,
+            relief=tk.SOLID,
+            bd=1
+        )
+        scrollbar.config(command=self.lista_clientes.yview)
+        self.lista_clientes.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.lista_clientes.bind('<<ListboxSelect>>', self.actualizar_contador)
+
+        self.contador_label = tk.Label(
+            main_frame,
+            text="0 clientes seleccionados",
+            font=("Arial", 9),
+            bg='white',
+            fg='#6b7280'
+        )
+        self.contador_label.pack(anchor='w')
+
+        # Botones
+        btn_frame = tk.Frame(self.dialog, bg='white')
+        btn_frame.pack(fill=tk.X, padx=30, pady=(0, 20))
+
+        tk.Button(
+            btn_frame,
+            text="✅ Crear Cotizaciones",
+            font=("Arial", 10, "bold"),
+            bg='#10b981',
+            fg='white',
+            cursor='hand2',
+            relief=tk.FLAT,
+            padx=20,
+            pady=8,
+            command=self.crear_cotizaciones
+        ).pack(side=tk.LEFT, padx=(0, 10))
+
+        tk.Button(
+            btn_frame,
+            text="❌ Cancelar",
+            font=("Arial", 10),
+            bg='#6b7280',
+            fg='white',
+            cursor='hand2',
+            relief=tk.FLAT,
+            padx=20,
+            pady=8,
+            command=self.dialog.destroy
+        ).pack(side=tk.LEFT)
+
+    def cargar_datos(self):
+        """Carga plantillas y clientes activos"""
+        self.plantillas = self.manager.listar_plantillas()
+        self.combo_plantillas['values'] = [
+            f"{nombre} ({tipo or 'Sin tipo'}, {lineas} líneas, ${total or 0:,.2f})"
+            for _, nombre, tipo, total, lineas in self.plantillas
+        ]
+        if self.plantillas:
+            self.combo_plantillas.current(0)
+
+        self.db.cursor.execute('''
+            SELECT id_cliente, nombre_empresa
+            FROM clientes
+            WHERE activo = 1
+            ORDER BY nombre_empresa
+        ''')
+        self.clientes = self.db.cursor.fetchall()
+
+        self.lista_clientes.delete(0, tk.END)
+        for _, nombre in self.clientes:
+            self.lista_clientes.insert(tk.END, nombre)
+
+    def actualizar_contador(self, event=None):
+        """Muestra cuántos clientes hay seleccionados"""
+        cantidad = len(self.lista_clientes.curselection())
+        self.contador_label.config(text=f"{cantidad} clientes seleccionados")
+
+    def eliminar_plantilla(self):
+        """Elimina la plantilla seleccionada"""
+        indice = self.combo_plantillas.current()
+        if indice < 0:
+            return
+
+        id_plantilla, nombre = self.plantillas[indice][:2]
+        if not messagebox.askyesno(
+            "Confirmar Eliminación",
+            f"¿Eliminar la plantilla '{nombre}'?",
+            parent=self.dialog
+        ):
+            return
+
+        exito, mensaje = self.manager.eliminar_plantilla(id_plantilla)
+        if not exito:
+            messagebox.showerror("Error", mensaje, parent=self.dialog)
+            return
+
+        self.plantilla_var.set('')
+        self.cargar_datos()
+
+    def crear_cotizaciones(self):
+        """Crea una cotización por cliente seleccionado"""
+        indice = self.combo_plantillas.current()
+        if indice < 0:
+            messagebox.showerror("Error", "Seleccione una plantilla", parent=self.dialog)
+            return
+
+        seleccion = self.lista_clientes.curselection()
+        if not seleccion:
+            messagebox.showerror("Error", "Seleccione al menos un cliente", parent=self.dialog)
+            return
+
+        id_plantilla = self.plantillas[indice][0]
+        ids_clientes = [self.clientes[i][0] for i in seleccion]
+
+        exito, resultado = self.manager.crear_desde_plantilla(id_plantilla, ids_clientes)
+        if not exito:
+            messagebox.showerror("Error", resultado, parent=self.dialog)
+            return
+
+        messagebox.showinfo(
+            "Éxito",
+            f"Se crearon {len(resultado)} cotizaciones desde la plantilla",
+            parent=self.dialog
+        )
+
+        if hasattr(self.parent, 'cargar_cotizaciones'):
+            self.parent.cargar_cotizaciones()
+        if hasattr(self.parent, 'actualizar_dashboard'):
+            self.parent.actualizar_dashboard()
+
+        self.dialog.destroy()
@@ -15,6 +15,11 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models.database import DatabaseManager
+from models.cotizaciones import cargar_lineas
+from models.tipo_cambio import obtener_historial
+from models.registros import CotizacionResumen, ClienteContacto
+from models.envios_email import resumen_cotizacion, resumen_cliente
+from utils.tareas import EjecutorTareas, PENDIENTE
 
 
 class DetalleCotizacionWindow:
@@ -45,6 +50,15 @@ class DetalleCotizacionWindow:
         self.db = DatabaseManager()
         self.db.conectar()
 
+        # Tareas en segundo plano (PDF y email)
+        self.tareas = EjecutorTareas(self.window, al_cambiar=self.actualizar_panel_tareas)
+        self.filas_tareas = {}
+        self.window.protocol("WM_DELETE_WINDOW", self.cerrar)
+
+        # PDF en curso y callbacks que esperan su resultado (ver _lanzar_pdf)
+        self.tarea_pdf = None
+        self.esperando_pdf = []
+
         # Cargar datos de la cotización
         self.cargar_cotizacion()
 
@@ -64,14 +78,9 @@ class DetalleCotizacionWindow:
         """Carga todos los datos de la cotización desde la base de datos"""
         try:
             # Datos principales de la cotización
-            query = """
-                SELECT c.*, cl.nombre_empresa, cl.contacto_nombre
-                FROM cotizaciones c
-                LEFT JOIN clientes cl ON c.id_cliente = cl.id_cliente
-                WHERE c.numero_cotizacion = ?
-            """
-            result = self.db.ejecutar_query(query, (self.numero_cotizacion,))
-            self.cotizacion = result.fetchone()
+            self.cotizacion = CotizacionResumen.consultar(
+                self.db, "c.numero_cotizacion = ?", (self.numero_cotizacion,)
+            ).fetchone()
 
             if not self.cotizacion:
                 messagebox.showerror("Error", "No se encontró la cotización")
@@ -79,119 +88,25 @@ class DetalleCotizacionWindow:
                 return
 
             # Obtener ID de la cotización
-            self.id_cotizacion = self.cotizacion[0]
-
-            # Cargar equipos
-            self.equipos = self.cargar_detalle_equipos()
-
-            # Cargar ductos
-            self.ductos = self.cargar_detalle_ductos()
-
-            # Cargar difusores
-            self.difusores = self.cargar_detalle_difusores()
+            self.id_cotizacion = self.cotizacion.id_cotizacion
 
-            # Cargar rejillas
-            self.rejillas = self.cargar_detalle_rejillas()
+            # Cargar todo el detalle en una sola consulta
+            detalle = cargar_lineas(self.db.cursor, self.id_cotizacion)
 
-            # Cargar tuberías
-            self.tuberias = self.cargar_detalle_tuberias()
-
-            # Cargar mano de obra
-            self.mano_obra = self.cargar_detalle_mano_obra()
-
-            # Cargar materiales
-            self.materiales = self.cargar_detalle_materiales()
-
-            # Cargar gastos
-            self.gastos = self.cargar_detalle_gastos()
+            self.equipos = detalle['equipo']
+            self.ductos = detalle['ducto']
+            self.difusores = detalle['difusor']
+            self.rejillas = detalle['rejilla']
+            self.tuberias = detalle['tuberia']
+            self.mano_obra = detalle['mano_obra']
+            self.materiales = detalle['material']
+            self.gastos = detalle['gasto']
 
         except Exception as e:
             print(f"Error al cargar cotización: {e}")
             messagebox.showerror("Error", f"Error al cargar la cotización:\n{e}")
             self.window.destroy()
 
-    def cargar_detalle_equipos(self):
-        """Carga equipos de la cotización"""
-        query = """
-            SELECT pe.tipo_equipo, dc.cantidad, dc.horas_por_equipo, dc.subtotal
-            FROM detalle_cotizacion dc
-            LEFT JOIN productos_equipos pe ON dc.id_equipo = pe.id_equipo
-            WHERE dc.id_cotizacion = ?
-        """
-        result = self.db.ejecutar_query(query, (self.id_cotizacion,))
-        return result.fetchall()
-
-    def cargar_detalle_ductos(self):
-        """Carga ductos de la cotización"""
-        query = """
-            SELECT tipo_ducto, largo_suministro, largo_retorno, precio_unitario, subtotal
-            FROM cotizacion_ductos
-            WHERE id_cotizacion = ?
-        """
-        result = self.db.ejecutar_query(query, (self.id_cotizacion,))
-        return result.fetchall()
-
-    def cargar_detalle_difusores(self):
-        """Carga difusores de la cotización"""
-        query = """
-            SELECT tipo_difusor, cantidad, precio_unitario, subtotal
-            FROM cotizacion_difusores
-            WHERE id_cotizacion = ?
-        """
-        result = self.db.ejecutar_query(query, (self.id_cotizacion,))
-        return result.fetchall()
-
-    def cargar_detalle_rejillas(self):
-        """Carga rejillas de la cotización"""
-        query = """
-            SELECT tipo_rejilla, cantidad, precio_unitario, subtotal
-            FROM cotizacion_rejillas
-            WHERE id_cotizacion = ?
-        """
-        result = self.db.ejecutar_query(query, (self.id_cotizacion,))
-        return result.fetchall()
-
-    def cargar_detalle_tuberias(self):
-        """Carga tuberías de la cotización"""
-        query = """
-            SELECT tipo_tuberia, largo, precio_unitario, subtotal
-            FROM cotizacion_tuberias
-            WHERE id_cotizacion = ?
-        """
-        result = self.db.ejecutar_query(query, (self.id_cotizacion,))
-        return result.fetchall()
-
-    def cargar_detalle_mano_obra(self):
-        """Carga mano de obra de la cotización"""
-        query = """
-            SELECT descripcion, cantidad, precio_unitario, subtotal
-            FROM cotizacion_mano_obra
-            WHERE id_cotizacion = ?
-        """
-        result = self.db.ejecutar_query(query, (self.id_cotizacion,))
-        return result.fetchall()
-
-    def cargar_detalle_materiales(self):
-        """Carga materiales de la cotización"""
-        query = """
-            SELECT mr.nombre_material, cm.cantidad, cm.precio_unitario, cm.subtotal
-            FROM cotizacion_materiales cm
-            LEFT JOIN materiales_repuestos mr ON cm.id_material = mr.id_material
-            WHERE cm.id_cotizacion = ?
-        """
-        result = self.db.ejecutar_query(query, (self.id_cotizacion,))
-        return result.fetchall()
-
-    def cargar_detalle_gastos(self):
-        """Carga gastos adicionales de la cotización"""
-        query = """
-            SELECT concepto, monto
-            FROM gastos_adicionales
-            WHERE id_cotizacion = ?
-        """
-        result = self.db.ejecutar_query(query, (self.id_cotizacion,))
-        return result.fetchall()
-
     def crear_interfaz(self):
         """Crea la interfaz de la ventana"""
         # Header
@@ -208,7 +123,7 @@ class DetalleCotizacionWindow:
         ).pack(side=tk.LEFT, padx=20, pady=15)
 
         # Estado con color
-        estado = self.cotizacion[16]  # estado está en la columna 16
+        estado = self.cotizacion.estado
         color_estado = {
             'pendiente': '#f59e0b',
             'aprobada': '#10b981',
@@ -226,9 +141,13 @@ class DetalleCotizacionWindow:
             pady=5
         ).pack(side=tk.RIGHT, padx=20, pady=15)
 
+        # Panel de tareas en segundo plano (visible solo con tareas activas)
+        self.panel_tareas = tk.Frame(self.window, bg='#f1f5f9', padx=20, pady=8)
+
         # Contenido con scroll
         main_frame = tk.Frame(self.window, bg='white')
         main_frame.pack(fill=tk.BOTH, expand=True)
+        self.frame_contenido = main_frame
 
         # Canvas y scrollbar
         canvas = tk.Canvas(main_frame, bg='white')
@@ -297,12 +216,14 @@ class DetalleCotizacionWindow:
         frame.pack(fill=tk.X, pady=(0, 20))
 
         info = [
-            ("Cliente:", self.cotizacion[26]),  # nombre_empresa
-            ("Contacto:", self.cotizacion[27] or "N/A"),  # contacto_nombre
-            ("Fecha:", self.cotizacion[3]),  # fecha_emision
-            ("Tipo de Servicio:", self.cotizacion[5]),  # tipo_servicio
-            ("Visitas Anuales:", str(self.cotizacion[6])),  # visitas_anuales
-            ("Factor de Venta:", f"{self.cotizacion[7]:.2f}"),  # factor_venta
+            ("Cliente:", self.cotizacion.cliente),
+            ("Contacto:", self.cotizacion.contacto or "N/A"),
+            ("Fecha:", self.cotizacion.fecha_emision),
+            ("Tipo de Servicio:", self.cotizacion.tipo_servicio),
+            ("Visitas Anuales:", str(self.cotizacion.visitas_anuales)),
+            ("Factor de Venta:", f"{self.cotizacion.factor_venta or 0:.2f}"),
+            ("Enviada por Email:", self.texto_envios()),
+            ("Emails al Cliente:", self.texto_envios_cliente()),
         ]
 
         for i, (label, valor) in enumerate(info):
@@ -324,6 +245,21 @@ class DetalleCotizacionWindow:
                 bg='white'
             ).grid(row=row, column=col+1, sticky=tk.W, padx=(0, 40), pady=5)
 
+    def texto_envios(self):
+        """Resumen de los envíos de esta cotización (búsqueda por clave)"""
+        resumen = resumen_cotizacion(self.db, self.numero_cotizacion)
+        if not resumen['envios']:
+            return "Nunca"
+        veces = "1 vez" if resumen['envios'] == 1 else f"{resumen['envios']} veces"
+        return f"{veces}, la última el {resumen['ultimo_envio'][:16]} a {resumen['ultimo_destino']}"
+
+    def texto_envios_cliente(self):
+        """Resumen de los envíos a todas las cotizaciones del cliente"""
+        resumen = resumen_cliente(self.db, self.cotizacion.id_cliente)
+        if not resumen['envios']:
+            return "Ninguno"
+        return f"{resumen['envios']} en total, el último el {resumen['ultimo_envio'][:16]}"
+
     def crear_seccion_equipos(self, parent):
         """Muestra equipos de la cotización"""
         self.crear_tabla_seccion(
@@ -444,11 +380,11 @@ class DetalleCotizacionWindow:
         )
         frame.pack(fill=tk.X, pady=(0, 20))
 
-        # Índices de las columnas en la consulta
-        subtotal = self.cotizacion[10]  # subtotal
-        ins_ccss = self.cotizacion[19]  # ins_ccss
-        total_iva = self.cotizacion[14]  # total_iva
-        total = self.cotizacion[15]  # total
+        subtotal = self.cotizacion.subtotal or 0
+        ins_ccss = self.cotizacion.ins_ccss
+        total_iva = self.cotizacion.total_iva or 0
+        total = self.cotizacion.total or 0
+        iva_porcentaje = self.cotizacion.iva_porcentaje or 13.0
 
         totales = [
             ("Subtotal:", subtotal),
@@ -458,7 +394,7 @@ class DetalleCotizacionWindow:
             totales.append(("INS y CCSS:", ins_ccss))
 
         totales.extend([
-            ("IVA (13%):", total_iva),
+            (f"IVA ({iva_porcentaje:g}%):", total_iva),
             ("TOTAL FINAL:", total)
         ])
 
@@ -481,6 +417,29 @@ class DetalleCotizacionWindow:
                 fg='#2563eb' if "TOTAL FINAL" in label else 'black'
             ).pack(side=tk.RIGHT)
 
+        # Total en colones al tipo de cambio vigente en la fecha de emisión
+        fecha = self.cotizacion.fecha_emision
+        tipo_cambio = obtener_historial(self.db).valor_en(fecha)
+
+        row_frame = tk.Frame(frame, bg='white')
+        row_frame.pack(fill=tk.X, pady=(8, 3))
+
+        tk.Label(
+            row_frame,
+            text=f"Total en colones (T.C. ₡{tipo_cambio:,.2f} al {fecha}):",
+            font=("Arial", 10),
+            bg='white',
+            fg='#6b7280'
+        ).pack(side=tk.LEFT)
+
+        tk.Label(
+            row_frame,
+            text=f"₡{(total or 0) * tipo_cambio:,.2f}",
+            font=("Arial", 11),
+            bg='white',
+            fg='#6b7280'
+        ).pack(side=tk.RIGHT)
+
     def crear_botones_accion(self, parent):
         """Crea botones de acción"""
         frame = tk.Frame(parent, bg='white')
@@ -499,8 +458,8 @@ class DetalleCotizacionWindow:
             command=self.cambiar_estado
         ).pack(side=tk.LEFT, padx=(0, 10))
 
-        # Botón Generar PDF
-        tk.Button(
+        # Botón Generar PDF (deshabilitado mientras se dibuja el PDF)
+        self.btn_pdf = tk.Button(
             frame,
             text="📄 Generar PDF",
             bg='#10b981',
@@ -510,7 +469,8 @@ class DetalleCotizacionWindow:
             padx=30,
             pady=10,
             command=self.generar_pdf
-        ).pack(side=tk.LEFT, padx=(0, 10))
+        )
+        self.btn_pdf.pack(side=tk.LEFT, padx=(0, 10))
 
         # Botón Enviar por Email
         tk.Button(
@@ -560,7 +520,7 @@ class DetalleCotizacionWindow:
         ).pack(pady=20)
 
         # Variable para el estado
-        nuevo_estado = tk.StringVar(value=self.cotizacion[16])  # estado
+        nuevo_estado = tk.StringVar(value=self.cotizacion.estado)
 
         # Opciones de estado
         estados = [
@@ -628,31 +588,26 @@ class DetalleCotizacionWindow:
         ).pack(side=tk.LEFT, padx=5)
 
     def generar_pdf(self):
-        """Genera el PDF de la cotización"""
+        """Genera el PDF de la cotización en segundo plano"""
         try:
-            from utils.pdf_generator import generar_pdf_cotizacion
-            import os
-            import subprocess
-
-            # Generar PDF
-            pdf_path = generar_pdf_cotizacion(self.numero_cotizacion, self.db)
-
-            if pdf_path:
-                messagebox.showinfo(
-                    "Éxito",
-                    f"PDF generado correctamente:\n{pdf_path}\n\n¿Deseas abrir el archivo?"
-                )
+            from utils.pdf_generator import obtener_datos_cotizaciones
 
-                # Abrir el PDF
-                if messagebox.askyesno("Abrir PDF", "¿Abrir el archivo PDF ahora?"):
-                    # Abrir con el visualizador predeterminado
-                    os.startfile(pdf_path)
+            # Los datos se leen aquí: la conexión no se puede usar desde otro hilo
+            data = obtener_datos_cotizaciones(self.db, [self.numero_cotizacion]).get(
+                self.numero_cotizacion
+            )
+            if not data:
+                messagebox.showerror("Error", "No se encontró la cotización")
+                return
 
-            else:
-                messagebox.showerror(
-                    "Error",
-                    "No se pudo generar el PDF. Revisa la consola para más detalles."
+            self._lanzar_pdf(
+                f"PDF {self.numero_cotizacion}",
+                data,
+                al_completar=self._pdf_generado,
+                al_error=lambda e: messagebox.showerror(
+                    "Error", f"Error al generar PDF:\n{e}", parent=self.window
                 )
+            )
 
         except Exception as e:
             print(f"Error al generar PDF: {e}")
@@ -663,11 +618,75 @@ class DetalleCotizacionWindow:
                 f"Error al generar PDF:\n{e}"
             )
 
+    def _lanzar_pdf(self, descripcion, data, al_completar, al_error):
+        """
+        Dibuja el PDF de la cotización en segundo plano, uno a la vez
+
+        Todas las tareas escriben el mismo archivo (ruta_pdf_cotizacion()),
+        así que si ya hay una en curso los callbacks esperan su resultado en
+        lugar de lanzar otra.
+        """
+        self.esperando_pdf.append((al_completar, al_error))
+        if self.tarea_pdf is not None:
+            return
+
+        self.btn_pdf.config(state=tk.DISABLED)
+        self.tarea_pdf = self.tareas.lanzar(
+            descripcion,
+            self._tarea_pdf,
+            data,
+            al_completar=lambda pdf_path: self._pdf_terminado(pdf_path=pdf_path),
+            al_error=lambda e: self._pdf_terminado(error=e),
+            al_cancelar=self._pdf_terminado
+        )
+
+    def _pdf_terminado(self, pdf_path=None, error=None):
+        """Entrega el resultado del PDF a todos los que lo esperaban"""
+        self.tarea_pdf = None
+        esperando, self.esperando_pdf = self.esperando_pdf, []
+        if self.window.winfo_exists():
+            self.btn_pdf.config(state=tk.NORMAL)
+
+        for al_completar, al_error in esperando:
+            if pdf_path:
+                al_completar(pdf_path)
+            elif error is not None:
+                al_error(error)
+
+    @staticmethod
+    def _tarea_pdf(tarea, data):
+        """Dibuja el PDF (se ejecuta en un hilo aparte)"""
+        from utils.pdf_generator import renderizar_pdf_cotizacion
+
+        def progreso(hechos, total, etapa):
+            if etapa == 'secciones':
+                tarea.reportar(10 + hechos * 80 // total, f"Dibujando sección {hechos + 1}")
+            elif etapa == 'armado':
+                tarea.reportar(10 + hechos * 80 // total, "Armando el documento")
+            else:
+                tarea.reportar(95, "Guardando en el caché")
+
+        tarea.reportar(10, "Dibujando PDF")
+        pdf_path = renderizar_pdf_cotizacion(data, progreso=progreso)
+        if not pdf_path:
+            raise RuntimeError("No se pudo generar el PDF. Revisa la consola para más detalles.")
+        return pdf_path
+
+    def _pdf_generado(self, pdf_path):
+        """Ofrece abrir el PDF recién generado"""
+        if messagebox.askyesno(
+            "PDF Generado",
+            f"PDF generado correctamente:\n{pdf_path}\n\n¿Abrir el archivo PDF ahora?",
+            parent=self.window
+        ):
+            # Abrir con el visualizador predeterminado
+            os.startfile(pdf_path)
+
     def enviar_por_email(self):
         """Abre diálogo para enviar cotización por email"""
         try:
-            from utils.email_manager import EmailManager
-            from utils.pdf_generator import generar_pdf_cotizacion
+            from utils.bandeja_salida import BandejaSalida
+            from utils.pdf_generator import obtener_datos_cotizaciones
 
             # Crear diálogo
             dialog = tk.Toplevel(self.window)
@@ -709,9 +728,10 @@ class DetalleCotizacionWindow:
             ).pack(anchor=tk.W, pady=(10, 5))
 
             email_var = tk.StringVar()
-            # Pre-cargar email si existe
-            if hasattr(self, 'datos_cotizacion') and self.datos_cotizacion[5]:
-                email_var.set(self.datos_cotizacion[5])
+            # Pre-cargar email del cliente si existe
+            cliente = ClienteContacto.obtener(self.db, self.cotizacion.id_cliente)
+            if cliente and cliente.email:
+                email_var.set(cliente.email)
 
             tk.Entry(
                 content,
@@ -765,31 +785,41 @@ class DetalleCotizacionWindow:
 
                 mensaje_personalizado = mensaje_text.get("1.0", tk.END).strip()
 
-                # Generar PDF primero
                 dialog.destroy()
-                pdf_path = generar_pdf_cotizacion(self.numero_cotizacion, self.db)
 
-                if not pdf_path:
-                    messagebox.showerror("Error", "No se pudo generar el PDF")
+                # Datos y configuración se leen aquí; el PDF y el envío van en segundo plano
+                data = obtener_datos_cotizaciones(self.db, [self.numero_cotizacion]).get(
+                    self.numero_cotizacion
+                )
+                if not data:
+                    messagebox.showerror("Error", "No se encontró la cotización")
                     return
 
-                # Enviar email
-                email_manager = EmailManager(self.db)
-                nombre_cliente = self.datos_cotizacion[1] if hasattr(self, 'datos_cotizacion') else "Cliente"
-
-                exito, mensaje = email_manager.enviar_cotizacion(
-                    email_destino,
-                    nombre_cliente,
-                    self.numero_cotizacion,
-                    pdf_path,
-                    mensaje_personalizado
+                nombre_cliente = self.cotizacion.cliente or "Cliente"
+
+                # El PDF se dibuja en segundo plano; el email va a la bandeja de
+                # salida y el repartidor lo envía (con reintentos si la red falla)
+                def al_completar(pdf_path):
+                    BandejaSalida(self.db).encolar(
+                        email_destino, nombre_cliente, self.numero_cotizacion,
+                        pdf_path, mensaje_personalizado
+                    )
+                    messagebox.showinfo(
+                        "Email en Cola",
+                        f"El email a {email_destino} quedó en la bandeja de salida "
+                        "y se enviará en segundo plano.",
+                        parent=self.window
+                    )
+
+                self._lanzar_pdf(
+                    f"Email a {email_destino}",
+                    data,
+                    al_completar=al_completar,
+                    al_error=lambda e: messagebox.showerror(
+                        "Error", f"Error preparando el email:\n{e}", parent=self.window
+                    )
                 )
 
-                if exito:
-                    messagebox.showinfo("Éxito", mensaje)
-                else:
-                    messagebox.showerror("Error", mensaje)
-
             tk.Button(
                 btn_frame,
                 text="📧 Enviar Email",
@@ -818,7 +848,60 @@ class DetalleCotizacionWindow:
             traceback.print_exc()
             messagebox.showerror("Error", f"Error al abrir diálogo de email:\n{e}")
 
+    # ===== TAREAS EN SEGUNDO PLANO =====
+
+    def actualizar_panel_tareas(self, tarea):
+        """Muestra, actualiza o quita la fila de una tarea en el panel"""
+        if not self.window.winfo_exists():
+            return
+
+        fila = self.filas_tareas.get(tarea.id)
+
+        if tarea.terminada:
+            if fila:
+                fila['frame'].destroy()
+                del self.filas_tareas[tarea.id]
+            if not self.filas_tareas:
+                self.panel_tareas.pack_forget()
+            return
+
+        if fila is None:
+            frame = tk.Frame(self.panel_tareas, bg='#f1f5f9')
+            frame.pack(fill=tk.X, pady=2)
+
+            etiqueta = tk.Label(frame, font=("Arial", 9), bg='#f1f5f9', anchor='w', width=45)
+            etiqueta.pack(side=tk.LEFT)
+
+            barra = ttk.Progressbar(frame, mode='determinate', maximum=100, length=250)
+            barra.pack(side=tk.LEFT, padx=10)
+
+            tk.Button(
+                frame,
+                text="Cancelar",
+                font=("Arial", 9),
+                bg='#ef4444',
+                fg='white',
+                relief=tk.FLAT,
+                padx=10,
+                command=tarea.cancelar
+            ).pack(side=tk.LEFT)
+
+            fila = {'frame': frame, 'etiqueta': etiqueta, 'barra': barra}
+            self.filas_tareas[tarea.id] = fila
+
+            if not self.panel_tareas.winfo_ismapped():
+                self.panel_tareas.pack(side=tk.BOTTOM, fill=tk.X, before=self.frame_contenido)
+
+        texto = tarea.descripcion
+        if tarea.mensaje:
+            texto += f" - {tarea.mensaje}"
+        elif tarea.estado == PENDIENTE:
+            texto += " - En espera"
+        fila['etiqueta'].config(text=texto)
+        fila['barra']['value'] = tarea.progreso
+
     def cerrar(self):
         """Cierra la ventana"""
+        self.tareas.cerrar()
         self.db.desconectar()
         self.window.destroy()
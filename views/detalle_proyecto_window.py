@@ -36,6 +36,10 @@ class DetalleProyectoWindow:
         self.dialog.transient(parent)
         self.dialog.grab_set()
 
+        # Tareas en segundo plano (PDF del presupuesto), se crean al usarlas
+        self.tareas = None
+        self.dialog.protocol("WM_DELETE_WINDOW", self.cerrar)
+
         # Centrar ventana
         self.centrar_ventana()
 
@@ -162,7 +166,21 @@ class DetalleProyectoWindow:
             padx=15,
             pady=5,
             command=self.exportar_excel
-        ).pack(side=tk.LEFT)
+        ).pack(side=tk.LEFT, padx=(0, 5))
+
+        self.btn_pdf = tk.Button(
+            btn_frame,
+            text="📄 Presupuesto PDF",
+            font=("Arial", 10),
+            bg='#dc2626',
+            fg='white',
+            cursor='hand2',
+            relief=tk.FLAT,
+            padx=15,
+            pady=5,
+            command=self.generar_pdf
+        )
+        self.btn_pdf.pack(side=tk.LEFT)
 
         # Total del proyecto
         total_frame = tk.Frame(btn_frame, bg='#10b981', relief=tk.RAISED, bd=2)
@@ -692,6 +710,84 @@ class DetalleProyectoWindow:
         except Exception as e:
             messagebox.showerror("Error", f"Error al exportar:\n{e}")
 
+    def generar_pdf(self):
+        """
+        Genera el presupuesto del proyecto en PDF en segundo plano
+
+        El PDF lee los items con un cursor mientras se dibuja, así que la
+        tarea abre su propia conexión: la de la ventana no se puede usar
+        desde otro hilo.
+        """
+        try:
+            from utils.tareas import EjecutorTareas
+
+            if self.tareas is None:
+                self.tareas = EjecutorTareas(self.dialog, max_hilos=1)
+
+            self.btn_pdf.config(state=tk.DISABLED, text="📄 Generando PDF...")
+            self.tareas.lanzar(
+                f"PDF proyecto {self.id_proyecto}",
+                self._tarea_pdf,
+                self.db.db_path,
+                self.id_proyecto,
+                al_completar=self._pdf_generado,
+                al_error=self._pdf_fallido,
+                al_cancelar=self._pdf_terminado
+            )
+        except Exception as e:
+            self._pdf_terminado()
+            messagebox.showerror("Error", f"Error al generar PDF:\n{e}")
+
+    @staticmethod
+    def _tarea_pdf(tarea, db_path, id_proyecto):
+        """Dibuja el PDF (se ejecuta en un hilo aparte)"""
+        from models.database import DatabaseManager
+        from utils.pdf_proyecto import generar_pdf_proyecto
+
+        db = DatabaseManager(db_path)
+        if not db.conectar():
+            raise RuntimeError("No se pudo conectar a la base de datos")
+        def progreso(hechos, total, etapa):
+            if etapa == 'armado':
+                tarea.reportar(10, "Dibujando PDF")
+            else:
+                tarea.reportar(10 + hechos * 85 // max(total, 1), f"Dibujando {hechos:,}/{total:,} items")
+
+        try:
+            ruta = generar_pdf_proyecto(id_proyecto, db, progreso=progreso)
+        finally:
+            db.desconectar()
+
+        if not ruta:
+            raise RuntimeError("No se pudo generar el PDF del proyecto")
+        return ruta
+
+    def _pdf_terminado(self):
+        """Vuelve a habilitar el botón del PDF"""
+        if self.dialog.winfo_exists():
+            self.btn_pdf.config(state=tk.NORMAL, text="📄 Presupuesto PDF")
+
+    def _pdf_generado(self, ruta):
+        """Ofrece abrir el presupuesto recién generado"""
+        self._pdf_terminado()
+        if messagebox.askyesno(
+            "PDF Generado",
+            f"Presupuesto generado en:\n{ruta}\n\n¿Abrir el archivo?",
+            parent=self.dialog
+        ):
+            os.startfile(ruta)
+
+    def _pdf_fallido(self, error):
+        """Informa el error del PDF"""
+        self._pdf_terminado()
+        messagebox.showerror("Error", f"Error al generar PDF:\n{error}", parent=self.dialog)
+
+    def cerrar(self):
+        """Cierra la ventana; un PDF a medio dibujar se descarta"""
+        if self.tareas is not None:
+            self.tareas.cerrar()
+        self.dialog.destroy()
+
     # ===== MÉTODOS PARA COTIZACIONES =====
 
     def cargar_cotizaciones_proyecto(self):
@@ -0,0 +1,231 @@
+"""
+importar_proyecto_window.py - Vista previa de la importación desde Excel
+
+Muestra los cambios que haría un Excel sobre el proyecto (items nuevos,
+modificados, que no están en el archivo) y los aplica solo si el usuario
+confirma.
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+# Filas que se muestran en la tabla; el resto solo se cuenta
+MAX_FILAS_VISTA = 2000
+
+NOMBRES_CAMPOS = {
+    'descripcion': 'Descripción',
+    'cantidad': 'Cantidad',
+    'unidad': 'Unidad',
+    'costo_equipo': 'Costo Equipo',
+    'costo_materiales': 'Costo Materiales',
+    'costo_mano_obra': 'Costo Mano Obra',
+}
+
+
+class VistaPreviaImportacionWindow:
+    """Ventana de confirmación de una importación de proyecto"""
+
+    def __init__(self, parent, db, cambios):
+        """
+        Inicializa la ventana
+
+        Args:
+            parent: Ventana padre
+            db: Instancia de DatabaseManager
+            cambios: CambiosImportacion calculado por ExcelManager
+        """
+        self.db = db
+        self.cambios = cambios
+        self.aplicado = False
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Vista Previa de Importación")
+        self.dialog.geometry("900x600")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+
+        # Centrar ventana
+        self.centrar_ventana()
+
+        # Crear interfaz
+        self.crear_interfaz()
+
+    def centrar_ventana(self):
+        """Centra la ventana en la pantalla"""
+        self.dialog.update_idletasks()
+        width = 900
+        height = 600
+        x = (self.dialog.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.dialog.winfo_screenheight() // 2) - (height // 2)
+        self.dialog.geometry(f'{width}x{height}+{x}+{y}')
+
+    def crear_interfaz(self):
+        """Crea la interfaz de la ventana"""
+        # Header
+        header = tk.Frame(self.dialog, bg='#1e293b', height=60)
+        header.pack(fill=tk.X)
+        header.pack_propagate(False)
+
+        tk.Label(
+            header,
+            text="Vista Previa de Importación",
+            font=("Arial", 14, "bold"),
+            bg='#1e293b',
+            fg='white'
+        ).pack(pady=15)
+
+        # Contenedor principal
+        main_container = tk.Frame(self.dialog, bg='white')
+        main_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+
+        # Resumen
+        tk.Label(
+            main_container,
+            text=self.cambios.resumen(),
+            font=("Arial", 10),
+            bg='#f3f4f6',
+            fg='#1e293b',
+            padx=10,
+            pady=10,
+            wraplength=820,
+            justify=tk.LEFT
+        ).pack(fill=tk.X, pady=(0, 15))
+
+        # Tabla de cambios
+        table_frame = tk.Frame(main_container, bg='white')
+        table_frame.pack(fill=tk.BOTH, expand=True)
+
+        scrollbar = ttk.Scrollbar(table_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree_cambios = ttk.Treeview(
+            table_frame,
+            columns=('Cambio', 'Nivel', 'Especificación', 'Detalle'),
+            show='headings',
+            yscrollcommand=scrollbar.set
+        )
+
+        self.tree_cambios.heading('Cambio', text='Cambio')
+        self.tree_cambios.heading('Nivel', text='Nivel')
+        self.tree_cambios.heading('Especificación', text='Especificación')
+        self.tree_cambios.heading('Detalle', text='Detalle')
+
+        self.tree_cambios.column('Cambio', width=110)
+        self.tree_cambios.column('Nivel', width=80)
+        self.tree_cambios.column('Especificación', width=180)
+        self.tree_cambios.column('Detalle', width=480)
+
+        self.tree_cambios.tag_configure('nuevo', foreground='#059669')
+        self.tree_cambios.tag_configure('modificado', foreground='#2563eb')
+        self.tree_cambios.tag_configure('faltante', foreground='#dc2626')
+
+        self.tree_cambios.pack(fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.tree_cambios.yview)
+
+        self.cargar_cambios()
+
+        # Opción de borrar los items que no están en el archivo
+        self.eliminar_var = tk.BooleanVar(value=False)
+        if self.cambios.faltantes:
+            tk.Checkbutton(
+                main_container,
+                text=f"Eliminar los {len(self.cambios.faltantes)} items que no están en el archivo",
+                variable=self.eliminar_var,
+                font=("Arial", 10),
+                bg='white'
+            ).pack(anchor='w', pady=(10, 0))
+
+        # Botones
+        bottom_frame = tk.Frame(main_container, bg='white')
+        bottom_frame.pack(fill=tk.X, pady=(15, 0))
+
+        tk.Button(
+            bottom_frame,
+            text="✔️ Aplicar Cambios",
+            font=("Arial", 10, "bold"),
+            bg='#10b981',
+            fg='white',
+            cursor='hand2',
+            relief=tk.FLAT,
+            padx=20,
+            pady=8,
+            command=self.aplicar
+        ).pack(side=tk.LEFT, padx=(0, 10))
+
+        tk.Button(
+            bottom_frame,
+            text="❌ Cancelar",
+            font=("Arial", 10),
+            bg='#6b7280',
+            fg='white',
+            cursor='hand2',
+            relief=tk.FLAT,
+            padx=20,
+            pady=8,
+            command=self.dialog.destroy
+        ).pack(side=tk.LEFT)
+
+    def cargar_cambios(self):
+        """Llena la tabla con los cambios (hasta MAX_FILAS_VISTA filas)"""
+        filas = 0
+
+        for _, codigo_nivel, especificacion, valores, _ in self.cambios.agregados:
+            if filas >= MAX_FILAS_VISTA:
+                break
+            detalle = f"Cantidad {valores[1]} {valores[2]}"
+            if valores[0]:
+                detalle = f"{valores[0]} - {detalle}"
+            self.tree_cambios.insert('', tk.END, values=(
+                'Nuevo', codigo_nivel, especificacion, detalle
+            ), tags=('nuevo',))
+            filas += 1
+
+        for _, codigo_nivel, especificacion, _, diferencias in self.cambios.actualizados:
+            if filas >= MAX_FILAS_VISTA:
+                break
+            detalle = ";  ".join(
+                f"{NOMBRES_CAMPOS[campo]}: {antes} → {despues}"
+                for campo, (antes, despues) in diferencias.items()
+            )
+            self.tree_cambios.insert('', tk.END, values=(
+                'Modificado', codigo_nivel, especificacion, detalle
+            ), tags=('modificado',))
+            filas += 1
+
+        for _, codigo_nivel, especificacion in self.cambios.faltantes:
+            if filas >= MAX_FILAS_VISTA:
+                break
+            self.tree_cambios.insert('', tk.END, values=(
+                'No está en el archivo', codigo_nivel, especificacion, ''
+            ), tags=('faltante',))
+            filas += 1
+
+        total = (len(self.cambios.agregados) + len(self.cambios.actualizados)
+                 + len(self.cambios.faltantes))
+        if total > filas:
+            self.tree_cambios.insert('', tk.END, values=(
+                '', '', f"... y {total - filas} más", ''
+            ))
+
+    def aplicar(self):
+        """Guarda los cambios y cierra la ventana"""
+        from utils.excel_manager import ExcelManager
+
+        eliminar = self.eliminar_var.get()
+        if eliminar and not messagebox.askyesno(
+            "Confirmar",
+            f"¿Eliminar {len(self.cambios.faltantes)} items del proyecto?",
+            parent=self.dialog
+        ):
+            return
+
+        exito, mensaje = ExcelManager(self.db).aplicar_cambios(
+            self.cambios, eliminar_faltantes=eliminar
+        )
+
+        if exito:
+            self.aplicado = True
+            messagebox.showinfo("Importación Exitosa", mensaje, parent=self.dialog)
+            self.dialog.destroy()
+        else:
+            messagebox.showerror("Error", mensaje, parent=self.dialog)
@@ -51,6 +51,11 @@ class MainWindow:
         self.db = DatabaseManager()
         self.db.conectar()
 
+        # Envío en segundo plano de la bandeja de salida de emails
+        from utils.bandeja_salida import RepartidorCorreo
+        self.repartidor = RepartidorCorreo(self.db.db_path)
+        self.repartidor.iniciar()
+
         # Crear interfaz
         self.crear_menu_superior()
         self.crear_notebook()
@@ -241,6 +246,18 @@ class MainWindow:
             """)
             ingresos_totales = result.fetchone()[0] or 0
 
+            # Ingresos en colones al tipo de cambio de la fecha de cada cotización
+            from models.tipo_cambio import obtener_historial
+            historial_tc = obtener_historial(self.db)
+            result = self.db.ejecutar_query("""
+                SELECT fecha_emision, total
+                FROM cotizaciones
+                WHERE estado = 'aprobada'
+            """)
+            ingresos_colones = sum(
+                historial_tc.convertir(total, fecha) for fecha, total in result.fetchall()
+            )
+
             # Total clientes
             result = self.db.ejecutar_query("SELECT COUNT(*) FROM clientes WHERE activo = 1")
             total_clientes = result.fetchone()[0]
@@ -253,6 +270,7 @@ class MainWindow:
                 ("Borradores", str(borradores), "#6b7280"),
                 ("% Conversión", f"{conversion_rate:.1f}%", "#8b5cf6"),
                 ("Ingresos Totales", f"${ingresos_totales:,.0f}", "#10b981"),
+                ("Ingresos (₡)", f"₡{ingresos_colones:,.0f}", "#059669"),
                 ("Clientes Activos", str(total_clientes), "#2563eb")
             ]
 
@@ -530,6 +548,32 @@ class MainWindow:
             command=self.nueva_cotizacion
         ).pack(side=tk.RIGHT)
 
+        tk.Button(
+            top_frame,
+            text="📋 Desde Plantilla",
+            font=("Arial", 11),
+            bg='#6366f1',
+            fg='white',
+            cursor='hand2',
+            relief=tk.FLAT,
+            padx=20,
+            pady=10,
+            command=self.cotizaciones_desde_plantilla
+        ).pack(side=tk.RIGHT, padx=(0, 10))
+
+        tk.Button(
+            top_frame,
+            text="📧 Campaña Email",
+            font=("Arial", 11),
+            bg='#8b5cf6',
+            fg='white',
+            cursor='hand2',
+            relief=tk.FLAT,
+            padx=20,
+            pady=10,
+            command=self.campana_email
+        ).pack(side=tk.RIGHT, padx=(0, 10))
+
         # Barra de búsqueda y filtros
         search_frame = tk.Frame(tab, bg='white')
         search_frame.pack(fill=tk.X, padx=20, pady=(0, 10))
@@ -705,6 +749,29 @@ class MainWindow:
             command=self.cargar_proyectos
         ).pack(side=tk.LEFT, padx=5)
 
+        tk.Button(
+            buttons_frame,
+            text="📊 Exportar Lista",
+            font=("Arial", 11),
+            bg='#059669',
+            fg='white',
+            cursor='hand2',
+            relief=tk.FLAT,
+            padx=20,
+            pady=8,
+            command=self.exportar_proyectos_excel
+        ).pack(side=tk.LEFT, padx=5)
+
+        # Avance de la exportación de varios proyectos
+        self.estado_exportacion_var = tk.StringVar()
+        tk.Label(
+            top_frame,
+            textvariable=self.estado_exportacion_var,
+            font=("Arial", 10),
+            bg='white',
+            fg='#6b7280'
+        ).pack(side=tk.RIGHT, padx=10)
+
         # Frame de búsqueda
         search_frame = tk.Frame(tab, bg='white')
         search_frame.pack(fill=tk.X, padx=20, pady=(0, 10))
@@ -1307,9 +1374,23 @@ class MainWindow:
         self.crear_campo_config(form4, "Nombre Remitente:", "email_nombre", 5,
             "Nombre que aparecerá como remitente")
 
+        # Reducir PDFs adjuntos
+        from utils.adjuntos_email import reduccion_disponible
+        self.email_reducir_pdf_var = tk.BooleanVar(
+            value=self.db.obtener_configuracion('email_reducir_pdf') == '1'
+        )
+        tk.Checkbutton(
+            form4,
+            text="Reducir PDFs con imágenes antes de enviarlos"
+                 + ("" if reduccion_disponible() else " (requiere pypdf)"),
+            variable=self.email_reducir_pdf_var,
+            font=("Arial", 10),
+            bg='white'
+        ).grid(row=6, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
+
         # Botón probar conexión
         test_btn_frame = tk.Frame(form4, bg='white')
-        test_btn_frame.grid(row=6, column=0, columnspan=2, sticky=tk.W, pady=15)
+        test_btn_frame.grid(row=7, column=0, columnspan=2, sticky=tk.W, pady=15)
 
         tk.Button(
             test_btn_frame,
@@ -1324,6 +1405,32 @@ class MainWindow:
             command=self.probar_conexion_email
         ).pack(side=tk.LEFT)
 
+        tk.Button(
+            test_btn_frame,
+            text="📤 Bandeja de Salida",
+            font=("Arial", 10),
+            bg='#2563eb',
+            fg='white',
+            cursor='hand2',
+            relief=tk.FLAT,
+            padx=15,
+            pady=8,
+            command=self.abrir_bandeja_salida
+        ).pack(side=tk.LEFT, padx=(10, 0))
+
+        tk.Button(
+            test_btn_frame,
+            text="✉️ Plantillas de Email",
+            font=("Arial", 10),
+            bg='#059669',
+            fg='white',
+            cursor='hand2',
+            relief=tk.FLAT,
+            padx=15,
+            pady=8,
+            command=self.abrir_plantillas_email
+        ).pack(side=tk.LEFT, padx=(10, 0))
+
         # Botón guardar
         btn_frame = tk.Frame(config_frame, bg='white')
         btn_frame.pack(fill=tk.X, pady=(30, 20))
@@ -1537,6 +1644,15 @@ class MainWindow:
                 command=lambda: self.ver_detalle_cotizacion(None)
             )
 
+            menu.add_command(
+                label="Duplicar Cotización",
+                command=self.duplicar_cotizacion
+            )
+            menu.add_command(
+                label="Guardar como Plantilla",
+                command=self.guardar_como_plantilla
+            )
+
             menu.add_separator()
 
             # Opciones según el estado
@@ -1563,6 +1679,86 @@ class MainWindow:
             # Mostrar menú en la posición del cursor
             menu.post(event.x_root, event.y_root)
 
+    def _id_cotizacion_seleccionada(self):
+        """Devuelve (id, número) de la cotización seleccionada o None"""
+        selection = self.tree_cotizaciones.selection()
+        if not selection:
+            return None
+
+        numero_cotizacion = self.tree_cotizaciones.item(selection[0])['values'][0]
+        self.db.cursor.execute(
+            "SELECT id_cotizacion FROM cotizaciones WHERE numero_cotizacion = ?",
+            (numero_cotizacion,)
+        )
+        fila = self.db.cursor.fetchone()
+        return (fila[0], numero_cotizacion) if fila else None
+
+    def duplicar_cotizacion(self):
+        """Crea una copia de la cotización seleccionada para el mismo cliente"""
+        seleccion = self._id_cotizacion_seleccionada()
+        if not seleccion:
+            return
+
+        from utils.plantillas_manager import PlantillasManager
+        exito, resultado = PlantillasManager(self.db).clonar_cotizacion(seleccion[0])
+
+        if not exito:
+            messagebox.showerror("Error", f"No se pudo duplicar la cotización:\n{resultado}")
+            return
+
+        self.db.cursor.execute(
+            "SELECT numero_cotizacion FROM cotizaciones WHERE id_cotizacion = ?",
+            (resultado,)
+        )
+        messagebox.showinfo(
+            "Éxito",
+            f"Cotización {seleccion[1]} duplicada como {self.db.cursor.fetchone()[0]}"
+        )
+        self.cargar_cotizaciones()
+        self.actualizar_dashboard()
+
+    def guardar_como_plantilla(self):
+        """Guarda la cotización seleccionada como plantilla reutilizable"""
+        seleccion = self._id_cotizacion_seleccionada()
+        if not seleccion:
+            return
+
+        from tkinter import simpledialog
+        nombre = simpledialog.askstring(
+            "Guardar como Plantilla",
+            "Nombre de la plantilla:",
+            parent=self.root
+        )
+        if not nombre:
+            return
+
+        from utils.plantillas_manager import PlantillasManager
+        exito, resultado = PlantillasManager(self.db).crear_plantilla(seleccion[0], nombre)
+
+        if exito:
+            messagebox.showinfo("Éxito", f"Plantilla '{nombre.strip()}' guardada correctamente")
+        else:
+            messagebox.showerror("Error", resultado)
+
+    def cotizaciones_desde_plantilla(self):
+        """Abre ventana para crear cotizaciones desde una plantilla"""
+        from views.cotizacion_desde_plantilla_window import CotizacionDesdePlantillaWindow
+        CotizacionDesdePlantillaWindow(self)
+
+    def campana_email(self):
+        """Envía por email las cotizaciones seleccionadas (o todas las visibles)"""
+        seleccion = self.tree_cotizaciones.selection()
+        if len(seleccion) < 2:
+            seleccion = self.tree_cotizaciones.get_children()
+
+        numeros = [self.tree_cotizaciones.item(item)['values'][0] for item in seleccion]
+        if not numeros:
+            messagebox.showwarning("Sin Cotizaciones", "No hay cotizaciones para enviar")
+            return
+
+        from views.campana_email_window import CampanaEmailWindow
+        CampanaEmailWindow(self.root, self.db, numeros)
+
     def aprobar_cotizacion(self):
         """Marca una cotización como aprobada"""
         selection = self.tree_cotizaciones.selection()
@@ -1735,8 +1931,37 @@ class MainWindow:
         EditarMaterialWindow(self, id_material)
 
     def importar_excel(self):
-        """Importa datos desde el Excel"""
-        messagebox.showinfo("Próximamente", "Importador de Excel en desarrollo")
+        """Importa la lista de precios de un proveedor al catálogo de equipos"""
+        from tkinter import filedialog
+        ruta = filedialog.askopenfilename(
+            title="Seleccionar lista de precios",
+            filetypes=[("Excel o CSV", "*.xlsx *.xlsm *.csv"), ("All files", "*.*")]
+        )
+
+        if not ruta:
+            return
+
+        try:
+            from utils.importador_precios import ImportadorPrecios, ErrorImportacion
+            self.root.config(cursor='watch')
+            self.root.update_idletasks()
+            try:
+                estadisticas = ImportadorPrecios(self.db, 'equipos').importar(ruta)
+            finally:
+                self.root.config(cursor='')
+
+            messagebox.showinfo(
+                "Importación Exitosa",
+                f"{estadisticas['insertados']} equipos nuevos\n"
+                f"{estadisticas['actualizados']} equipos actualizados\n"
+                f"{estadisticas['rechazados']} filas sin código o nombre descartadas\n\n"
+                f"{estadisticas['filas']} filas en {estadisticas['segundos']:.1f} s"
+            )
+            self.cargar_productos()
+        except ErrorImportacion as e:
+            messagebox.showerror("Error", f"No se pudo importar el archivo:\n{e}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al importar lista de precios:\n{e}")
 
     def guardar_configuracion(self):
         """Guarda la configuración en la base de datos"""
@@ -1755,6 +1980,17 @@ class MainWindow:
                     valor = entry.get().strip()
                     self.db.actualizar_configuracion(config, valor)
 
+            # Registrar el tipo de cambio en el historial si cambió
+            from models.tipo_cambio import obtener_historial, registrar_tipo_cambio
+            entry_tc = getattr(self, 'entry_tipo_cambio', None)
+            if entry_tc:
+                try:
+                    nuevo_tc = float(entry_tc.get().strip())
+                except ValueError:
+                    nuevo_tc = None
+                if nuevo_tc and nuevo_tc != obtener_historial(self.db).valor_en():
+                    registrar_tipo_cambio(self.db, nuevo_tc)
+
             # Guardar contraseña de email ENCRIPTADA
             if hasattr(self, 'email_password_var'):
                 valor_pass = self.email_password_var.get().strip()
@@ -1767,6 +2003,10 @@ class MainWindow:
             incluir_ins = '1' if self.incluir_ins_ccss_var.get() else '0'
             self.db.actualizar_configuracion('incluir_ins_ccss_defecto', incluir_ins)
 
+            # Guardar checkbox de reducción de PDFs adjuntos
+            reducir_pdf = '1' if self.email_reducir_pdf_var.get() else '0'
+            self.db.actualizar_configuracion('email_reducir_pdf', reducir_pdf)
+
             messagebox.showinfo("Éxito", "Configuración guardada correctamente")
 
         except Exception as e:
@@ -1815,6 +2055,16 @@ class MainWindow:
             traceback.print_exc()
             messagebox.showerror("Error", f"Error al probar conexión:\n{e}")
 
+    def abrir_bandeja_salida(self):
+        """Abre la ventana de la bandeja de salida de emails"""
+        from views.bandeja_salida_window import BandejaSalidaWindow
+        BandejaSalidaWindow(self.root, self.db)
+
+    def abrir_plantillas_email(self):
+        """Abre el editor de plantillas de email"""
+        from views.plantillas_email_window import PlantillasEmailWindow
+        PlantillasEmailWindow(self.root, self.db)
+
     def crear_tab_respaldos(self):
         """Pestaña de Respaldos"""
         tab = tk.Frame(self.notebook, bg='white')
@@ -1835,7 +2085,7 @@ class MainWindow:
         btn_frame = tk.Frame(header, bg='white')
         btn_frame.pack(side=tk.RIGHT)
 
-        tk.Button(
+        self.btn_crear_backup = tk.Button(
             btn_frame,
             text="✨ Crear Respaldo",
             font=("Arial", 11, "bold"),
@@ -1846,7 +2096,8 @@ class MainWindow:
             padx=20,
             pady=8,
             command=self.crear_backup_manual
-        ).pack(side=tk.LEFT, padx=(0, 10))
+        )
+        self.btn_crear_backup.pack(side=tk.LEFT, padx=(0, 10))
 
         tk.Button(
             btn_frame,
@@ -1871,14 +2122,40 @@ class MainWindow:
 
         tk.Label(
             info_frame,
-            text="ℹ️ Los respaldos se guardan en formato ZIP comprimido. "
-                 "Puedes restaurar cualquier respaldo anterior haciendo doble clic sobre él.",
+            text="ℹ️ Los respaldos se crean en segundo plano, sin cerrar la base de datos. Los "
+                 "incrementales solo guardan lo que cambió desde el respaldo anterior; los completos "
+                 "son un ZIP con toda la base. Puedes restaurar cualquier respaldo anterior haciendo "
+                 "doble clic sobre él.",
             font=("Arial", 10),
             bg='#f3f4f6',
             fg='#666',
             wraplength=800,
             justify=tk.LEFT
-        ).pack(padx=15, pady=15)
+        ).pack(padx=15, pady=(15, 5))
+
+        self.espacio_backups_var = tk.StringVar()
+        tk.Label(
+            info_frame,
+            textvariable=self.espacio_backups_var,
+            font=("Arial", 10, "bold"),
+            bg='#f3f4f6',
+            fg='#1e293b'
+        ).pack(anchor='w', padx=15, pady=(0, 15))
+
+        # Avance del respaldo en curso (se muestra solo mientras se crea)
+        self.progreso_backup_frame = tk.Frame(main_container, bg='white')
+        self.estado_backup_var = tk.StringVar()
+        tk.Label(
+            self.progreso_backup_frame,
+            textvariable=self.estado_backup_var,
+            font=("Arial", 10),
+            bg='white',
+            fg='#2563eb'
+        ).pack(anchor='w')
+        self.barra_backup = ttk.Progressbar(
+            self.progreso_backup_frame, mode='determinate', maximum=100
+        )
+        self.barra_backup.pack(fill=tk.X, pady=(5, 0))
 
         # Tabla de respaldos
         table_frame = tk.Frame(main_container, bg='white')
@@ -1889,7 +2166,7 @@ class MainWindow:
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
         # TreeView
-        columns = ('Archivo', 'Fecha Creación', 'Tamaño (MB)', 'Ruta')
+        columns = ('Archivo', 'Tipo', 'Fecha Creación', 'Tamaño Lógico (MB)', 'Tamaño Físico (MB)', 'Ruta')
         self.tree_backups = ttk.Treeview(
             table_frame,
             columns=columns,
@@ -1899,15 +2176,15 @@ class MainWindow:
         )
 
         # Configurar columnas
-        self.tree_backups.heading('Archivo', text='Archivo')
-        self.tree_backups.heading('Fecha Creación', text='Fecha Creación')
-        self.tree_backups.heading('Tamaño (MB)', text='Tamaño (MB)')
-        self.tree_backups.heading('Ruta', text='Ruta')
+        for col in columns:
+            self.tree_backups.heading(col, text=col)
 
-        self.tree_backups.column('Archivo', width=300)
-        self.tree_backups.column('Fecha Creación', width=180)
-        self.tree_backups.column('Tamaño (MB)', width=120)
-        self.tree_backups.column('Ruta', width=400)
+        self.tree_backups.column('Archivo', width=280)
+        self.tree_backups.column('Tipo', width=100)
+        self.tree_backups.column('Fecha Creación', width=160)
+        self.tree_backups.column('Tamaño Lógico (MB)', width=130, anchor='e')
+        self.tree_backups.column('Tamaño Físico (MB)', width=130, anchor='e')
+        self.tree_backups.column('Ruta', width=360)
 
         self.tree_backups.pack(fill=tk.BOTH, expand=True)
         scrollbar.config(command=self.tree_backups.yview)
@@ -1978,21 +2255,29 @@ class MainWindow:
         # Cargar backups
         backups = self.backup_manager.listar_backups()
 
-        for nombre, fecha, tamaño_mb, ruta in backups:
+        for nombre, fecha, logico_mb, fisico_mb, ruta in backups:
             fecha_str = fecha.strftime('%Y-%m-%d %H:%M:%S')
             self.tree_backups.insert('', 'end', values=(
                 nombre,
+                'Incremental' if nombre.endswith('.json') else 'Completo',
                 fecha_str,
-                f"{tamaño_mb:.2f}",
+                f"{logico_mb:.2f}",
+                f"{fisico_mb:.2f}",
                 ruta
             ))
 
+        espacio = self.backup_manager.resumen_espacio()
+        self.espacio_backups_var.set(
+            f"{len(backups)} respaldos: {espacio['bytes_logicos'] / (1024 * 1024):,.1f} MB de datos "
+            f"ocupan {espacio['bytes_fisicos'] / (1024 * 1024):,.1f} MB en disco"
+        )
+
     def crear_backup_manual(self):
         """Crea un respaldo manual"""
         # Pedir descripción opcional
         dialog = tk.Toplevel(self.root)
         dialog.title("Crear Respaldo")
-        dialog.geometry("400x200")
+        dialog.geometry("400x240")
         dialog.resizable(False, False)
         dialog.transient(self.root)
         dialog.grab_set()
@@ -2000,8 +2285,8 @@ class MainWindow:
         # Centrar
         dialog.update_idletasks()
         x = (dialog.winfo_screenwidth() // 2) - 200
-        y = (dialog.winfo_screenheight() // 2) - 100
-        dialog.geometry(f'400x200+{x}+{y}')
+        y = (dialog.winfo_screenheight() // 2) - 120
+        dialog.geometry(f'400x240+{x}+{y}')
 
         tk.Label(
             dialog,
@@ -2021,23 +2306,21 @@ class MainWindow:
             textvariable=desc_var,
             font=("Arial", 11),
             width=35
-        ).pack(pady=(0, 20))
+        ).pack(pady=(0, 10))
+
+        incremental_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(
+            dialog,
+            text="Incremental (solo guarda lo que cambió)",
+            variable=incremental_var,
+            font=("Arial", 10)
+        ).pack(pady=(0, 15))
 
         def ejecutar_backup():
             descripcion = desc_var.get().strip()
+            incremental = incremental_var.get()
             dialog.destroy()
-
-            # Mostrar mensaje de espera
-            exito, resultado = self.backup_manager.crear_backup(descripcion)
-
-            if exito:
-                messagebox.showinfo(
-                    "Éxito",
-                    f"Respaldo creado correctamente:\n{os.path.basename(resultado)}"
-                )
-                self.cargar_lista_backups()
-            else:
-                messagebox.showerror("Error", resultado)
+            self._lanzar_backup(descripcion, incremental)
 
         btn_frame = tk.Frame(dialog)
         btn_frame.pack()
@@ -2064,6 +2347,69 @@ class MainWindow:
             command=dialog.destroy
         ).pack(side=tk.LEFT, padx=5)
 
+    def _lanzar_backup(self, descripcion, incremental=True):
+        """
+        Crea el respaldo en segundo plano
+
+        BackupManager abre su propia conexión, así que la copia no usa la
+        conexión de la ventana y la aplicación se puede seguir usando.
+        """
+        from utils.tareas import EjecutorTareas
+
+        if getattr(self, 'tareas', None) is None:
+            self.tareas = EjecutorTareas(self.root, max_hilos=1)
+
+        def crear(tarea, descripcion):
+            def progreso(hechos, total, etapa):
+                # La copia es la mitad del trabajo; comprimir o guardar los bloques, el resto
+                if etapa == 'copia':
+                    tarea.reportar(hechos * 50 // max(total, 1), f"Copiando {hechos:,}/{total:,} páginas")
+                elif etapa == 'bloques':
+                    tarea.reportar(50 + hechos * 50 // max(total, 1), "Guardando bloques nuevos")
+                else:
+                    tarea.reportar(50 + hechos * 50 // max(total, 1), "Comprimiendo")
+
+            if incremental:
+                return self.backup_manager.crear_backup_incremental(descripcion, progreso=progreso)
+            return self.backup_manager.crear_backup(descripcion, progreso=progreso)
+
+        self.btn_crear_backup.config(state=tk.DISABLED)
+        self.barra_backup['value'] = 0
+        self.estado_backup_var.set("Creando respaldo...")
+        self.progreso_backup_frame.pack(fill=tk.X, pady=(0, 20), before=self.tree_backups.master)
+
+        self.tarea_backup = self.tareas.lanzar(
+            "Crear respaldo", crear, descripcion,
+            al_progreso=self._progreso_backup,
+            al_completar=self._backup_terminado,
+            al_error=lambda error: self._backup_terminado((False, f"Error al crear respaldo: {error}")),
+            al_cancelar=lambda: self._backup_terminado(None)
+        )
+
+    def _progreso_backup(self, porcentaje, mensaje):
+        self.barra_backup['value'] = porcentaje
+        self.estado_backup_var.set(f"Creando respaldo: {mensaje}...")
+
+    def _backup_terminado(self, resultado):
+        """Resultado del respaldo creado en segundo plano"""
+        self.tarea_backup = None
+        self.btn_crear_backup.config(state=tk.NORMAL)
+        self.progreso_backup_frame.pack_forget()
+        self.estado_backup_var.set("")
+
+        if resultado is None:
+            return
+
+        exito, resultado = resultado
+        if exito:
+            messagebox.showinfo(
+                "Éxito",
+                f"Respaldo creado correctamente:\n{os.path.basename(resultado)}"
+            )
+            self.cargar_lista_backups()
+        else:
+            messagebox.showerror("Error", resultado)
+
     def restaurar_backup_seleccionado(self, event=None):
         """Restaura el respaldo seleccionado"""
         selection = self.tree_backups.selection()
@@ -2071,8 +2417,17 @@ class MainWindow:
             messagebox.showwarning("Selección Requerida", "Selecciona un respaldo para restaurar")
             return
 
+        # El respaldo en curso lee la base que la restauración reemplaza
+        tarea_backup = getattr(self, 'tarea_backup', None)
+        if tarea_backup is not None and not tarea_backup.terminada:
+            messagebox.showwarning(
+                "Respaldo en Curso",
+                "Espera a que termine el respaldo que se está creando antes de restaurar."
+            )
+            return
+
         item = self.tree_backups.item(selection[0])
-        ruta_backup = item['values'][3]
+        ruta_backup = item['values'][5]
         nombre_backup = item['values'][0]
 
         if messagebox.askyesno(
@@ -2107,7 +2462,7 @@ class MainWindow:
             return
 
         item = self.tree_backups.item(selection[0])
-        ruta_backup = item['values'][3]
+        ruta_backup = item['values'][5]
         nombre_backup = item['values'][0]
 
         if messagebox.askyesno(
@@ -2276,6 +2631,81 @@ class MainWindow:
         except Exception as e:
             messagebox.showerror("Error", f"Error al exportar proyecto:\n{e}")
 
+    def exportar_proyectos_excel(self):
+        """
+        Exporta a Excel los proyectos seleccionados, o todos los de la lista
+
+        Los datos se cargan aquí (la conexión SQLite es de este hilo) y los
+        archivos se escriben en segundo plano, en paralelo.
+        """
+        seleccion = self.tree_proyectos.selection()
+        filas = seleccion if len(seleccion) > 1 else self.tree_proyectos.get_children()
+        ids = [self.tree_proyectos.item(fila)['tags'][0] for fila in filas]
+
+        if not ids:
+            messagebox.showwarning("Sin Proyectos", "No hay proyectos en la lista para exportar")
+            return
+
+        un_libro = messagebox.askyesnocancel(
+            "Exportar Proyectos",
+            f"Se exportarán {len(ids)} proyectos.\n\n"
+            "¿Exportar a un solo libro con una hoja por proyecto?\n"
+            "(No = un archivo por proyecto)"
+        )
+        if un_libro is None:
+            return
+
+        try:
+            from utils.excel_lote import ExportadorExcelLote
+            from utils.tareas import EjecutorTareas
+
+            exportador = ExportadorExcelLote(self.db)
+            datos = exportador.cargar(ids)
+
+            if getattr(self, 'tareas', None) is None:
+                self.tareas = EjecutorTareas(self.root, max_hilos=1)
+
+            def escribir(tarea, datos):
+                def progreso(hechos, total, ruta, segundos):
+                    tarea.reportar(hechos * 100 // total, f"{hechos}/{total}")
+                return exportador.escribir(datos, un_libro=un_libro, progreso=progreso)
+
+            self.estado_exportacion_var.set(f"Exportando {len(datos)} proyectos...")
+            self.tareas.lanzar(
+                "Exportar proyectos a Excel", escribir, datos,
+                al_progreso=lambda porcentaje, mensaje: self.estado_exportacion_var.set(
+                    f"Exportando proyectos {mensaje}..."
+                ),
+                al_completar=lambda estadisticas: self._proyectos_exportados(
+                    estadisticas, exportador.carpeta
+                ),
+                al_error=self._error_exportacion_proyectos
+            )
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al exportar proyectos:\n{e}")
+
+    def _proyectos_exportados(self, estadisticas, carpeta):
+        """Resultado de la exportación de varios proyectos"""
+        self.estado_exportacion_var.set("")
+
+        mensaje = (
+            f"{estadisticas['proyectos']} proyectos ({estadisticas['items']:,} items) "
+            f"exportados en {estadisticas['archivos']} archivo(s)\n"
+            f"Tiempo: {estadisticas['segundos']:.1f} s\n\n{carpeta}"
+        )
+        if estadisticas['errores']:
+            mensaje += f"\n\nNo se pudieron escribir {len(estadisticas['errores'])} archivos"
+            messagebox.showwarning("Exportación con Errores", mensaje)
+        else:
+            messagebox.showinfo("Exportación Exitosa", mensaje)
+
+        if estadisticas['archivos'] and messagebox.askyesno("Abrir Carpeta", "¿Abrir la carpeta de exportación?"):
+            os.startfile(carpeta)
+
+    def _error_exportacion_proyectos(self, error):
+        self.estado_exportacion_var.set("")
+        messagebox.showerror("Error", f"Error al exportar proyectos:\n{error}")
+
     def importar_proyecto_excel(self):
         """Importa proyecto desde Excel"""
         selection = self.tree_proyectos.selection()
@@ -2299,13 +2729,25 @@ class MainWindow:
             from utils.excel_manager import ExcelManager
             excel_manager = ExcelManager(self.db)
 
-            exito, mensaje = excel_manager.importar_proyecto(id_proyecto, ruta)
+            exito, cambios = excel_manager.previsualizar_importacion(id_proyecto, ruta)
 
-            if exito:
-                messagebox.showinfo("Importación Exitosa", mensaje)
+            if not exito:
+                messagebox.showerror("Error", cambios)
+                return
+
+            if not (cambios.hay_cambios() or cambios.faltantes):
+                messagebox.showinfo(
+                    "Sin Cambios",
+                    f"El archivo no tiene cambios respecto al proyecto.\n\n{cambios.resumen()}"
+                )
+                return
+
+            from views.importar_proyecto_window import VistaPreviaImportacionWindow
+            ventana = VistaPreviaImportacionWindow(self.root, self.db, cambios)
+            self.root.wait_window(ventana.dialog)
+
+            if ventana.aplicado:
                 self.cargar_proyectos()
-            else:
-                messagebox.showerror("Error", mensaje)
         except Exception as e:
             messagebox.showerror("Error", f"Error al importar proyecto:\n{e}")
 
@@ -2364,6 +2806,12 @@ class MainWindow:
 
     def cerrar_aplicacion(self):
         """Cierra la aplicación correctamente"""
+        from utils.email_manager import cerrar_pools
+        self.repartidor.detener()
+        cerrar_pools()
+        # Un respaldo a medias se cancela y se descarta
+        if getattr(self, 'tareas', None) is not None:
+            self.tareas.cerrar()
         self.db.desconectar()
         self.root.destroy()
 
@@ -18,6 +18,10 @@ from datetime import datetime
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models.database import DatabaseManager
+from models.cotizaciones import (
+    construir_lineas, guardar_lineas, calcular_totales, precio_equipo
+)
+from models.secuencias import siguiente_numero_cotizacion
 
 
 class NuevaCotizacionWindow:
@@ -1015,8 +1019,9 @@ class NuevaCotizacionWindow:
             return
 
         equipo_info = self.equipos_dict[equipo_nombre]
-        horas_total = equipo_info['horas'] * cantidad
-        subtotal = horas_total * self.costo_hora * self.factor_venta
+        horas_total, subtotal = precio_equipo(
+            equipo_info['horas'], cantidad, self.costo_hora, self.factor_venta
+        )
 
         self.equipos_agregados.append({
             'id': equipo_info['id'],
@@ -1329,33 +1334,32 @@ class NuevaCotizacionWindow:
 
     def calcular_totales(self):
         """Calcula todos los totales de la cotizacion"""
-        # Calcular totales por categoria
-        total_equipos = sum(e['subtotal'] for e in self.equipos_agregados)
-        total_ductos = sum(d['subtotal'] for d in self.ductos_agregados)
-        total_difusores = sum(d['subtotal'] for d in self.difusores_agregados)
-        total_rejillas = sum(r['subtotal'] for r in self.rejillas_agregadas)
-        total_tuberias = sum(t['subtotal'] for t in self.tuberias_agregadas)
-        total_mano_obra = sum(m['subtotal'] for m in self.mano_obra_agregada)
-        total_materiales = sum(m['subtotal'] for m in self.materiales_agregados)
-        total_gastos = sum(g['monto'] for g in self.gastos_agregados)
-
-        # Subtotal sin impuestos
-        subtotal = (total_equipos + total_ductos + total_difusores +
-                   total_rejillas + total_tuberias + total_mano_obra +
-                   total_materiales + total_gastos)
-
-        # INS y CCSS (35% aproximadamente) - opcional
-        total_ins_ccss = 0
-        if self.incluir_ins_ccss_var.get():
-            total_ins_ccss = subtotal * 0.35
-
-        # IVA configurable
         iva_porcentaje = self.obtener_iva_porcentaje()
-        base_iva = subtotal + total_ins_ccss
-        total_iva = base_iva * (iva_porcentaje / 100)
+        totales = calcular_totales(
+            equipos=self.equipos_agregados,
+            ductos=self.ductos_agregados,
+            difusores=self.difusores_agregados,
+            rejillas=self.rejillas_agregadas,
+            tuberias=self.tuberias_agregadas,
+            mano_obra=self.mano_obra_agregada,
+            materiales=self.materiales_agregados,
+            gastos=self.gastos_agregados,
+            iva_porcentaje=iva_porcentaje,
+            incluir_ins_ccss=self.incluir_ins_ccss_var.get()
+        )
 
-        # Total final
-        total = base_iva + total_iva
+        total_equipos = totales['total_equipos']
+        total_ductos = totales['total_ductos']
+        total_difusores = totales['total_difusores']
+        total_rejillas = totales['total_rejillas']
+        total_tuberias = totales['total_tuberias']
+        total_mano_obra = totales['total_mano_obra']
+        total_materiales = totales['total_materiales']
+        total_gastos = totales['total_gastos']
+        subtotal = totales['subtotal']
+        total_ins_ccss = totales['ins_ccss']
+        total_iva = totales['total_iva']
+        total = totales['total']
 
         # Verificar si mostrar en colones
         mostrar_colones = self.mostrar_colones_var.get()
@@ -1394,20 +1398,7 @@ class NuevaCotizacionWindow:
             self.label_total.config(text=f"TOTAL: ${total:.2f}")
 
         # Guardar totales calculados
-        self.totales_calculados = {
-            'total_equipos': total_equipos,
-            'total_ductos': total_ductos,
-            'total_difusores': total_difusores,
-            'total_rejillas': total_rejillas,
-            'total_tuberias': total_tuberias,
-            'total_mano_obra': total_mano_obra,
-            'total_materiales': total_materiales,
-            'total_gastos': total_gastos,
-            'subtotal': subtotal,
-            'ins_ccss': total_ins_ccss,
-            'total_iva': total_iva,
-            'total': total
-        }
+        self.totales_calculados = totales
 
         print(f"Totales calculados: Total=${total:.2f} (INS/CCSS: ${total_ins_ccss:.2f})")
 
@@ -1434,9 +1425,8 @@ class NuevaCotizacionWindow:
             self.calcular_totales()
 
         try:
-            # Generar numero de cotizacion
-            fecha = datetime.now()
-            numero_cot = f"COT-MT-{fecha.strftime('%y')}-{fecha.strftime('%m')}-{fecha.strftime('%d%H%M')}"
+            # Reservar numero de cotizacion (se libera si la transaccion falla)
+            numero_cot = siguiente_numero_cotizacion(self.db.cursor)
 
             id_cliente = self.clientes_dict[cliente_nombre]
 
@@ -1471,98 +1461,18 @@ class NuevaCotizacionWindow:
 
             id_cotizacion = self.db.cursor.lastrowid
 
-            # Insertar detalle equipos
-            for equipo in self.equipos_agregados:
-                self.db.cursor.execute('''
-                    INSERT INTO detalle_cotizacion (
-                        id_cotizacion, id_equipo, cantidad, horas_por_equipo,
-                        precio_unitario, subtotal
-                    ) VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    id_cotizacion, equipo['id'], equipo['cantidad'],
-                    equipo['horas'], equipo['subtotal']/equipo['cantidad'],
-                    equipo['subtotal']
-                ))
-
-            # Insertar ductos
-            for ducto in self.ductos_agregados:
-                self.db.cursor.execute('''
-                    INSERT INTO cotizacion_ductos (
-                        id_cotizacion, tipo_ducto, largo_suministro,
-                        largo_retorno, precio_unitario, subtotal
-                    ) VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    id_cotizacion, ducto['tipo'], ducto['largo_suministro'],
-                    ducto['largo_retorno'], ducto['precio_metro'], ducto['subtotal']
-                ))
-
-            # Insertar difusores
-            for difusor in self.difusores_agregados:
-                self.db.cursor.execute('''
-                    INSERT INTO cotizacion_difusores (
-                        id_cotizacion, tipo_difusor, cantidad,
-                        precio_unitario, subtotal
-                    ) VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    id_cotizacion, difusor['tipo'], difusor['cantidad'],
-                    difusor['precio_unit'], difusor['subtotal']
-                ))
-
-            # Insertar rejillas
-            for rejilla in self.rejillas_agregadas:
-                self.db.cursor.execute('''
-                    INSERT INTO cotizacion_rejillas (
-                        id_cotizacion, tipo_rejilla, cantidad,
-                        precio_unitario, subtotal
-                    ) VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    id_cotizacion, rejilla['tipo'], rejilla['cantidad'],
-                    rejilla['precio_unit'], rejilla['subtotal']
-                ))
-
-            # Insertar tuberias
-            for tuberia in self.tuberias_agregadas:
-                self.db.cursor.execute('''
-                    INSERT INTO cotizacion_tuberias (
-                        id_cotizacion, tipo_tuberia, largo,
-                        precio_unitario, subtotal
-                    ) VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    id_cotizacion, tuberia['tipo'], tuberia['largo'],
-                    tuberia['precio_metro'], tuberia['subtotal']
-                ))
-
-            # Insertar mano de obra
-            for mano_obra in self.mano_obra_agregada:
-                self.db.cursor.execute('''
-                    INSERT INTO cotizacion_mano_obra (
-                        id_cotizacion, descripcion, cantidad,
-                        precio_unitario, subtotal
-                    ) VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    id_cotizacion, mano_obra['descripcion'], mano_obra['cantidad'],
-                    mano_obra['precio_unit'], mano_obra['subtotal']
-                ))
-
-            # Insertar materiales
-            for material in self.materiales_agregados:
-                self.db.cursor.execute('''
-                    INSERT INTO cotizacion_materiales (
-                        id_cotizacion, id_material, cantidad,
-                        precio_unitario, subtotal
-                    ) VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    id_cotizacion, material['id'], material['cantidad'],
-                    material['precio_unit'], material['subtotal']
-                ))
-
-            # Insertar gastos
-            for gasto in self.gastos_agregados:
-                self.db.cursor.execute('''
-                    INSERT INTO gastos_adicionales (
-                        id_cotizacion, concepto, monto
-                    ) VALUES (?, ?, ?)
-                ''', (id_cotizacion, gasto['concepto'], gasto['monto']))
+            # Insertar todas las lineas del detalle en un solo executemany
+            lineas = construir_lineas(
+                equipos=self.equipos_agregados,
+                ductos=self.ductos_agregados,
+                difusores=self.difusores_agregados,
+                rejillas=self.rejillas_agregadas,
+                tuberias=self.tuberias_agregadas,
+                mano_obra=self.mano_obra_agregada,
+                materiales=self.materiales_agregados,
+                gastos=self.gastos_agregados
+            )
+            guardar_lineas(self.db.cursor, id_cotizacion, lineas)
 
             self.db.conn.commit()
 
@@ -1581,6 +1491,7 @@ class NuevaCotizacionWindow:
             self.cerrar()
 
         except Exception as e:
+            self.db.conn.rollback()
             print(f"Error al guardar cotizacion: {e}")
             import traceback
             traceback.print_exc()
@@ -6,8 +6,13 @@ Permite crear un nuevo proyecto grande con información básica
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime
 from tkcalendar import DateEntry
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.secuencias import consultar_numero_proyecto, siguiente_numero_proyecto
 
 
 class NuevoProyectoWindow:
@@ -334,25 +339,13 @@ class NuevoProyectoWindow:
         ).pack(side=tk.LEFT)
 
     def generar_numero_proyecto(self):
-        """Genera el siguiente número de proyecto disponible"""
-        cursor = self.db.ejecutar_query(
-            'SELECT numero_proyecto FROM proyectos ORDER BY id_proyecto DESC LIMIT 1'
-        )
-        resultado = cursor.fetchone()
-
-        if resultado:
-            ultimo_numero = resultado[0]
-            # Extraer número (formato: PROY-2025-001)
-            partes = ultimo_numero.split('-')
-            if len(partes) == 3:
-                año = datetime.now().year
-                if int(partes[1]) == año:
-                    siguiente = int(partes[2]) + 1
-                    return f"PROY-{año}-{siguiente:03d}"
-
-        # Si no hay proyectos o es nuevo año
-        año = datetime.now().year
-        return f"PROY-{año}-001"
+        """
+        Número de proyecto que se mostrará en el formulario
+
+        Es solo una vista previa; el número definitivo (formato
+        PROY-2025-001) se reserva de la secuencia al guardar.
+        """
+        return consultar_numero_proyecto(self.db.cursor)
 
     def cargar_clientes(self):
         """Carga los clientes en el combo"""
@@ -379,7 +372,6 @@ class NuevoProyectoWindow:
             return
 
         # Obtener datos
-        numero = self.numero_var.get()
         nombre = self.nombre_var.get().strip()
         id_cliente = self.clientes_dict[self.cliente_var.get()]
         ubicacion = self.ubicacion_var.get().strip()
@@ -391,7 +383,8 @@ class NuevoProyectoWindow:
         notas = self.notas_text.get('1.0', tk.END).strip()
 
         try:
-            # Insertar proyecto
+            # Reservar número e insertar el proyecto en la misma transacción
+            numero = siguiente_numero_proyecto(self.db.cursor)
             self.db.ejecutar_query('''
                 INSERT INTO proyectos (
                     numero_proyecto, nombre_proyecto, id_cliente,
@@ -418,4 +411,5 @@ class NuevoProyectoWindow:
             self.dialog.destroy()
 
         except Exception as e:
+            self.db.conn.rollback()
             messagebox.showerror("Error", f"Error al crear proyecto:\n{e}")
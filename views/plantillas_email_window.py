@@ -0,0 +1,275 @@
+"""
+plantillas_email_window.py - Editor de plantillas de email
+
+Lista las plantillas guardadas, permite crearlas, editarlas, elegir la
+activa (la que usan todos los envíos) y ver cómo queda el email con datos
+de ejemplo antes de activarla.
+"""
+
+import os
+import tempfile
+from html import escape
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from utils.plantillas_email import (
+    GestorPlantillasEmail, PlantillaEmail, CAMPOS, VALORES_EJEMPLO,
+    ASUNTO_PREDETERMINADO, CUERPO_PREDETERMINADO
+)
+
+
+class PlantillasEmailWindow:
+    """Ventana para editar las plantillas de email"""
+
+    def __init__(self, parent, db):
+        """
+        Inicializa la ventana
+
+        Args:
+            parent: Ventana padre
+            db: Instancia de DatabaseManager
+        """
+        self.gestor = GestorPlantillasEmail(db)
+        self.id_plantilla = None
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Plantillas de Email")
+        self.dialog.geometry("1000x680")
+        self.dialog.transient(parent)
+
+        # Centrar ventana
+        self.centrar_ventana()
+
+        # Crear interfaz
+        self.crear_interfaz()
+        self.cargar_plantillas()
+        self.nueva()
+
+    def centrar_ventana(self):
+        """Centra la ventana en la pantalla"""
+        self.dialog.update_idletasks()
+        width = 1000
+        height = 680
+        x = (self.dialog.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.dialog.winfo_screenheight() // 2) - (height // 2)
+        self.dialog.geometry(f'{width}x{height}+{x}+{y}')
+
+    def crear_interfaz(self):
+        """Crea la interfaz de la ventana"""
+        # Header
+        header = tk.Frame(self.dialog, bg='#1e293b', height=60)
+        header.pack(fill=tk.X)
+        header.pack_propagate(False)
+
+        tk.Label(
+            header,
+            text="✉️ Plantillas de Email",
+            font=("Arial", 14, "bold"),
+            bg='#1e293b',
+            fg='white'
+        ).pack(pady=15)
+
+        # Contenedor principal
+        main_container = tk.Frame(self.dialog, bg='white')
+        main_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+
+        # Lista de plantillas
+        lista_frame = tk.Frame(main_container, bg='white')
+        lista_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 20))
+
+        self.tree_plantillas = ttk.Treeview(
+            lista_frame,
+            columns=('Nombre', 'Activa'),
+            show='headings',
+            height=20
+        )
+        self.tree_plantillas.heading('Nombre', text='Nombre')
+        self.tree_plantillas.heading('Activa', text='Activa')
+        self.tree_plantillas.column('Nombre', width=180)
+        self.tree_plantillas.column('Activa', width=60, anchor='center')
+        self.tree_plantillas.pack(fill=tk.Y, expand=True)
+        self.tree_plantillas.bind('<<TreeviewSelect>>', lambda e: self.cargar_seleccionada())
+
+        self.activa_var = tk.StringVar()
+        tk.Label(
+            lista_frame,
+            textvariable=self.activa_var,
+            font=("Arial", 9),
+            bg='white',
+            fg='#6b7280',
+            wraplength=240,
+            justify=tk.LEFT
+        ).pack(anchor='w', pady=(10, 0))
+
+        # Editor
+        editor = tk.Frame(main_container, bg='white')
+        editor.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        tk.Label(editor, text="Nombre:", font=("Arial", 10), bg='white').pack(anchor='w')
+        self.nombre_var = tk.StringVar()
+        tk.Entry(editor, textvariable=self.nombre_var, font=("Arial", 10)).pack(fill=tk.X)
+
+        tk.Label(editor, text="Asunto:", font=("Arial", 10), bg='white').pack(anchor='w', pady=(10, 0))
+        self.asunto_var = tk.StringVar()
+        tk.Entry(editor, textvariable=self.asunto_var, font=("Arial", 10)).pack(fill=tk.X)
+
+        tk.Label(editor, text="Cuerpo (HTML):", font=("Arial", 10), bg='white').pack(anchor='w', pady=(10, 0))
+        self.cuerpo_text = tk.Text(editor, font=("Consolas", 9), wrap=tk.NONE, height=18)
+        self.cuerpo_text.pack(fill=tk.BOTH, expand=True)
+
+        tk.Label(
+            editor,
+            text="Campos: " + "  ".join(f"{{{{{campo}}}}}" for campo in CAMPOS),
+            font=("Arial", 9),
+            bg='#f3f4f6',
+            fg='#1e293b',
+            wraplength=680,
+            justify=tk.LEFT,
+            padx=10,
+            pady=6
+        ).pack(fill=tk.X, pady=(10, 0))
+
+        # Botones
+        bottom_frame = tk.Frame(editor, bg='white')
+        bottom_frame.pack(fill=tk.X, pady=(10, 0))
+
+        for texto, color, comando in (
+            ("➕ Nueva", '#6b7280', self.nueva),
+            ("💾 Guardar", '#059669', self.guardar),
+            ("✅ Activar", '#2563eb', self.activar),
+            ("👁 Vista Previa", '#8b5cf6', self.vista_previa),
+            ("🗑 Eliminar", '#dc2626', self.eliminar),
+        ):
+            tk.Button(
+                bottom_frame,
+                text=texto,
+                font=("Arial", 10),
+                bg=color,
+                fg='white',
+                cursor='hand2',
+                relief=tk.FLAT,
+                padx=12,
+                pady=6,
+                command=comando
+            ).pack(side=tk.LEFT, padx=(0, 8))
+
+        tk.Button(
+            bottom_frame,
+            text="Usar Predeterminada",
+            font=("Arial", 10),
+            bg='#e5e7eb',
+            fg='#1e293b',
+            cursor='hand2',
+            relief=tk.FLAT,
+            padx=12,
+            pady=6,
+            command=self.usar_predeterminada
+        ).pack(side=tk.RIGHT)
+
+    def cargar_plantillas(self):
+        """Llena la lista de plantillas"""
+        self.tree_plantillas.delete(*self.tree_plantillas.get_children())
+        activa = None
+        for id_plantilla, nombre, es_activa, _, _ in self.gestor.listar():
+            self.tree_plantillas.insert('', tk.END, iid=str(id_plantilla), values=(
+                nombre, '✔' if es_activa else ''
+            ))
+            if es_activa:
+                activa = nombre
+
+        self.activa_var.set(f"En uso: {activa or 'plantilla predeterminada'}")
+
+    def cargar_seleccionada(self):
+        """Muestra la plantilla seleccionada en el editor"""
+        seleccion = self.tree_plantillas.selection()
+        if not seleccion:
+            return
+
+        plantilla = self.gestor.obtener(int(seleccion[0]))
+        if not plantilla:
+            return
+
+        self.id_plantilla = int(seleccion[0])
+        nombre, asunto, cuerpo, _ = plantilla
+        self._mostrar(nombre, asunto, cuerpo)
+
+    def _mostrar(self, nombre, asunto, cuerpo):
+        self.nombre_var.set(nombre)
+        self.asunto_var.set(asunto)
+        self.cuerpo_text.delete("1.0", tk.END)
+        self.cuerpo_text.insert("1.0", cuerpo)
+
+    def _cuerpo(self):
+        return self.cuerpo_text.get("1.0", "end-1c")
+
+    def nueva(self):
+        """Empieza una plantilla nueva a partir de la predeterminada"""
+        self.id_plantilla = None
+        self.tree_plantillas.selection_remove(*self.tree_plantillas.selection())
+        self._mostrar("", ASUNTO_PREDETERMINADO, CUERPO_PREDETERMINADO)
+
+    def guardar(self):
+        """Guarda la plantilla del editor"""
+        exito, resultado = self.gestor.guardar(
+            self.nombre_var.get(), self.asunto_var.get(), self._cuerpo(), self.id_plantilla
+        )
+        if not exito:
+            messagebox.showerror("Error", resultado, parent=self.dialog)
+            return
+
+        self.id_plantilla = resultado
+        self.cargar_plantillas()
+        self.tree_plantillas.selection_set(str(resultado))
+
+    def activar(self):
+        """Usa la plantilla del editor para todos los envíos"""
+        if self.id_plantilla is None:
+            messagebox.showwarning(
+                "Sin Guardar", "Guarda la plantilla antes de activarla", parent=self.dialog
+            )
+            return
+
+        exito, mensaje = self.gestor.activar(self.id_plantilla)
+        if not exito:
+            messagebox.showerror("Error", mensaje, parent=self.dialog)
+        self.cargar_plantillas()
+
+    def usar_predeterminada(self):
+        """Vuelve a la plantilla predeterminada"""
+        self.gestor.activar(None)
+        self.cargar_plantillas()
+
+    def eliminar(self):
+        """Elimina la plantilla seleccionada"""
+        if self.id_plantilla is None:
+            return
+        if not messagebox.askyesno(
+            "Confirmar", f"¿Eliminar la plantilla '{self.nombre_var.get()}'?", parent=self.dialog
+        ):
+            return
+
+        exito, mensaje = self.gestor.eliminar(self.id_plantilla)
+        if not exito:
+            messagebox.showerror("Error", mensaje, parent=self.dialog)
+        self.cargar_plantillas()
+        self.nueva()
+
+    def vista_previa(self):
+        """Abre el email con datos de ejemplo en el navegador"""
+        try:
+            plantilla = PlantillaEmail(self.asunto_var.get(), self._cuerpo())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e), parent=self.dialog)
+            return
+
+        asunto, cuerpo = plantilla.renderizar(
+            VALORES_EJEMPLO, "Estimado/a {{contacto}}: este es un mensaje personalizado."
+        )
+        descriptor, ruta = tempfile.mkstemp(suffix='.html', prefix='vista_previa_email_')
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as archivo:
+            archivo.write(f"<p><b>Asunto:</b> {escape(asunto)}</p><hr>{cuerpo}")
+
+        try:
+            os.startfile(ruta)
+        except Exception:
+            messagebox.showinfo("Vista Previa", f"Vista previa guardada en:\n{ruta}", parent=self.dialog)